@@ -7,12 +7,18 @@
 List of all external dependencies for this package. Imported as
 optional includes
 """
+import importlib.util as _importlib_util
 import platform as _platform
 import re as _re
 import sys as _sys
 
 from packaging.version import Version
 
+try:
+    import importlib.metadata as _metadata
+except ImportError:  # Python 3.7
+    _metadata = None
+
 from coremltools import _logger as logger
 
 _HAS_KMEANS1D = True
@@ -23,6 +29,33 @@ except:
     _HAS_KMEANS1D = False
 
 
+def _is_importable(module_name):
+    """
+    Probe whether a top-level module can be imported, without importing it. Importing the
+    optional frameworks (torch, tensorflow, ...) costs seconds, so ``_HAS_*`` flags are set from
+    the import system's module spec instead.
+    """
+    try:
+        return _importlib_util.find_spec(module_name) is not None
+    except (ImportError, ValueError):
+        return False
+
+
+def _get_installed_version(module_name, *dist_names):
+    """
+    Return the version string of an installed module, read from the distribution metadata of the
+    first matching name in ``dist_names``. Falls back to importing the module when no metadata is
+    found (e.g. for a source checkout on ``sys.path``).
+    """
+    if _metadata is not None:
+        for dist_name in dist_names:
+            try:
+                return _metadata.version(dist_name)
+            except _metadata.PackageNotFoundError:
+                continue
+    return __import__(module_name).__version__
+
+
 def _get_version(version):
     # matching 1.6.1, and 1.6.1rc, 1.6.1.dev
     version_regex = r"^\d+\.\d+\.\d+"
@@ -65,9 +98,11 @@ def __get_sklearn_version(version):
 
 
 try:
-    import sklearn
+    if not _is_importable("sklearn"):
+        raise ImportError
+    _sklearn_version_str = _get_installed_version("sklearn", "scikit-learn")
 
-    _SKLEARN_VERSION = __get_sklearn_version(sklearn.__version__)
+    _SKLEARN_VERSION = __get_sklearn_version(_sklearn_version_str)
     if _SKLEARN_VERSION < Version(
         _SKLEARN_MIN_VERSION
     ) or _SKLEARN_VERSION > Version(_SKLEARN_MAX_VERSION):
@@ -78,26 +113,24 @@ try:
                 "Maximum required version: %s. "
                 "Disabling scikit-learn conversion API."
             )
-            % (sklearn.__version__, _SKLEARN_MIN_VERSION, _SKLEARN_MAX_VERSION)
+            % (_sklearn_version_str, _SKLEARN_MIN_VERSION, _SKLEARN_MAX_VERSION)
         )
 except:
     _HAS_SKLEARN = False
 MSG_SKLEARN_NOT_FOUND = "Sklearn not found."
 
 # ---------------------------------------------------------------------------------------
-_HAS_LIBSVM = True
-try:
-    from libsvm import svm
-except:
-    _HAS_LIBSVM = False
+_HAS_LIBSVM = _is_importable("libsvm")
 MSG_LIBSVM_NOT_FOUND = "Libsvm not found."
 
 # ---------------------------------------------------------------------------------------
-_HAS_XGBOOST = True
+_HAS_XGBOOST = _is_importable("xgboost")
 _XGBOOST_MAX_VERSION = "1.4.2"
 try:
-    import xgboost
-    _warn_if_above_max_supported_version("XGBoost", xgboost.__version__, _XGBOOST_MAX_VERSION)
+    if _HAS_XGBOOST:
+        _warn_if_above_max_supported_version(
+            "XGBoost", _get_installed_version("xgboost", "xgboost"), _XGBOOST_MAX_VERSION
+        )
 except:
     _HAS_XGBOOST = False
 
@@ -111,9 +144,13 @@ _TF_2_MIN_VERSION = "2.1.0"
 _TF_2_MAX_VERSION = "2.12.0"
 
 try:
-    import tensorflow
+    if not _is_importable("tensorflow"):
+        raise ImportError
+    _tf_version_str = _get_installed_version(
+        "tensorflow", "tensorflow", "tensorflow-cpu", "tensorflow-gpu", "tensorflow-macos"
+    )
 
-    tf_ver = _get_version(tensorflow.__version__)
+    tf_ver = _get_version(_tf_version_str)
 
     # TensorFlow
     if tf_ver < Version("2.0.0"):
@@ -131,9 +168,9 @@ try:
                     "TensorFlow version %s is not supported. Minimum required version: %s ."
                     "TensorFlow conversion will be disabled."
                 )
-                % (tensorflow.__version__, _TF_1_MIN_VERSION)
+                % (_tf_version_str, _TF_1_MIN_VERSION)
             )
-        _warn_if_above_max_supported_version("TensorFlow", tensorflow.__version__, _TF_1_MAX_VERSION)
+        _warn_if_above_max_supported_version("TensorFlow", _tf_version_str, _TF_1_MAX_VERSION)
     elif _HAS_TF_2:
         if tf_ver < Version(_TF_2_MIN_VERSION):
             logger.warning(
@@ -141,9 +178,9 @@ try:
                     "TensorFlow version %s is not supported. Minimum required version: %s ."
                     "TensorFlow conversion will be disabled."
                 )
-                % (tensorflow.__version__, _TF_2_MIN_VERSION)
+                % (_tf_version_str, _TF_2_MIN_VERSION)
             )
-        _warn_if_above_max_supported_version("TensorFlow", tensorflow.__version__, _TF_2_MAX_VERSION)
+        _warn_if_above_max_supported_version("TensorFlow", _tf_version_str, _TF_2_MAX_VERSION)
 
 except:
     _HAS_TF = False
@@ -160,10 +197,12 @@ _HAS_TORCH_EXPORT_API = False
 _CT_OPTIMIZE_TORCH_MIN_VERSION = "2.1.0"
 _IMPORT_CT_OPTIMIZE_TORCH = False
 try:
-    import torch
-    _warn_if_above_max_supported_version("Torch", torch.__version__, _TORCH_MAX_VERSION)
+    if not _is_importable("torch"):
+        raise ImportError
+    _torch_version_str = _get_installed_version("torch", "torch")
+    _warn_if_above_max_supported_version("Torch", _torch_version_str, _TORCH_MAX_VERSION)
 
-    torch_version = _get_version(torch.__version__)
+    torch_version = _get_version(_torch_version_str)
 
     if torch_version >= Version("2.5.0"):
         _HAS_TORCH_EXPORT_API = True
@@ -184,50 +223,24 @@ MSG_TORCH_NOT_FOUND = "PyTorch not found."
 MSG_TORCH_EXPORT_API_NOT_FOUND = "Torch.Export API not found."
 
 
-_HAS_TORCH_VISION = True
-try:
-    import torchvision
-except:
-    _HAS_TORCH_VISION = False
+_HAS_TORCH_VISION = _is_importable("torchvision")
 MSG_TORCH_VISION_NOT_FOUND = "TorchVision not found."
 
-_HAS_TORCH_AUDIO = True
-try:
-    import torchaudio
-except:
-    _HAS_TORCH_AUDIO = False
+_HAS_TORCH_AUDIO = _is_importable("torchaudio")
 MSG_TORCH_AUDIO_NOT_FOUND = "TorchAudio not found."
 
 
-_HAS_EXECUTORCH = True
-try:
-    import executorch
-except:
-    _HAS_EXECUTORCH = False
+_HAS_EXECUTORCH = _is_importable("executorch")
 MSG_EXECUTORCH_NOT_FOUND = "Executorch not found."
 
-_HAS_TORCHAO = True
-try:
-    import torchao
-except:
-    _HAS_TORCHAO = False
+_HAS_TORCHAO = _is_importable("torchao")
 MSG_TORCHAO_NOT_FOUND = "Torchao not found."
 
 # ---------------------------------------------------------------------------------------
-try:
-    import scipy
-except:
-    _HAS_SCIPY = False
-else:
-    _HAS_SCIPY = True
+_HAS_SCIPY = _is_importable("scipy")
 
 # ---------------------------------------------------------------------------------------
-try:
-    import transformers
-except:
-    _HAS_HF = False
-else:
-    _HAS_HF = True
+_HAS_HF = _is_importable("transformers")
 
 # General utils
 def version_ge(module, target_version):
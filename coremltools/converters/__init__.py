@@ -3,9 +3,13 @@
 # Use of this source code is governed by a BSD-3-clause license that can be
 # found in the LICENSE.txt file or at https://opensource.org/licenses/BSD-3-Clause
 
-# expose directories as imports
-from . import libsvm, sklearn, xgboost
+import importlib as _importlib
+
+# coremltools.models must be initialized before the MIL converter: the MIL op definitions import
+# coremltools.optimize.coreml, which needs a fully initialized coremltools.models.
+from .. import models as _models
 from ._converters_entry import convert
+from ._profile_utils import ConversionProfiler
 from .mil import (
     ClassifierConfig,
     ColorLayout,
@@ -16,3 +20,17 @@ from .mil import (
     StateType,
     TensorType,
 )
+
+# expose directories as imports. The classic ML converters import their frameworks, so they are
+# only imported on first access.
+_LAZY_SUBMODULES = ("libsvm", "sklearn", "xgboost")
+
+
+def __getattr__(name):
+    if name in _LAZY_SUBMODULES:
+        return _importlib.import_module(f"{__name__}.{name}")
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_LAZY_SUBMODULES))
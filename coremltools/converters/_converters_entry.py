@@ -7,6 +7,7 @@ import collections
 from datetime import date
 import gc
 import os
+import sys
 from typing import List, Optional, Text, Union
 
 from coremltools import (
@@ -17,7 +18,7 @@ from coremltools import ComputeUnit as _ComputeUnit
 from coremltools import __version__ as _ct_version
 from coremltools import _logger as logger
 from coremltools._deps import _HAS_TF_1, _HAS_TF_2, _HAS_TORCH, _HAS_TORCH_EXPORT_API
-from coremltools.converters._profile_utils import _profile
+from coremltools.converters._profile_utils import _profile, _profile_stage
 from coremltools.converters.mil._deployment_compatibility import (
     AvailableTarget,
     check_deployment_compatibility,
@@ -46,26 +47,26 @@ from coremltools.models import (
 )
 from coremltools.models.utils import _MLPACKAGE_EXTENSION
 
-if _HAS_TF_1:
-    import tensorflow as tf
 
-    from coremltools.converters.mil.frontend.tensorflow.load import TF1Loader
-if _HAS_TF_2:
-    import tensorflow as tf
+def _is_torch_exported_program(model) -> bool:
+    # An ExportedProgram can only be given if torch is already imported, so check that first to
+    # avoid importing torch for the other sources.
+    if not _HAS_TORCH_EXPORT_API or "torch" not in sys.modules:
+        return False
+    from torch.export import ExportedProgram
 
-    from coremltools.converters.mil.frontend.tensorflow2.load import TF2Loader
+    return isinstance(model, ExportedProgram)
 
-if _HAS_TORCH:
-    import torch
 
+def _is_torch_model(model) -> bool:
     from coremltools.converters.mil.frontend.torch.load import is_torch_model
 
-    if _HAS_TORCH_EXPORT_API:
-        from torch.export import ExportedProgram
+    return is_torch_model(model)
 
 
 
 @_profile
+@_profile_stage("convert", category="convert")
 def convert(
     model,
     source="auto",
@@ -974,7 +975,7 @@ def _validate_conversion_arguments(
             raise ValueError("Input should be a list of TensorType or ImageType")
 
     elif exact_source == "pytorch":
-        if _HAS_TORCH_EXPORT_API and isinstance(model, ExportedProgram):
+        if _is_torch_exported_program(model):
             if model.dialect not in ("ATEN", "EDGE"):
                 raise NotImplementedError(
                     f"Conversion for models with only ATEN or EDGE dialect is supported/tested. Provided Dialect: {model.dialect}."
@@ -982,7 +983,7 @@ def _validate_conversion_arguments(
                 )
 
         else:
-            if is_torch_model(model):
+            if _is_torch_model(model):
                 if inputs is None:
                     raise ValueError(
                         'Expected argument "inputs" for TorchScript models not provided'
@@ -1014,7 +1015,7 @@ def _determine_source_dialect(model, exact_source):
     source_dialect = None
     if exact_source == "pytorch":
 
-        if _HAS_TORCH_EXPORT_API and isinstance(model, ExportedProgram):
+        if _is_torch_exported_program(model):
             return f"TorchExport::{model.dialect}"
         else:
             return "TorchScript"
@@ -1044,6 +1045,8 @@ def _determine_source(model, source,
 
     # Determine `auto` source
     if source == "auto" and _HAS_TF_1:
+        from coremltools.converters.mil.frontend.tensorflow.load import TF1Loader
+
         try:
             loader = TF1Loader(model, outputs=outputs_as_tensor_or_image_types)
             loader._graph_def_from_model(output_names=output_names)
@@ -1052,6 +1055,8 @@ def _determine_source(model, source,
             pass
 
     if source == "auto" and _HAS_TF_2:
+        from coremltools.converters.mil.frontend.tensorflow2.load import TF2Loader
+
         try:
             loader = TF2Loader(model, outputs=outputs_as_tensor_or_image_types)
             loader._graph_def_from_model(output_names=output_names)
@@ -1061,10 +1066,10 @@ def _determine_source(model, source,
 
     if source == "auto" and _HAS_TORCH:
 
-        if _HAS_TORCH_EXPORT_API and isinstance(model, ExportedProgram):
+        if _is_torch_exported_program(model):
             return "pytorch"
 
-        if is_torch_model(model):
+        if _is_torch_model(model):
             # validate that the outputs passed by the user are of type ImageType/TensorType
             if output_argument_as_specified_by_user is not None and not all(
                 [
@@ -1167,8 +1172,12 @@ def _get_metadata_from_mlmodel(mlmodel):
 def _record_build_metadata(mlmodel, exact_source, source_dialect=None):
     # recording metadata: coremltools version, source framework and version
     if exact_source in {"tensorflow", "tensorflow2"} and (_HAS_TF_1 or _HAS_TF_2):
+        import tensorflow as tf
+
         src_pkg_version = "tensorflow=={0}".format(tf.__version__)
     elif exact_source == "pytorch" and _HAS_TORCH:
+        import torch
+
         src_pkg_version = "torch=={0}".format(torch.__version__)
     elif exact_source == 'milinternal':
         src_pkg_version = "milinternal"
@@ -3,8 +3,13 @@
 #  Use of this source code is governed by a BSD-3-clause license that can be
 #  found in the LICENSE.txt file or at https://opensource.org/licenses/BSD-3-Clause
 
+import json
 import os
+import sys
 import time
+import tracemalloc
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional, Text
 
 _FUNCTION_PROFILE_REGISTRY = {}  # str -> list (function name to time stack)
 _ENABLE_PROFILING = os.environ.get("ENABLE_PROFILING", False)
@@ -57,11 +62,11 @@ def _profiler(frame, event, arg, indent=[0]):
                 " (" + ".".join(function_name.split(".")[2:-1]) + ")",
             )
         )
-        start_time = time.clock()
+        start_time = time.perf_counter()
         _FUNCTION_PROFILE_REGISTRY[function_name].append(start_time)
 
     elif event == "return" and profile_function:
-        duration = time.clock() - _FUNCTION_PROFILE_REGISTRY[function_name][-1]
+        duration = time.perf_counter() - _FUNCTION_PROFILE_REGISTRY[function_name][-1]
         duration = round(duration)
         _pr_color(
             "{} exit {} {} ".format(
@@ -76,3 +81,216 @@ def _profiler(frame, event, arg, indent=[0]):
         _FUNCTION_PROFILE_REGISTRY[function_name].pop()
 
     return _profiler
+
+
+# The ConversionProfiler whose context is currently entered, if any.
+_ACTIVE_PROFILER = None
+
+
+def _get_peak_rss_bytes() -> Optional[int]:
+    try:
+        import resource
+    except ImportError:
+        # The resource module is not available on Windows.
+        return None
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS, and in kilobytes on Linux.
+    return peak_rss if sys.platform == "darwin" else peak_rss * 1024
+
+
+def _get_num_ops(prog) -> Optional[int]:
+    if prog is None:
+        return None
+
+    def _get_num_ops_in_block(block):
+        num_ops = 0
+        for op in block.operations:
+            num_ops += 1
+            for b in op.blocks:
+                num_ops += _get_num_ops_in_block(b)
+        return num_ops
+
+    return sum(_get_num_ops_in_block(f) for f in prog.functions.values())
+
+
+class _ProfileRecord:
+    """
+    A stage of the conversion recorded by the ``ConversionProfiler``. The program the stage operates
+    on can be set after the stage starts (for example, by the frontend that creates it), so the
+    number of ops after the stage can be counted.
+    """
+
+    def __init__(self, name: Text, category: Text, prog=None):
+        self.name = name
+        self.category = category
+        self.prog = prog
+
+    def set_program(self, prog) -> None:
+        self.prog = prog
+
+
+class ConversionProfiler:
+    """
+    Profile the stages of a conversion and the graph passes in each pass pipeline.
+
+    Within the context of a ``ConversionProfiler``, every call to ``ct.convert``, the frontend and
+    backend of the converter, and every pass run by ``PassPipelineManager.apply_pipeline`` are
+    recorded with:
+
+    - ``wall_time``: The wall time of the stage, in seconds.
+    - ``peak_rss_bytes``: The peak resident set size of the process at the end of the stage.
+      A stage that raises the peak RSS is the one that allocated the most memory so far.
+    - ``tracemalloc_delta_bytes``: The change of the memory traced by ``tracemalloc`` during the stage.
+    - ``tracemalloc_peak_bytes``: The peak memory traced by ``tracemalloc`` during the stage,
+      relative to the traced memory at the start of the stage.
+    - ``num_ops_before`` / ``num_ops_after``: The number of ops in the program, including the ops in
+      nested blocks, before and after the stage.
+
+    Examples
+    --------
+    .. sourcecode:: python
+
+        with ct.converters.ConversionProfiler() as profiler:
+            mlmodel = ct.convert(model, convert_to="mlprogram")
+
+        records = profiler.to_dict()["records"]
+        slowest_pass = max(
+            (record for record in records if record["category"] == "pass"),
+            key=lambda record: record["wall_time"],
+        )
+        profiler.to_json("conversion_profile.json")
+        # Open in chrome://tracing or https://ui.perfetto.dev.
+        profiler.to_chrome_trace("conversion_trace.json")
+
+    Parameters
+    ----------
+    trace_memory: bool
+        Whether to trace the Python memory allocations with ``tracemalloc`` during the conversion.
+        Tracing slows the conversion down, so it can be turned off if only the wall time is needed,
+        in which case the ``tracemalloc_*`` fields are ``None``.
+    """
+
+    def __init__(self, trace_memory: bool = True):
+        self.trace_memory = trace_memory
+        self.records: List[Dict[Text, Any]] = []
+        self._start_time = None
+        self._stops_tracemalloc = False
+        # Stack of the currently running stages, each with the peak traced memory seen so far.
+        self._stack: List[Dict[Text, Any]] = []
+
+    def __enter__(self) -> "ConversionProfiler":
+        global _ACTIVE_PROFILER
+        if _ACTIVE_PROFILER is not None:
+            raise RuntimeError("Cannot enter a ConversionProfiler while another one is active.")
+        if self.trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._stops_tracemalloc = True
+        self.records = []
+        self._start_time = time.perf_counter()
+        _ACTIVE_PROFILER = self
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        global _ACTIVE_PROFILER
+        _ACTIVE_PROFILER = None
+        if self._stops_tracemalloc:
+            tracemalloc.stop()
+            self._stops_tracemalloc = False
+
+    @contextmanager
+    def _record(self, record: _ProfileRecord) -> Iterator[_ProfileRecord]:
+        trace_memory = self.trace_memory and tracemalloc.is_tracing()
+        if trace_memory:
+            traced_memory_before, peak = tracemalloc.get_traced_memory()
+            if self._stack:
+                self._stack[-1]["peak"] = max(self._stack[-1]["peak"], peak)
+            if hasattr(tracemalloc, "reset_peak"):
+                # tracemalloc.reset_peak is only available since Python 3.9. Before that, the peak
+                # is the one since tracemalloc was started.
+                tracemalloc.reset_peak()
+        frame = {"peak": 0}
+        self._stack.append(frame)
+        num_ops_before = _get_num_ops(record.prog)
+        start_time = time.perf_counter()
+        try:
+            yield record
+        finally:
+            wall_time = time.perf_counter() - start_time
+            self._stack.pop()
+            result = {
+                "name": record.name,
+                "category": record.category,
+                "depth": len(self._stack),
+                "start_time": start_time - self._start_time,
+                "wall_time": wall_time,
+                "peak_rss_bytes": _get_peak_rss_bytes(),
+                "tracemalloc_delta_bytes": None,
+                "tracemalloc_peak_bytes": None,
+                "num_ops_before": num_ops_before,
+                "num_ops_after": _get_num_ops(record.prog),
+            }
+            if trace_memory:
+                traced_memory_after, peak = tracemalloc.get_traced_memory()
+                peak = max(frame["peak"], peak)
+                if self._stack:
+                    self._stack[-1]["peak"] = max(self._stack[-1]["peak"], peak)
+                result["tracemalloc_delta_bytes"] = traced_memory_after - traced_memory_before
+                result["tracemalloc_peak_bytes"] = peak - traced_memory_before
+            self.records.append(result)
+
+    def to_dict(self) -> Dict[Text, Any]:
+        """Return the records, ordered by their start time."""
+        return {"records": sorted(self.records, key=lambda record: record["start_time"])}
+
+    def to_json(self, path: Optional[Text] = None) -> Text:
+        """Return the records as a JSON string, and write it to ``path`` if provided."""
+        json_str = json.dumps(self.to_dict(), indent=2)
+        if path is not None:
+            with open(path, "w") as f:
+                f.write(json_str)
+        return json_str
+
+    def to_chrome_trace(self, path: Optional[Text] = None) -> Dict[Text, Any]:
+        """
+        Return the records in the Chrome trace event format, which can be viewed in
+        ``chrome://tracing`` or Perfetto, and write it to ``path`` if provided.
+        """
+        trace_events = []
+        for record in self.to_dict()["records"]:
+            args = {
+                key: val
+                for key, val in record.items()
+                if key not in ("name", "category", "start_time", "wall_time", "depth")
+            }
+            trace_events.append(
+                {
+                    "name": record["name"],
+                    "cat": record["category"],
+                    "ph": "X",
+                    "ts": record["start_time"] * 1e6,
+                    "dur": record["wall_time"] * 1e6,
+                    "pid": os.getpid(),
+                    "tid": 0,
+                    "args": args,
+                }
+            )
+        trace = {"traceEvents": trace_events, "displayTimeUnit": "ms"}
+        if path is not None:
+            with open(path, "w") as f:
+                json.dump(trace, f)
+        return trace
+
+
+@contextmanager
+def _profile_stage(name: Text, category: Text, prog=None) -> Iterator[_ProfileRecord]:
+    """
+    Record a stage of the conversion in the active ``ConversionProfiler``, if any.
+    The yielded record's ``set_program`` can be used to count the ops of a program created
+    within the stage.
+    """
+    record = _ProfileRecord(name, category, prog)
+    if _ACTIVE_PROFILER is None:
+        yield record
+        return
+    with _ACTIVE_PROFILER._record(record):
+        yield record
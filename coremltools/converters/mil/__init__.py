@@ -4,8 +4,6 @@
 #  found in the LICENSE.txt file or at https://opensource.org/licenses/BSD-3-Clause
 
 
-from .frontend.tensorflow.tf_op_registry import register_tf_op
-from .frontend.torch import register_torch_op
 from .input_types import (
     ClassifierConfig,
     ColorLayout,
@@ -41,3 +39,21 @@ from .mil import (
     mil_list,
     register_op,
 )
+
+
+def __getattr__(name):
+    # The op registries of the frontends are imported on first access, since importing a frontend
+    # imports its source framework.
+    if name == "register_tf_op":
+        from .frontend.tensorflow.tf_op_registry import register_tf_op
+
+        return register_tf_op
+    if name == "register_torch_op":
+        from .frontend.torch import register_torch_op
+
+        return register_torch_op
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__():
+    return sorted(set(globals()) | {"register_tf_op", "register_torch_op"})
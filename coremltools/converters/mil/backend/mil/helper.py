@@ -3,12 +3,103 @@
 #  Use of this source code is governed by a BSD-3-clause license that can be
 #  found in the LICENSE.txt file or at https://opensource.org/licenses/BSD-3-Clause
 
+import mmap
+from typing import Optional, Tuple
 
 import numpy as np
 
 from coremltools import proto
 from coremltools.converters.mil.mil import types
 
+# The blob_metadata struct (see MILBlob/Blob/StorageFormat.hpp) that precedes each blob in a
+# weight file. The blob data is written right after its metadata.
+_BLOB_METADATA_SENTINEL = 0xDEADBEEF
+_BLOB_METADATA_DTYPE = np.dtype(
+    [
+        ("sentinel", "<u4"),
+        ("mil_dtype", "<u4"),
+        ("size_in_bytes", "<u8"),
+        ("offset", "<u8"),
+        ("padding_size_in_bits", "<u8"),
+        ("reserved", "<u8", (4,)),
+    ]
+)
+
+
+# The byte-aligned dtypes whose blobs can be memory-mapped, and their BlobDataType enum values
+# (see MILBlob/Blob/BlobDataType.hpp). Sub-byte dtypes are packed, so they can't.
+_MEMORY_MAPPABLE_BLOB_DTYPES = {
+    types.fp16: 1,
+    types.fp32: 2,
+    types.uint8: 3,
+    types.int8: 4,
+    types.int16: 6,
+    types.uint16: 7,
+    types.int32: 14,
+    types.uint32: 15,
+}
+
+
+def _read_blob_metadata(filename: str, offset: int) -> Optional[np.void]:
+    """
+    Read the blob metadata at offset in a weight file. Return None if there is no valid metadata.
+    """
+    if offset < 0:
+        return None
+    metadata = np.fromfile(filename, dtype=_BLOB_METADATA_DTYPE, count=1, offset=offset)
+    if len(metadata) != 1 or metadata[0]["sentinel"] != _BLOB_METADATA_SENTINEL:
+        return None
+    return metadata[0]
+
+
+def _get_blob_metadata(data: np.ndarray, offset: int) -> Optional[np.void]:
+    """
+    Get the blob metadata at offset in ``data``, the uint8 content of a weight file. Return None if
+    there is no valid metadata.
+    """
+    if offset < 0 or offset + _BLOB_METADATA_DTYPE.itemsize > len(data):
+        return None
+    metadata = data[offset : offset + _BLOB_METADATA_DTYPE.itemsize].view(_BLOB_METADATA_DTYPE)[0]
+    if metadata["sentinel"] != _BLOB_METADATA_SENTINEL:
+        return None
+    return metadata
+
+
+def _get_source_blob(val: np.ndarray) -> Optional[Tuple[str, int]]:
+    """
+    If val is the read-only memory-mapped data of a blob in a weight file, as loaded by the milproto
+    loader with lazy_weights, return the path of the weight file and the offset of the blob (that
+    is, of its metadata). Otherwise, return None.
+
+    The blob is located from the address of the data of val in the memory map of the weight file.
+    Views of the memory-mapped data which don't hold exactly the data of a blob, in its order and
+    with its dtype (slices, transposes, etc.), are not considered as blobs.
+    """
+    if (
+        not isinstance(val, np.memmap)
+        or val.mode != "r"
+        or not isinstance(getattr(val, "_mmap", None), mmap.mmap)
+        or not val.flags.c_contiguous
+    ):
+        return None
+    # np.memmap maps the file from the allocation granularity boundary preceding its offset.
+    mapped_data = np.frombuffer(val._mmap, dtype=np.uint8)
+    mapped_start = val.offset - val.offset % mmap.ALLOCATIONGRANULARITY
+    data_offset = val.ctypes.data - mapped_data.ctypes.data
+    if data_offset < 0 or data_offset + val.nbytes > len(mapped_data):
+        return None
+    metadata_offset = data_offset - _BLOB_METADATA_DTYPE.itemsize
+    metadata = _get_blob_metadata(mapped_data, metadata_offset)
+    if (
+        metadata is None
+        or int(metadata["offset"]) != mapped_start + data_offset
+        or int(metadata["size_in_bytes"]) != val.nbytes
+        or _MEMORY_MAPPABLE_BLOB_DTYPES.get(types.numpy_type_to_builtin_type(val.dtype))
+        != metadata["mil_dtype"]
+    ):
+        return None
+    return val.filename, mapped_start + metadata_offset
+
 
 def create_valuetype_scalar(data_type):
     """
@@ -250,39 +341,37 @@ def types_to_proto_primitive(valuetype):
 
 
 def _get_offset_by_writing_data(output_var, blob_writer):
+    # ravel (instead of flatten) and view keep the data of a contiguous value in place, so a
+    # memory-mapped weight that is not modified is copied straight from its source file.
+    val = np.ascontiguousarray(output_var.val).ravel()
     if output_var.dtype == types.int4:
-        offset = blob_writer.write_int4_data(np.ascontiguousarray(output_var.val.flatten()))
+        offset = blob_writer.write_int4_data(val)
     elif output_var.dtype == types.uint1:
-        offset = blob_writer.write_uint1_data(np.ascontiguousarray(output_var.val.flatten()))
+        offset = blob_writer.write_uint1_data(val)
     elif output_var.dtype == types.uint2:
-        offset = blob_writer.write_uint2_data(np.ascontiguousarray(output_var.val.flatten()))
+        offset = blob_writer.write_uint2_data(val)
     elif output_var.dtype == types.uint3:
-        offset = blob_writer.write_uint3_data(np.ascontiguousarray(output_var.val.flatten()))
+        offset = blob_writer.write_uint3_data(val)
     elif output_var.dtype == types.uint4:
-        offset = blob_writer.write_uint4_data(np.ascontiguousarray(output_var.val.flatten()))
+        offset = blob_writer.write_uint4_data(val)
     elif output_var.dtype == types.uint6:
-        offset = blob_writer.write_uint6_data(np.ascontiguousarray(output_var.val.flatten()))
-    elif output_var.val.dtype.kind == "f" and output_var.val.dtype.itemsize == 4:
-        offset = blob_writer.write_float_data(np.ascontiguousarray(output_var.val.flatten()))
-    elif output_var.val.dtype.kind == "f" and output_var.val.dtype.itemsize == 2:
-        output_var_fp16_to_bytes_to_uint16 = np.frombuffer(
-            output_var.val.flatten().tobytes(), np.uint16
-        )
-        offset = blob_writer.write_fp16_data(
-            np.ascontiguousarray(output_var_fp16_to_bytes_to_uint16)
-        )
-    elif output_var.val.dtype.kind == "u" and output_var.val.dtype.itemsize == 1:
-        offset = blob_writer.write_uint8_data(np.ascontiguousarray(output_var.val.flatten()))
-    elif output_var.val.dtype.kind == "i" and output_var.val.dtype.itemsize == 1:
-        offset = blob_writer.write_int8_data(np.ascontiguousarray(output_var.val.flatten()))
-    elif output_var.val.dtype.kind == "u" and output_var.val.dtype.itemsize == 2:
-        offset = blob_writer.write_uint16_data(np.ascontiguousarray(output_var.val.flatten()))
-    elif output_var.val.dtype.kind == "i" and output_var.val.dtype.itemsize == 2:
-        offset = blob_writer.write_int16_data(np.ascontiguousarray(output_var.val.flatten()))
-    elif output_var.val.dtype.kind == "i" and output_var.val.dtype.itemsize == 4:
-        offset = blob_writer.write_int32_data(np.ascontiguousarray(output_var.val.flatten()))
-    elif output_var.val.dtype.kind == "u" and output_var.val.dtype.itemsize == 4:
-        offset = blob_writer.write_uint32_data(np.ascontiguousarray(output_var.val.flatten()))
+        offset = blob_writer.write_uint6_data(val)
+    elif val.dtype.kind == "f" and val.dtype.itemsize == 4:
+        offset = blob_writer.write_float_data(val)
+    elif val.dtype.kind == "f" and val.dtype.itemsize == 2:
+        offset = blob_writer.write_fp16_data(val.view(np.uint16))
+    elif val.dtype.kind == "u" and val.dtype.itemsize == 1:
+        offset = blob_writer.write_uint8_data(val)
+    elif val.dtype.kind == "i" and val.dtype.itemsize == 1:
+        offset = blob_writer.write_int8_data(val)
+    elif val.dtype.kind == "u" and val.dtype.itemsize == 2:
+        offset = blob_writer.write_uint16_data(val)
+    elif val.dtype.kind == "i" and val.dtype.itemsize == 2:
+        offset = blob_writer.write_int16_data(val)
+    elif val.dtype.kind == "i" and val.dtype.itemsize == 4:
+        offset = blob_writer.write_int32_data(val)
+    elif val.dtype.kind == "u" and val.dtype.itemsize == 4:
+        offset = blob_writer.write_uint32_data(val)
     else:
         raise TypeError("Unsupported type, {}, for net buffer serialization.".format(output_var.val.dtype))
 
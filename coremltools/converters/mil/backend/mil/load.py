@@ -4,6 +4,7 @@
 #  found in the LICENSE.txt file or at https://opensource.org/licenses/BSD-3-Clause
 
 import os
+import shutil
 import warnings
 from collections import OrderedDict
 from typing import Any, Dict, List, Optional, Tuple, Union
@@ -88,6 +89,10 @@ class MILProtoExporter:
         self.specification_version = specification_version
         self.blob_writers = {}
         self.weight_id_to_file_value = {}  # mapping from weight_id to file value
+        # mapping from (weight path, const content digest) to the offset of the written blob
+        self.content_digest_to_offset = {}
+        # weight paths that are copies of an existing weight file, so their blobs are not written
+        self.copied_weight_paths = set()
         self.prog.validate(check_essential_scope=True)
 
     @staticmethod
@@ -121,10 +126,59 @@ class MILProtoExporter:
         """
         Get a blob writer given a weight_path.
         """
+        if BlobWriter is None:
+            raise RuntimeError("BlobWriter not loaded")
         if weight_path not in self.blob_writers:
             self.blob_writers[weight_path] = BlobWriter(weight_path)
         return self.blob_writers[weight_path]
 
+    def copy_unchanged_weight_files(self) -> None:
+        """
+        For each weight path, if all of its weights are the unchanged blobs of the same existing
+        weight file (that is, they were memory-mapped by the milproto loader with lazy_weights and
+        never modified), copy that file as a whole, which the OS does without going through Python
+        buffers, instead of writing the weights blob by blob. The file values then point to the
+        blob offsets in the existing file.
+
+        The existing file is not copied if less than half of it is still used by the program,
+        to not carry over the blobs of removed weights.
+        """
+        weight_path_to_vals = OrderedDict()
+
+        def collect_weights(block):
+            for op in block.operations:
+                for b in op.blocks:
+                    collect_weights(b)
+                if op.op_type != "const":
+                    continue
+                val = op.outputs[0].val
+                if should_use_weight_file(val, self.specification_version):
+                    weight_path_to_vals.setdefault(self.get_weight_path(op), []).append(val)
+
+        for func in self.prog.functions.values():
+            collect_weights(func)
+
+        for weight_path, vals in weight_path_to_vals.items():
+            source_blobs = [helper._get_source_blob(val) for val in vals]
+            if any(source_blob is None for source_blob in source_blobs):
+                continue
+            source_paths = {source_path for source_path, _ in source_blobs}
+            if len(source_paths) != 1:
+                continue
+            source_path = source_paths.pop()
+            # Each blob takes its metadata and its data, padded to the 64 bytes alignment.
+            used_blobs = {
+                source_blob: helper._BLOB_METADATA_DTYPE.itemsize + -(-val.nbytes // 64) * 64
+                for source_blob, val in zip(source_blobs, vals)
+            }
+            if 2 * sum(used_blobs.values()) < os.path.getsize(source_path):
+                continue
+
+            if not (os.path.exists(weight_path) and os.path.samefile(source_path, weight_path)):
+                shutil.copyfile(source_path, weight_path)
+            self.copied_weight_paths.add(weight_path)
+            logger.info(f"Copied the unchanged weight file {source_path} to {weight_path}.")
+
     def create_file_value(self, var: Var) -> proto.MIL_pb2.Value:
         """
         Returns the mil proto file value of a var.
@@ -133,8 +187,16 @@ class MILProtoExporter:
 
         def create_file_value_helper():
             weight_path = self.get_weight_path(var.op)
-            blob_writer = self.get_blob_writer(weight_path)
-            offset = helper._get_offset_by_writing_data(var, blob_writer)
+            if weight_path in self.copied_weight_paths:
+                _, offset = helper._get_source_blob(var.val)
+            else:
+                # Identical weights are written once, and share the same blob.
+                digest_key = (weight_path, var.op.content_digest)
+                offset = self.content_digest_to_offset.get(digest_key)
+                if offset is None:
+                    blob_writer = self.get_blob_writer(weight_path)
+                    offset = helper._get_offset_by_writing_data(var, blob_writer)
+                    self.content_digest_to_offset[digest_key] = offset
             weight_file_name = os.path.basename(weight_path)
 
             # Get proto type for the primitive
@@ -495,7 +557,8 @@ class MILProtoExporter:
         """
         Export a pymil program into mil proto with the given specification version.
         """
-        if BlobWriter is None:
+        self.copy_unchanged_weight_files()
+        if BlobWriter is None and len(self.copied_weight_paths) == 0:
             raise RuntimeError("BlobWriter not loaded")
 
         function_protos = {}
@@ -515,6 +578,40 @@ class MILProtoExporter:
 
         return proto.MIL_pb2.Program(**kwargs)
 
+
+class WeightAppendingMILProtoExporter(MILProtoExporter):
+    """
+    Export a pymil program to milproto, appending the blobs of its weights to the existing
+    weight file in ``weights_dir`` instead of writing a new one. The weights whose content digest
+    is in ``digest_to_offset`` are not written again, and point to the existing blobs.
+    """
+
+    def __init__(
+        self,
+        prog: Program,
+        weights_dir: str,
+        specification_version: int,
+        digest_to_offset: Dict[str, int],
+    ):
+        super().__init__(prog, weights_dir, specification_version)
+        weight_path = os.path.join(self.weights_dir, _WEIGHTS_FILE_NAME)
+        for digest, offset in digest_to_offset.items():
+            self.content_digest_to_offset[(weight_path, digest)] = offset
+
+    def copy_unchanged_weight_files(self) -> None:
+        # The weight file holds the blobs of other programs, so it is never replaced.
+        pass
+
+    def get_blob_writer(self, weight_path: str) -> BlobWriter:
+        if BlobWriter is None:
+            raise RuntimeError("BlobWriter not loaded")
+        if weight_path not in self.blob_writers:
+            self.blob_writers[weight_path] = BlobWriter(
+                weight_path, truncate_file=not os.path.exists(weight_path)
+            )
+        return self.blob_writers[weight_path]
+
+
 # Add a classify op to the output.
 # Replaces the original probabilities output (in the containing MIL block)
 # with the outputs of the classifier op. Returns the name of the original
@@ -15,9 +15,15 @@ import numpy as np
 import pytest
 
 import coremltools as ct
-from coremltools import _SPECIFICATION_VERSION_IOS_18, proto
+from coremltools import _SPECIFICATION_VERSION_IOS_15, _SPECIFICATION_VERSION_IOS_18, proto
 from coremltools.converters.mil import mil
+from coremltools.converters.mil.backend.mil.load import MILProtoExporter
 from coremltools.converters.mil.converter import mil_convert as _mil_convert
+from coremltools.converters.mil.frontend.milproto.load import (
+    _memory_map_file_value,
+    _memory_map_weight_file,
+)
+from coremltools.converters.mil.frontend.milproto.test_load import _write_weight_file
 from coremltools.converters.mil.mil import get_new_symbol, types
 from coremltools.converters.mil.mil.builder import Builder as mb
 from coremltools.converters.mil.mil.ops.tests.iOS18.test_compression import (
@@ -801,6 +807,96 @@ class TestMILProtoExporter:
 
         shutil.rmtree(saved_package_path)
 
+    def test_identical_weights_written_once(self):
+        val = np.random.rand(32, 32).astype(np.float32)
+
+        @mb.program(input_specs=[mb.TensorSpec(shape=(32, 32))])
+        def prog(x):
+            x = mb.add(x=x, y=val)
+            x = mb.add(x=x, y=val.copy())
+            return mb.add(x=x, y=val + 1)
+
+        with tempfile.TemporaryDirectory() as weights_dir:
+            proto_prog = MILProtoExporter(prog, weights_dir, _SPECIFICATION_VERSION_IOS_15).export()
+            const_ops = [
+                op for op in proto_prog.functions["main"].block_specializations["CoreML5"].operations
+                if op.type == "const" and op.attributes["val"].HasField("blobFileValue")
+            ]
+            offsets = [op.attributes["val"].blobFileValue.offset for op in const_ops]
+            assert len(offsets) == 3
+            assert offsets[0] == offsets[1]
+            assert offsets[2] != offsets[0]
+
+    @staticmethod
+    def _get_program_with_memory_mapped_weights(weights_dir, vals, unused_vals=()):
+        """
+        Write vals and unused_vals to a weight file, and return the weight path, the offset of each
+        blob of vals, and a program whose consts are the memory-mapped blobs of vals, as loaded by
+        the milproto loader.
+        """
+        weight_path = os.path.join(weights_dir, "weight.bin")
+        offsets = _write_weight_file(weight_path, [(2, val) for val in vals + list(unused_vals)])
+        offsets = offsets[: len(vals)]
+        file_map = _memory_map_weight_file(weight_path)
+        memory_mapped_vals = [
+            _memory_map_file_value(file_map, offset, types.fp32, val.shape)
+            for offset, val in zip(offsets, vals)
+        ]
+
+        @mb.program(input_specs=[mb.TensorSpec(shape=(4, 4))])
+        def prog(x):
+            for val in memory_mapped_vals:
+                x = mb.add(x=x, y=val)
+            return x
+
+        return weight_path, offsets, prog
+
+    def test_copy_unchanged_weight_file(self):
+        vals = [np.random.rand(4, 4).astype(np.float32) for _ in range(3)]
+        with tempfile.TemporaryDirectory() as source_dir, tempfile.TemporaryDirectory() as weights_dir:
+            source_path, offsets, prog = self._get_program_with_memory_mapped_weights(
+                source_dir, vals
+            )
+            exporter = MILProtoExporter(prog, weights_dir, _SPECIFICATION_VERSION_IOS_15)
+            proto_prog = exporter.export()
+
+            weight_path = os.path.join(weights_dir, "weight.bin")
+            assert exporter.copied_weight_paths == {weight_path}
+            with open(source_path, "rb") as f_source, open(weight_path, "rb") as f_copy:
+                assert f_source.read() == f_copy.read()
+
+            const_ops = [
+                op for op in proto_prog.functions["main"].block_specializations["CoreML5"].operations
+                if op.type == "const"
+            ]
+            file_values = [op.attributes["val"].blobFileValue for op in const_ops]
+            assert [file_value.offset for file_value in file_values] == offsets
+            assert all(
+                file_value.fileName == "@model_path/weights/weight.bin"
+                for file_value in file_values
+            )
+
+    def test_not_copy_changed_weight_file(self):
+        vals = [np.random.rand(4, 4).astype(np.float32) for _ in range(2)]
+        with tempfile.TemporaryDirectory() as source_dir, tempfile.TemporaryDirectory() as weights_dir:
+            # One of the weights is modified.
+            _, _, prog = self._get_program_with_memory_mapped_weights(source_dir, vals)
+            const_op = prog.functions["main"].find_ops(op_type="const")[0]
+            const_op.outputs[0]._sym_val.val = const_op.val.val + 1
+            exporter = MILProtoExporter(prog, weights_dir, _SPECIFICATION_VERSION_IOS_15)
+            exporter.copy_unchanged_weight_files()
+            assert len(exporter.copied_weight_paths) == 0
+
+        large_val = np.random.rand(4, 4, 16).astype(np.float32)
+        with tempfile.TemporaryDirectory() as source_dir, tempfile.TemporaryDirectory() as weights_dir:
+            # Less than half of the weight file is used after a weight is removed.
+            _, _, prog = self._get_program_with_memory_mapped_weights(
+                source_dir, vals, unused_vals=[large_val]
+            )
+            exporter = MILProtoExporter(prog, weights_dir, _SPECIFICATION_VERSION_IOS_15)
+            exporter.copy_unchanged_weight_files()
+            assert len(exporter.copied_weight_paths) == 0
+
 
 @pytest.mark.skipif(
     ct.utils._macos_version() < (15, 0), reason="Tests are for deployment target iOS18/macos15"
@@ -15,6 +15,7 @@ from coremltools.converters.mil.mil.types.type_mapping import np_val_to_py_type
 from coremltools.models import neural_network as neural_network
 from coremltools.models.neural_network.quantization_utils import \
     _convert_array_to_nbit_quantized_bytes
+from coremltools.models.utils import _fill_float_weights
 
 from .mil_to_nn_mapping_registry import MIL_TO_NN_MAPPING_REGISTRY, register_mil_to_nn_mapping
 
@@ -3473,7 +3474,7 @@ def custom_op(const_context, builder, op):
     # Load weights
     for _weight in weights:
         wt = params.weights.add()
-        wt.floatValue.extend(map(float, _weight))
+        _fill_float_weights(wt, _weight)
 
     # Add a custom layer
     builder.add_custom(
@@ -3,12 +3,12 @@
 #  Use of this source code is governed by a BSD-3-clause license that can be
 #  found in the LICENSE.txt file or at https://opensource.org/licenses/BSD-3-Clause
 
-import tempfile as _tempfile
+import shutil as _shutil
 import warnings as _warnings
 from typing import Optional, Text, Tuple
 
 import coremltools as ct
-from coremltools.converters._profile_utils import _profile
+from coremltools.converters._profile_utils import _profile, _profile_stage
 from coremltools.converters.mil import input_types
 from coremltools.converters.mil.mil import Builder as mb
 from coremltools.converters.mil.mil import Program
@@ -210,18 +210,26 @@ def _mil_convert(
         _warnings.warn(msg.format(registry.backend_alias_names[convert_to], convert_to))
         convert_to = registry.backend_alias_names[convert_to]
 
+    package_path = None
     if convert_to == 'mlprogram':
-        # mil_convert_to_proto places weight files inside the weights_dir
-        weights_dir = _tempfile.TemporaryDirectory()
-        kwargs["weights_dir"] = weights_dir.name
-
-    proto, mil_program = mil_convert_to_proto(
-                            model,
-                            convert_from,
-                            convert_to,
-                            registry,
-                            **kwargs
-                         )
+        # mil_convert_to_proto places weight files inside the weights_dir, which is created
+        # directly inside the mlpackage, so that the weights are written only once.
+        package_path, kwargs["weights_dir"] = ct.models.utils._create_mlpackage_for_weights(
+            kwargs.get("package_dir")
+        )
+
+    try:
+        proto, mil_program = mil_convert_to_proto(
+                                model,
+                                convert_from,
+                                convert_to,
+                                registry,
+                                **kwargs
+                             )
+    except BaseException:
+        if package_path is not None:
+            _shutil.rmtree(package_path, ignore_errors=True)
+        raise
 
     _reset_conversion_state()
 
@@ -231,24 +239,24 @@ def _mil_convert(
         return proto  # internal mil data structure
 
     elif convert_to == "mlprogram":
-        package_path = ct.models.model._create_mlpackage(
-            proto, kwargs.get("weights_dir"), kwargs.get("package_dir")
-        )
+        with _profile_stage("create mlpackage", category="backend"):
+            ct.models.utils._set_mlpackage_root_model(package_path, proto)
+            return modelClass(
+                package_path,
+                is_temp_package=not kwargs.get("package_dir"),
+                mil_program=mil_program,
+                skip_model_load=kwargs.get("skip_model_load", False),
+                compute_units=compute_units,
+            )
+
+    with _profile_stage("create model", category="backend"):
         return modelClass(
-            package_path,
-            is_temp_package=not kwargs.get("package_dir"),
+            proto,
             mil_program=mil_program,
             skip_model_load=kwargs.get("skip_model_load", False),
             compute_units=compute_units,
         )
 
-    return modelClass(
-        proto,
-        mil_program=mil_program,
-        skip_model_load=kwargs.get("skip_model_load", False),
-        compute_units=compute_units,
-    )
-
 
 def mil_convert_to_proto(
     model, convert_from, convert_to, converter_registry, main_pipeline=None, **kwargs
@@ -291,7 +299,9 @@ def mil_convert_to_proto(
     )
 
     frontend_converter = frontend_converter_type()
-    prog = frontend_converter(model, **kwargs)
+    with _profile_stage(f"{convert_from} frontend", category="frontend") as stage:
+        prog = frontend_converter(model, **kwargs)
+        stage.set_program(prog)
     PassPipelineManager.apply_pipeline(prog, frontend_pipeline)
 
     PassPipelineManager.apply_pipeline(prog, main_pipeline)
@@ -310,7 +320,8 @@ def mil_convert_to_proto(
             f"one of: {list(converter_registry.backends.keys())}"
         )
     backend_converter = backend_converter_type()
-    out = backend_converter(prog, **kwargs)
+    with _profile_stage(f"{convert_to} backend", category="backend", prog=prog):
+        out = backend_converter(prog, **kwargs)
 
     return out, prog
 
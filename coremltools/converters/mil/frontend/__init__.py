@@ -3,4 +3,17 @@
 #  Use of this source code is governed by a BSD-3-clause license that can be
 #  found in the LICENSE.txt file or at https://opensource.org/licenses/BSD-3-Clause
 
-from . import tensorflow, tensorflow2, torch
+import importlib as _importlib
+
+# The frontends import their source framework, so they are only imported on first access.
+_LAZY_SUBMODULES = ("tensorflow", "tensorflow2", "torch")
+
+
+def __getattr__(name):
+    if name in _LAZY_SUBMODULES:
+        return _importlib.import_module(f"{__name__}.{name}")
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_LAZY_SUBMODULES))
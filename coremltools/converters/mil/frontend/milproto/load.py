@@ -4,7 +4,7 @@
 # found in the LICENSE.txt file or at https://opensource.org/licenses/BSD-3-Clause
 
 import os
-from typing import Tuple
+from typing import Optional, Tuple
 
 import numpy as np
 
@@ -12,6 +12,10 @@ from coremltools import _logger as logger
 from coremltools import proto
 from coremltools.converters.mil import mil
 from coremltools.converters.mil._deployment_compatibility import AvailableTarget as _target
+from coremltools.converters.mil.backend.mil.helper import (
+    _MEMORY_MAPPABLE_BLOB_DTYPES,
+    _get_blob_metadata,
+)
 from coremltools.converters.mil.mil import Block
 from coremltools.converters.mil.mil import Builder as mb
 from coremltools.converters.mil.mil import (
@@ -24,6 +28,7 @@ from coremltools.converters.mil.mil import (
     types,
 )
 from coremltools.converters.mil.mil.block import curr_block
+from coremltools.converters.mil.mil.types.symbolic import any_symbolic
 from coremltools.converters.mil.mil.ops.registry import SSAOpRegistry as _SSAOpRegistry
 from coremltools.converters.mil.mil.program import StateTensorPlaceholder
 from coremltools.optimize import _utils as optimize_utils
@@ -36,18 +41,28 @@ except Exception as e:
     logger.warning(f"Fail to import BlobReader from libmilstoragepython. {e}")
     BlobReader = None
 
-
 class TranscriptionContext:
     """
     Holds shared variables needed for transcription.
+
+    If ``lazy_weights`` is True, the byte-aligned weights are loaded as read-only ``np.memmap``
+    views into the weight file, so their data is only read from disk when it is accessed. Each
+    weight file is memory-mapped once, and shared by the views of all its weights.
     """
 
-    def __init__(self, weights_dir=""):
+    def __init__(self, weights_dir="", lazy_weights=False):
         self.name_to_var = {} # mapping from name -> var object
         self.blob_reader_from_filename = (
             {}
         )  # mapping from filename -> BlobReader object
+        self.weight_file_map_from_filename = {}  # mapping from filename -> memory-mapped file
         self.weights_dir = weights_dir
+        self.lazy_weights = lazy_weights
+
+    def get_weight_file_map(self, filename):
+        if filename not in self.weight_file_map_from_filename:
+            self.weight_file_map_from_filename[filename] = _memory_map_weight_file(filename)
+        return self.weight_file_map_from_filename[filename]
 
     def register_var_with_name(self, name, var):
         var.name = name
@@ -104,15 +119,59 @@ def _load_immediate_value(context: TranscriptionContext, immediatevalue_spec):
         )
 
 
-def _load_file_value(context, filevalue_spec, dtype):
-    if BlobReader is None:
-        raise RuntimeError("BlobReader not loaded")
+def _memory_map_weight_file(filename: str) -> Optional[np.memmap]:
+    """
+    Return the content of the weight file as a read-only memory-mapped uint8 array, or None if it
+    cannot be memory-mapped.
+    """
+    try:
+        return np.memmap(filename, dtype=np.uint8, mode="r")
+    except (OSError, ValueError):
+        # For instance, a missing or empty file.
+        return None
+
+
+def _memory_map_file_value(
+    file_map: Optional[np.memmap], offset: int, dtype: type, shape: Tuple[int]
+) -> Optional[np.memmap]:
+    """
+    Return a read-only view of the blob at ``offset`` in the memory-mapped weight file ``file_map``
+    (see ``_memory_map_weight_file``), or None if the blob cannot be memory-mapped as an array of
+    ``dtype`` and ``shape``.
+    """
+    if file_map is None or dtype not in _MEMORY_MAPPABLE_BLOB_DTYPES or any_symbolic(shape):
+        return None
+    metadata = _get_blob_metadata(file_map, offset)
+    if metadata is None or metadata["mil_dtype"] != _MEMORY_MAPPABLE_BLOB_DTYPES[dtype]:
+        return None
+    np_dtype = np.dtype(types.nptype_from_builtin(dtype))
+    size_in_bytes = int(metadata["size_in_bytes"])
+    data_offset = int(metadata["offset"])
+    if size_in_bytes != int(np.prod(shape)) * np_dtype.itemsize:
+        return None
+    if len(shape) == 0 or size_in_bytes == 0 or data_offset + size_in_bytes > len(file_map):
+        # Scalars and empty arrays are read through the BlobReader.
+        return None
+    return file_map[data_offset : data_offset + size_in_bytes].view(np_dtype).reshape(shape)
+
+
+def _load_file_value(context, filevalue_spec, dtype, shape=None):
     if not isinstance(filevalue_spec, proto.MIL_pb2.Value.BlobFileValue):
         raise TypeError("Invalid BlobFileValue spec object")
 
     filename = os.path.join(context.weights_dir, filevalue_spec.fileName.split("/")[-1])
     offset = filevalue_spec.offset
 
+    if context.lazy_weights and shape is not None:
+        np_value = _memory_map_file_value(
+            context.get_weight_file_map(filename), offset, dtype, shape
+        )
+        if np_value is not None:
+            return np_value
+
+    if BlobReader is None:
+        raise RuntimeError("BlobReader not loaded")
+
     if filename in context.blob_reader_from_filename:
         blob_reader = context.blob_reader_from_filename[filename]
     else:
@@ -187,10 +246,14 @@ def _load_value(context, value_spec):
         if value_spec.WhichOneof("value") == "immediateValue":
             value = _load_immediate_value(context, value_spec.immediateValue)
         else:
-            value = _load_file_value(context, value_spec.blobFileValue, dtype)
+            value = _load_file_value(context, value_spec.blobFileValue, dtype, shape)
 
         target_np_dtype = types.nptype_from_builtin(dtype)
-        if dtype in types.IMMEDIATE_VALUE_TYPES_IN_BYTES:
+        if isinstance(value, np.memmap):
+            # The memory-mapped value already has the target dtype and shape. It is kept as is,
+            # so its data is not read until it is accessed.
+            pass
+        elif dtype in types.IMMEDIATE_VALUE_TYPES_IN_BYTES:
             value = _restore_np_from_bytes_value(value, dtype, shape).astype(target_np_dtype)
         elif dtype == types.str and shape == ():
             value = str(value[0])
@@ -572,9 +635,13 @@ def _load_program_spec_attributes(
             raise ValueError(f"Invalid attribute {attr_name} for program")
 
 
-def load_mil_proto(program_spec, specification_version, file_weights_dir=""):
+def load_mil_proto(program_spec, specification_version, file_weights_dir="", lazy_weights=False):
     """
     Load in-memory Proto specification of MILSpec.Program(.Proto) object to PyMIL
+
+    Set lazy_weights to load the weights as read-only memory-mapped views into the weight file,
+    which are only read when accessed. The weight file must not be modified while the program
+    is alive.
     """
     if not isinstance(program_spec, proto.MIL_pb2.Program):
         raise TypeError("Invalid Program spec object")
@@ -585,7 +652,7 @@ def load_mil_proto(program_spec, specification_version, file_weights_dir=""):
     if program_spec.version != 1:
         raise ValueError("Invalid program version")
 
-    context = TranscriptionContext(file_weights_dir)
+    context = TranscriptionContext(file_weights_dir, lazy_weights=lazy_weights)
     pymil_program = mil.Program()
     for func_name, func_spec in program_spec.functions.items():
         pymil_program.add_function(
@@ -602,6 +669,7 @@ def load(model_spec, specification_version, file_weights_dir="", **kwargs):
     Load in-memory Proto specification of Model(.Proto) object to PyMIL
 
     Set force_spec_version to force override the spec version.
+    Set lazy_weights to memory-map the weights instead of reading them (see load_mil_proto).
     """
     if not isinstance(model_spec, proto.Model_pb2.Model):
         raise TypeError("Invalid Model sepc object")
@@ -615,4 +683,9 @@ def load(model_spec, specification_version, file_weights_dir="", **kwargs):
     if model_spec.WhichOneof("Type") != "mlProgram":
         raise ValueError("Only MIL proto based mlmodels can be loaded")
 
-    return load_mil_proto(model_spec.mlProgram, specification_version, file_weights_dir)
+    return load_mil_proto(
+        model_spec.mlProgram,
+        specification_version,
+        file_weights_dir,
+        lazy_weights=kwargs.get("lazy_weights", False),
+    )
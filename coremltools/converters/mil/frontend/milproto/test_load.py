@@ -5,6 +5,12 @@
 
 import itertools
 
+try:
+    import resource
+except ImportError:
+    # Not available on Windows.
+    resource = None
+
 import numpy as np
 import pytest
 
@@ -13,8 +19,14 @@ from coremltools import _SPECIFICATION_VERSION_IOS_18, ComputeUnit, proto
 from coremltools._deps import _HAS_TF_2, _HAS_TORCH
 from coremltools.converters._converters_entry import _get_metadata_from_mlmodel
 from coremltools.converters.mil import Builder as mb
-from coremltools.converters.mil.backend.mil.helper import create_tensor_value
+from coremltools.converters.mil.backend.mil import helper
+from coremltools.converters.mil.backend.mil.helper import (
+    create_file_value_tensor,
+    create_tensor_value,
+    types_to_proto_primitive,
+)
 from coremltools.converters.mil.converter import mil_convert
+from coremltools.converters.mil.frontend.milproto import load as milproto_load
 from coremltools.converters.mil.frontend.milproto.load import load as milproto_to_pymil
 
 if _HAS_TF_2:
@@ -494,3 +506,128 @@ class TestLoadOperation:
         )
 
         assert get_op_types_in_program(loaded_pymil_prog) == get_op_types_in_program(prog)
+
+
+def _write_weight_file(path, blobs):
+    """
+    Write (mil_dtype, np.ndarray) blobs to a weight file in the MIL blob storage format, and return
+    the offset of the metadata of each blob.
+    """
+    metadata_offsets = []
+    with open(path, "wb") as f:
+        f.write(np.array([len(blobs), 2], dtype=np.uint32).tobytes().ljust(64, b"\0"))
+        for mil_dtype, data in blobs:
+            metadata_offsets.append(f.tell())
+            metadata = np.zeros(1, dtype=helper._BLOB_METADATA_DTYPE)
+            metadata["sentinel"] = helper._BLOB_METADATA_SENTINEL
+            metadata["mil_dtype"] = mil_dtype
+            metadata["size_in_bytes"] = data.nbytes
+            metadata["offset"] = f.tell() + 64
+            f.write(metadata.tobytes())
+            f.write(data.tobytes().ljust(-(-data.nbytes // 64) * 64, b"\0"))
+    return metadata_offsets
+
+
+class TestLazyWeightLoading:
+    @staticmethod
+    def _get_file_value(offset, shape, dtype):
+        return create_file_value_tensor(
+            file_name="@model_path/weights/weight.bin",
+            offset=offset,
+            dim=shape,
+            data_type=types_to_proto_primitive(dtype),
+        )
+
+    def test_load_memory_mapped_weights(self, tmp_path):
+        fp32_val = np.random.rand(4, 3).astype(np.float32)
+        fp16_val = np.random.rand(2, 8).astype(np.float16)
+        int8_val = np.arange(-5, 5, dtype=np.int8).reshape(5, 2)
+        fp32_offset, fp16_offset, int8_offset = _write_weight_file(
+            tmp_path / "weight.bin", [(2, fp32_val), (1, fp16_val), (4, int8_val)]
+        )
+
+        context = milproto_load.TranscriptionContext(str(tmp_path), lazy_weights=True)
+        for offset, expected_val, dtype in (
+            (fp32_offset, fp32_val, types.fp32),
+            (fp16_offset, fp16_val, types.fp16),
+            (int8_offset, int8_val, types.int8),
+        ):
+            value_spec = self._get_file_value(offset, expected_val.shape, dtype)
+            val = milproto_load._load_value(context, value_spec)
+            assert isinstance(val, np.memmap)
+            assert not val.flags.writeable
+            assert val.dtype == expected_val.dtype
+            np.testing.assert_array_equal(val, expected_val)
+
+            # The memory-mapped data is handed to the blob writer without any copy.
+            @mb.program(input_specs=[])
+            def prog():
+                return mb.const(val=val)
+
+            class BlobWriterStub:
+                def __getattr__(self, name):
+                    def write_data(data):
+                        assert np.shares_memory(data, val)
+                        return 0
+
+                    return write_data
+
+            output_var = prog.functions["main"].outputs[0]
+            assert output_var.val is val
+            helper._get_offset_by_writing_data(output_var, BlobWriterStub())
+
+    def test_fall_back_to_blob_reader(self, tmp_path):
+        val = np.random.rand(4, 3).astype(np.float32)
+        (offset,) = _write_weight_file(tmp_path / "weight.bin", [(2, val)])
+        file_map = milproto_load._memory_map_weight_file(str(tmp_path / "weight.bin"))
+
+        assert milproto_load._memory_map_file_value(file_map, offset, types.fp32, (4, 3)) is not None
+        # Mismatching dtype, size or corrupted metadata can't be memory-mapped.
+        assert milproto_load._memory_map_file_value(file_map, offset, types.int32, (4, 3)) is None
+        assert milproto_load._memory_map_file_value(file_map, offset, types.fp32, (4, 4)) is None
+        assert milproto_load._memory_map_file_value(file_map, 0, types.fp32, (4, 3)) is None
+        # Sub-byte dtypes are packed, so they always go through the BlobReader.
+        assert milproto_load._memory_map_file_value(file_map, offset, types.uint4, (4, 3)) is None
+        # A missing weight file can't be memory-mapped.
+        assert milproto_load._memory_map_weight_file(str(tmp_path / "missing.bin")) is None
+
+    @pytest.mark.skipif(resource is None, reason="Requires the resource module.")
+    def test_weight_file_mapped_once(self, tmp_path):
+        """
+        All the weights share the memory map of the weight file, so loading many weights doesn't
+        take one file descriptor per weight.
+        """
+        vals = [np.full((4, 4), i, dtype=np.float32) for i in range(300)]
+        offsets = _write_weight_file(tmp_path / "weight.bin", [(2, val) for val in vals])
+
+        soft_limit, hard_limit = resource.getrlimit(resource.RLIMIT_NOFILE)
+        resource.setrlimit(resource.RLIMIT_NOFILE, (min(256, soft_limit), hard_limit))
+        try:
+            context = milproto_load.TranscriptionContext(str(tmp_path), lazy_weights=True)
+            loaded_vals = [
+                milproto_load._load_value(context, self._get_file_value(offset, (4, 4), types.fp32))
+                for offset in offsets
+            ]
+        finally:
+            resource.setrlimit(resource.RLIMIT_NOFILE, (soft_limit, hard_limit))
+
+        for val, loaded_val in zip(vals, loaded_vals):
+            assert isinstance(loaded_val, np.memmap)
+            np.testing.assert_array_equal(loaded_val, val)
+            assert helper._get_source_blob(loaded_val) is not None
+        assert len(context.weight_file_map_from_filename) == 1
+
+    def test_source_blob_of_views(self, tmp_path):
+        val = np.random.rand(4, 6).astype(np.float32)
+        (offset,) = _write_weight_file(tmp_path / "weight.bin", [(2, val)])
+        file_map = milproto_load._memory_map_weight_file(str(tmp_path / "weight.bin"))
+        loaded_val = milproto_load._memory_map_file_value(file_map, offset, types.fp32, (4, 6))
+
+        assert helper._get_source_blob(loaded_val) == (str(tmp_path / "weight.bin"), offset)
+        assert helper._get_source_blob(loaded_val.reshape(6, 4)) is not None
+        # Views which don't hold the data of the blob, in its order and dtype, are not blobs.
+        assert helper._get_source_blob(loaded_val[1:]) is None
+        assert helper._get_source_blob(loaded_val.T) is None
+        assert helper._get_source_blob(loaded_val.view(np.int32)) is None
+        assert helper._get_source_blob(file_map) is None
+        assert helper._get_source_blob(val) is None
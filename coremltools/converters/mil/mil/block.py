@@ -24,6 +24,16 @@ from .visitors.dot_visitor import DotVisitor
 BLOCK_STACK = []
 DEBUG = False
 
+# Callables in OP_MUTATION_LISTENERS are invoked as ``listener(block, op)`` each time ``op`` is
+# inserted into, has its inputs rewired in, or is removed from ``block``. ``op`` is None when only
+# the inputs or outputs of ``block`` change.
+OP_MUTATION_LISTENERS = []
+
+
+def _notify_op_mutation(block, op):
+    for listener in OP_MUTATION_LISTENERS:
+        listener(block, op)
+
 
 def curr_block():
     if len(BLOCK_STACK) == 0:
@@ -223,44 +233,98 @@ class Block:
         for op in self.operations:
             for b in op.blocks:
                 b.validate(force_validate=force_validate)
-            if op.outputs is None:
-                raise InvalidBlockStateError()
+            self._validate_op_connections(op)
 
-            # Check the input output relationships
-            # from outputs -> inputs
-            for ov in op.outputs:
-                child_op_count = Counter(ov.child_ops)
-                for next_op, c in child_op_count.items():
-                    c_actual = next_op.get_flattened_inputs().count(ov)
-                    if c_actual != c:
-                        msg = (
-                            "Var {} should be consumed by op {} {}"
-                            + " times, but op {} uses it {} times.\n{}"
-                        )
-                        raise InvalidBlockStateError(
-                            msg.format(
-                                ov.name,
-                                next_op.name,
-                                c,
-                                next_op.name,
-                                c_actual,
-                                next_op,
-                            )
+        self._validate_outputs_and_internal_vars()
+
+        # check essential scope info are not missing
+        if check_essential_scope:
+            self._check_has_scope_info()
+
+    def validate_locally(self, check_essential_scope: Optional[bool] = False) -> None:
+        """
+        Validate this block only, without recursing into its nested blocks.
+
+        This is the incremental counterpart of ``validate(force_validate=True)``, which is used
+        to re-validate only the blocks mutated by a graph pass. The vars coming from the
+        enclosing blocks are checked with ``is_var_visible_in_block``.
+        """
+        block_inputs = list(self.inputs.values()) if isinstance(self, Function) else self.inputs
+        visible_vars_in_block = set(block_inputs)
+        visible_vars_from_outer_block = set()
+
+        for op in self.operations:
+            for val in op.get_flattened_inputs():
+                if (
+                    val in self._internal_vars
+                    or val in visible_vars_in_block
+                    or val in visible_vars_from_outer_block
+                ):
+                    continue
+                if self.outer_op is not None and self.outer_op.enclosing_block.is_var_visible_in_block(
+                    val, upto_op=self.outer_op
+                ):
+                    visible_vars_from_outer_block.add(val)
+                    continue
+                raise ValueError(f"Var {val} not visible in the block {self.name}.")
+            self._validate_op_connections(op)
+            for out_var in op.outputs:
+                visible_vars_in_block.add(out_var)
+
+        self._validate_outputs_and_internal_vars()
+
+        if check_essential_scope:
+            function = self
+            while not isinstance(function, Function):
+                function = function.outer_op.enclosing_block
+            for op in self.operations:
+                for scope in function._essential_scope_sources:
+                    if scope not in op.scopes or len(op.scopes[scope]) == 0:
+                        raise ValueError(
+                            f"op {op.name} with scopes {op.scopes} is missing essential scopes {scope}."
                         )
 
-            # from inputs -> outputs
-            input_var_count = Counter(op.get_flattened_inputs())
-            for iv, c in input_var_count.items():
-                c_actual = iv.child_ops.count(op)
+    @staticmethod
+    def _validate_op_connections(op: Operation) -> None:
+        if op.outputs is None:
+            raise InvalidBlockStateError()
+
+        # Check the input output relationships
+        # from outputs -> inputs
+        for ov in op.outputs:
+            child_op_count = Counter(ov.child_ops)
+            for next_op, c in child_op_count.items():
+                c_actual = next_op.get_flattened_inputs().count(ov)
                 if c_actual != c:
                     msg = (
                         "Var {} should be consumed by op {} {}"
                         + " times, but op {} uses it {} times.\n{}"
                     )
                     raise InvalidBlockStateError(
-                        msg.format(iv.name, op.name, c_actual, op.name, c, op)
+                        msg.format(
+                            ov.name,
+                            next_op.name,
+                            c,
+                            next_op.name,
+                            c_actual,
+                            next_op,
+                        )
                     )
 
+        # from inputs -> outputs
+        input_var_count = Counter(op.get_flattened_inputs())
+        for iv, c in input_var_count.items():
+            c_actual = iv.child_ops.count(op)
+            if c_actual != c:
+                msg = (
+                    "Var {} should be consumed by op {} {}"
+                    + " times, but op {} uses it {} times.\n{}"
+                )
+                raise InvalidBlockStateError(
+                    msg.format(iv.name, op.name, c_actual, op.name, c, op)
+                )
+
+    def _validate_outputs_and_internal_vars(self) -> None:
         # 1 to 1 mapping between Block outputs and Var.consuming_blocks
         for op in self.operations:
             for ov in op.outputs:
@@ -272,7 +336,7 @@ class Block:
         for v in self.outputs:
             if self not in v.consuming_blocks:
                 msg = "Var {} should be output of block {}: {}"
-                raise ValueError(msg.format(ov.name, b.name, b))
+                raise ValueError(msg.format(v.name, self.name, self))
 
         # checking internal vars are consistent with self._internal_vars
         internal_var_in_block = set()
@@ -284,10 +348,6 @@ class Block:
                 "internal vars in the block are not consistent with self._internal_vars."
             )
 
-        # check essential scope info are not missing
-        if check_essential_scope:
-            self._check_has_scope_info()
-
     def remove_inputs(self, curr_input_vars):
         """
         curr_input_vars: list[Var], whose elements must be in
@@ -298,6 +358,7 @@ class Block:
         self._block_inputs = [
             v for i, v in enumerate(self._block_inputs) if i not in remove_idx
         ]
+        _notify_op_mutation(self, None)
 
     def find_ops(self, prefix=None, op_type=None):
         """
@@ -377,12 +438,8 @@ class Block:
                 for i in range(idx - 1, -1, -1):
                     if var.op is self.operations[i]:
                         return True
-            else:
-                cursor = self.operations._get_node_from_op(upto_op).prev
-                while cursor is not None:
-                    if cursor.op is var.op:
-                        return True
-                    cursor = cursor.prev
+            elif var.op in self.operations and self.operations.is_before(var.op, upto_op):
+                return True
 
         if self.outer_op is not None:
             enclosing_block = self.outer_op.enclosing_block
@@ -395,14 +452,37 @@ class Block:
         if len(self.operations) > 0 and target_op == self.operations[-1]:
             return len(self.operations) - 1
 
-        op_list = self.operations if isinstance(self.operations, list) else list(self.operations)
-
         try:
-            idx = op_list.index(target_op)
+            idx = self.operations.index(target_op)
         except ValueError:
             raise ValueError("Op {} not found in {}: {}".format(target_op.name, self.name, self))
         return idx
 
+    def _is_op_in_range(
+        self,
+        op: Operation,
+        anchor_op: Optional[Operation] = None,
+        end_op: Optional[Operation] = None,
+    ) -> bool:
+        """
+        Return True if ``op`` comes after ``anchor_op`` and not after ``end_op`` (inclusive) in
+        this block. A None ``anchor_op`` / ``end_op`` means the start / end of the block.
+        """
+        if isinstance(self.operations, list):
+            # This could only happen in debug mode
+            op_idx = self.find_op_id_in_block(op)
+            start_idx = self.find_op_id_in_block(anchor_op) + 1 if anchor_op is not None else 0
+            end_idx = (
+                self.find_op_id_in_block(end_op) if end_op is not None else len(self.operations) - 1
+            )
+            return start_idx <= op_idx <= end_idx
+
+        if anchor_op is not None and not self.operations.is_before(anchor_op, op):
+            return False
+        if end_op is not None and op is not end_op and not self.operations.is_before(op, end_op):
+            return False
+        return True
+
     def set_outputs(self, outputs):
         """
         outputs: list[Var]
@@ -433,6 +513,7 @@ class Block:
         # For duplicate vars in outputs, only add consuming_blocks once.
         for ov in set(outputs):
             ov.consuming_blocks.append(self)
+        _notify_op_mutation(self, None)
 
     def __enter__(self):
         global BLOCK_STACK
@@ -480,10 +561,12 @@ class Block:
 
         if isinstance(self.operations, CacheDoublyLinkedList):
             self.operations.insert_op_before(new_op, before_op)
+            _notify_op_mutation(self, new_op)
             return
 
         if before_op is None:
             self.operations.append(new_op)
+            _notify_op_mutation(self, new_op)
             return
 
         # check inputs visibility in debug mode
@@ -502,6 +585,7 @@ class Block:
 
         idx = self.find_op_id_in_block(before_op)
         self.operations.insert(idx, new_op)
+        _notify_op_mutation(self, new_op)
 
     def _replace_var(
         self,
@@ -530,9 +614,6 @@ class Block:
             and anchor_op is old_var.op
         )
 
-        # We should only compute start_idx and end_idx once if needed.
-        start_idx = end_idx = None
-
         if replace_vars_right_after_old_var:
             op_list = list(old_var.child_ops)
         else:
@@ -580,43 +661,25 @@ class Block:
                 num_ops_affected += 1
                 op.set_inputs(no_check_var_types=no_check_var_types,
                     **new_inputs)
+                _notify_op_mutation(self, op)
 
             # Replace recursively.
             for b in op.blocks:
                 num_ops_affected += b._replace_var(old_var, new_var)
 
+        # The producer of old_var lost consumers, which is also a mutation around it.
+        if num_ops_affected > 0 and old_var.op is not None and old_var.op.enclosing_block is not None:
+            _notify_op_mutation(old_var.op.enclosing_block, old_var.op)
+
         # Replace consuming_blocks's outputs.
         # It is important to use list copy here,
         # since replace_block_output_var is going to change the consuming_blocks
-        # Note that, there are some expensive index query in the following implementation,
-        # but overally it won't affect the time complexity too much,
-        # since we can assume the number of the block outputs in a program as a constant.
-        # As the result, the amortized time complexity will not blow up.
         for b in list(old_var.consuming_blocks):
             outer_op = b.outer_op
-
-            if outer_op is not None:
-                # Query the start and end index if needed
-                if start_idx is None:
-                    start_idx = (
-                        self.find_op_id_in_block(anchor_op) + 1 if anchor_op is not None else 0
-                    )
-                if end_idx is None:
-                    end_idx = (
-                        self.find_op_id_in_block(end_op)
-                        if end_op is not None
-                        else len(self.operations) - 1
-                    )
-
-            op_to_idx = {}
             while outer_op is not None:
                 block = outer_op.enclosing_block
                 if block is self:
-                    if len(op_to_idx) == 0:
-                        for idx, op in enumerate(self.operations):
-                            op_to_idx[op] = idx
-                    op_idx = op_to_idx[outer_op]
-                    if op_idx >= start_idx and op_idx <= end_idx:
+                    if self._is_op_in_range(outer_op, anchor_op, end_op):
                         b.replace_block_output_var(old_var, new_var)
                     break
                 outer_op = block.outer_op
@@ -629,6 +692,7 @@ class Block:
             self._block_inputs = list(self._block_inputs)
             self._block_inputs[idx] = new_var
             self._block_inputs = tuple(self._block_inputs)
+            _notify_op_mutation(self, None)
 
         # If old_var is block's output, replace as well.
         self.replace_block_output_var(old_var, new_var)
@@ -651,6 +715,7 @@ class Block:
                 found_old_var_in_output = True
                 self._outputs[idx] = new_var
         if found_old_var_in_output:
+            _notify_op_mutation(self, None)
             new_var.consuming_blocks.append(self)
             # This block no longer uses `old_var` as its outputs
             old_var.consuming_blocks.remove(self)
@@ -893,6 +958,9 @@ class Block:
         Args: ops_to_remove: List[Operation]. All ops in this list must be pre-existing in the
         block. It allows duplicated ops, but duplicated ops will only be removed once.
 
+        The ops are removed in bulk: the block is validated once, and the consumer list of each
+        input var is rebuilt once, no matter how many of its consumers are removed.
+
         Raises:
             ValueError if any `op` in `ops_to_remove` meets any of following conditions:
               - `op` is not found in the block
@@ -902,32 +970,47 @@ class Block:
         self.validate()
 
         # Dedup ops because each op can only be deleted once.
+        ops_to_remove = list(dict.fromkeys(ops_to_remove))
         ops_to_remove_set = set(ops_to_remove)
-        ops_to_remove = list(ops_to_remove_set)
 
+        block_outputs = set(self._outputs)
         for op in ops_to_remove:
             for i, v in enumerate(op.outputs):
                 # Check that the output Var isn't block's output
-                if v in self._outputs:
+                if v in block_outputs:
                     raise ValueError(
                         f"cannot delete op {op.name} with output {i}: {v.name} that's block {self.name}'s output."
                     )
+            if op not in self.operations:
+                raise ValueError(f"Op {op.name} not found in {self.name}.")
 
+        input_vars = {}
+        for op in ops_to_remove:
             for b in op.blocks:
                 b.set_outputs([])
-                b.remove_ops(b.operations)
-
-            self.operations.remove(op)
+                b.remove_ops(list(b.operations))
 
             op.enclosing_block = None
 
             for v in op.get_flattened_inputs():
-                v.remove_child_op(op)
+                input_vars[id(v)] = v
 
             # Remove InternalVar from self._internal_vars
             for v in op.internal_inputs.values():
                 self._internal_vars.remove(v)
 
+        if isinstance(self.operations, CacheDoublyLinkedList):
+            self.operations.remove_ops(ops_to_remove)
+        else:
+            self.operations[:] = [op for op in self.operations if op not in ops_to_remove_set]
+
+        # Each input var drops all of its removed consumers in a single pass.
+        for v in input_vars.values():
+            v.remove_child_ops(ops_to_remove_set)
+
+        for op in ops_to_remove:
+            _notify_op_mutation(self, op)
+
         # In the end, we check no ops depend on removed op's outputs
         for op in ops_to_remove:
             for i, v in enumerate(op.outputs):
@@ -0,0 +1,8 @@
+#  Copyright (c) 2025, Apple Inc. All rights reserved.
+#
+#  Use of this source code is governed by a BSD-3-clause license that can be
+#  found in the LICENSE.txt file or at https://opensource.org/licenses/BSD-3-Clause
+
+from . import kernels
+from .kernel_registry import register_kernel
+from .reference_executor import ReferenceExecutor, bind_inputs
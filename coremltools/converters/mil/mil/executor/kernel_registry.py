@@ -0,0 +1,64 @@
+#  Copyright (c) 2025, Apple Inc. All rights reserved.
+#
+#  Use of this source code is governed by a BSD-3-clause license that can be
+#  found in the LICENSE.txt file or at https://opensource.org/licenses/BSD-3-Clause
+
+from typing import Callable, Optional
+
+
+class KernelRegistry:
+    """
+    Map from op type to the NumPy kernel used by the ``ReferenceExecutor``.
+
+    A kernel is called as ``kernel(executor, op, inputs)``, where ``inputs`` maps each input name
+    of ``op`` to its value (a tuple of values for tuple inputs). It returns the value of the single
+    output, or a tuple of values for multiple outputs. Ops without a registered kernel are executed
+    by their ``value_inference``.
+    """
+
+    def __init__(self):
+        self.op_type_to_kernel = {}
+
+    def get_kernel(self, op_type: str) -> Optional[Callable]:
+        return self.op_type_to_kernel.get(op_type, None)
+
+    def register_kernel(self, kernel: Callable, op_type: str, override: bool = False):
+        if not override and op_type in self.op_type_to_kernel:
+            raise ValueError(f"Kernel for op {op_type} already registered.")
+        self.op_type_to_kernel[op_type] = kernel
+
+    def __contains__(self, op_type: str) -> bool:
+        return op_type in self.op_type_to_kernel
+
+
+_KERNEL_REGISTRY = KernelRegistry()
+
+
+def register_kernel(op_type: str, override: bool = False):
+    """
+    Register a NumPy kernel for an op type, used by the ``ReferenceExecutor``.
+
+    op_type: str
+        The op type, for example ``"conv"``, or the op type of a custom op.
+
+    override: bool [Default=False]
+        If True, replaces the kernel registered earlier for the op type, which includes the
+        built-in kernels. Otherwise, duplicate registration will error out.
+
+    Examples
+    --------
+    .. sourcecode:: python
+
+        from coremltools.converters.mil.mil.executor import register_kernel
+
+
+        @register_kernel("my_custom_op")
+        def my_custom_op(executor, op, inputs):
+            return inputs["x"] * 2
+    """
+
+    def kernel_wrapper(kernel):
+        _KERNEL_REGISTRY.register_kernel(kernel, op_type, override)
+        return kernel
+
+    return kernel_wrapper
@@ -0,0 +1,533 @@
+#  Copyright (c) 2025, Apple Inc. All rights reserved.
+#
+#  Use of this source code is governed by a BSD-3-clause license that can be
+#  found in the LICENSE.txt file or at https://opensource.org/licenses/BSD-3-Clause
+
+"""
+NumPy kernels of the ops which have no ``value_inference``, or whose ``value_inference`` relies on
+compile time values, such as the ops with nested blocks.
+"""
+
+from typing import List, Sequence, Tuple
+
+import numpy as np
+
+from coremltools.converters.mil.mil.ops.defs._utils import (
+    aggregated_pad,
+    spatial_dimensions_out_shape,
+)
+from coremltools.converters.mil.mil.types.symbolic import any_symbolic
+
+from .kernel_registry import register_kernel
+
+
+def _compute_dtype(x: np.ndarray) -> np.dtype:
+    """Accumulate fp16 in fp32, which is what the Core ML CPU backend does as well."""
+    return np.float32 if x.dtype == np.float16 else x.dtype
+
+
+def _pads_before(
+    pad_type: str,
+    kernel_shape: Sequence[int],
+    input_shape: Sequence[int],
+    strides: Sequence[int],
+    dilations: Sequence[int],
+    custom_pad: Sequence[int],
+) -> List[int]:
+    """The padding at the beginning of each spatial dimension of a conv or a pooling."""
+    if pad_type == "custom":
+        return [int(p) for p in custom_pad[::2]]
+    total_pads = aggregated_pad(
+        pad_type=pad_type,
+        kernel_shape=kernel_shape,
+        input_shape=input_shape,
+        strides=strides,
+        dilations=dilations,
+        custom_pad=custom_pad,
+    )
+    if pad_type == "same_lower":
+        return [p - p // 2 for p in total_pads]
+    return [p // 2 for p in total_pads]
+
+
+def _windows(
+    x: np.ndarray,
+    kernel_shape: Sequence[int],
+    strides: Sequence[int],
+    dilations: Sequence[int],
+    pads_before: Sequence[int],
+    out_shape: Sequence[int],
+    pad_value: float = 0.0,
+):
+    """
+    Yield, for each offset in the kernel, the strided view of the padded x (of shape
+    ``[n, C, *out_shape]``) which is multiplied by (or pooled at) this offset.
+    """
+    pad_width = [(0, 0), (0, 0)]
+    for in_size, k, s, d, before, out in zip(
+        x.shape[2:], kernel_shape, strides, dilations, pads_before, out_shape
+    ):
+        after = max(0, (out - 1) * s + (k - 1) * d + 1 - in_size - before)
+        pad_width.append((before, after))
+    x = np.pad(x, pad_width, constant_values=pad_value)
+
+    for offset in np.ndindex(*kernel_shape):
+        slices = [slice(None), slice(None)]
+        for o, s, d, out in zip(offset, strides, dilations, out_shape):
+            slices.append(slice(o * d, o * d + (out - 1) * s + 1, s))
+        yield offset, x[tuple(slices)]
+
+
+@register_kernel("conv")
+def conv(executor, op, inputs):
+    x, weight = inputs["x"], inputs["weight"]
+    groups = int(inputs["groups"])
+    strides, dilations = inputs["strides"], inputs["dilations"]
+    kernel_shape = weight.shape[2:]
+    in_shape = x.shape[2:]
+    custom_pad = inputs["pad"]
+
+    out_shape = spatial_dimensions_out_shape(
+        pad_type=inputs["pad_type"],
+        input_shape=in_shape,
+        kernel_shape=kernel_shape,
+        strides=strides,
+        dilations=dilations,
+        custom_pad=custom_pad,
+    )
+    pads_before = _pads_before(
+        inputs["pad_type"], kernel_shape, in_shape, strides, dilations, custom_pad
+    )
+
+    dtype = _compute_dtype(x)
+    n, c_in = x.shape[:2]
+    c_out = weight.shape[0]
+    # [C_out, C_in / g, *K] -> [g, C_out / g, C_in / g, *K]
+    weight = weight.astype(dtype).reshape((groups, c_out // groups) + weight.shape[1:])
+    y = np.zeros((n, groups, c_out // groups) + tuple(out_shape), dtype=dtype)
+    for offset, x_window in _windows(
+        x.astype(dtype), kernel_shape, strides, dilations, pads_before, out_shape
+    ):
+        x_window = x_window.reshape((n, groups, c_in // groups) + tuple(out_shape))
+        y += np.einsum(
+            "ngc...,goc->ngo...", x_window, weight[(Ellipsis,) + offset], optimize=True
+        )
+    y = y.reshape((n, c_out) + tuple(out_shape))
+
+    if inputs.get("bias") is not None:
+        y += inputs["bias"].reshape((c_out,) + (1,) * len(out_shape))
+    return y
+
+
+@register_kernel("conv_transpose")
+def conv_transpose(executor, op, inputs):
+    x, weight = inputs["x"], inputs["weight"]
+    groups = int(inputs["groups"])
+    strides, dilations = inputs["strides"], inputs["dilations"]
+    pad_type = inputs["pad_type"]
+    kernel_shape = weight.shape[2:]
+    in_shape = x.shape[2:]
+    n, c_in = x.shape[:2]
+    c_out = weight.shape[1] * groups
+
+    # The output of the transposed convolution before cropping the padding.
+    full_shape = [
+        (i - 1) * s + (k - 1) * d + 1
+        for i, k, s, d in zip(in_shape, kernel_shape, strides, dilations)
+    ]
+    if not any_symbolic(op.outputs[0].shape):
+        out_shape = list(op.outputs[0].shape[2:])
+    elif inputs.get("output_shape") is not None:
+        out_shape = [int(i) for i in inputs["output_shape"][2:]]
+    else:
+        custom_pad = inputs["pad"]
+        out_shape = [
+            f - custom_pad[2 * r] - custom_pad[2 * r + 1] for r, f in enumerate(full_shape)
+        ]
+
+    if pad_type == "custom":
+        pads_before = [int(p) for p in inputs["pad"][::2]]
+    elif pad_type == "valid":
+        pads_before = [0] * len(full_shape)
+    else:
+        total_pads = [max(0, f - o) for f, o in zip(full_shape, out_shape)]
+        if pad_type == "same_lower":
+            pads_before = [p - p // 2 for p in total_pads]
+        else:
+            pads_before = [p // 2 for p in total_pads]
+
+    dtype = _compute_dtype(x)
+    x = x.astype(dtype).reshape((n, groups, c_in // groups) + tuple(in_shape))
+    # [C_in, C_out / g, *K] -> [g, C_in / g, C_out / g, *K]
+    weight = weight.astype(dtype).reshape((groups, c_in // groups) + weight.shape[1:])
+    padded_shape = [max(f, b + o) for f, b, o in zip(full_shape, pads_before, out_shape)]
+    y = np.zeros((n, groups, c_out // groups) + tuple(padded_shape), dtype=dtype)
+    for offset in np.ndindex(*kernel_shape):
+        slices = [slice(None)] * 3
+        for o, i, s, d in zip(offset, in_shape, strides, dilations):
+            slices.append(slice(o * d, o * d + (i - 1) * s + 1, s))
+        y[tuple(slices)] += np.einsum(
+            "ngc...,gco->ngo...", x, weight[(Ellipsis,) + offset], optimize=True
+        )
+    y = y.reshape((n, c_out) + tuple(padded_shape))
+    y = y[
+        (slice(None), slice(None))
+        + tuple(slice(b, b + o) for b, o in zip(pads_before, out_shape))
+    ]
+
+    if inputs.get("bias") is not None:
+        y = y + inputs["bias"].reshape((c_out,) + (1,) * len(out_shape))
+    return y
+
+
+def _pool(inputs, reduce_windows):
+    """
+    Compute a pooling. ``reduce_windows(windows, count_windows)`` reduces the strided windows of x
+    into the output, where ``windows(x, pad_value)`` yields the windows of x padded by pad_value,
+    and ``count_windows(exclude_padding)`` returns the number of elements of x (and of the
+    explicit padding, unless excluded) in each window.
+    """
+    x = inputs["x"]
+    kernel_shape, strides = inputs["kernel_sizes"], inputs["strides"]
+    pad_type = inputs["pad_type"]
+    in_shape = x.shape[2:]
+    custom_pad = inputs["pad"]
+    dilations = [1] * len(kernel_shape)
+    out_shape = spatial_dimensions_out_shape(
+        pad_type=pad_type,
+        input_shape=in_shape,
+        kernel_shape=kernel_shape,
+        strides=strides,
+        custom_pad=custom_pad,
+        ceil_mode=bool(inputs.get("ceil_mode", False)),
+    )
+    pads_before = _pads_before(pad_type, kernel_shape, in_shape, strides, dilations, custom_pad)
+
+    def windows(x, pad_value=0.0):
+        for _, window in _windows(
+            x, kernel_shape, strides, dilations, pads_before, out_shape, pad_value
+        ):
+            yield window
+
+    def count_windows(exclude_padding):
+        mask = np.ones((1, 1) + tuple(in_shape), dtype=np.float32)
+        if exclude_padding:
+            return sum(windows(mask))
+        # The explicit padding is counted, but not the extra one of the ceil mode.
+        if pad_type == "custom":
+            pads_after = [int(p) for p in custom_pad[1::2]]
+        else:
+            total_pads = aggregated_pad(
+                pad_type=pad_type,
+                kernel_shape=kernel_shape,
+                input_shape=in_shape,
+                strides=strides,
+                custom_pad=custom_pad,
+            )
+            pads_after = [t - b for t, b in zip(total_pads, pads_before)]
+        mask = np.pad(
+            mask, [(0, 0), (0, 0)] + list(zip(pads_before, pads_after)), constant_values=1
+        )
+        return sum(
+            window
+            for _, window in _windows(
+                mask, kernel_shape, strides, dilations, [0] * len(in_shape), out_shape
+            )
+        )
+
+    return reduce_windows(windows, count_windows)
+
+
+@register_kernel("max_pool")
+def max_pool(executor, op, inputs):
+    x = inputs["x"]
+
+    def reduce_windows(windows, count_windows):
+        y = None
+        for window in windows(x, pad_value=-np.inf):
+            y = window.copy() if y is None else np.maximum(y, window)
+        return y
+
+    return _pool(inputs, reduce_windows)
+
+
+@register_kernel("avg_pool")
+def avg_pool(executor, op, inputs):
+    x = inputs["x"]
+    x = x.astype(_compute_dtype(x))
+    exclude_padding = bool(inputs.get("exclude_padding_from_average", False))
+
+    def reduce_windows(windows, count_windows):
+        y = sum(window for window in windows(x))
+        return y / np.maximum(count_windows(exclude_padding), 1)
+
+    return _pool(inputs, reduce_windows)
+
+
+@register_kernel("l2_pool")
+def l2_pool(executor, op, inputs):
+    x = inputs["x"]
+    x = x.astype(_compute_dtype(x))
+
+    def reduce_windows(windows, count_windows):
+        return np.sqrt(sum(np.square(window) for window in windows(x)))
+
+    return _pool(inputs, reduce_windows)
+
+
+def _channel_shape(x: np.ndarray) -> Tuple[int, ...]:
+    """The shape to broadcast a per channel parameter against x of shape [n, C, *D]."""
+    return (x.shape[1],) + (1,) * (x.ndim - 2)
+
+
+@register_kernel("batch_norm")
+def batch_norm(executor, op, inputs):
+    x = inputs["x"]
+    dtype = _compute_dtype(x)
+    shape = _channel_shape(x)
+    mean = inputs["mean"].astype(dtype).reshape(shape)
+    variance = inputs["variance"].astype(dtype).reshape(shape)
+    y = (x.astype(dtype) - mean) / np.sqrt(variance + inputs["epsilon"])
+    if inputs.get("gamma") is not None:
+        y = y * inputs["gamma"].reshape(shape)
+    if inputs.get("beta") is not None:
+        y = y + inputs["beta"].reshape(shape)
+    return y
+
+
+@register_kernel("instance_norm")
+def instance_norm(executor, op, inputs):
+    x = inputs["x"]
+    x = x.astype(_compute_dtype(x))
+    shape = _channel_shape(x)
+    axes = tuple(range(2, x.ndim))
+    mean = np.mean(x, axis=axes, keepdims=True)
+    variance = np.var(x, axis=axes, keepdims=True)
+    y = (x - mean) / np.sqrt(variance + inputs["epsilon"])
+    if inputs.get("gamma") is not None:
+        y = y * inputs["gamma"].reshape(shape)
+    if inputs.get("beta") is not None:
+        y = y + inputs["beta"].reshape(shape)
+    return y
+
+
+@register_kernel("local_response_norm")
+def local_response_norm(executor, op, inputs):
+    x = inputs["x"]
+    x = x.astype(_compute_dtype(x))
+    size = int(inputs["size"])
+    squares = np.square(x)
+    # Sum over the window of channels [c - size // 2, c + (size - 1) // 2], the same as PyTorch.
+    padded = np.pad(squares, [(0, 0), (size // 2, (size - 1) // 2)] + [(0, 0)] * (x.ndim - 2))
+    window_sum = np.zeros_like(x)
+    for i in range(size):
+        window_sum += padded[:, i : i + x.shape[1]]
+    return x / np.power(inputs["k"] + inputs["alpha"] / size * window_sum, inputs["beta"])
+
+
+@register_kernel("silu")
+def silu(executor, op, inputs):
+    x = inputs["x"]
+    x = x.astype(_compute_dtype(x))
+    return x / (1 + np.exp(-x))
+
+
+@register_kernel("one_hot")
+def one_hot(executor, op, inputs):
+    indices = inputs["indices"]
+    size = int(inputs["one_hot_vector_size"])
+    axis = int(inputs["axis"])
+    if axis < 0:
+        axis += indices.ndim + 1
+    y = np.expand_dims(indices, axis) == np.arange(size).reshape(
+        (size,) + (1,) * (indices.ndim - axis)
+    )
+    return np.where(y, inputs["on_value"], inputs["off_value"])
+
+
+@register_kernel("gather_nd")
+def gather_nd(executor, op, inputs):
+    x, indices = inputs["x"], inputs["indices"]
+    batch_dims = int(inputs.get("batch_dims", 0))
+    batch_shape = x.shape[:batch_dims]
+    num_batches = int(np.prod(batch_shape))
+    x = x.reshape((num_batches,) + x.shape[batch_dims:])
+    indices = indices.reshape((num_batches,) + indices.shape[batch_dims:])
+    index_depth = indices.shape[-1]
+    y = np.empty(
+        (num_batches,) + indices.shape[1:-1] + x.shape[1 + index_depth :], dtype=x.dtype
+    )
+    for b in range(num_batches):
+        y[b] = x[b][tuple(np.moveaxis(indices[b], -1, 0))]
+    return y.reshape(batch_shape + y.shape[1:])
+
+
+_SCATTER_MODE_TO_UFUNC = {
+    "add": np.add,
+    "sub": np.subtract,
+    "mul": np.multiply,
+    "div": np.divide,
+    "max": np.maximum,
+    "min": np.minimum,
+}
+
+
+def _scatter(data: np.ndarray, index: Tuple[np.ndarray, ...], updates: np.ndarray, mode: str):
+    data = data.copy()
+    if mode == "update":
+        data[index] = updates
+    elif mode in _SCATTER_MODE_TO_UFUNC:
+        _SCATTER_MODE_TO_UFUNC[mode].at(data, index, updates)
+    else:
+        raise ValueError(f"Invalid scatter mode {mode}.")
+    return data
+
+
+@register_kernel("scatter")
+def scatter(executor, op, inputs):
+    data, indices, updates = inputs["data"], inputs["indices"], inputs["updates"]
+    axis = int(inputs["axis"])
+    if axis < 0:
+        axis += data.ndim
+    indices = np.where(indices < 0, indices + data.shape[axis], indices)
+    y = _scatter(
+        np.moveaxis(data, axis, 0), (indices,), np.moveaxis(updates, axis, 0), inputs["mode"]
+    )
+    return np.moveaxis(y, 0, axis)
+
+
+@register_kernel("scatter_nd")
+def scatter_nd(executor, op, inputs):
+    data, indices = inputs["data"], inputs["indices"]
+    index = tuple(np.moveaxis(indices, -1, 0))
+    return _scatter(data, index, inputs["updates"], inputs["mode"])
+
+
+@register_kernel("depth_to_space")
+def depth_to_space(executor, op, inputs):
+    x = inputs["x"]
+    bs = int(inputs["block_size"])
+    n, c, h, w = x.shape
+    # DCR order, which is the one of TensorFlow.
+    y = x.reshape(n, bs, bs, c // (bs * bs), h, w).transpose(0, 3, 4, 1, 5, 2)
+    return y.reshape(n, c // (bs * bs), h * bs, w * bs)
+
+
+@register_kernel("space_to_depth")
+def space_to_depth(executor, op, inputs):
+    x = inputs["x"]
+    bs = int(inputs["block_size"])
+    n, c, h, w = x.shape
+    y = x.reshape(n, c, h // bs, bs, w // bs, bs).transpose(0, 3, 5, 1, 2, 4)
+    return y.reshape(n, c * bs * bs, h // bs, w // bs)
+
+
+@register_kernel("pixel_shuffle")
+def pixel_shuffle(executor, op, inputs):
+    x = inputs["x"]
+    f = int(inputs["upscale_factor"])
+    n, c, h, w = x.shape
+    # CRD order, which is the one of PyTorch.
+    y = x.reshape(n, c // (f * f), f, f, h, w).transpose(0, 1, 4, 2, 5, 3)
+    return y.reshape(n, c // (f * f), h * f, w * f)
+
+
+@register_kernel("pixel_unshuffle")
+def pixel_unshuffle(executor, op, inputs):
+    x = inputs["x"]
+    f = int(inputs["downscale_factor"])
+    n, c, h, w = x.shape
+    y = x.reshape(n, c, h // f, f, w // f, f).transpose(0, 1, 3, 5, 2, 4)
+    return y.reshape(n, c * f * f, h // f, w // f)
+
+
+@register_kernel("upsample_nearest_neighbor")
+def upsample_nearest_neighbor(executor, op, inputs):
+    x = inputs["x"]
+    scales = (inputs["scale_factor_height"], inputs["scale_factor_width"])
+    for axis, scale in zip((-2, -1), scales):
+        in_size = x.shape[axis]
+        out_size = int(np.floor(in_size * scale))
+        index = np.minimum(np.floor(np.arange(out_size) / scale).astype(np.int64), in_size - 1)
+        x = np.take(x, index, axis=axis)
+    return x
+
+
+@register_kernel("crop")
+def crop(executor, op, inputs):
+    x = inputs["x"]
+    (top, bottom), (left, right) = inputs["crop_height"], inputs["crop_width"]
+    return x[..., top : x.shape[-2] - bottom, left : x.shape[-1] - right]
+
+
+@register_kernel("read_state")
+def read_state(executor, op, inputs):
+    # Copy, since the state may be updated in place later.
+    return inputs["input"].copy()
+
+
+@register_kernel("coreml_update_state")
+def coreml_update_state(executor, op, inputs):
+    np.copyto(inputs["state"], inputs["value"], casting="same_kind")
+    return inputs["value"]
+
+
+@register_kernel("cond")
+def cond(executor, op, inputs):
+    block = op.blocks[0] if inputs["pred"] else op.blocks[1]
+    return tuple(executor.run_block(block))
+
+
+@register_kernel("while_loop")
+def while_loop(executor, op, inputs):
+    cond_block, body_block = op.blocks
+    loop_vars = list(inputs["loop_vars"])
+    while executor.run_block(cond_block, loop_vars)[0]:
+        loop_vars = executor.run_block(body_block, loop_vars)
+    return tuple(loop_vars)
+
+
+# Lists are Python lists of numpy arrays (None for the elements not written yet). They are copied
+# on write, since a list var may be consumed by several ops.
+
+
+@register_kernel("make_list")
+def make_list(executor, op, inputs):
+    return [None] * int(inputs["init_length"])
+
+
+@register_kernel("list_length")
+def list_length(executor, op, inputs):
+    return np.int32(len(inputs["ls"]))
+
+
+@register_kernel("list_write")
+def list_write(executor, op, inputs):
+    ls = list(inputs["ls"])
+    index = int(inputs["index"])
+    if index >= len(ls):
+        ls.extend([None] * (index + 1 - len(ls)))
+    ls[index] = inputs["value"]
+    return ls
+
+
+@register_kernel("list_read")
+def list_read(executor, op, inputs):
+    value = inputs["ls"][int(inputs["index"])]
+    if value is None:
+        raise ValueError(f"Op {op.name} reads an element of a list which was never written.")
+    return value
+
+
+@register_kernel("list_gather")
+def list_gather(executor, op, inputs):
+    ls = inputs["ls"]
+    return np.stack([list_read(executor, op, {"ls": ls, "index": i}) for i in inputs["indices"]])
+
+
+@register_kernel("list_scatter")
+def list_scatter(executor, op, inputs):
+    ls = inputs["ls"]
+    for index, value in zip(inputs["indices"], inputs["value"]):
+        ls = list_write(executor, op, {"ls": ls, "index": index, "value": value})
+    return ls
@@ -0,0 +1,287 @@
+#  Copyright (c) 2025, Apple Inc. All rights reserved.
+#
+#  Use of this source code is governed by a BSD-3-clause license that can be
+#  found in the LICENSE.txt file or at https://opensource.org/licenses/BSD-3-Clause
+
+import copy
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+import numpy as np
+
+from coremltools.converters.mil.mil import Block, Function, Operation, Program, Var, types
+from coremltools.converters.mil.mil.types.symbolic import any_symbolic
+
+from .kernel_registry import _KERNEL_REGISTRY
+
+
+class _BlockSchedule:
+    """
+    The execution plan of a block: its ops in order, and after each op, the vars of the block whose
+    last consumer it is, which can be freed.
+    """
+
+    def __init__(self, block: Block):
+        self.operations = list(block.operations)
+        block_inputs = block.inputs.values() if isinstance(block, Function) else block.inputs
+        self.local_vars = list(block_inputs) + [
+            var for op in self.operations for var in op.outputs
+        ]
+
+        last_use = {}
+        for idx, op in enumerate(self.operations):
+            for var in _referenced_vars(op):
+                last_use[var] = idx
+        block_outputs = set(block.outputs)
+
+        self.vars_to_free = [[] for _ in self.operations]
+        for idx, op in enumerate(self.operations):
+            for var in op.outputs:
+                # An output without consumers is freed right after its op.
+                last_use.setdefault(var, idx)
+        for var in self.local_vars:
+            if var in last_use and var not in block_outputs:
+                self.vars_to_free[last_use[var]].append(var)
+
+
+def _referenced_vars(op: Operation) -> List[Var]:
+    """The vars consumed by an op, including the ones consumed by the ops of its nested blocks."""
+    referenced_vars = op.get_flattened_inputs()
+    for block in op.blocks:
+        for nested_op in block.operations:
+            referenced_vars.extend(_referenced_vars(nested_op))
+        referenced_vars.extend(block.outputs)
+    return referenced_vars
+
+
+def _value_to_var(var: Var, value: Any) -> Var:
+    """Create a var which has the same type as var, with value as its (concrete) value."""
+    if types.is_tensor(var.sym_type):
+        sym_type = types.tensor(var.dtype, value.shape)
+    else:
+        sym_type = var.sym_type
+        if isinstance(value, np.bool_):
+            # The value_inference expects a Python bool, as the Builder creates, while the programs
+            # loaded from milproto have numpy bools, which numpy doesn't accept as flags.
+            value = bool(value)
+    sym_val = sym_type()
+    sym_val.val = value
+    return Var(var.name, sym_type, sym_val)
+
+
+def bind_inputs(op: Operation, inputs: Dict[str, Any]) -> Operation:
+    """
+    Return a shallow copy of op, whose input vars have the given concrete values, so that the
+    ``value_inference`` (or ``materialized_val_inference``) of the copy computes the op on them.
+    """
+    bound_op = copy.copy(op)
+    bound_op._input_vars = dict(op._input_vars)
+    for name, value in inputs.items():
+        var = op._input_vars[name]
+        if isinstance(var, (list, tuple)):
+            bound_var = tuple(_value_to_var(v, x) for v, x in zip(var, value))
+        else:
+            bound_var = _value_to_var(var, value)
+        bound_op._input_vars[name] = bound_var
+        setattr(bound_op, name, bound_var)
+    return bound_op
+
+
+def _to_var_value(var: Var, value: Any) -> Any:
+    """Convert the value computed for var to the numpy dtype of var."""
+    if types.is_tensor(var.sym_type):
+        return np.asarray(value, dtype=types.nptype_from_builtin(var.dtype))
+    if types.is_scalar(var.sym_type) and not types.is_str(var.sym_type):
+        return types.nptype_from_builtin(var.sym_type)(value)
+    return value
+
+
+class ReferenceExecutor:
+    """
+    Execute a function of a PyMIL ``Program`` on concrete NumPy inputs, without Core ML.
+
+    It's a slow but platform independent reference, which is useful to check conversions
+    numerically, or to compute the activations of a model on Linux.
+
+    The ops of each block run in program order, which is a topological order. Every intermediate
+    value is freed once the last op consuming it (including the ops of nested blocks) has run.
+    Each op is computed by the kernel registered for its type by ``register_kernel``, or else by
+    its ``value_inference``. Vars whose value is known at compile time (such as the outputs of
+    ``const``) are used as is, and the values of ``constexpr_`` ops are materialized once and
+    cached.
+
+    Examples
+    --------
+    .. sourcecode:: python
+
+        from coremltools.converters.mil.mil.executor import ReferenceExecutor
+
+        executor = ReferenceExecutor(prog)
+        outputs = executor.predict({"x": np.random.rand(1, 3, 224, 224).astype(np.float32)})
+
+        # For a stateful program.
+        state = executor.make_state()
+        outputs = executor.predict({"x": x}, state=state)
+    """
+
+    def __init__(self, prog: Program, function_name: str = "main"):
+        if function_name not in prog.functions:
+            raise ValueError(
+                f"Function {function_name} not found in the program. "
+                f"Available functions: {list(prog.functions.keys())}"
+            )
+        self.function = prog.functions[function_name]
+        self._schedules: Dict[Block, _BlockSchedule] = {}
+        self._constexpr_vals: Dict[Var, np.ndarray] = {}
+        self._env: Dict[Var, Any] = {}
+        self._callback = None
+
+    def make_state(self) -> Dict[str, np.ndarray]:
+        """
+        Create the zero-initialized states of the function, as a dict from the name of each state
+        input to its value, which ``predict`` updates in place.
+        """
+        state = {}
+        for name, var in self.function.inputs.items():
+            if not types.is_state(var.sym_type):
+                continue
+            if any_symbolic(var.shape):
+                raise ValueError(f"State {name} has a symbolic shape {var.shape}.")
+            state[name] = np.zeros(var.shape, dtype=types.nptype_from_builtin(var.dtype))
+        return state
+
+    def predict(
+        self,
+        data: Dict[str, np.ndarray],
+        state: Optional[Dict[str, np.ndarray]] = None,
+        callback: Optional[Callable[[Var, Any], None]] = None,
+    ) -> Dict[str, Any]:
+        """
+        Execute the function.
+
+        Parameters
+        ----------
+        data: Dict[str, np.ndarray]
+            The value of each (non-state) input of the function, by name.
+
+        state: Dict[str, np.ndarray] (Optional)
+            The value of each state input of the function, by name, such as created by
+            ``make_state``. The values are updated in place by the ``coreml_update_state`` ops.
+
+        callback: Callable[[Var, Any], None] (Optional)
+            Called with each var computed by an op and its value, including the vars in nested
+            blocks, for example to record activation statistics. The value may be freed after the
+            call, so it must be copied to be kept.
+
+        Returns
+        -------
+        Dict[str, Any]
+            The value of each output of the function, by name.
+        """
+        self._env = {}
+        self._callback = callback
+        try:
+            for name, var in self.function.inputs.items():
+                if types.is_state(var.sym_type):
+                    if state is None or name not in state:
+                        raise ValueError(f"The value of state {name} is not provided.")
+                    value = state[name]
+                    expected_dtype = types.nptype_from_builtin(var.dtype)
+                    if not isinstance(value, np.ndarray) or value.dtype != expected_dtype:
+                        raise ValueError(
+                            f"State {name} must be a numpy array of dtype "
+                            f"{np.dtype(expected_dtype)}."
+                        )
+                else:
+                    if name not in data:
+                        raise ValueError(f"The value of input {name} is not provided.")
+                    value = _to_var_value(var, data[name])
+                    if types.is_tensor(var.sym_type) and value.ndim != var.rank:
+                        raise ValueError(
+                            f"Input {name} must have rank {var.rank}, but got shape {value.shape}."
+                        )
+                self._env[var] = value
+
+            outputs = self.run_block(self.function)
+            return {var.name: value for var, value in zip(self.function.outputs, outputs)}
+        finally:
+            self._env = {}
+            self._callback = None
+
+    def run_block(self, block: Block, input_values: Sequence[Any] = ()) -> List[Any]:
+        """
+        Execute a block on the values of its inputs and return the values of its outputs. It's
+        used by the kernels of the ops with nested blocks, such as ``cond`` and ``while_loop``.
+        """
+        if block not in self._schedules:
+            self._schedules[block] = _BlockSchedule(block)
+        schedule = self._schedules[block]
+
+        if not isinstance(block, Function):
+            for var, value in zip(block.inputs, input_values):
+                self._env[var] = value
+        for op, vars_to_free in zip(schedule.operations, schedule.vars_to_free):
+            self._execute_op(op)
+            for var in vars_to_free:
+                self._env.pop(var, None)
+
+        outputs = [self.get_value(var) for var in block.outputs]
+        for var in schedule.local_vars:
+            self._env.pop(var, None)
+        return outputs
+
+    def get_value(self, var: Var) -> Any:
+        """Get the value of a var visible to the op being executed."""
+        if var in self._env:
+            return self._env[var]
+        if var.val is not None:
+            return var.val
+        raise ValueError(f"The value of var {var.name} is not computed or was already freed.")
+
+    def _execute_op(self, op: Operation):
+        outputs = op.outputs
+        if all(var.val is not None for var in outputs):
+            values = [var.val for var in outputs]
+        elif op.op_type.startswith("constexpr_"):
+            if outputs[0] not in self._constexpr_vals:
+                values = op.materialized_val_inference()
+                values = values if isinstance(values, tuple) else (values,)
+                for var, value in zip(outputs, values):
+                    self._constexpr_vals[var] = _to_var_value(var, value)
+            values = [self._constexpr_vals[var] for var in outputs]
+        else:
+            inputs = {}
+            for name, var in op.inputs.items():
+                if isinstance(var, (list, tuple)):
+                    inputs[name] = tuple(self.get_value(v) for v in var)
+                else:
+                    inputs[name] = self.get_value(var)
+            values = self._compute_op(op, inputs)
+            if len(outputs) == 1:
+                values = (values,)
+            values = [_to_var_value(var, value) for var, value in zip(outputs, values)]
+
+        for var, value in zip(outputs, values):
+            self._env[var] = value
+            if self._callback is not None:
+                self._callback(var, value)
+
+    def _compute_op(self, op: Operation, inputs: Dict[str, Any]) -> Any:
+        kernel = _KERNEL_REGISTRY.get_kernel(op.op_type)
+        if kernel is not None:
+            return kernel(self, op, inputs)
+
+        bound_op = bind_inputs(op, inputs)
+        try:
+            if hasattr(bound_op, "materialized_val_inference"):
+                values = bound_op.materialized_val_inference()
+            else:
+                values = bound_op.value_inference()
+        except NotImplementedError as e:
+            raise NotImplementedError(
+                f"Op {op.name} of type {op.op_type} can't be executed, since it has no "
+                "value_inference. Please register a kernel for it with "
+                "coremltools.converters.mil.mil.executor.register_kernel."
+            ) from e
+        if values is None:
+            raise ValueError(f"The value inference of op {op.name} ({op.op_type}) failed.")
+        return values
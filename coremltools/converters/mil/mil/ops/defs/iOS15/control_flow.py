@@ -4,6 +4,7 @@
 #  found in the LICENSE.txt file or at https://opensource.org/licenses/BSD-3-Clause
 
 import copy
+import hashlib
 
 import numpy as np
 
@@ -166,6 +167,8 @@ class Const(Operation):
     def __init__(self, **kwargs):
         super(Const, self).__init__(**kwargs)
         self._weight_id = None
+        # (value, digest of the value) cached by content_digest
+        self._content_digest = None
 
     def type_inference(self):
         builtin_type, _ = self._get_type_val(self.val.val)
@@ -239,6 +242,40 @@ class Const(Operation):
         assert self._weight_id is None, f"cannot set {self.name} weight_id twice."
         self._weight_id = val
 
+    @property
+    def content_digest(self) -> str:
+        """
+        Digest of the dtype, shape and full content of the const value, so that consts with the
+        same digest hold identical values. The digest is computed once, and computed again only
+        if the value of the const is replaced. Once digested, the value is made read-only, so
+        that writing into it in place raises an error rather than leaving the digest stale.
+        """
+        value = self.outputs[0].val
+        if self._content_digest is None or self._content_digest[0] is not value:
+            if isinstance(value, np.ndarray):
+                value.setflags(write=False)
+            self._content_digest = (value, self._compute_content_digest(value))
+        return self._content_digest[1]
+
+    @staticmethod
+    def _compute_content_digest(value) -> str:
+        hasher = hashlib.blake2b()
+        if not isinstance(value, (np.ndarray, np.generic)):
+            hasher.update(f"{type(value).__name__}:{value}".encode())
+            return hasher.hexdigest()
+
+        # The builtin type distinguishes the sub-byte dtypes, which share the numpy dtype.
+        dtype_str = builtin_to_string(numpy_type_to_builtin_type(value.dtype))
+        hasher.update(f"{dtype_str}{value.shape}".encode())
+        value = np.asarray(value)
+        if value.flags.c_contiguous:
+            hasher.update(value.reshape(-1).view(np.uint8))
+        else:
+            # Hash slice by slice, to not copy the whole value into a contiguous buffer.
+            for value_slice in value:
+                hasher.update(np.ascontiguousarray(value_slice).reshape(-1).view(np.uint8))
+        return hasher.hexdigest()
+
 
 @register_op
 class const(Const):
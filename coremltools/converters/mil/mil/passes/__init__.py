@@ -3,7 +3,8 @@
 #  Use of this source code is governed by a BSD-3-clause license that can be
 #  found in the LICENSE.txt file or at https://opensource.org/licenses/BSD-3-Clause
 
-# Import all frontend/backend passes to make sure they got registered.
+# Import all backend passes to make sure they got registered. The frontend passes are registered
+# on first lookup by PASS_REGISTRY, so that the frontends (and their frameworks) are imported lazily.
 from coremltools.converters.mil.backend.mil.passes import (
     adjust_io_to_supported_types,
     fuse_activation_silu,
@@ -20,16 +21,6 @@ from coremltools.converters.mil.backend.nn.passes import (
     handle_unused_inputs,
     mlmodel_passes,
 )
-from coremltools.converters.mil.frontend.tensorflow2.ssa_passes import remove_vacuous_cond
-from coremltools.converters.mil.frontend.tensorflow.ssa_passes import (
-    backfill_make_list_elem_type,
-    expand_tf_lstm,
-    tf_lstm_to_core_lstm,
-)
-from coremltools.converters.mil.frontend.torch.ssa_passes import (
-    torch_tensor_assign_to_core,
-    torch_upsample_to_core_upsample,
-)
 from coremltools.converters.mil.mil.passes.defs import (
     cleanup,
     lower_complex_dialect_ops,
@@ -3,12 +3,11 @@
 #  Use of this source code is governed by a BSD-3-clause license that can be
 #  found in the LICENSE.txt file or at https://opensource.org/licenses/BSD-3-Clause
 
-import hashlib
 from typing import Dict, List, Tuple, Union
 
 import numpy as np
 
-from coremltools.converters.mil.mil import Block, ListVar, Program, Var, types
+from coremltools.converters.mil.mil import Block, ListVar, Program, Var
 from coremltools.converters.mil.mil.passes.graph_pass import AbstractGraphPass
 from coremltools.converters.mil.mil.passes.helper import block_context_manager
 from coremltools.converters.mil.mil.passes.pass_registry import register_pass
@@ -55,13 +54,6 @@ class const_deduplication(AbstractGraphPass):
     # const with size < _const_threshold will not be deduplicated
     _const_threshold = 100
 
-    # length of the number value hashkey
-    LENGTH_OF_HASHKEY = 100
-    DTYPE2ATOL = {
-        types.fp16: 6e-8,
-        types.fp32: 1e-12,
-    }
-
     @property
     def const_threshold(self) -> int:
         return const_deduplication._const_threshold
@@ -203,8 +195,9 @@ class const_deduplication(AbstractGraphPass):
         """
         unique2duplicates: Dict[Var, List[Var]] = {}
 
-        # instead of brute-force C_N^2 comparison, use a hash map to be O(N)
-        constant_dict: Dict[Tuple[str, types.type, Tuple[int], str], List[Var]] = {}
+        # The content digest covers the dtype, shape and full value of a const, and is cached on
+        # the const op, so a duplicate is found by a single dict lookup.
+        constant_dict: Dict[Tuple[str, ...], Var] = {}
         for block in blocks:
             for op in list(block.operations):
                 if op.op_type != "const":
@@ -217,39 +210,15 @@ class const_deduplication(AbstractGraphPass):
                 if not const_deduplication.should_be_deduplicated(constant_var.val):
                     continue
 
-                shape = constant_var.shape
-                dtype = constant_var.dtype
-                value = constant_var.val
-
-                hash = hashlib.sha1(
-                    np.ascontiguousarray(value.reshape(-1)[: const_deduplication.LENGTH_OF_HASHKEY])
-                ).hexdigest()
                 if hasattr(op, "weight_key"):
-                    key = (op.weight_key, dtype, shape, hash)
+                    key = (op.weight_key, op.content_digest)
                 else:
-                    key = (dtype, shape, hash)
+                    key = (op.content_digest,)
 
                 if key not in constant_dict:
-                    constant_dict[key] = [constant_var]
+                    constant_dict[key] = constant_var
                     unique2duplicates[constant_var] = []
                 else:
-                    hash_collisions = constant_dict[key]
-
-                    existing_constant_var = None
-                    for var in hash_collisions:
-                        if np.allclose(
-                            value,
-                            var.val,
-                            rtol=0.0,
-                            atol=const_deduplication.DTYPE2ATOL.get(dtype, 1e-12),
-                        ):
-                            existing_constant_var = var
-                            break
-
-                    if existing_constant_var is None:
-                        hash_collisions.append(constant_var)
-                        unique2duplicates[constant_var] = []
-                    else:
-                        unique2duplicates[existing_constant_var].append(constant_var)
+                    unique2duplicates[constant_dict[key]].append(constant_var)
 
         return unique2duplicates
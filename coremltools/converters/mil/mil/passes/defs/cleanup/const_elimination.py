@@ -32,6 +32,7 @@ class const_elimination(AbstractGraphPass):
     - ``skip_const_by_size``: Skip folding ``const`` ops that have larger number of elements than a threshold.
     """
 
+    _is_idempotent = True
     _skip_const_by_size = None
 
     @property
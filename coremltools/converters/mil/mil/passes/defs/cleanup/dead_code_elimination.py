@@ -44,6 +44,8 @@ class dead_code_elimination(AbstractGraphPass):
     its input ops (``%tx_0`` and ``%ty_0``) are eliminated in this pass.
     """
 
+    _is_idempotent = True
+
     def apply(self, prog: Program):
         for f in prog.functions.values():
             self._dead_code_elimination_block(f)
@@ -7,7 +7,7 @@
 import numpy as np
 
 from coremltools.converters.mil.mil.passes.graph_pass import AbstractGraphPass
-from coremltools.converters.mil.mil.passes.helper import block_context_manager
+from coremltools.converters.mil.mil.passes.helper import WorklistRewriteDriver
 from coremltools.converters.mil.mil.passes.pass_registry import register_pass
 
 
@@ -31,6 +31,8 @@ class noop_elimination(AbstractGraphPass):
         ...
     """
 
+    _is_idempotent = True
+
     _SUPPORTED_OPS = {
         "identity",
         "add",
@@ -216,26 +218,14 @@ class noop_elimination(AbstractGraphPass):
 
         return None
 
-    @block_context_manager
+    @staticmethod
+    def _try_to_remove_noop(op):
+        if len(op.blocks) > 0:
+            return False
+        remove_fn = noop_elimination._match_pattern(op)
+        return remove_fn is not None and remove_fn(op)
+
     def _noop_elimination_block_wrapper(self, block):
-        def _noop_elimination_block(block):
-            status = False
-            for op in list(block.operations):
-                if op.enclosing_block is None:
-                    continue
-
-                for b in op.blocks:
-                    block_changed = True
-                    while block_changed:
-                        block_changed = _noop_elimination_block(b)
-                if len(op.blocks) > 0:
-                    continue
-
-                remove_fn = noop_elimination._match_pattern(op)
-                if remove_fn is not None and remove_fn(op):
-                    status = True
-            return status
-
-        block_changed = True
-        while block_changed:
-            block_changed = _noop_elimination_block(block)
+        driver = WorklistRewriteDriver()
+        driver.add_pattern(self._try_to_remove_noop)
+        driver.rewrite_block(block)
@@ -14,6 +14,7 @@ from coremltools.converters.mil.mil import Builder as mb
 from coremltools.converters.mil.mil import Operation, Program, types
 from coremltools.converters.mil.mil.passes.graph_pass import AbstractGraphPass
 from coremltools.converters.mil.mil.passes.helper import (
+    WorklistRewriteDriver,
     _check_child_op_type,
     _check_no_output_connection,
     block_context_manager,
@@ -573,9 +574,7 @@ class fuse_conv_bias(AbstractGraphPass):
 
     def apply(self, prog):
         for f in prog.functions.values():
-            block_changed = True
-            while block_changed:
-                block_changed = self._fuse_conv_bias_block(f)
+            self._fuse_conv_bias_block(f)
 
     def _match_pattern(self, op):
         if op.op_type == "conv" or op.op_type == "conv_transpose":
@@ -812,32 +811,23 @@ class fuse_conv_bias(AbstractGraphPass):
             return True
         return False
 
-    @block_context_manager
-    def _fuse_conv_bias_block(self, block):
-        fusion_occurred = False
-        for op in list(block.operations):
-            if op.enclosing_block is None:
-                continue
-
-            for b in op.blocks:
-                block_changed = True
-                while block_changed:
-                    block_changed = self._fuse_conv_bias_block(b)
-            if len(op.blocks) > 0:
-                # This op can't be conv or conv_transpose
-                continue
+    def _try_to_fuse_conv_bias(self, op):
+        if len(op.blocks) > 0:
+            # This op can't be conv or conv_transpose
+            return False
 
-            # pattern 1 : conv + add/sub
-            add_op = self._match_pattern(op)
-            if add_op is not None:
-                if self._try_to_transform(op, add_op):
-                    fusion_occurred = True
+        # pattern 1 : conv + add/sub
+        add_op = self._match_pattern(op)
+        if add_op is not None:
+            return self._try_to_transform(op, add_op)
 
-            # pattern 2 : conv + transpose + add/sub
-            elif self._try_to_transform_transpose_pattern(op, block):
-                fusion_occurred = True
+        # pattern 2 : conv + transpose + add/sub
+        return self._try_to_transform_transpose_pattern(op, op.enclosing_block)
 
-        return fusion_occurred
+    def _fuse_conv_bias_block(self, block):
+        driver = WorklistRewriteDriver()
+        driver.add_pattern(self._try_to_fuse_conv_bias)
+        return driver.rewrite_block(block)
 
 
 @register_pass(namespace="common")
@@ -14,7 +14,11 @@ from coremltools.converters.mil.mil import Block
 from coremltools.converters.mil.mil import Builder as mb
 from coremltools.converters.mil.mil import Function, Operation
 from coremltools.converters.mil.mil.passes.graph_pass import AbstractGraphPass
-from coremltools.converters.mil.mil.passes.helper import _check_child_op_type, block_context_manager
+from coremltools.converters.mil.mil.passes.helper import (
+    WorklistRewriteDriver,
+    _check_child_op_type,
+    block_context_manager,
+)
 from coremltools.converters.mil.mil.passes.pass_registry import register_pass
 from coremltools.converters.mil.mil.types.symbolic import any_symbolic
 from coremltools.converters.mil.mil.types.type_mapping import (
@@ -153,20 +157,10 @@ class merge_consecutive_transposes(AbstractGraphPass):
             return True
         return False
 
-    @block_context_manager
     def _merge_transposes_in_block(self, block):
-        def help_merge_transpose_ops(block):
-            fusion_happens = False
-            for op in list(block.operations):
-                if op.enclosing_block is None:
-                    continue
-                if self._match_and_replace_pattern(block, op):
-                    fusion_happens = True
-            return fusion_happens
-
-        block_changed = True
-        while block_changed:
-            block_changed = help_merge_transpose_ops(block)
+        driver = WorklistRewriteDriver(recurse_into_nested_blocks=False)
+        driver.add_pattern(lambda op: self._match_and_replace_pattern(block, op))
+        driver.rewrite_block(block)
 
 
 @register_pass(namespace="common")
@@ -203,20 +197,10 @@ class merge_consecutive_relus(AbstractGraphPass):
             return True
         return False
 
-    @block_context_manager
     def _merge_relus_in_block(self, block):
-        def help_merge_relu_ops(block):
-            fusion_happens = False
-            for op in list(block.operations):
-                if op.enclosing_block is None:
-                    continue
-                if self._match_and_replace_pattern(block, op):
-                    fusion_happens = True
-            return fusion_happens
-
-        block_changed = True
-        while block_changed:
-            block_changed = help_merge_relu_ops(block)
+        driver = WorklistRewriteDriver(recurse_into_nested_blocks=False)
+        driver.add_pattern(lambda op: self._match_and_replace_pattern(block, op))
+        driver.rewrite_block(block)
 
 
 @register_pass(namespace="common")
@@ -267,47 +251,36 @@ class merge_consecutive_reshapes(AbstractGraphPass):
 
         return res
 
-    @block_context_manager
-    def _merge_consecutive_reshapes_block(self, block):
-        @block_context_manager
-        def help_merge_consecutive_reshapes_block(block):
-            fusion_happens = False
-            for op in list(block.operations):
-                if op.enclosing_block is None:
-                    continue
-
-                for b in op.blocks:
-                    block_changed = True
-                    while block_changed:
-                        block_changed = help_merge_consecutive_reshapes_block(b)
-                # move on to the next op if this op is not reshape
-                if op.op_type != "reshape":
-                    continue
+    def _try_to_merge_reshapes(self, op):
+        # move on to the next op if this op is not reshape
+        if op.op_type != "reshape":
+            return False
 
-                reshape_ops = self._match_pattern(op)
-                # merge the list of consecutive reshape ops
-                if len(reshape_ops) > 1:
-                    # create a new reshape op
-                    reshape_out = mb.reshape(
-                        x=reshape_ops[0].x,
-                        shape=reshape_ops[-1].shape,
-                        name=reshape_ops[-1].outputs[0].name,
-                        before_op=reshape_ops[-1],
-                    )
-                    # replace the consecutive reshape ops with the new reshape op
-                    reshape_ops[-1].enclosing_block.replace_uses_of_var_after_op(
-                        anchor_op=reshape_ops[-1],
-                        old_var=reshape_ops[-1].outputs[0],
-                        new_var=reshape_out,
-                    )
-                    reshape_ops[-1].enclosing_block.remove_ops(reshape_ops)
-                    fusion_happens = True
+        reshape_ops = self._match_pattern(op)
+        # merge the list of consecutive reshape ops
+        if len(reshape_ops) <= 1:
+            return False
 
-            return fusion_happens
+        # create a new reshape op
+        reshape_out = mb.reshape(
+            x=reshape_ops[0].x,
+            shape=reshape_ops[-1].shape,
+            name=reshape_ops[-1].outputs[0].name,
+            before_op=reshape_ops[-1],
+        )
+        # replace the consecutive reshape ops with the new reshape op
+        reshape_ops[-1].enclosing_block.replace_uses_of_var_after_op(
+            anchor_op=reshape_ops[-1],
+            old_var=reshape_ops[-1].outputs[0],
+            new_var=reshape_out,
+        )
+        reshape_ops[-1].enclosing_block.remove_ops(reshape_ops)
+        return True
 
-        block_changed = True
-        while block_changed:
-            block_changed = help_merge_consecutive_reshapes_block(block)
+    def _merge_consecutive_reshapes_block(self, block):
+        driver = WorklistRewriteDriver()
+        driver.add_pattern(self._try_to_merge_reshapes)
+        driver.rewrite_block(block)
 
 class CastOptimizationNode:
     def __init__(self, op_type, match_criterion=None):
@@ -405,6 +378,7 @@ class cast_optimization(AbstractGraphPass):
     For more examples, please see the unittests that start with prefix ``TestCastOptimization`` in ``test_passes.py``.
     """
 
+    _is_idempotent = True
     _num_of_visited_ops = 0  # Testing purpose, making sure the algorithm performs in O(N)
 
     def apply(self, prog):
@@ -46,14 +46,28 @@ class AbstractGraphPass(ABC):
     Each graph pass can also implement their own supported options.
     See examples of `skip_ops_by_type` in `add_fp16_cast` and `skip_const_by_size` in
     `const_elimination` about how to support new options in each pass.
+
+    A graph pass that sets `_is_idempotent` to True declares that running it again right after
+    itself never changes the program. The `PassPipelineManager` skips re-running such a pass if
+    the program has not been mutated since its last run.
     """
 
-    def __call__(self, prog: Program):
-        if not prog.skip_all_passes:
+    _is_idempotent = False
+
+    def __call__(self, prog: Program) -> bool:
+        """
+        Apply the pass to the program, and return True if the pass mutated the program, that is,
+        if any block of the program had ops inserted, rewired or removed, or had its inputs or
+        outputs changed.
+        """
+        if prog.skip_all_passes:
+            return False
+        with prog.track_mutated_blocks() as mutated_blocks:
             # we use the scope context manager to populate the graph pass information to the ops
             # constructed by the pass.
             with mb.scope(ScopeInfo(source=ScopeSource.COREMLTOOLS_GRAPH_PASS, data=[str(self)])):
                 self.apply(prog)
+        return len(mutated_blocks) > 0
 
     def __str__(self):
         return type(self).__name__
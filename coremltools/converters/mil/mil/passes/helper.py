@@ -3,11 +3,13 @@
 #  Use of this source code is governed by a BSD-3-clause license that can be
 #  found in the LICENSE.txt file or at https://opensource.org/licenses/BSD-3-Clause
 
+from collections import deque
 from typing import Callable, List, Optional
 
 import numpy as np
 
 from coremltools.converters.mil.mil import Block, Operation
+from coremltools.converters.mil.mil import block as _block
 from coremltools.converters.mil.mil.passes.graph_pass import AbstractGraphPass
 
 
@@ -66,6 +68,131 @@ def block_context_manager(_func: Optional[Callable] = None):
     return wrapper
 
 
+class WorklistRewriteDriver:
+    """
+    Drive match-and-replace callbacks over a block until no more rewrites fire.
+
+    The classic way to write a fusion pass is to sweep ``list(block.operations)`` from the top,
+    and to repeat the sweep until nothing changes, which costs O(N) per fired rewrite. Instead,
+    this driver visits every op once, and afterwards only re-visits the ops that are touched by
+    a rewrite: the inserted ops, the ops whose inputs got rewired, and their direct producers and
+    consumers. As a result, a pass runs in time roughly linear to the number of ops.
+
+    A rewrite callback takes an ``Operation`` and returns ``True`` if it mutated the graph.
+    Callbacks are registered with ``add_pattern`` and are tried in registration order. The
+    ``block`` a callback receives through ``op.enclosing_block`` is the current block of the
+    builder, so ops can be constructed with ``mb.xxx(..., before_op=...)`` inside the callback.
+
+    Example:
+
+    .. sourcecode:: python
+
+        def _fuse_relu_relu(op):
+            if op.op_type != "relu" or not _check_child_op_type(op, "relu"):
+                return False
+            child_op = list(op.outputs[0].child_ops)[0]
+            if op.enclosing_block.try_replace_uses_of_var_after_op(
+                anchor_op=child_op, old_var=child_op.outputs[0], new_var=op.outputs[0]
+            ):
+                op.enclosing_block.remove_ops([child_op])
+                return True
+            return False
+
+        driver = WorklistRewriteDriver()
+        driver.add_pattern(_fuse_relu_relu)
+        block_changed = driver.rewrite_block(block)
+    """
+
+    def __init__(self, recurse_into_nested_blocks: bool = True):
+        """
+        recurse_into_nested_blocks: If True, ops in the nested blocks (e.g. in ``cond`` and
+        ``while_loop``) are rewritten as well.
+        """
+        self._patterns: List[Callable[[Operation], bool]] = []
+        self._recurse_into_nested_blocks = recurse_into_nested_blocks
+
+    def add_pattern(self, rewrite_fn: Callable[[Operation], bool]) -> None:
+        """Registers a match-and-replace callback."""
+        self._patterns.append(rewrite_fn)
+
+    def _collect_ops(self, block: Block, ops: List[Operation]) -> None:
+        # Nested blocks are visited before their outer op, which mirrors how the passes
+        # traditionally handle control flow.
+        for op in block.operations:
+            if self._recurse_into_nested_blocks:
+                for b in op.blocks:
+                    self._collect_ops(b, ops)
+            ops.append(op)
+
+    def _is_in_scope(self, root: Block, op: Operation) -> bool:
+        block = op.enclosing_block
+        if block is root:
+            return True
+        if not self._recurse_into_nested_blocks:
+            return False
+        while block is not None and block.outer_op is not None:
+            block = block.outer_op.enclosing_block
+            if block is root:
+                return True
+        return False
+
+    def rewrite_block(self, block: Block) -> bool:
+        """
+        Applies the registered patterns to ``block`` until a fixed point is reached.
+        Returns True if any rewrite happened.
+        """
+        if len(self._patterns) == 0:
+            return False
+
+        initial_ops = []
+        self._collect_ops(block, initial_ops)
+        worklist = deque(initial_ops)
+        enqueued = set(initial_ops)
+
+        def enqueue(op):
+            if op is not None and op not in enqueued:
+                enqueued.add(op)
+                worklist.append(op)
+
+        def on_op_mutation(_, op):
+            if op is None:
+                return
+            enqueue(op)
+            for v in op.get_flattened_inputs():
+                enqueue(v.op)
+            # A newly inserted op has no outputs until its type inference is done.
+            for v in op.outputs or []:
+                for child_op in v.child_ops:
+                    enqueue(child_op)
+
+        block_changed = False
+        _block.OP_MUTATION_LISTENERS.append(on_op_mutation)
+        try:
+            with block:
+                while len(worklist) > 0:
+                    op = worklist.popleft()
+                    enqueued.discard(op)
+                    # The op may have been removed, or may live outside of the block to rewrite.
+                    if op.enclosing_block is None or not self._is_in_scope(block, op):
+                        continue
+
+                    # Make the op's block the current one without re-entering it, since exiting a
+                    # block re-propagates the non-replaceable vars, which is done once by the
+                    # outermost ``with block`` instead.
+                    _block.BLOCK_STACK.append(op.enclosing_block)
+                    try:
+                        for rewrite_fn in self._patterns:
+                            if rewrite_fn(op):
+                                block_changed = True
+                                break
+                    finally:
+                        _block.BLOCK_STACK = _block.BLOCK_STACK[:-1]
+        finally:
+            _block.OP_MUTATION_LISTENERS.remove(on_op_mutation)
+
+        return block_changed
+
+
 def _check_child_op_type(op, child_op_type):
     """
     :param op: operation
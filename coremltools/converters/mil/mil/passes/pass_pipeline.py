@@ -10,7 +10,7 @@ from typing import Dict, List, Optional, Set, Text, Union
 from tqdm import tqdm
 
 from coremltools import _logger as logger
-from coremltools.converters._profile_utils import _profile
+from coremltools.converters._profile_utils import _profile, _profile_stage
 from coremltools.converters.mil.mil import Program
 from coremltools.converters.mil.mil.passes.graph_pass import PassOption
 from coremltools.converters.mil.mil.passes.helper import classproperty as _classproperty
@@ -278,8 +278,35 @@ class PassPipeline:
             pass_name="common::const_elimination",
             options={"skip_const_by_size": "100000"},
         )
+
+    Set how the program is validated between passes:
+
+    .. sourcecode:: python
+
+        pipeline = ct.PassPipeline.DEFAULT
+        # Fully validate the program after every pass, which is the slowest but pinpoints
+        # the pass that breaks the program.
+        pipeline.validation_policy = "full"
+        # Only re-validate the blocks mutated by each pass (default).
+        pipeline.validation_policy = "dirty_only"
+        # Only validate the program once all passes have run.
+        pipeline.validation_policy = "final_only"
+
+    In all policies, the program is fully validated before the first and after the last pass.
+
+    Passes that are idempotent (such as ``common::const_elimination`` and
+    ``common::dead_code_elimination``) are skipped if the program has not been mutated since their
+    last run. Inspect which passes are run or skipped after the pipeline is applied:
+
+    .. sourcecode:: python
+
+        pipeline = ct.PassPipeline.DEFAULT
+        mlmodel = ct.convert(model, pass_pipeline=pipeline)
+        print(pipeline.report)
     """
 
+    _VALIDATION_POLICIES = ("full", "dirty_only", "final_only")
+
     # TODO: rdar://121242189 ([Infra] Have a better way to handle predefined pass pipeline)
     _PIPELINE_NAME_TO_PASSES = {
         "default": _COMMON_PASSES + _CLEANUP_PASSES,
@@ -304,6 +331,8 @@ class PassPipeline:
         self._pass_names: List[Text] = pass_names
         self._pass_options: Dict[Text, List[PassOption]] = dict()
         self._pipeline_name = pipeline_name
+        self._validation_policy = "dirty_only"
+        self._report: Optional[PassPipelineReport] = None
 
     def __str__(self):
         return self._pipeline_name
@@ -327,6 +356,24 @@ class PassPipeline:
     def pipeline_name(self, pipeline_name: Text):
         self._pipeline_name = pipeline_name
 
+    @property
+    def validation_policy(self) -> Text:
+        return self._validation_policy
+
+    @validation_policy.setter
+    def validation_policy(self, validation_policy: Text):
+        if validation_policy not in self._VALIDATION_POLICIES:
+            raise ValueError(
+                f"Invalid validation_policy {validation_policy}. "
+                f"Supported policies: {self._VALIDATION_POLICIES}"
+            )
+        self._validation_policy = validation_policy
+
+    @property
+    def report(self) -> Optional[PassPipelineReport]:
+        """The report of the last time this pipeline was applied, or None if it never was."""
+        return self._report
+
     def append_pass(self, pass_name: Text):
         """Append a pass at the end of the current passes in the pipeline."""
         if pass_name not in PASS_REGISTRY:
@@ -378,10 +425,12 @@ class PassPipeline:
         """
         Convenience method for setting options from another pipeline's options.
         For each option in other_pipeline, set it if it's also applicable to this pipeline.
+        The validation policy of other_pipeline is adopted as well.
         """
         for pass_name, options in other_pipeline.get_all_options().items():
             if pass_name in self.passes:
                 self._pass_options[pass_name] = options
+        self._validation_policy = other_pipeline.validation_policy
 
     def validate(self):
         """Validates the pipeline (including options)."""
@@ -460,6 +509,34 @@ class PassPipeline:
         pipeline.set_options("compression::prune_weights", {"config": config})
         return pipeline
 
+class PassPipelineReport:
+    """
+    Records, for each pass of a pipeline applied to a program, whether the pass was run or skipped
+    and whether it mutated the program.
+    """
+
+    def __init__(self, pipeline_name: Text):
+        self.pipeline_name = pipeline_name
+        self.records: List[Dict[Text, Union[Text, bool]]] = []
+
+    def __str__(self):
+        lines = [f"Report of the {self.pipeline_name} pipeline:"]
+        for record in self.records:
+            if record["skipped"]:
+                status = "skipped"
+            else:
+                status = "run, mutated" if record["mutated"] else "run, unchanged"
+            lines.append(f"  {record['pass_name']}: {status}")
+        return "\n".join(lines)
+
+    def add_record(self, pass_name: Text, skipped: bool, mutated: bool):
+        self.records.append({"pass_name": pass_name, "skipped": skipped, "mutated": mutated})
+
+    @property
+    def skipped_passes(self) -> List[Text]:
+        return [record["pass_name"] for record in self.records if record["skipped"]]
+
+
 class PassPipelineManager:
     @staticmethod
     @_profile
@@ -471,36 +548,73 @@ class PassPipelineManager:
         pass_pipeline.validate()
         prog.validate()
 
-        logger.debug(f"Program before {pass_pipeline} pipeline:\n{prog}")
-        for pass_name in tqdm(
-            pass_pipeline.passes,
-            desc=f"Running MIL {pass_pipeline} pipeline",
-            unit=" passes",
-        ):
-            logger.debug(f'Performing pass: "{pass_name}"')
-            pass_options = pass_pipeline.get_options(pass_name)
-            if pass_options is not None:
-                logger.debug(
-                    f"The graph pass options for {pass_name} is set to {pass_options}. "
-                    f"It will change the pass behavior. Make sure the option is intended."
-                )
-            if pass_name.startswith("experimental::"):
-                logger.warning(
-                    f"The graph pass {pass_name} is under experimental development, "
-                    f"and the API could be changed in the future."
-                )
-            graph_pass = PASS_REGISTRY[pass_name]
-            graph_pass.set_options(pass_options)
-
-            try:
-                graph_pass(prog)
-            except Exception as e:
-                logger.error(
-                    f"\n\nERROR - '{pass_name}' graph pass produces the following error:\n"
-                )
-                raise e  # re-raise exception
+        validation_policy = pass_pipeline.validation_policy
+        report = PassPipelineReport(pass_pipeline.pipeline_name)
+        pass_pipeline._report = report
+        # The number of passes that have mutated the program so far, and its value right after
+        # the last run of each pass, to skip an idempotent pass if nothing changed since then.
+        num_mutating_passes = 0
+        pass_name_to_last_run = dict()
 
-            # After dead code elimination, we should check if the program misses any essential scope info
-            check_essential_scope = pass_name == "common::dead_code_elimination"
-            prog.validate(check_essential_scope=check_essential_scope)
+        logger.debug(f"Program before {pass_pipeline} pipeline:\n{prog}")
+        with _profile_stage(
+            f"{pass_pipeline} pipeline", category="pipeline", prog=prog
+        ), prog.track_mutated_blocks() as mutated_blocks:
+            for pass_name in tqdm(
+                pass_pipeline.passes,
+                desc=f"Running MIL {pass_pipeline} pipeline",
+                unit=" passes",
+            ):
+                graph_pass = PASS_REGISTRY[pass_name]
+                if (
+                    getattr(graph_pass, "_is_idempotent", False)
+                    and pass_name_to_last_run.get(pass_name) == num_mutating_passes
+                ):
+                    logger.debug(
+                        f'Skipping pass: "{pass_name}", since the program has not been mutated '
+                        f"since its last run."
+                    )
+                    report.add_record(pass_name, skipped=True, mutated=False)
+                    continue
+                logger.debug(f'Performing pass: "{pass_name}"')
+                pass_options = pass_pipeline.get_options(pass_name)
+                if pass_options is not None:
+                    logger.debug(
+                        f"The graph pass options for {pass_name} is set to {pass_options}. "
+                        f"It will change the pass behavior. Make sure the option is intended."
+                    )
+                if pass_name.startswith("experimental::"):
+                    logger.warning(
+                        f"The graph pass {pass_name} is under experimental development, "
+                        f"and the API could be changed in the future."
+                    )
+                graph_pass.set_options(pass_options)
+
+                try:
+                    with _profile_stage(pass_name, category="pass", prog=prog):
+                        graph_pass(prog)
+                except Exception as e:
+                    logger.error(
+                        f"\n\nERROR - '{pass_name}' graph pass produces the following error:\n"
+                    )
+                    raise e  # re-raise exception
+
+                mutated = len(mutated_blocks) > 0
+                if mutated:
+                    num_mutating_passes += 1
+                pass_name_to_last_run[pass_name] = num_mutating_passes
+                report.add_record(pass_name, skipped=False, mutated=mutated)
+
+                # After dead code elimination, we should check if the program misses any essential scope info
+                check_essential_scope = pass_name == "common::dead_code_elimination"
+                if validation_policy == "full":
+                    prog.validate(check_essential_scope=check_essential_scope)
+                elif validation_policy == "dirty_only":
+                    prog.validate(check_essential_scope=check_essential_scope, blocks=mutated_blocks)
+                mutated_blocks.clear()
+
+        if validation_policy != "full":
+            prog.validate(
+                check_essential_scope="common::dead_code_elimination" in pass_pipeline.passes
+            )
         logger.debug(f"Program after {pass_pipeline} pipeline:\n{prog}")
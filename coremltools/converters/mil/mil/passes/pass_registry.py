@@ -3,6 +3,7 @@
 #  Use of this source code is governed by a BSD-3-clause license that can be
 #  found in the LICENSE.txt file or at https://opensource.org/licenses/BSD-3-Clause
 
+import importlib
 import inspect
 from typing import Dict, Optional, Text, Type
 
@@ -11,6 +12,16 @@ from coremltools.converters.mil.mil.passes.graph_pass import AbstractGraphPass
 
 
 class PassRegistry:
+    # The passes of these frontend namespaces are registered by importing their ``ssa_passes``
+    # module, which imports the frontend package (and with it, the source framework). They are
+    # loaded the first time a pass of the namespace is looked up, so that importing coremltools
+    # doesn't import torch or tensorflow.
+    _LAZY_NAMESPACES: Dict[Text, Text] = {
+        "tensorflow": "coremltools.converters.mil.frontend.tensorflow.ssa_passes",
+        "tensorflow2": "coremltools.converters.mil.frontend.tensorflow2.ssa_passes",
+        "torch": "coremltools.converters.mil.frontend.torch.ssa_passes",
+    }
+
     def __init__(self):
         """
         Store the pass class instead of instance to avoid the same instance got modified by several
@@ -22,15 +33,22 @@ class PassRegistry:
         """
         pass_id: namespace::func_name (e.g., 'common::const_elimination')
         """
-        if pass_id not in self.passes:
+        if pass_id not in self:
             raise KeyError(f"Pass {pass_id} not found")
         current_pass = self.passes[pass_id]
         # The current_pass could be a PassContainer instance if registered by register_generic_pass.
         return current_pass() if inspect.isclass(current_pass) else current_pass
 
     def __contains__(self, pass_id: Text) -> bool:
+        if pass_id not in self.passes:
+            self._load_namespace(pass_id.split("::")[0])
         return pass_id in self.passes
 
+    def _load_namespace(self, namespace: Text) -> None:
+        module_name = self._LAZY_NAMESPACES.get(namespace)
+        if module_name is not None:
+            importlib.import_module(module_name)
+
     def add(
         self,
         namespace: Text,
@@ -465,6 +465,77 @@ class TestConstDeduplication:
         sparse_to_dense_op = prog.functions["main"].find_ops(op_type="constexpr_sparse_to_dense")[0]
         assert quantize_op.data_mask == sparse_to_dense_op.mask
 
+    @staticmethod
+    def test_const_deduplication_same_prefix():
+        """Consts which only differ after a long common prefix are not deduplicated."""
+        val_1 = np.random.rand(1000).astype(np.float32)
+        val_2 = val_1.copy()
+        val_2[-1] += 1.0
+
+        @mb.program(input_specs=[mb.TensorSpec(shape=(1000,))])
+        def prog(x):
+            x = mb.add(x=x, y=val_1)
+            x = mb.add(x=x, y=val_2)
+            x = mb.add(x=x, y=val_1.copy())
+            return mb.add(x=x, y=val_2.copy())
+
+        prev_prog, _, _ = apply_pass_and_basic_check(prog, "common::const_deduplication")
+        assert_op_count_match(prev_prog, expect=4, op="const")
+        assert_op_count_match(prog, expect=2, op="const")
+        add_ops = prog.functions["main"].find_ops(op_type="add")
+        assert add_ops[0].y is add_ops[2].y
+        assert add_ops[1].y is add_ops[3].y
+        assert add_ops[0].y is not add_ops[1].y
+
+    @staticmethod
+    def test_const_content_digest():
+        val = np.random.rand(4, 8).astype(np.float16)
+
+        @mb.program(input_specs=[mb.TensorSpec(shape=(4, 8), dtype=types.fp16)])
+        def prog(x):
+            mb.const(val=val)
+            mb.const(val=np.asfortranarray(val))
+            mb.const(val=val.view(np.uint16).astype(np.int32))
+            mb.const(val=val.astype(np.float32))
+            return x
+
+        const_ops = prog.functions["main"].find_ops(op_type="const")
+        digests = [const_op.content_digest for const_op in const_ops]
+        # The same value, stored in a non-C-contiguous array.
+        assert not const_ops[1].outputs[0].val.flags.c_contiguous
+        assert digests[0] == digests[1]
+        # Different dtypes.
+        assert len(set(digests[1:])) == 3
+
+        # The digest is cached, and computed again once the value is replaced.
+        with patch.object(
+            const_ops[0], "_compute_content_digest", side_effect=AssertionError
+        ):
+            assert const_ops[0].content_digest == digests[0]
+        const_ops[0].outputs[0]._sym_val.val = val + np.float16(1)
+        assert const_ops[0].content_digest != digests[0]
+
+    @staticmethod
+    def test_const_content_digest_in_place_write():
+        """Writing into a digested const value in place raises, rather than leaving a stale digest."""
+        val_1 = np.random.rand(100).astype(np.float32)
+        val_2 = val_1.copy()
+
+        @mb.program(input_specs=[mb.TensorSpec(shape=(100,))])
+        def prog(x):
+            x = mb.add(x=x, y=val_1)
+            return mb.add(x=x, y=val_2)
+
+        const_ops = prog.functions["main"].find_ops(op_type="const")
+        assert const_ops[0].content_digest == const_ops[1].content_digest
+        with pytest.raises(ValueError, match="read-only"):
+            const_ops[0].outputs[0].val[0] += 1.0
+        # The array passed to the const is the value of the const.
+        with pytest.raises(ValueError, match="read-only"):
+            val_2[0] += 1.0
+        assert const_ops[0].content_digest == const_ops[1].content_digest
+        np.testing.assert_array_equal(const_ops[0].outputs[0].val, const_ops[1].outputs[0].val)
+
 
 class TestConstElimination:
     def test_const_elimination(self):
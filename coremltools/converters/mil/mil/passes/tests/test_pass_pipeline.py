@@ -3,12 +3,28 @@
 #  Use of this source code is governed by a BSD-3-clause license that can be
 #  found in the LICENSE.txt file or at https://opensource.org/licenses/BSD-3-Clause
 
+import gc
+import json
+import time
+
 import numpy as np
 import pytest
 
+import coremltools as ct
+from coremltools import _logger as logger
+from coremltools.converters._profile_utils import ConversionProfiler
 from coremltools.converters.mil.mil import Builder as mb
+from coremltools.converters.mil.mil import types
+from coremltools.converters.mil.mil.block import InvalidBlockStateError
+from coremltools.converters.mil.mil.passes.defs.optimize_conv import fuse_conv_bias
+from coremltools.converters.mil.mil.passes.helper import WorklistRewriteDriver
 from coremltools.converters.mil.mil.passes.pass_pipeline import PassPipeline, PassPipelineManager
-from coremltools.converters.mil.testing_utils import assert_model_is_valid, get_op_types_in_program
+from coremltools.converters.mil.mil.passes.pass_registry import PASS_REGISTRY
+from coremltools.converters.mil.testing_utils import (
+    assert_model_is_valid,
+    get_op_types_in_block,
+    get_op_types_in_program,
+)
 
 np.random.seed(1984)
 
@@ -124,3 +140,435 @@ class TestPassPipeline:
         pipeline.append_pass("compression::palettize_weights")
         pipeline_2 = PassPipeline.DEFAULT_PRUNING
         assert "compression::palettize_weights" not in pipeline_2.passes
+
+    def test_validation_policy(self):
+        pipeline = PassPipeline.DEFAULT
+        assert pipeline.validation_policy == "dirty_only"
+        pipeline.validation_policy = "final_only"
+        assert pipeline.validation_policy == "final_only"
+        with pytest.raises(ValueError, match="Invalid validation_policy"):
+            pipeline.validation_policy = "none"
+
+        frontend_pipeline = PassPipeline.get_pipeline("frontend_pytorch")
+        frontend_pipeline.set_options_by_another_pipeline(pipeline)
+        assert frontend_pipeline.validation_policy == "final_only"
+
+    @pytest.mark.parametrize(
+        "validation_policy, expected_num_full_validations, expected_num_dirty_validations",
+        [("full", 3, 0), ("dirty_only", 2, 2), ("final_only", 2, 0)],
+    )
+    def test_apply_pipeline_with_validation_policy(
+        self,
+        mocker,
+        validation_policy,
+        expected_num_full_validations,
+        expected_num_dirty_validations,
+    ):
+        @mb.program(input_specs=[mb.TensorSpec(shape=(2, 3))])
+        def prog(x):
+            x = mb.relu(x=x)
+            x = mb.relu(x=x)
+            return mb.transpose(x=x, perm=[1, 0])
+
+        pipeline = PassPipeline(
+            pass_names=["common::merge_consecutive_relus", "common::reduce_transposes"]
+        )
+        pipeline.validation_policy = validation_policy
+        validate_spy = mocker.spy(prog, "validate")
+        PassPipelineManager.apply_pipeline(prog, pipeline)
+        assert get_op_types_in_program(prog) == ["relu", "transpose"]
+
+        num_full_validations = sum(
+            1 for call in validate_spy.call_args_list if call.kwargs.get("blocks") is None
+        )
+        num_dirty_validations = len(validate_spy.call_args_list) - num_full_validations
+        assert num_full_validations == expected_num_full_validations
+        assert num_dirty_validations == expected_num_dirty_validations
+
+    def test_track_mutated_blocks(self):
+        @mb.program(input_specs=[mb.TensorSpec(shape=(1,)), mb.TensorSpec(shape=(1,), dtype=types.bool)])
+        def prog(x, pred):
+            def true_fn():
+                return mb.relu(x=mb.relu(x=x))
+
+            def false_fn():
+                return mb.sin(x=x)
+
+            return mb.cond(pred=pred, _true_fn=true_fn, _false_fn=false_fn)
+
+        main_block = prog.functions["main"]
+        cond_op = main_block.find_ops(op_type="cond")[0]
+        true_block, false_block = cond_op.blocks
+
+        with prog.track_mutated_blocks() as mutated_blocks:
+            relu_1, relu_2 = true_block.operations
+            true_block.replace_uses_of_var_after_op(
+                anchor_op=relu_2, old_var=relu_2.outputs[0], new_var=relu_1.outputs[0]
+            )
+            true_block.remove_ops([relu_2])
+            assert mutated_blocks == {true_block}
+            prog.validate(blocks=mutated_blocks)
+            mutated_blocks.clear()
+
+            # A block removed from the program is not validated anymore.
+            with main_block:
+                x = mb.relu(x=main_block.inputs["x"], before_op=cond_op)
+            main_block.replace_uses_of_var_after_op(
+                anchor_op=cond_op, old_var=cond_op.outputs[0], new_var=x
+            )
+            main_block.remove_ops([cond_op])
+            assert main_block in mutated_blocks
+            prog.validate(blocks=mutated_blocks | {false_block})
+
+        assert get_op_types_in_program(prog) == ["relu"]
+
+    def test_dirty_block_validation_catches_broken_block(self):
+        @mb.program(input_specs=[mb.TensorSpec(shape=(1,)), mb.TensorSpec(shape=(1,), dtype=types.bool)])
+        def prog(x, pred):
+            def true_fn():
+                return mb.relu(x=x)
+
+            def false_fn():
+                return mb.sin(x=x)
+
+            return mb.cond(pred=pred, _true_fn=true_fn, _false_fn=false_fn)
+
+        true_block = prog.functions["main"].find_ops(op_type="cond")[0].blocks[0]
+        relu_op = true_block.operations[0]
+        # Corrupt the producer / consumer relationship in the nested block only.
+        prog.functions["main"].inputs["x"].remove_child_ops({relu_op})
+
+        with pytest.raises(InvalidBlockStateError, match="should be consumed by op"):
+            prog.validate(blocks=[true_block])
+        with pytest.raises(InvalidBlockStateError, match="should be consumed by op"):
+            prog.validate()
+        # Blocks that are not mutated are not checked.
+        prog.validate(blocks=[prog.functions["main"]])
+
+    def test_graph_pass_reports_mutation(self):
+        @mb.program(input_specs=[mb.TensorSpec(shape=(2, 3))])
+        def prog(x):
+            mb.add(x=x, y=1.0)
+            return mb.relu(x=x)
+
+        dead_code_elimination = PASS_REGISTRY["common::dead_code_elimination"]
+        assert dead_code_elimination(prog)
+        assert not dead_code_elimination(prog)
+        assert get_op_types_in_program(prog) == ["relu"]
+
+    def test_skip_unchanged_idempotent_passes(self):
+        @mb.program(input_specs=[mb.TensorSpec(shape=(2, 3))])
+        def prog(x):
+            mb.add(x=x, y=1.0)
+            x = mb.relu(x=x)
+            return mb.relu(x=x)
+
+        pipeline = PassPipeline(
+            pass_names=[
+                "common::const_elimination",
+                "common::dead_code_elimination",
+                "common::const_elimination",
+                "common::dead_code_elimination",
+                "common::merge_consecutive_relus",
+                "common::merge_consecutive_relus",
+                "common::const_elimination",
+                "common::const_elimination",
+            ]
+        )
+        assert pipeline.report is None
+        PassPipelineManager.apply_pipeline(prog, pipeline)
+        assert get_op_types_in_program(prog) == ["relu"]
+
+        report = pipeline.report
+        assert [(record["skipped"], record["mutated"]) for record in report.records] == [
+            (False, False),
+            (False, True),
+            # dead_code_elimination mutated the program since the last const_elimination.
+            (False, False),
+            # Nothing was mutated since the last dead_code_elimination.
+            (True, False),
+            (False, True),
+            # merge_consecutive_relus is not declared idempotent, so it is always run.
+            (False, False),
+            (False, False),
+            (True, False),
+        ]
+        assert report.skipped_passes == [
+            "common::dead_code_elimination",
+            "common::const_elimination",
+        ]
+        assert "common::dead_code_elimination: skipped" in str(report)
+
+
+
+class TestConversionProfiler:
+    def test_profile_pipeline(self, tmp_path):
+        @mb.program(input_specs=[mb.TensorSpec(shape=(2, 3))])
+        def prog(x):
+            x = mb.relu(x=x)
+            x = mb.relu(x=x)
+            return mb.add(x=x, y=1.0)
+
+        pipeline = PassPipeline(
+            pass_names=["common::merge_consecutive_relus", "common::dead_code_elimination"],
+            pipeline_name="test",
+        )
+        with ConversionProfiler() as profiler:
+            PassPipelineManager.apply_pipeline(prog, pipeline)
+
+        records = profiler.to_dict()["records"]
+        assert [(record["name"], record["category"], record["depth"]) for record in records] == [
+            ("test pipeline", "pipeline", 0),
+            ("common::merge_consecutive_relus", "pass", 1),
+            ("common::dead_code_elimination", "pass", 1),
+        ]
+        pipeline_record, merge_relus_record, _ = records
+        # The const op of y is counted as well.
+        assert (pipeline_record["num_ops_before"], pipeline_record["num_ops_after"]) == (4, 3)
+        assert (merge_relus_record["num_ops_before"], merge_relus_record["num_ops_after"]) == (4, 3)
+        for record in records:
+            assert record["wall_time"] >= 0
+            assert record["tracemalloc_peak_bytes"] >= 0
+            assert record["tracemalloc_peak_bytes"] >= record["tracemalloc_delta_bytes"]
+
+        assert json.loads(profiler.to_json(str(tmp_path / "profile.json"))) == profiler.to_dict()
+        trace_path = tmp_path / "trace.json"
+        profiler.to_chrome_trace(str(trace_path))
+        with open(trace_path) as f:
+            trace_events = json.load(f)["traceEvents"]
+        assert [event["name"] for event in trace_events] == [record["name"] for record in records]
+        assert all(event["ph"] == "X" for event in trace_events)
+        assert trace_events[1]["args"]["num_ops_after"] == 3
+
+    def test_profile_convert(self):
+        @mb.program(input_specs=[mb.TensorSpec(shape=(2, 3))])
+        def prog(x):
+            return mb.relu(x=x)
+
+        with ConversionProfiler(trace_memory=False) as profiler:
+            ct.convert(prog, convert_to="milinternal")
+
+        records = profiler.to_dict()["records"]
+        assert records[0]["name"] == "convert"
+        assert records[0]["tracemalloc_peak_bytes"] is None
+        categories = {record["category"] for record in records}
+        assert {"convert", "frontend", "pipeline", "pass"} <= categories
+
+        # Nothing is recorded outside of the profiler context.
+        ct.convert(prog, convert_to="milinternal")
+        assert len(profiler.records) == len(records)
+
+
+
+def _get_deep_transpose_program(num_layers):
+    @mb.program(input_specs=[mb.TensorSpec(shape=(2, 3, 4))])
+    def prog(x):
+        for _ in range(num_layers):
+            x = mb.transpose(x=x, perm=[1, 0, 2])
+            x = mb.transpose(x=x, perm=[0, 2, 1])
+            x = mb.relu(x=x)
+            x = mb.add(x=x, y=0.0)
+        return x
+
+    return prog
+
+
+def _sweep_to_fixed_point(block, rewrite_fns, recurse_into_nested_blocks=False):
+    """
+    The per-pass ``while block_changed`` loop that WorklistRewriteDriver replaces: the nested
+    blocks of an op are swept to a fixed point before the op, and the block is swept again from
+    the top until no rewrite fires.
+    """
+    any_change = False
+    with block:
+        block_changed = True
+        while block_changed:
+            block_changed = False
+            for op in list(block.operations):
+                if op.enclosing_block is None:
+                    continue
+                if recurse_into_nested_blocks:
+                    for b in op.blocks:
+                        block_changed |= _sweep_to_fixed_point(b, rewrite_fns, True)
+                for rewrite_fn in rewrite_fns:
+                    if rewrite_fn(op):
+                        block_changed = True
+                        break
+            any_change |= block_changed
+    return any_change
+
+
+def _sweep_rewrite_block(driver, block):
+    """A ``WorklistRewriteDriver.rewrite_block`` which sweeps like the passes used to."""
+    return _sweep_to_fixed_point(block, driver._patterns, driver._recurse_into_nested_blocks)
+
+
+class TestWorklistRewriteDriver:
+    @staticmethod
+    def _merge_relus(op):
+        if op.op_type != "relu" or len(op.outputs[0].child_ops) != 1:
+            return False
+        child_op = op.outputs[0].child_ops[0]
+        if child_op.op_type != "relu":
+            return False
+        if op.enclosing_block.try_replace_uses_of_var_after_op(
+            anchor_op=child_op, old_var=child_op.outputs[0], new_var=op.outputs[0]
+        ):
+            op.enclosing_block.remove_ops([child_op])
+            return True
+        return False
+
+    def test_rewrite_to_fixed_point(self):
+        @mb.program(input_specs=[mb.TensorSpec(shape=(2, 3))])
+        def prog(x):
+            for _ in range(10):
+                x = mb.relu(x=x)
+            return mb.add(x=x, y=1.0)
+
+        driver = WorklistRewriteDriver()
+        driver.add_pattern(self._merge_relus)
+        assert driver.rewrite_block(prog.functions["main"])
+        assert get_op_types_in_program(prog) == ["relu", "add"]
+        assert not driver.rewrite_block(prog.functions["main"])
+
+    def test_only_touched_ops_are_revisited(self):
+        @mb.program(input_specs=[mb.TensorSpec(shape=(2, 3))])
+        def prog(x):
+            for _ in range(50):
+                x = mb.sin(x=x)
+            x = mb.relu(x=x)
+            x = mb.relu(x=x)
+            return x
+
+        visited = []
+
+        def rewrite_fn(op):
+            visited.append(op.op_type)
+            return self._merge_relus(op)
+
+        driver = WorklistRewriteDriver()
+        driver.add_pattern(rewrite_fn)
+        driver.rewrite_block(prog.functions["main"])
+        assert get_op_types_in_program(prog) == ["sin"] * 50 + ["relu"]
+        # Every op is visited once, and only the neighborhood of the fusion is re-visited.
+        assert visited.count("sin") == 50
+        assert visited.count("relu") == 2
+
+    def test_nested_blocks(self):
+        @mb.program(input_specs=[mb.TensorSpec(shape=(1,)), mb.TensorSpec(shape=(2, 3))])
+        def prog(a, x):
+            def true_fn():
+                return mb.relu(x=mb.relu(x=x))
+
+            def false_fn():
+                return mb.relu(x=mb.relu(x=mb.relu(x=x)))
+
+            pred = mb.squeeze(x=mb.greater(x=a, y=0.0))
+            return mb.cond(pred=pred, _true_fn=true_fn, _false_fn=false_fn)
+
+        driver = WorklistRewriteDriver(recurse_into_nested_blocks=False)
+        driver.add_pattern(self._merge_relus)
+        assert not driver.rewrite_block(prog.functions["main"])
+
+        driver = WorklistRewriteDriver()
+        driver.add_pattern(self._merge_relus)
+        assert driver.rewrite_block(prog.functions["main"])
+        cond_op = prog.find_ops(op_type="cond", exactly_one=True)[0]
+        for block in cond_op.blocks:
+            assert get_op_types_in_block(block) == ["relu"]
+
+    def test_new_ops_are_matched(self):
+        prog = _get_deep_transpose_program(num_layers=5)
+        PassPipelineManager.apply_pipeline(
+            prog, PassPipeline(["common::merge_consecutive_transposes"], "test")
+        )
+        assert get_op_types_in_program(prog) == ["transpose", "relu", "add"] * 5
+
+    @staticmethod
+    def _get_graph_structure(prog):
+        """
+        The type of each op, with the positions of the ops producing its inputs, and the values
+        of the consts.
+        """
+        ops = prog.functions["main"].operations
+        op_positions = {op: i for i, op in enumerate(ops)}
+        structure = [
+            (op.op_type, [op_positions.get(v.op) for v in op.get_flattened_inputs()]) for op in ops
+        ]
+        const_vals = [op.val.val for op in ops if op.op_type == "const"]
+        return structure, const_vals
+
+    @staticmethod
+    def _time_rewrite(get_prog, rewrite_fn):
+        """Returns the time ``rewrite_fn`` takes on a new program, and the rewritten graph."""
+        prog = get_prog()
+        gc.collect()
+        start = time.perf_counter()
+        rewrite_fn(prog)
+        elapsed = time.perf_counter() - start
+        return elapsed, TestWorklistRewriteDriver._get_graph_structure(prog)
+
+    @pytest.mark.slow
+    @pytest.mark.parametrize("num_layers, num_bias_adds", [(500, 8)])
+    def test_benchmark_deep_graph(self, num_layers, num_bias_adds, monkeypatch):
+        """
+        Each ``conv`` is followed by a chain of bias ``add``, so a fixed-point sweep needs
+        ``num_bias_adds`` rounds over the whole graph, while the worklist fuses each chain in place.
+        ``fuse_conv_bias`` alone and ``PassPipeline.DEFAULT`` are timed with the worklist driver,
+        and with the fixed-point sweeps it replaced.
+        """
+
+        def get_prog():
+            np.random.seed(0)
+
+            @mb.program(input_specs=[mb.TensorSpec(shape=(1, 2, 4, 4))])
+            def prog(x):
+                for _ in range(num_layers):
+                    x = mb.conv(x=x, weight=np.random.rand(2, 2, 1, 1).astype(np.float32))
+                    for _ in range(num_bias_adds):
+                        x = mb.add(x=x, y=np.random.rand(1, 2, 1, 1).astype(np.float32))
+                    x = mb.transpose(x=x, perm=[0, 1, 3, 2])
+                    x = mb.transpose(x=x, perm=[0, 1, 3, 2])
+                return x
+
+            return prog
+
+        def apply_fuse_conv_bias(prog):
+            driver = WorklistRewriteDriver()
+            driver.add_pattern(fuse_conv_bias()._try_to_fuse_conv_bias)
+            driver.rewrite_block(prog.functions["main"])
+
+        def apply_default_pipeline(prog):
+            PassPipelineManager.apply_pipeline(prog, PassPipeline.DEFAULT)
+
+        times = {}
+        for name, rewrite_fn in (
+            ("fuse_conv_bias", apply_fuse_conv_bias),
+            ("PassPipeline.DEFAULT", apply_default_pipeline),
+        ):
+            with monkeypatch.context() as m:
+                m.setattr(WorklistRewriteDriver, "rewrite_block", _sweep_rewrite_block)
+                sweep_time, (sweep_structure, sweep_const_vals) = self._time_rewrite(
+                    get_prog, rewrite_fn
+                )
+            worklist_time, (worklist_structure, worklist_const_vals) = self._time_rewrite(
+                get_prog, rewrite_fn
+            )
+            times[name] = (sweep_time, worklist_time)
+
+            # Both drivers produce the same program.
+            assert "add" not in [op_type for op_type, _ in worklist_structure]
+            assert worklist_structure == sweep_structure
+            for worklist_val, sweep_val in zip(worklist_const_vals, sweep_const_vals):
+                if np.issubdtype(np.asarray(sweep_val).dtype, np.floating):
+                    np.testing.assert_allclose(worklist_val, sweep_val, rtol=1e-6)
+                else:
+                    np.testing.assert_array_equal(worklist_val, sweep_val)
+
+        logger.info(
+            f"{num_layers * (num_bias_adds + 3)} ops, fixed-point sweep vs worklist: "
+            + ", ".join(
+                f"{name} {sweep_time:.3f}s vs {worklist_time:.3f}s"
+                for name, (sweep_time, worklist_time) in times.items()
+            )
+        )
@@ -4,7 +4,8 @@
 #  found in the LICENSE.txt file or at https://opensource.org/licenses/BSD-3-Clause
 
 from collections import defaultdict
-from typing import Dict, List, Optional, Union
+from contextlib import contextmanager
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Union
 
 import numpy as _np
 import sympy as _sm
@@ -16,7 +17,7 @@ from coremltools.converters.mil.mil.ops.helper import _get_version_of_op
 from coremltools.converters.mil.mil.var import ListVar
 
 from . import types
-from .block import Function
+from .block import OP_MUTATION_LISTENERS, Block, Function
 from .operation import Operation
 from .scope import ScopeSource
 from .types.symbolic import k_num_internal_syms, k_used_symbols
@@ -234,9 +235,63 @@ class Program:
             raise ValueError(msg.format(found_ops))
         return found_ops
 
-    def validate(self, check_essential_scope: Optional[bool] = False) -> None:
-        for f in self.functions.values():
-            f.validate(force_validate=True, check_essential_scope=check_essential_scope)
+    def validate(
+        self,
+        check_essential_scope: Optional[bool] = False,
+        blocks: Optional[Iterable[Block]] = None,
+    ) -> None:
+        """
+        Validate the program.
+
+        If ``blocks`` is None, every function is fully validated. Otherwise, only the given blocks
+        are validated, each one without recursing into its nested blocks (see
+        ``Block.validate_locally``). Blocks that are no longer part of the program are skipped.
+        This is used together with ``track_mutated_blocks`` to only re-validate the blocks
+        mutated by a graph pass.
+        """
+        if blocks is None:
+            for f in self.functions.values():
+                f.validate(force_validate=True, check_essential_scope=check_essential_scope)
+            return
+
+        functions = set(self.functions.values())
+        for block in blocks:
+            if self._is_block_in_program(block, functions):
+                block.validate_locally(check_essential_scope=check_essential_scope)
+
+    @staticmethod
+    def _is_block_in_program(block: Block, functions: Set[Function]) -> bool:
+        while block.outer_op is not None:
+            block = block.outer_op.enclosing_block
+            if block is None:
+                # The outer op has been removed from the program.
+                return False
+        return block in functions
+
+    @contextmanager
+    def track_mutated_blocks(self) -> Iterator[Set[Block]]:
+        """
+        Within this context, every block that has ops inserted, rewired or removed, or has its
+        inputs or outputs changed, is recorded in the yielded set. The caller can clear the set
+        after checking it, to only track the mutations since the last check.
+
+        .. sourcecode:: python
+
+            with prog.track_mutated_blocks() as mutated_blocks:
+                graph_pass(prog)
+                prog.validate(blocks=mutated_blocks)
+                mutated_blocks.clear()
+        """
+        mutated_blocks = set()
+
+        def on_op_mutation(block, _):
+            mutated_blocks.add(block)
+
+        OP_MUTATION_LISTENERS.append(on_op_mutation)
+        try:
+            yield mutated_blocks
+        finally:
+            OP_MUTATION_LISTENERS.remove(on_op_mutation)
 
     def stringify_stack_trace(self) -> str:
         result = ""
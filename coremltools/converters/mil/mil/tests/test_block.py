@@ -4,10 +4,12 @@
 #  found in the LICENSE.txt file or at https://opensource.org/licenses/BSD-3-Clause
 
 import copy
+import time
 
 import numpy as np
 import pytest
 
+from coremltools import _logger as logger
 from coremltools.converters.mil.mil import Builder as mb
 from coremltools.converters.mil.mil.passes.tests.test_passes import CONSTEXPR_FUNCS
 from coremltools.converters.mil.mil.utils import CacheDoublyLinkedList
@@ -549,7 +551,109 @@ class TestCacheDoublyLinkedList:
         ):
             operations[1]
 
+    def test_slice_and_index(self):
+        operations = CacheDoublyLinkedList([1, 2, 3, 4])
+        assert operations[1:3] == [2, 3]
+        assert operations[:] == [1, 2, 3, 4]
+        assert operations.index(3) == 2
+        assert 3 in operations
+        assert 5 not in operations
+        with pytest.raises(ValueError, match="5 is not in the list."):
+            operations.index(5)
+
+    def test_is_before(self):
+        operations = CacheDoublyLinkedList([1, 2, 3])
+        operations.insert_op_before(4, before_op=1)
+        operations.insert_op_before(5, before_op=3)
+        assert list(operations) == [4, 1, 2, 5, 3]
+        assert operations.is_before(4, 1)
+        assert operations.is_before(2, 5)
+        assert not operations.is_before(3, 5)
+        assert not operations.is_before(2, 2)
+
+    def test_order_labels_stay_sorted(self):
+        # Keep inserting right before the same op, which exhausts the gap between the labels.
+        operations = CacheDoublyLinkedList([0, 1, 2])
+        expected = [0, 1, 2]
+        for i in range(3, 2000):
+            before_op = expected[1] if i % 3 else expected[-1]
+            operations.insert_op_before(i, before_op=before_op)
+            expected.insert(expected.index(before_op), i)
+            if i % 7 == 0:
+                operations.remove(expected[i % len(expected)])
+                expected.pop(i % len(expected))
+        assert list(operations) == expected
+        labels = [operations._get_node_from_op(op).label for op in operations]
+        assert all(label < next_label for label, next_label in zip(labels, labels[1:]))
+
     def test_deep_copy(self):
         operations = CacheDoublyLinkedList([x for x in range(0, 5000)])
         copy_operations = copy.deepcopy(operations)
         assert list(copy_operations) == [x for x in range(0, 5000)]
+        assert copy_operations.is_before(10, 20)
+
+    @pytest.mark.slow
+    def test_benchmark_insert_remove(self):
+        num_ops = 100000
+
+        start = time.perf_counter()
+        operations = CacheDoublyLinkedList()
+        anchor = -1
+        operations.insert_op_before(anchor)
+        for i in range(num_ops):
+            # Insert in the middle of the list, right before a fixed anchor.
+            operations.insert_op_before(i, before_op=anchor)
+        for i in range(num_ops):
+            operations.is_before(i, anchor)
+        operations.remove_ops(list(range(num_ops)))
+        linked_list_time = time.perf_counter() - start
+        assert list(operations) == [anchor]
+
+        # The python list is quadratic, so it is only timed on a tenth of the ops.
+        num_list_ops = num_ops // 10
+        start = time.perf_counter()
+        operations = [anchor]
+        for i in range(num_list_ops):
+            operations.insert(operations.index(anchor), i)
+        for i in range(num_list_ops):
+            operations.index(i) < operations.index(anchor)
+        for i in range(num_list_ops):
+            operations.remove(i)
+        python_list_time = time.perf_counter() - start
+
+        logger.info(
+            f"insert / order query / remove: CacheDoublyLinkedList {num_ops} ops "
+            f"{linked_list_time:.3f}s, python list {num_list_ops} ops {python_list_time:.3f}s"
+        )
+
+
+class TestBulkRemoveOps:
+    def test_remove_many_consumers_of_shared_var(self):
+        @mb.program(input_specs=[mb.TensorSpec(shape=(2, 4))])
+        def prog(x):
+            ys = [mb.relu(x=x) for _ in range(200)]
+            return mb.add(x=ys[0], y=ys[1])
+
+        block = prog.functions["main"]
+        relu_ops = [op for op in block.operations if op.op_type == "relu"][2:]
+        # Duplicated ops are removed only once.
+        block.remove_ops(relu_ops + relu_ops[:10])
+        assert get_op_types_in_program(prog) == ["relu", "relu", "add"]
+        assert len(block.inputs["x"].child_ops) == 2
+        assert all(op.enclosing_block is None for op in relu_ops)
+        block.validate(force_validate=True)
+
+    def test_remove_op_not_in_block(self):
+        @mb.program(input_specs=[mb.TensorSpec(shape=(2, 4))])
+        def prog(x):
+            return mb.relu(x=x)
+
+        @mb.program(input_specs=[mb.TensorSpec(shape=(2, 4))])
+        def prog_2(x):
+            return mb.relu(x=mb.sin(x=x))
+
+        sin_op = prog_2.find_ops(op_type="sin", exactly_one=True)[0]
+        block = prog.functions["main"]
+        with pytest.raises(ValueError, match="not found in"):
+            block.remove_ops([sin_op])
+        assert get_op_types_in_program(prog) == ["relu"]
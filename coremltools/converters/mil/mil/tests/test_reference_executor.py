@@ -0,0 +1,421 @@
+#  Copyright (c) 2025, Apple Inc. All rights reserved.
+#
+#  Use of this source code is governed by a BSD-3-clause license that can be
+#  found in the LICENSE.txt file or at https://opensource.org/licenses/BSD-3-Clause
+
+import itertools
+
+import numpy as np
+import pytest
+
+from coremltools._deps import _HAS_TORCH, MSG_TORCH_NOT_FOUND
+from coremltools.converters.mil._deployment_compatibility import AvailableTarget
+from coremltools.converters.mil.mil import Builder as mb
+from coremltools.converters.mil.mil import get_new_symbol, types
+from coremltools.converters.mil.mil.executor import ReferenceExecutor, register_kernel
+from coremltools.converters.mil.mil.executor.kernel_registry import _KERNEL_REGISTRY
+from coremltools.converters.mil.mil.ops.defs._op_reqs import register_op
+from coremltools.converters.mil.mil.ops.defs.iOS15.elementwise_unary import elementwise_unary
+
+if _HAS_TORCH:
+    import torch
+
+np.random.seed(0)
+
+
+class TestReferenceExecutor:
+    def test_elementwise_program(self):
+        @mb.program(input_specs=[mb.TensorSpec(shape=(2, 3)), mb.TensorSpec(shape=(3,))])
+        def prog(x, y):
+            z = mb.add(x=x, y=y)
+            z = mb.matmul(x=z, y=np.ones((3, 4), dtype=np.float32))
+            return mb.relu(x=z, name="out")
+
+        x = np.random.rand(2, 3).astype(np.float32) - 0.5
+        y = np.random.rand(3).astype(np.float32)
+        outputs = ReferenceExecutor(prog).predict({"x": x, "y": y})
+        np.testing.assert_allclose(outputs["out"], np.maximum((x + y) @ np.ones((3, 4)), 0))
+        assert outputs["out"].dtype == np.float32
+
+    def test_symbolic_shape_input(self):
+        @mb.program(input_specs=[mb.TensorSpec(shape=(get_new_symbol(), 3))])
+        def prog(x):
+            return mb.reduce_sum(x=x, axes=[0], name="out")
+
+        executor = ReferenceExecutor(prog)
+        for n in [1, 5]:
+            x = np.random.rand(n, 3).astype(np.float32)
+            np.testing.assert_allclose(executor.predict({"x": x})["out"], x.sum(0), rtol=1e-6)
+
+    def test_invalid_inputs(self):
+        @mb.program(input_specs=[mb.TensorSpec(shape=(2, 3))])
+        def prog(x):
+            return mb.relu(x=x)
+
+        executor = ReferenceExecutor(prog)
+        with pytest.raises(ValueError, match="The value of input x is not provided"):
+            executor.predict({})
+        with pytest.raises(ValueError, match="Input x must have rank 2"):
+            executor.predict({"x": np.zeros(3)})
+        with pytest.raises(ValueError, match="Function foo not found"):
+            ReferenceExecutor(prog, function_name="foo")
+
+    def test_intermediates_are_freed(self):
+        @mb.program(input_specs=[mb.TensorSpec(shape=(4,))])
+        def prog(x):
+            a = mb.relu(x=x)
+            b = mb.sigmoid(x=a)
+            c = mb.tanh(x=b)
+            return mb.add(x=c, y=a)
+
+        executor = ReferenceExecutor(prog)
+        live_vars = []
+        executor.predict(
+            {"x": np.random.rand(4).astype(np.float32)},
+            callback=lambda var, value: live_vars.append(len(executor._env)),
+        )
+        # x is freed once relu has consumed it, and b once tanh has, while a is kept until add.
+        assert live_vars == [2, 2, 3, 3]
+        assert executor._env == {}
+
+    def test_callback_records_all_vars(self):
+        @mb.program(input_specs=[mb.TensorSpec(shape=(2,))])
+        def prog(x):
+            def true_fn():
+                return mb.mul(x=x, y=2.0, name="double")
+
+            def false_fn():
+                return mb.mul(x=x, y=3.0, name="triple")
+
+            pred = mb.greater(x=mb.reduce_sum(x=x), y=0.0)
+            return mb.cond(pred=pred, _true_fn=true_fn, _false_fn=false_fn)
+
+        names = []
+        ReferenceExecutor(prog).predict(
+            {"x": np.ones(2, dtype=np.float32)}, callback=lambda var, value: names.append(var.name)
+        )
+        assert "double" in names
+        assert "triple" not in names
+
+    def test_cond(self):
+        @mb.program(input_specs=[mb.TensorSpec(shape=(2,))])
+        def prog(x):
+            def true_fn():
+                return mb.add(x=x, y=1.0), mb.mul(x=x, y=2.0)
+
+            def false_fn():
+                return mb.sub(x=x, y=1.0), mb.mul(x=x, y=3.0)
+
+            pred = mb.greater(x=mb.reduce_sum(x=x), y=0.0)
+            return mb.cond(pred=pred, _true_fn=true_fn, _false_fn=false_fn)
+
+        executor = ReferenceExecutor(prog)
+        x = np.array([1.0, 2.0], dtype=np.float32)
+        outputs = list(executor.predict({"x": x}).values())
+        np.testing.assert_allclose(outputs[0], x + 1)
+        np.testing.assert_allclose(outputs[1], x * 2)
+        outputs = list(executor.predict({"x": -x}).values())
+        np.testing.assert_allclose(outputs[0], -x - 1)
+        np.testing.assert_allclose(outputs[1], -x * 3)
+
+    def test_while_loop(self):
+        @mb.program(input_specs=[mb.TensorSpec(shape=(1,)), mb.TensorSpec(shape=(1,))])
+        def prog(a, b):
+            def body(a, b):
+                return mb.add(x=a, y=np.float32(1)), b
+
+            def cond(a, b):
+                return mb.less(x=mb.mul(x=a, y=np.float32(2)), y=b)
+
+            return mb.while_loop(_cond=cond, _body=body, loop_vars=(a, b))
+
+        outputs = list(
+            ReferenceExecutor(prog)
+            .predict({"a": np.array([1.0], np.float32), "b": np.array([10.0], np.float32)})
+            .values()
+        )
+        np.testing.assert_allclose(outputs[0], [5.0])
+        np.testing.assert_allclose(outputs[1], [10.0])
+
+    def test_list_ops_in_while_loop(self):
+        @mb.program(input_specs=[mb.TensorSpec(shape=(3, 2))])
+        def prog(x):
+            ls = mb.make_list(init_length=3, elem_shape=(2,), dtype="fp32")
+            i = mb.const(val=np.int32(0))
+
+            def body(i, ls):
+                row = mb.gather(x=x, indices=i, axis=0)
+                ls = mb.list_write(ls=ls, index=i, value=mb.mul(x=row, y=2.0))
+                return mb.add(x=i, y=np.int32(1)), ls
+
+            def cond(i, ls):
+                return mb.less(x=i, y=mb.list_length(ls=ls))
+
+            _, ls = mb.while_loop(_cond=cond, _body=body, loop_vars=(i, ls))
+            return mb.list_gather(ls=ls, indices=[2, 0], name="out")
+
+        x = np.random.rand(3, 2).astype(np.float32)
+        outputs = ReferenceExecutor(prog).predict({"x": x})
+        np.testing.assert_allclose(outputs["out"], x[[2, 0]] * 2)
+
+    def test_state(self):
+        @mb.program(
+            input_specs=[
+                mb.TensorSpec(shape=(2,), dtype=types.fp16),
+                mb.StateTensorSpec(shape=(2,), dtype=types.fp16),
+            ],
+            opset_version=AvailableTarget.iOS18,
+        )
+        def prog(x, state):
+            read = mb.read_state(input=state)
+            acc = mb.add(x=read, y=x)
+            mb.coreml_update_state(state=state, value=acc)
+            return mb.mul(x=read, y=np.float16(2), name="out")
+
+        executor = ReferenceExecutor(prog)
+        state = executor.make_state()
+        np.testing.assert_array_equal(state["state"], np.zeros(2, np.float16))
+        x = np.array([1, 2], dtype=np.float16)
+        for step in range(3):
+            outputs = executor.predict({"x": x}, state=state)
+            np.testing.assert_array_equal(outputs["out"], x * 2 * step)
+            np.testing.assert_array_equal(state["state"], x * (step + 1))
+
+        with pytest.raises(ValueError, match="The value of state state is not provided"):
+            executor.predict({"x": x})
+
+    def test_constexpr(self):
+        @mb.program(input_specs=[mb.TensorSpec(shape=(2, 4))], opset_version=AvailableTarget.iOS16)
+        def prog(x):
+            weight = mb.constexpr_affine_dequantize(
+                quantized_data=np.arange(8, dtype=np.uint8).reshape(4, 2),
+                zero_point=np.uint8(1),
+                scale=np.float32(0.5),
+                axis=0,
+            )
+            return mb.matmul(x=x, y=weight, name="out")
+
+        x = np.random.rand(2, 4).astype(np.float32)
+        weight = (np.arange(8).reshape(4, 2) - 1) * 0.5
+        executor = ReferenceExecutor(prog)
+        for _ in range(2):
+            np.testing.assert_allclose(executor.predict({"x": x})["out"], x @ weight, rtol=1e-6)
+        assert len(executor._constexpr_vals) == 1
+
+    def test_missing_kernel(self):
+        @mb.program(input_specs=[mb.TensorSpec(shape=(1, 1, 4, 4))])
+        def prog(x):
+            return mb.resize_bilinear(x=x, target_size_height=8, target_size_width=8)
+
+        with pytest.raises(NotImplementedError, match="register a kernel"):
+            ReferenceExecutor(prog).predict({"x": np.zeros((1, 1, 4, 4), np.float32)})
+
+    def test_custom_kernel(self):
+        @register_op(is_custom_op=True, allow_override=True)
+        class _test_executor_custom_op(elementwise_unary):
+            pass
+
+        @mb.program(input_specs=[mb.TensorSpec(shape=(3,))])
+        def prog(x):
+            return mb._test_executor_custom_op(x=x, name="out")
+
+        @register_kernel("_test_executor_custom_op")
+        def kernel(executor, op, inputs):
+            return inputs["x"] * 3
+
+        try:
+            x = np.random.rand(3).astype(np.float32)
+            np.testing.assert_allclose(ReferenceExecutor(prog).predict({"x": x})["out"], x * 3)
+            with pytest.raises(ValueError, match="already registered"):
+                register_kernel("_test_executor_custom_op")(kernel)
+        finally:
+            _KERNEL_REGISTRY.op_type_to_kernel.pop("_test_executor_custom_op")
+
+
+@pytest.mark.skipif(not _HAS_TORCH, reason=MSG_TORCH_NOT_FOUND)
+class TestReferenceKernels:
+    @staticmethod
+    def _run(build_fn, x):
+        @mb.program(input_specs=[mb.TensorSpec(shape=x.shape)])
+        def prog(x):
+            return build_fn(x)
+
+        return list(ReferenceExecutor(prog).predict({"x": x}).values())[0]
+
+    @pytest.mark.parametrize(
+        "strides, dilations, groups, pad_type",
+        itertools.product([1, 2], [1, 2], [1, 2], ["valid", "same", "custom"]),
+    )
+    def test_conv(self, strides, dilations, groups, pad_type):
+        x = np.random.rand(2, 4, 9, 8).astype(np.float32)
+        weight = np.random.rand(6, 4 // groups, 3, 2).astype(np.float32)
+        bias = np.random.rand(6).astype(np.float32)
+        pad = [1, 1, 0, 0] if pad_type == "custom" else [0] * 4
+        if pad_type == "same" and strides > 1:
+            return
+
+        y = self._run(
+            lambda x: mb.conv(
+                x=x,
+                weight=weight,
+                bias=bias,
+                strides=[strides] * 2,
+                dilations=[dilations] * 2,
+                groups=groups,
+                pad_type=pad_type,
+                pad=pad,
+            ),
+            x,
+        )
+        expected = torch.nn.functional.conv2d(
+            torch.tensor(x),
+            torch.tensor(weight),
+            torch.tensor(bias),
+            stride=strides,
+            dilation=dilations,
+            groups=groups,
+            padding="same" if pad_type == "same" else (pad[0], pad[2]),
+        ).numpy()
+        np.testing.assert_allclose(y, expected, rtol=1e-5, atol=1e-5)
+
+    @pytest.mark.parametrize(
+        "strides, dilations, groups", itertools.product([1, 2], [1, 2], [1, 2])
+    )
+    def test_conv_transpose(self, strides, dilations, groups):
+        x = np.random.rand(1, 4, 5, 6).astype(np.float32)
+        weight = np.random.rand(4, 6 // groups, 3, 3).astype(np.float32)
+        y = self._run(
+            lambda x: mb.conv_transpose(
+                x=x,
+                weight=weight,
+                strides=[strides] * 2,
+                dilations=[dilations] * 2,
+                groups=groups,
+                pad_type="custom",
+                pad=[1, 1, 0, 0],
+            ),
+            x,
+        )
+        expected = torch.nn.functional.conv_transpose2d(
+            torch.tensor(x),
+            torch.tensor(weight),
+            stride=strides,
+            dilation=dilations,
+            groups=groups,
+            padding=(1, 0),
+        ).numpy()
+        np.testing.assert_allclose(y, expected, rtol=1e-5, atol=1e-5)
+
+    @pytest.mark.parametrize(
+        "pool, ceil_mode, pad",
+        itertools.product(["max", "avg", "avg_exclude_pad"], [False, True], [0, 1]),
+    )
+    def test_pool(self, pool, ceil_mode, pad):
+        x = np.random.rand(1, 3, 8, 7).astype(np.float32)
+        kwargs = dict(
+            x=None,
+            kernel_sizes=[3, 3],
+            strides=[2, 2],
+            pad_type="custom",
+            pad=[pad] * 4,
+            ceil_mode=ceil_mode,
+        )
+        if pool == "max":
+            build_fn = lambda x: mb.max_pool(**{**kwargs, "x": x})
+            expected = torch.nn.functional.max_pool2d(
+                torch.tensor(x), 3, 2, padding=pad, ceil_mode=ceil_mode
+            )
+        else:
+            exclude_pad = pool == "avg_exclude_pad"
+            build_fn = lambda x: mb.avg_pool(
+                **{**kwargs, "x": x}, exclude_padding_from_average=exclude_pad
+            )
+            expected = torch.nn.functional.avg_pool2d(
+                torch.tensor(x),
+                3,
+                2,
+                padding=pad,
+                ceil_mode=ceil_mode,
+                count_include_pad=not exclude_pad,
+            )
+        np.testing.assert_allclose(self._run(build_fn, x), expected.numpy(), rtol=1e-5)
+
+    def test_norms(self):
+        x = np.random.rand(2, 5, 4, 3).astype(np.float32)
+        gamma = np.random.rand(5).astype(np.float32)
+        beta = np.random.rand(5).astype(np.float32)
+        mean = np.random.rand(5).astype(np.float32)
+        variance = np.random.rand(5).astype(np.float32)
+
+        y = self._run(
+            lambda x: mb.batch_norm(
+                x=x, mean=mean, variance=variance, gamma=gamma, beta=beta, epsilon=1e-5
+            ),
+            x,
+        )
+        expected = torch.nn.functional.batch_norm(
+            torch.tensor(x),
+            torch.tensor(mean),
+            torch.tensor(variance),
+            torch.tensor(gamma),
+            torch.tensor(beta),
+            eps=1e-5,
+        )
+        np.testing.assert_allclose(y, expected.numpy(), rtol=1e-5, atol=1e-6)
+
+        y = self._run(lambda x: mb.instance_norm(x=x, gamma=gamma, beta=beta), x)
+        expected = torch.nn.functional.instance_norm(
+            torch.tensor(x), weight=torch.tensor(gamma), bias=torch.tensor(beta)
+        )
+        np.testing.assert_allclose(y, expected.numpy(), rtol=1e-4, atol=1e-5)
+
+        y = self._run(lambda x: mb.local_response_norm(x=x, size=3), x)
+        expected = torch.nn.functional.local_response_norm(torch.tensor(x), size=3)
+        np.testing.assert_allclose(y, expected.numpy(), rtol=1e-5)
+
+    def test_layout_ops(self):
+        x = np.random.rand(1, 8, 2, 4).astype(np.float32)
+        y = self._run(lambda x: mb.pixel_shuffle(x=x, upscale_factor=2), x)
+        np.testing.assert_array_equal(y, torch.nn.functional.pixel_shuffle(torch.tensor(x), 2))
+
+        y = self._run(
+            lambda x: mb.space_to_depth(x=mb.depth_to_space(x=x, block_size=2), block_size=2), x
+        )
+        np.testing.assert_array_equal(y, x)
+
+        y = self._run(
+            lambda x: mb.upsample_nearest_neighbor(
+                x=x, scale_factor_height=2, scale_factor_width=3
+            ),
+            x,
+        )
+        np.testing.assert_array_equal(
+            y, torch.nn.functional.interpolate(torch.tensor(x), scale_factor=(2, 3), mode="nearest")
+        )
+
+    def test_scatter_gather_ops(self):
+        x = np.random.rand(4, 3).astype(np.float32)
+        updates = np.random.rand(2, 3).astype(np.float32)
+        y = self._run(
+            lambda x: mb.scatter(
+                data=x, indices=np.array([3, 3], np.int32), updates=updates, mode="add"
+            ),
+            x,
+        )
+        expected = x.copy()
+        expected[3] += updates.sum(0)
+        np.testing.assert_allclose(y, expected, rtol=1e-6)
+
+        y = self._run(
+            lambda x: mb.gather_nd(x=x, indices=np.array([[1, 2], [3, 0]], np.int32)), x
+        )
+        np.testing.assert_array_equal(y, x[[1, 3], [2, 0]])
+
+        y = self._run(
+            lambda x: mb.one_hot(
+                indices=mb.cast(x=mb.reduce_argmax(x=x, axis=1), dtype="int32"),
+                one_hot_vector_size=3,
+            ),
+            x,
+        )
+        np.testing.assert_array_equal(y, np.eye(3)[x.argmax(1)])
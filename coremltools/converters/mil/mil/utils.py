@@ -4,7 +4,7 @@
 #  found in the LICENSE.txt file or at https://opensource.org/licenses/BSD-3-Clause
 
 from copy import deepcopy
-from typing import Any, Dict, List, Optional, Tuple
+from typing import Any, Dict, List, Optional, Tuple, Union
 
 from .operation import Operation
 
@@ -12,13 +12,15 @@ from .operation import Operation
 class OpNode:
     """
     A helper node class for the doubly linked list.
-    It contains an Operation data and pointers to the previous and the next node.
+    It contains an Operation data, pointers to the previous and the next node,
+    and an order label which increases monotonically along the list.
     """
 
     def __init__(self, op: Operation):
         self.op = op
         self.next: Optional[OpNode] = None
         self.prev: Optional[OpNode] = None
+        self.label: int = 0
 
     def __deepcopy__(
         self,
@@ -36,6 +38,7 @@ class OpNode:
 
             op_copy = deepcopy(node.op, memo=memo)
             node_copy = OpNode(op=op_copy)
+            node_copy.label = node.label
             memo[id(node)] = node_copy
 
             return node_copy
@@ -82,10 +85,18 @@ class CacheDoublyLinkedList:
 
     Given the fact that each op in the list must be unique, a hash table
     is maintained in this data structure, and hence the insert / pop can both be performed in O(1).
+
+    Each node also carries an integer order label, so that the relative position of two ops
+    can be compared in O(1) through ``is_before``, without walking the list. When an op is
+    inserted between two nodes whose labels are adjacent, the labels of a small window of
+    neighboring nodes are respread, which keeps the insertion O(1) amortized.
     """
 
     INVALID_NODE = OpNode(None)
 
+    # The spacing of the order labels of two adjacent nodes, when they are appended or relabeled.
+    LABEL_GAP = 1 << 20
+
     def __init__(self, array: Optional[List[Operation]] = None):
         self.start: OpNode = None
         self.end: OpNode = None
@@ -112,6 +123,7 @@ class CacheDoublyLinkedList:
             else:
                 self.end.next = new_node
                 new_node.prev = self.end
+                new_node.label = self.end.label + self.LABEL_GAP
                 self.end = new_node
         else:
             anchor_node = self.op_to_node[before_op]
@@ -119,15 +131,78 @@ class CacheDoublyLinkedList:
 
             if prev_node is None:
                 self.start = new_node
+                new_node.label = anchor_node.label - self.LABEL_GAP
             else:
                 prev_node.next = new_node
+                new_node.label = (prev_node.label + anchor_node.label) // 2
 
             new_node.prev = prev_node
             new_node.next = anchor_node
             anchor_node.prev = new_node
 
+            if prev_node is not None and new_node.label == prev_node.label:
+                self._relabel_around(new_node)
+
         self.op_to_node[new_op] = new_node
 
+    def _relabel_around(self, node: OpNode):
+        """
+        Respread the labels of a window of nodes centered at ``node``.
+        The window is doubled until the labels surrounding it leave enough room for its nodes.
+        """
+        left = right = node
+        count = 1
+        while True:
+            for _ in range(count):
+                if left.prev is not None:
+                    left = left.prev
+                    count += 1
+                if right.next is not None:
+                    right = right.next
+                    count += 1
+
+            lower = left.prev.label if left.prev is not None else None
+            upper = right.next.label if right.next is not None else None
+            if lower is None:
+                lower = (right.label if upper is None else upper) - (count + 1) * self.LABEL_GAP
+            if upper is None:
+                upper = lower + (count + 1) * self.LABEL_GAP
+
+            step = (upper - lower) // (count + 1)
+            # Leave room for a few more insertions in-between every two nodes.
+            if step >= 64:
+                break
+
+        cursor = left
+        label = lower
+        while True:
+            label += step
+            cursor.label = label
+            if cursor is right:
+                break
+            cursor = cursor.next
+
+    def is_before(self, op_a: Operation, op_b: Operation) -> bool:
+        """
+        Return True if ``op_a`` is placed before ``op_b`` in the list. This is an O(1) operation.
+        """
+        return self.op_to_node[op_a].label < self.op_to_node[op_b].label
+
+    def index(self, op: Operation) -> int:
+        """
+        Return the position of ``op`` in the list. Note that it walks the list, and hence is O(N).
+        Use ``is_before`` when only the relative order of two ops is needed.
+        """
+        if op not in self.op_to_node:
+            raise ValueError(f"{op} is not in the list.")
+        target_node = self.op_to_node[op]
+        cursor = self.start
+        idx = 0
+        while cursor is not target_node:
+            cursor = cursor.next
+            idx += 1
+        return idx
+
     def remove(self, op: Operation):
         """
         Remove an op from the data structure.
@@ -151,10 +226,20 @@ class CacheDoublyLinkedList:
         # remove op from the cache
         del self.op_to_node[op]
 
-    def __getitem__(self, idx: int) -> Operation:
+    def remove_ops(self, ops: List[Operation]):
+        """
+        Remove a batch of ops from the data structure.
+        """
+        for op in ops:
+            self.remove(op)
+
+    def __getitem__(self, idx: Union[int, slice]) -> Union[Operation, List[Operation]]:
         """
         The indexing is expensive in doubly linked list, we should prevent direct access besides [0] and [-1].
+        Slicing is allowed, which returns a list of the ops, as what a python list does.
         """
+        if isinstance(idx, slice):
+            return list(self)[idx]
         if self.start is None:
             raise ValueError("Cannot index an empty list.")
         if idx >= len(self):
@@ -186,3 +271,6 @@ class CacheDoublyLinkedList:
 
     def __len__(self) -> int:
         return len(self.op_to_node)
+
+    def __contains__(self, op: Operation) -> bool:
+        return op in self.op_to_node
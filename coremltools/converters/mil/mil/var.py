@@ -5,7 +5,7 @@
 
 import copy
 from collections import defaultdict
-from typing import Dict, List, Optional, Tuple, Union
+from typing import Dict, List, Optional, Set, Tuple, Union
 
 import numpy as np
 
@@ -287,6 +287,13 @@ class Var:
             raise ValueError(msg.format(target_op.name, self.name))
         self._child_ops.remove(target_op)
 
+    def remove_child_ops(self, target_ops: Set["Operation"]):
+        """
+        Remove all the occurrences of ops in ``target_ops`` from the child ops,
+        in a single pass over the child ops.
+        """
+        self._child_ops = [op for op in self._child_ops if op not in target_ops]
+
     def shape_str(self):
         annotation = ""
         if self.val is not None:
@@ -8,6 +8,7 @@ from coremltools import proto
 
 from ..._deps import _HAS_SCIPY, _HAS_SKLEARN
 from ...models import MLModel as _MLModel
+from ...models.nearest_neighbors.builder import _add_float_samples
 
 if _HAS_SKLEARN:
     import sklearn.neighbors as _neighbors
@@ -145,25 +146,16 @@ def _extract_training_data(model, spec):
         if _is_valid_sparse_format(X):
             X = _unpack_sparse(X)
 
-        for sample in X:
-            coreml_sample = (
-                spec.kNearestNeighborsClassifier.nearestNeighborsIndex.floatSamples.add()
-            )
-            for feature in sample:
-                coreml_sample.vector.append(feature)
+        _add_float_samples(spec.kNearestNeighborsClassifier.nearestNeighborsIndex, X)
 
     elif _is_algorithm_kd_tree(model):
         # sklearn guarantees that tree data is not stored in a sparse format
         npdata = np.asarray(model._tree.data)
-        for sample in npdata:
-            coreml_sample = (
-                spec.kNearestNeighborsClassifier.nearestNeighborsIndex.floatSamples.add()
-            )
-            for feature in sample:
-                coreml_sample.vector.append(feature)
+        _add_float_samples(spec.kNearestNeighborsClassifier.nearestNeighborsIndex, npdata)
 
-    for label in model._y:
-        spec.kNearestNeighborsClassifier.int64ClassLabels.vector.append(label)
+    spec.kNearestNeighborsClassifier.int64ClassLabels.vector.extend(
+        np.asarray(model._y).tolist()
+    )
 
 
 def get_input_dimension(model):
@@ -3,116 +3,68 @@
 # Use of this source code is governed by a BSD-3-clause license that can be
 # found in the LICENSE.txt file or at https://opensource.org/licenses/BSD-3-Clause
 
-from ..._deps import _HAS_SKLEARN
 from ...models._feature_management import process_or_validate_features
 from ...models.tree_ensemble import (TreeEnsembleClassifier,
                                      TreeEnsembleRegressor)
 
-if _HAS_SKLEARN:
-    from sklearn.tree import _tree
 
-
-
-def _get_value(scikit_value, mode="regressor", scaling=1.0, n_classes=2, tree_index=0):
-    """ Get the right value from the scikit-tree
+def _get_leaf_values(scikit_tree, mode="regressor", scaling=1.0, n_classes=2, tree_index=0):
+    """ Get the values of the nodes of the scikit-tree, and the prediction dimensions
+    they are added to (None for all of them).
     """
+    if scikit_tree.n_outputs != 1:
+        raise ValueError("Expected only 1 output in the scikit-learn tree.")
+    # Shape (node_count, max_n_classes)
+    scikit_values = scikit_tree.value[:, 0, :]
+
     # Regression
     if mode == "regressor":
-        return scikit_value[0] * scaling
+        return scikit_values * scaling, None
 
     # Binary classification
     if n_classes == 2:
         # Decision tree
-        if len(scikit_value[0]) != 1:
-            value = scikit_value[0][1] * scaling / scikit_value[0].sum()
+        if scikit_values.shape[1] != 1:
+            values = scikit_values[:, 1] * scaling / scikit_values.sum(axis=1)
         # boosted tree
         else:
-            value = scikit_value[0][0] * scaling
-        if value == 0.5:
-            value = value - 1e-7
+            values = scikit_values[:, 0] * scaling
+        values[values == 0.5] -= 1e-7
+        return values, None
 
     # Multiclass classification
-    else:
-        # Decision tree
-        if len(scikit_value[0]) != 1:
-            value = scikit_value[0] / scikit_value[0].sum()
-        # boosted tree
-        else:
-            value = {tree_index: scikit_value[0] * scaling}
-    return value
+    # Decision tree
+    if scikit_values.shape[1] != 1:
+        return scikit_values / scikit_values.sum(axis=1, keepdims=True), None
+    # boosted tree
+    return scikit_values * scaling, [tree_index]
 
 
-def _recurse(
+def _add_tree(
     coreml_tree,
     scikit_tree,
     tree_id,
-    node_id,
     scaling=1.0,
     mode="regressor",
     n_classes=2,
     tree_index=0,
 ):
-    """Traverse through the tree and append to the tree spec.
+    """Append all the nodes of the scikit-tree to the tree spec.
     """
-    if not (_HAS_SKLEARN):
-        raise RuntimeError(
-            "scikit-learn not found. scikit-learn conversion API is disabled."
-        )
-
-    ## Recursion should not be called on the leaf node.
-    if node_id == _tree.TREE_LEAF:
-        raise ValueError("Invalid node_id %s" % _tree.TREE_LEAF)
-
-    # Add a branch node to the tree
-    if scikit_tree.children_left[node_id] != _tree.TREE_LEAF:
-        branch_mode = "BranchOnValueLessThanEqual"
-        feature_index = scikit_tree.feature[node_id]
-        feature_value = scikit_tree.threshold[node_id]
-        left_child_id = scikit_tree.children_left[node_id]
-        right_child_id = scikit_tree.children_right[node_id]
-
-        # Add a branch node
-        coreml_tree.add_branch_node(
-            tree_id,
-            node_id,
-            feature_index,
-            feature_value,
-            branch_mode,
-            left_child_id,
-            right_child_id,
-        )
-
-        # Now recurse
-        _recurse(
-            coreml_tree,
-            scikit_tree,
-            tree_id,
-            left_child_id,
-            scaling,
-            mode,
-            n_classes,
-            tree_index,
-        )
-        _recurse(
-            coreml_tree,
-            scikit_tree,
-            tree_id,
-            right_child_id,
-            scaling,
-            mode,
-            n_classes,
-            tree_index,
-        )
-
-    # Add a leaf node to the tree
-    else:
-        # Get the scikit-learn value
-        if scikit_tree.n_outputs != 1:
-            raise ValueError("Expected only 1 output in the scikit-learn tree.")
-        value = _get_value(
-            scikit_tree.value[node_id], mode, scaling, n_classes, tree_index
-        )
-        coreml_tree.add_leaf_node(tree_id, node_id, value)
+    leaf_values, leaf_value_indices = _get_leaf_values(
+        scikit_tree, mode, scaling, n_classes, tree_index
+    )
+    # Leaf nodes have children_left == TREE_LEAF (-1).
+    coreml_tree.add_tree(
+        tree_id,
+        scikit_tree.feature,
+        scikit_tree.threshold,
+        scikit_tree.children_left,
+        scikit_tree.children_right,
+        leaf_values,
+        branch_mode="BranchOnValueLessThanEqual",
+        leaf_value_indices=leaf_value_indices,
+    )
 
 
 def get_input_dimension(model):
@@ -226,11 +178,10 @@ def convert_tree_ensemble(
 
     # Single tree
     if hasattr(model, "tree_"):
-        _recurse(
+        _add_tree(
             coreml_tree,
             model.tree_,
             tree_id=0,
-            node_id=0,
             mode=mode,
             n_classes=n_classes,
         )
@@ -256,11 +207,10 @@ def convert_tree_ensemble(
                 tree_index = tree_id % n_classes
             else:
                 tree_index = 0
-            _recurse(
+            _add_tree(
                 coreml_tree,
                 base_model.tree_,
                 tree_id,
-                node_id=0,
                 scaling=scaling,
                 mode=mode,
                 n_classes=n_classes,
@@ -3,6 +3,7 @@
 # Use of this source code is governed by a BSD-3-clause license that can be
 # found in the LICENSE.txt file or at https://opensource.org/licenses/BSD-3-Clause
 
+import json as _json
 from copy import deepcopy
 
 import numpy as _np
@@ -104,6 +105,87 @@ def recurse_json(
             )
 
 
+def _get_tree_arrays(booster):
+    """Get the trees of the booster as per-tree dicts of node arrays, read from its
+    JSON model in one go, along with the prediction dimension each tree adds to.
+
+    Returns None if the booster can't be saved as a JSON model (xgboost < 1.6), or if
+    it has trees that can only be converted from their dumps.
+    """
+    try:
+        xgb_model_json = _json.loads(booster.save_raw(raw_format="json"))
+    except TypeError:
+        return None
+
+    gradient_booster = xgb_model_json["learner"]["gradient_booster"]
+    if gradient_booster["name"] != "gbtree":
+        return None
+    trees = gradient_booster["model"]["trees"]
+    for tree in trees:
+        if int(tree["tree_param"].get("size_leaf_vector", 1)) > 1:
+            return None
+        if any(tree.get("split_type", [])):
+            return None
+    return trees, gradient_booster["model"]["tree_info"]
+
+
+def _reachable_nodes(left_children, right_children):
+    """Indices of the nodes reachable from the root, leaving out deleted nodes.
+    """
+    reachable = _np.zeros(len(left_children), dtype=bool)
+    frontier = _np.array([0])
+    while frontier.size > 0:
+        reachable[frontier] = True
+        branches = frontier[left_children[frontier] >= 0]
+        frontier = _np.concatenate([left_children[branches], right_children[branches]])
+    return _np.flatnonzero(reachable)
+
+
+def _add_tree(
+    mlkit_tree,
+    xgb_tree,
+    tree_id,
+    force_32bit_float,
+    mode="regressor",
+    tree_index=0,
+    n_classes=2,
+):
+    """Append all the nodes of a tree of an XGBoost JSON model to the tree spec.
+    """
+    left_children = _np.asarray(xgb_tree["left_children"], dtype=_np.int64)
+    right_children = _np.asarray(xgb_tree["right_children"], dtype=_np.int64)
+    # The split condition of a leaf is its value.
+    split_conditions = _np.asarray(xgb_tree["split_conditions"], dtype=_np.float64)
+    if force_32bit_float:
+        # See recurse_json.
+        split_conditions = split_conditions.astype(_np.float32).astype(_np.float64)
+
+    node_ids = _np.arange(len(left_children))
+    if int(xgb_tree["tree_param"].get("num_deleted", 0)) > 0:
+        node_ids = _reachable_nodes(left_children, right_children)
+
+    leaf_value_indices = None
+    if mode == "classifier" and n_classes > 2:
+        leaf_value_indices = [tree_index]
+
+    # Missing values go to the left child, which is the true child, by default.
+    mlkit_tree.add_tree(
+        tree_id,
+        _np.asarray(xgb_tree["split_indices"], dtype=_np.int64)[node_ids],
+        split_conditions[node_ids],
+        left_children[node_ids],
+        right_children[node_ids],
+        split_conditions[node_ids],
+        branch_mode="BranchOnValueLessThan",
+        leaf_value_indices=leaf_value_indices,
+        relative_hit_rates=_np.asarray(xgb_tree["sum_hessian"], dtype=_np.float64)[node_ids],
+        missing_value_tracks_true_child=_np.asarray(xgb_tree["default_left"], dtype=bool)[
+            node_ids
+        ],
+        node_ids=node_ids,
+    )
+
+
 def convert_tree_ensemble(
     model,
     feature_names,
@@ -159,6 +241,7 @@ def convert_tree_ensemble(
     import os
 
     feature_map = None
+    xgb_tree_arrays = None
     if isinstance(
         model, (_xgboost.core.Booster, _xgboost.XGBRegressor, _xgboost.XGBClassifier)
     ):
@@ -214,7 +297,9 @@ def convert_tree_ensemble(
             # but the user provides them, use them as they are expecting later.
             model.feature_names=feature_names
 
-        xgb_model_str = model.get_dump(with_stats=True, dump_format="json")
+        xgb_tree_arrays = _get_tree_arrays(model)
+        if xgb_tree_arrays is None:
+            xgb_model_str = model.get_dump(with_stats=True, dump_format="json")
 
         if model.feature_names:
             feature_map = {f: i for i, f in enumerate(model.feature_names)}
@@ -261,6 +346,20 @@ def convert_tree_ensemble(
         mlkit_tree = _TreeEnsembleRegressor(feature_names, target)
         mlkit_tree.set_default_prediction_value(0.5)
 
+    if xgb_tree_arrays is not None:
+        xgb_trees, xgb_tree_info = xgb_tree_arrays
+        for xgb_tree_id, xgb_tree in enumerate(xgb_trees):
+            _add_tree(
+                mlkit_tree,
+                xgb_tree,
+                xgb_tree_id,
+                force_32bit_float,
+                mode=mode,
+                tree_index=xgb_tree_info[xgb_tree_id],
+                n_classes=n_classes,
+            )
+        return mlkit_tree.spec
+
     for xgb_tree_id, xgb_tree_str in enumerate(xgb_model_str):
         if mode == "classifier" and n_classes > 2:
             tree_index = xgb_tree_id % n_classes
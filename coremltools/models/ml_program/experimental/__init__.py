@@ -3,6 +3,8 @@
 # Use of this source code is governed by a BSD-3-clause license that can be
 # found in the LICENSE.txt file or at https://opensource.org/licenses/BSD-3-Clause
 
+import importlib as _importlib
+
 from . import (
     async_wrapper,
     compute_plan_utils,
@@ -10,5 +12,15 @@ from . import (
     model_structure_path,
     perf_utils,
     remote_device,
-    torch,
 )
+
+
+def __getattr__(name):
+    # The torch utilities import torch, so they are only imported on first access.
+    if name == "torch":
+        return _importlib.import_module(f"{__name__}.torch")
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__():
+    return sorted(set(globals()) | {"torch"})
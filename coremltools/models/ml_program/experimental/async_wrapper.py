@@ -6,6 +6,7 @@
 import atexit
 import os
 import shutil
+import sys
 import tempfile
 from abc import ABC, abstractmethod
 from pathlib import Path
@@ -21,9 +22,6 @@ from ...model import MLModel, MLState
 from ...utils import compile_model
 from .remote_device import Device, _RemoteMLModelService
 
-if _HAS_TORCH:
-    from torch import Tensor
-
 class MLModelAsyncWrapper(ABC):
     @staticmethod
     def init_check(
@@ -383,10 +381,13 @@ class RemoteMLModelAsyncWrapper(MLModelAsyncWrapper):
         inputs: Dict[str, np.array],
         state: Optional[MLState] = None,
     ) -> Dict[str, np.array]:
+        # A torch tensor can only be given if torch is already imported.
+        torch = sys.modules.get("torch") if _HAS_TORCH else None
+
         def convert_to_np_array(input: Any):
             if isinstance(input, np.ndarray):
                 return input
-            elif _HAS_TORCH and isinstance(input, Tensor):
+            elif torch is not None and isinstance(input, torch.Tensor):
                 return input.detach().numpy()
             else:
                 return np.array(input)
@@ -4,6 +4,7 @@
 # found in the LICENSE.txt file or at https://opensource.org/licenses/BSD-3-Clause
 
 import gc
+import os
 import random
 from collections import OrderedDict, deque
 from collections.abc import AsyncIterator
@@ -14,6 +15,7 @@ from typing import (
     AsyncIterator,
     Callable,
     Dict,
+    FrozenSet,
     Generic,
     Iterable,
     List,
@@ -138,6 +140,133 @@ class _Trie(Generic[K, V]):
         return values
 
 
+class _ModelCache:
+    """
+    A least recently used cache of models, keyed by the set of their output names.
+
+    A lookup returns a cached model whose outputs include all the requested output names,
+    using an index from each output name to the keys of the models that produce it.
+    The cache is bounded by the number of models and, optionally, by the total size on disk
+    of their assets. The least recently used models are evicted first.
+    """
+
+    def __init__(
+        self,
+        max_models: Optional[int] = None,
+        max_size_in_bytes: Optional[int] = None,
+    ):
+        if max_models is not None and max_models < 1:
+            raise ValueError(f"max_models must be at least 1, got {max_models}")
+        if max_size_in_bytes is not None and max_size_in_bytes < 0:
+            raise ValueError(f"max_size_in_bytes must be non-negative, got {max_size_in_bytes}")
+
+        self.max_models = max_models
+        self.max_size_in_bytes = max_size_in_bytes
+        self.hits = 0
+        self.misses = 0
+        self.size_in_bytes = 0
+        self._models: "OrderedDict[FrozenSet[str], MLModelAsyncWrapper]" = OrderedDict()
+        self._sizes: Dict[FrozenSet[str], int] = {}
+        self._keys_by_output_name: Dict[str, Set[FrozenSet[str]]] = {}
+
+    @staticmethod
+    def _get_size_in_bytes(model: MLModelAsyncWrapper) -> int:
+        path = model.temp_asset_path
+        if path is None or not os.path.exists(path):
+            return 0
+        if os.path.isfile(path):
+            return os.path.getsize(path)
+
+        size = 0
+        for dir_path, _, file_names in os.walk(path):
+            for file_name in file_names:
+                file_path = os.path.join(dir_path, file_name)
+                if not os.path.islink(file_path):
+                    size += os.path.getsize(file_path)
+        return size
+
+    def __len__(self) -> int:
+        return len(self._models)
+
+    def get(self, output_names: Iterable[str]) -> Optional[MLModelAsyncWrapper]:
+        """
+        Returns the cached model with the fewest outputs among those producing all of
+        ``output_names``, or ``None`` if there is none.
+        """
+        output_names = set(output_names)
+        candidates = None
+        # Intersect the smallest sets of keys first.
+        for keys in sorted(
+            (self._keys_by_output_name.get(name, set()) for name in output_names), key=len
+        ):
+            candidates = set(keys) if candidates is None else candidates & keys
+            if len(candidates) == 0:
+                break
+
+        if candidates is None:
+            candidates = set(self._models.keys())
+
+        if len(candidates) == 0:
+            self.misses += 1
+            return None
+
+        key = min(candidates, key=len)
+        self._models.move_to_end(key)
+        self.hits += 1
+        return self._models[key]
+
+    def _remove(self, key: FrozenSet[str]) -> MLModelAsyncWrapper:
+        model = self._models.pop(key)
+        self.size_in_bytes -= self._sizes.pop(key)
+        for name in key:
+            keys = self._keys_by_output_name[name]
+            keys.discard(key)
+            if len(keys) == 0:
+                del self._keys_by_output_name[name]
+        return model
+
+    def _is_full(self) -> bool:
+        return (self.max_models is not None and len(self._models) > self.max_models) or (
+            self.max_size_in_bytes is not None and self.size_in_bytes > self.max_size_in_bytes
+        )
+
+    def put(
+        self,
+        output_names: Iterable[str],
+        model: MLModelAsyncWrapper,
+    ) -> List[MLModelAsyncWrapper]:
+        """
+        Caches ``model`` for ``output_names``, and returns the models evicted to make room for it.
+        The model just cached is never evicted, even if it exceeds the size bound on its own.
+        """
+        key = frozenset(output_names)
+        evicted = []
+        if key in self._models:
+            evicted.append(self._remove(key))
+
+        self._models[key] = model
+        self._sizes[key] = _ModelCache._get_size_in_bytes(model)
+        self.size_in_bytes += self._sizes[key]
+        for name in key:
+            self._keys_by_output_name.setdefault(name, set()).add(key)
+
+        while len(self._models) > 1 and self._is_full():
+            evicted.append(self._remove(next(iter(self._models))))
+
+        return [evicted_model for evicted_model in evicted if evicted_model is not model]
+
+    def clear(self) -> List[MLModelAsyncWrapper]:
+        """
+        Removes all the models from the cache, and returns them.
+        """
+        models = list(self._models.values())
+        self._models.clear()
+        self._sizes.clear()
+        self._keys_by_output_name.clear()
+        self.size_in_bytes = 0
+        return models
+
+
 class MLModelInspector:
     """
     A class for inspecting an ML model.
@@ -218,6 +347,8 @@ class MLModelInspector:
         function_name: Optional[str] = None,
         optimization_hints: Optional[Dict[str, Any]] = None,
         device: Optional[Device] = None,
+        max_cached_models: Optional[int] = 16,
+        max_cached_models_size_in_bytes: Optional[int] = None,
     ):
         """
         Initializes the MLModelInspector.
@@ -239,6 +370,13 @@ class MLModelInspector:
 
         device: Device
            The device on which the model will execute.
+
+        max_cached_models : Optional[int]
+            The maximum number of models with intermediate outputs kept loaded for reuse.
+            The least recently used models are unloaded first. Defaults to 16. ``None`` means unbounded.
+
+        max_cached_models_size_in_bytes : Optional[int]
+            The maximum total size on disk of the assets of the cached models. Defaults to None, which means unbounded.
         """
         compute_units = compute_units if compute_units is not None else model.compute_unit
         MLModelInspector._init_check(
@@ -254,7 +392,10 @@ class MLModelInspector:
             raise ValueError("MLModelInspector only supports ML program.")
 
         self.model = model
-        self._cached_models = {}
+        self._cached_models = _ModelCache(
+            max_models=max_cached_models,
+            max_size_in_bytes=max_cached_models_size_in_bytes,
+        )
         self._data_type_to_feature_type = {
             proto.MIL_pb2.DataType.FLOAT16: proto.FeatureTypes_pb2.ArrayFeatureType.FLOAT16,
             proto.MIL_pb2.DataType.FLOAT64: proto.FeatureTypes_pb2.ArrayFeatureType.DOUBLE,
@@ -307,18 +448,26 @@ class MLModelInspector:
         """
         return self._output_name_to_op_map.copy()
 
+    @property
+    def cache_hits(self) -> int:
+        """
+        Returns the number of requests for intermediate outputs served by a cached model.
+        """
+        return self._cached_models.hits
+
+    @property
+    def cache_misses(self) -> int:
+        """
+        Returns the number of requests for intermediate outputs that required creating a new model.
+        """
+        return self._cached_models.misses
+
     async def _create_model_with_outputs(
         self,
         output_names: List[str],
         ignore_const_ops: bool,
     ) -> MLModelAsyncWrapper:
-        model_key = frozenset(output_names)
-        model = None
-        for cached_model_key in self._cached_models:
-            if model_key in cached_model_key:
-                model = self._cached_models.get(model_key, None)
-                break
-
+        model = self._cached_models.get(output_names)
         if model is not None:
             return model
 
@@ -378,7 +527,9 @@ class MLModelInspector:
         )
 
         await model.load()
-        self._cached_models[model_key] = model
+        for evicted_model in self._cached_models.put(output_names, model):
+            await evicted_model.unload()
+            evicted_model.cleanup()
         return model
 
     async def _generate_models_with_outputs(
@@ -433,10 +584,9 @@ class MLModelInspector:
         """
         Clears the cache of generated models.
         """
-        for model in self._cached_models.values():
+        for model in self._cached_models.clear():
             model.cleanup()
 
-        self._cached_models.clear()
         gc.collect()
 
     async def inspect(
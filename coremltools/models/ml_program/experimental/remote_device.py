@@ -4,16 +4,22 @@
 # found in the LICENSE.txt file or at https://opensource.org/licenses/BSD-3-Clause
 
 import asyncio as _asyncio
+import io as _io
 import json as _json
 import os as _os
 import shutil as _shutil
+import socket as _socket
+import struct as _struct
 import subprocess as _subprocess
+import tarfile as _tarfile
 import tempfile as _tempfile
+import threading as _threading
 import uuid as _uuid
 from abc import ABC as _ABC
 from abc import abstractmethod as _abstractmethod
 from collections.abc import Mapping as _Mapping
 from collections.abc import Sequence as _Sequence
+from concurrent.futures import Future as _Future
 from dataclasses import dataclass as _dataclass
 from enum import Enum as _Enum
 from pathlib import Path as _Path
@@ -1361,12 +1367,15 @@ class _JSONRPCError(Exception):
 class _JSONRPCResponse:
     """
     Represents a JSON-RPC response with an associated resource.
+
+    The resource is a path to a file, or its content for sockets which transfer
+    resources inline.
     """
 
     id: str
     result: _Optional[_Any]
     error: _Optional[_JSONRPCError]
-    resource: _Path
+    resource: _Optional[_Union[_Path, bytes]]
 
 
 class _JSONRPCSocket(_ABC):
@@ -1631,6 +1640,307 @@ class _DeviceCtlSocket(_JSONRPCSocket):
         return self.device.session.is_alive
 
 
+# A frame starts with the big-endian sizes of the JSON message (uint32) and of the
+# binary payload (uint64) that follow it.
+_FRAME_HEADER = _struct.Struct(">IQ")
+
+
+def _send_frame(
+    sock: _socket.socket,
+    message: _Dict[str, _Any],
+    payload: _Optional[bytes] = None,
+) -> None:
+    """
+    Write a JSON message and an optional binary payload to a stream socket as a single frame.
+    """
+    message_bytes = _json.dumps(message).encode("utf-8")
+    payload_size = len(payload) if payload is not None else 0
+    sock.sendall(_FRAME_HEADER.pack(len(message_bytes), payload_size) + message_bytes)
+    if payload_size > 0:
+        sock.sendall(payload)
+
+
+def _receive_exactly(sock: _socket.socket, size: int) -> _Optional[bytearray]:
+    """
+    Read ``size`` bytes from a stream socket. Returns ``None`` if the connection is closed
+    before any byte is read.
+    """
+    buffer = bytearray(size)
+    view = memoryview(buffer)
+    received = 0
+    while received < size:
+        count = sock.recv_into(view[received:], size - received)
+        if count == 0:
+            if received == 0:
+                return None
+            raise ConnectionError(f"Connection closed after {received} of {size} bytes of a frame.")
+        received += count
+    return buffer
+
+
+def _receive_frame(
+    sock: _socket.socket,
+) -> _Optional[_Tuple[_Dict[str, _Any], _Optional[bytes]]]:
+    """
+    Read a frame written by ``_send_frame`` from a stream socket. Returns the JSON message and
+    the binary payload (``None`` if it is empty), or ``None`` if the connection is closed.
+    """
+    header = _receive_exactly(sock, _FRAME_HEADER.size)
+    if header is None:
+        return None
+    message_size, payload_size = _FRAME_HEADER.unpack(header)
+    message_bytes = _receive_exactly(sock, message_size) if message_size > 0 else b""
+    payload = _receive_exactly(sock, payload_size) if payload_size > 0 else None
+    if message_bytes is None or (payload_size > 0 and payload is None):
+        raise ConnectionError("Connection closed in the middle of a frame.")
+    message = _json.loads(bytes(message_bytes).decode("utf-8"))
+    return (message, bytes(payload) if payload is not None else None)
+
+
+class _StreamSocket(_JSONRPCSocket):
+    """
+    A class for communicating with a device application using JSON-RPC over a stream connection,
+    either TCP or a Unix domain socket.
+
+    Each request and response is sent as a single frame (see ``_send_frame``), holding the
+    JSON-RPC message followed by the content of its resource, if any. A resource is sent inline,
+    with its name in the ``resource`` field of the message. A directory resource, such as a compiled
+    model, is sent as an uncompressed tar archive, with ``resourceFormat`` set to ``tar``.
+
+    Responses are read by a background thread as soon as they arrive, and complete the future
+    of the request with the same ID, so that any number of requests can be in flight at once.
+    """
+
+    def __init__(
+        self,
+        address: _Union[_Tuple[str, int], str],
+        connect_timeout: _Optional[float] = None,
+    ) -> None:
+        """
+        Connect to a device application.
+
+        Parameters
+        ----------
+        address: Union[Tuple[str, int], str]
+            The (host, port) of a TCP server, or the path of a Unix domain socket.
+
+        connect_timeout: Optional[float]
+            The timeout (in seconds) for establishing the connection. Defaults to None, which waits indefinitely.
+        """
+        if isinstance(address, str):
+            sock = _socket.socket(_socket.AF_UNIX, _socket.SOCK_STREAM)
+            sock.settimeout(connect_timeout)
+            sock.connect(address)
+        else:
+            sock = _socket.create_connection(address, timeout=connect_timeout)
+            sock.setsockopt(_socket.IPPROTO_TCP, _socket.TCP_NODELAY, 1)
+        sock.settimeout(None)
+
+        self.address = address
+        self._socket = sock
+        self._send_lock = _threading.Lock()
+        self._lock = _threading.Lock()
+        # Futures of the requests waiting for a response, by request ID.
+        self._pending: _Dict[str, _Future] = {}
+        # Futures of the requests made with ``send``, until they are claimed by ``receive``.
+        self._sent: _Dict[str, _Future] = {}
+        self._closed = False
+        self._reader = _threading.Thread(
+            target=self._read_responses,
+            name=f"StreamSocketReader-{address}",
+            daemon=True,
+        )
+        self._reader.start()
+
+    @staticmethod
+    def _read_resource(resource: _Union[_Path, bytes]) -> _Tuple[bytes, _Dict[str, _Any]]:
+        """
+        Return the content of a resource, and the fields describing it in the request.
+        """
+        if isinstance(resource, (bytes, bytearray)):
+            return (bytes(resource), {"resource": "resource.bin"})
+
+        if resource.is_dir():
+            buffer = _io.BytesIO()
+            with _tarfile.open(fileobj=buffer, mode="w") as archive:
+                archive.add(str(resource), arcname=resource.name)
+            return (buffer.getvalue(), {"resource": resource.name, "resourceFormat": "tar"})
+
+        return (resource.read_bytes(), {"resource": resource.name})
+
+    def request(
+        self,
+        request: _JSONRPCRequest,
+        resource: _Optional[_Union[_Path, bytes]] = None,
+    ) -> _Future:
+        """
+        Send a JSON-RPC request to the device application.
+
+        Parameters
+        ----------
+        request: JSONRPCRequest
+           The JSON-RPC request to send.
+
+        resource: Optional[Union[Path, bytes]]
+           A resource file or directory, or the content of a resource, to be sent with the request.
+
+        Returns
+        -------
+        Future
+           A future which is completed with the ``JSONRPCResponse`` as soon as it is received,
+           or with an exception if the connection is lost before.
+        """
+        message = {}
+        message["jsonrpc"] = "2.0"
+        message["id"] = request.id
+        message["method"] = request.method
+        message["params"] = request.params
+
+        payload = None
+        if resource is not None:
+            (payload, resource_fields) = self._read_resource(resource)
+            message.update(resource_fields)
+
+        future = _Future()
+        with self._lock:
+            if self._closed:
+                raise ConnectionError(f"Connection to {self.address} is closed.")
+            self._pending[request.id] = future
+
+        try:
+            with self._send_lock:
+                _send_frame(self._socket, message, payload)
+        except Exception:
+            with self._lock:
+                self._pending.pop(request.id, None)
+            raise
+
+        return future
+
+    def send(
+        self,
+        request: _JSONRPCRequest,
+        resource_path: _Optional[_Union[_Path, bytes]] = None,
+    ) -> None:
+        """
+        Send a JSON-RPC request to the device application, whose response is retrieved with ``receive``.
+
+        Parameters
+        ----------
+        request: JSONRPCRequest
+           The JSON-RPC request to send.
+
+        resource_path: Optional[Union[Path, bytes]]
+           A resource file or directory, or the content of a resource, to be sent with the request.
+        """
+        future = self.request(request, resource_path)
+        with self._lock:
+            self._sent[request.id] = future
+
+    def receive(
+        self,
+        id: str,
+    ) -> _Optional[_JSONRPCResponse]:
+        """
+        Return the JSON-RPC response of a request made with ``send``, if it has been received.
+
+        Parameters
+        ----------
+        id : str
+            The ID of the request for which to receive the response.
+
+        Returns
+        -------
+        Optional[JSONRPCResponse]
+            The received response, or None if no response is available yet.
+        """
+        with self._lock:
+            future = self._sent.get(id, None)
+            if future is None or not future.done():
+                return None
+            del self._sent[id]
+        return future.result()
+
+    def _read_responses(self) -> None:
+        error = None
+        try:
+            while True:
+                frame = _receive_frame(self._socket)
+                if frame is None:
+                    break
+
+                (message, payload) = frame
+                if not isinstance(message, _Mapping) or "id" not in message:
+                    raise ValueError(f"Response is malformed {message}.")
+
+                id = message["id"]
+                with self._lock:
+                    future = self._pending.pop(id, None)
+                if future is None:
+                    _logger.warning(f"Received a response for unknown request-id={id}.")
+                    continue
+
+                result = message.get("result", None)
+                response_error = _DeviceCtlSocket._parse_error(message.get("error", None))
+                if result is None and response_error is None:
+                    future.set_exception(
+                        ValueError(
+                            f"Response for request-id={id} is malformed {message}, missing result={result} or error={response_error}."
+                        )
+                    )
+                    continue
+
+                resource = payload if message.get("resource", None) is not None else None
+                future.set_result(
+                    _JSONRPCResponse(
+                        id=id,
+                        result=result,
+                        error=response_error,
+                        resource=resource,
+                    )
+                )
+        except Exception as e:
+            error = e
+
+        with self._lock:
+            was_closed = self._closed
+            self._closed = True
+            pending = list(self._pending.values())
+            self._pending.clear()
+
+        if error is None or was_closed:
+            error = ConnectionError(f"Connection to {self.address} is closed.")
+        for future in pending:
+            future.set_exception(error)
+
+    def close(self) -> None:
+        """
+        Close the connection. Requests still waiting for a response fail with a ``ConnectionError``.
+        """
+        with self._lock:
+            self._closed = True
+        try:
+            self._socket.shutdown(_socket.SHUT_RDWR)
+        except OSError:
+            pass
+        if self._reader is not _threading.current_thread():
+            self._reader.join()
+        self._socket.close()
+
+    @property
+    def is_alive(self) -> bool:
+        """
+        Checks if the socket is active.
+
+        Returns
+        -------
+        bool
+            True if the socket is active, False otherwise.
+        """
+        with self._lock:
+            return not self._closed
+
+
 class _RemoteService(_ABC):
     """
     An abstract base class representing a remote service capable of executing methods.
@@ -1699,6 +2009,19 @@ class _RemoteService(_ABC):
         """
         pass
 
+    @property
+    def supports_inline_resources(self) -> bool:
+        """
+        Checks if resources can be passed to and returned from ``call_method`` as bytes,
+        rather than as paths to files.
+
+        Returns
+        -------
+        bool:
+            True if the service transfers resources inline, False otherwise.
+        """
+        return False
+
     @property
     def is_alive(self) -> bool:
         """
@@ -1874,6 +2197,153 @@ class _DeviceCtlRemoteService(_RemoteService):
         return self.socket.is_alive
 
 
+class _StreamRemoteService(_RemoteService):
+    """
+    A service class for calling methods on a remote device using JSON-RPC over a ``StreamSocket``.
+
+    Unlike ``DeviceCtlRemoteService``, the response of a call is delivered as soon as it is
+    received rather than polled for, and calls made concurrently are pipelined on the connection.
+    Resources are transferred inline, so tensors don't need to be written to files.
+    """
+
+    def __init__(self, socket: _StreamSocket) -> None:
+        """
+        Initialize a StreamRemoteService instance.
+
+        Parameters
+        ----------
+        socket: StreamSocket
+            The socket used for communication with the device.
+        """
+        self.socket = socket
+
+    @staticmethod
+    def connect(
+        address: _Union[_Tuple[str, int], str],
+        connect_timeout: _Optional[float] = None,
+    ) -> "_StreamRemoteService":
+        """
+        Connect to a device application listening on a TCP address or a Unix domain socket.
+
+        Parameters
+        ----------
+        address: Union[Tuple[str, int], str]
+            The (host, port) of a TCP server, or the path of a Unix domain socket.
+
+        connect_timeout: Optional[float]
+            The timeout (in seconds) for establishing the connection. Defaults to None, which waits indefinitely.
+        """
+        return _StreamRemoteService(socket=_StreamSocket(address, connect_timeout=connect_timeout))
+
+    def _request(
+        self,
+        name: str,
+        params: _Any,
+        resource: _Optional[_Union[_Path, bytes]],
+    ) -> _Future:
+        if isinstance(resource, _Path) and not resource.exists():
+            raise _DeviceCtlError(f"Resource file {resource.absolute()} does not exist.")
+
+        request = _JSONRPCRequest(
+            id=str(_uuid.uuid4()),
+            method=name,
+            params=params,
+        )
+        return self.socket.request(request, resource)
+
+    async def call_method(
+        self,
+        name: str,
+        params: _Any,
+        resource: _Optional[_Union[_Path, bytes]] = None,
+    ) -> _Tuple[_Any, _Optional[bytes]]:
+        """
+        Asynchronously call a method on the remote device.
+
+        The request is written from an executor thread, so that sending a large resource doesn't
+        block the event loop, and the response is awaited without polling.
+
+        Parameters
+        ----------
+        name: str
+            The name of the method to call on the remote device.
+
+        params: Any
+            The parameters to pass to the method. Can be any JSON-serializable object.
+
+        resource: Optional[Union[Path, bytes]]
+            A resource file or directory, or the content of a resource, to be sent with the request. Defaults to None.
+
+        Returns
+        -------
+        Tuple[Any, Optional[bytes]]
+            A tuple containing:
+            - The result of the method call (Any)
+            - The content of any resource returned by the method (Optional[bytes])
+        """
+        future = await _asyncio.get_running_loop().run_in_executor(
+            None, self._request, name, params, resource
+        )
+        response = await _asyncio.wrap_future(future)
+
+        if response.error is not None:
+            raise _DeviceCtlError(error_code=response.error.code, message=response.error.message)
+
+        return (response.result, response.resource)
+
+    def fire_and_forget(
+        self,
+        name: str,
+        params: _Any,
+        resource: _Optional[_Union[_Path, bytes]] = None,
+    ) -> None:
+        """
+        Sends a method call without waiting for its response.
+
+        Parameters
+        ----------
+        name: str
+            The name of the method to call on the remote device.
+
+        params: Any
+            The parameters to pass to the method. Can be any JSON-serializable object.
+
+        resource: Optional[Union[Path, bytes]]
+            A resource file or directory, or the content of a resource, to be sent with the request. Defaults to None.
+        """
+        if not self.socket.is_alive:
+            return
+
+        try:
+            self._request(name, params, resource)
+        except Exception as e:
+            _logger.info(f"Failed to send request for {name}: {e}")
+
+    @property
+    def supports_inline_resources(self) -> bool:
+        """
+        Checks if resources can be passed to and returned from ``call_method`` as bytes.
+
+        Returns
+        -------
+        bool:
+            Always True.
+        """
+        return True
+
+    @property
+    def is_alive(self) -> bool:
+        """
+        Checks if the socket is active.
+
+        Returns
+        -------
+        bool:
+            True if the socket is active, False otherwise.
+        """
+        return self.socket.is_alive
+
+
 @_dataclass(frozen=True)
 class _TensorStorage:
     """
@@ -2424,9 +2894,13 @@ class _RemoteMLModelService:
     @staticmethod
     def _prepare_data_for_transfer(
         values: _Dict[str, _np.array],
-    ) -> _Tuple[_Dict[str, _Any], _Path]:
-        data_file = _tempfile.NamedTemporaryFile("w+b", suffix=".bin", delete=False)
-        data_file.seek(0)
+        inline: bool = False,
+    ) -> _Tuple[_Dict[str, _Any], _Union[_Path, bytes]]:
+        if inline:
+            data_file = _io.BytesIO()
+        else:
+            data_file = _tempfile.NamedTemporaryFile("w+b", suffix=".bin", delete=False)
+            data_file.seek(0)
 
         result = {}
         for name, value in values.items():
@@ -2435,6 +2909,10 @@ class _RemoteMLModelService:
                 array=value,
                 file=data_file,
             ).as_dict()
+
+        if inline:
+            return (result, data_file.getvalue())
+
         data_file.close()
         data_file_path = _Path(data_file.name)
 
@@ -2464,7 +2942,10 @@ class _RemoteMLModelService:
             message = f"The model with ID {self.model_id} and {self.compute_units.value} is not currently loaded."
             raise _DeviceCtlError(error_code=-32001, message=message)
 
-        (values, data_file_path) = self._prepare_data_for_transfer(values=inputs)
+        (values, data_file_path) = self._prepare_data_for_transfer(
+            values=inputs,
+            inline=self._service.supports_inline_resources,
+        )
 
         params = {
             "modelID": self._model_id,
@@ -2490,7 +2971,7 @@ class _RemoteMLModelService:
         if resource is None:
             raise ValueError("Required resource for tensor data storage is missing.")
 
-        with open(resource, "rb") as fp:
+        with _io.BytesIO(resource) if isinstance(resource, bytes) else open(resource, "rb") as fp:
             for name, value in outputs.items():
                 if not isinstance(value, _Mapping):
                     raise TypeError(
@@ -7,6 +7,7 @@ import atexit as _atexit
 import json
 import os as _os
 import shutil as _shutil
+import sys as _sys
 import tempfile as _tempfile
 import warnings as _warnings
 from copy import deepcopy as _deepcopy
@@ -29,6 +30,7 @@ from coremltools.converters.mil.mil.scope import ScopeSource as _ScopeSource
 from .utils import (
     _MLMODEL_EXTENSION,
     _MLPACKAGE_EXTENSION,
+    _copy_package,
     _create_mlpackage,
     _get_model_spec_path,
     _has_custom_layer,
@@ -39,12 +41,6 @@ from .utils import (
 from .utils import load_spec as _load_spec
 from .utils import save_spec as _save_spec
 
-if _HAS_TORCH:
-    import torch as _torch
-
-if _HAS_TF_1 or _HAS_TF_2:
-    import tensorflow as _tf
-
 
 try:
     from ..libmodelpackage import ModelPackage as _ModelPackage
@@ -695,6 +691,11 @@ class MLModel:
         Save the model to an ``.mlmodel`` format. For an MIL program, the ``save_path`` is
         a package directory containing the ``mlmodel`` and weights.
 
+        The weight files of the package are hard linked rather than copied when ``save_path`` is
+        on the same filesystem as the model's package, so large weights are not written again.
+        Saving to the path of the model's own package, such as the ``package_dir`` passed to
+        ``coremltools.convert``, only updates the model spec in place.
+
         Parameters
         ----------
         save_path: Target file path / bundle directory for the model.
@@ -709,8 +710,14 @@ class MLModel:
         """
         save_path = _os.path.expanduser(save_path)
 
+        save_in_place = (
+            self.is_package
+            and _os.path.exists(save_path)
+            and _os.path.samefile(save_path, self.package_path)
+        )
+
         # Clean up existing file or directory.
-        if _os.path.exists(save_path):
+        if _os.path.exists(save_path) and not save_in_place:
             if _os.path.isdir(save_path):
                 _shutil.rmtree(save_path)
             else:
@@ -726,7 +733,8 @@ class MLModel:
                         _MLPACKAGE_EXTENSION, ext
                     )
                 )
-            _shutil.copytree(self.package_path, save_path)
+            if not save_in_place:
+                _copy_package(self.package_path, save_path)
 
             if self._mil_program is not None and all(
                 [
@@ -1067,12 +1075,17 @@ class MLModel:
                 input_data[k] = v.astype(_np.float32)
 
     def _convert_tensor_to_numpy(self, input_dict):
+        # A framework tensor can only be given if its framework is already imported, so the
+        # framework is looked up rather than imported here.
+        _torch = _sys.modules.get("torch") if _HAS_TORCH else None
+        _tf = _sys.modules.get("tensorflow") if _HAS_TF_1 or _HAS_TF_2 else None
+
         def convert(given_input):
             if isinstance(given_input, _numpy.ndarray):
                 sanitized_input = given_input
-            elif _HAS_TORCH and isinstance(given_input, _torch.Tensor):
+            elif _torch is not None and isinstance(given_input, _torch.Tensor):
                 sanitized_input = given_input.detach().numpy()
-            elif (_HAS_TF_1 or _HAS_TF_2) and isinstance(given_input, _tf.Tensor):
+            elif _tf is not None and isinstance(given_input, _tf.Tensor):
                 sanitized_input = given_input.eval(session=_tf.compat.v1.Session())
             else:
                 sanitized_input = _numpy.array(given_input)
@@ -9,6 +9,84 @@ import coremltools
 from coremltools import proto
 
 from .. import datatypes
+from ..utils import _encode_varint
+
+# Upper bound on the size of the buffer of encoded samples merged into the spec at once.
+_SAMPLES_CHUNK_BYTES = 1 << 26
+
+
+def _add_float_samples(index, data_points):
+    """
+    Append the rows of the 2-D array ``data_points`` to the ``floatSamples`` of the
+    NearestNeighborsIndex message ``index``.
+
+    Since all the samples have the same number of dimensions, every encoded FloatVector has
+    the same header, so the samples are encoded directly from the float32 buffer and merged
+    into the message in large chunks, rather than appended one feature at a time.
+    """
+    data = _np.ascontiguousarray(data_points, dtype="<f4")
+    num_samples, num_dimensions = data.shape
+    if num_samples == 0:
+        return
+    vector_field = proto.DataStructures_pb2.FloatVector.DESCRIPTOR.fields_by_name["vector"]
+    samples_field = index.DESCRIPTOR.fields_by_name["floatSamples"]
+    # Tag and length of the packed floats, inside the tag and length of the FloatVector.
+    vector_header = _encode_varint(vector_field.number << 3 | 2) + _encode_varint(
+        4 * num_dimensions
+    )
+    sample_length = len(vector_header) + 4 * num_dimensions
+    header = (
+        _encode_varint(samples_field.number << 3 | 2)
+        + _encode_varint(sample_length)
+        + vector_header
+    )
+
+    rows = _np.empty((num_samples, len(header) + 4 * num_dimensions), dtype=_np.uint8)
+    rows[:, : len(header)] = _np.frombuffer(header, dtype=_np.uint8)
+    rows[:, len(header) :] = data.view(_np.uint8)
+    chunk_size = max(1, _SAMPLES_CHUNK_BYTES // rows.shape[1])
+    for start in range(0, num_samples, chunk_size):
+        index.MergeFromString(rows[start : start + chunk_size].tobytes())
+
+
+def _get_float_samples(index):
+    """
+    Return the ``floatSamples`` of the NearestNeighborsIndex message ``index`` as a 2-D
+    float32 array.
+    """
+    num_dimensions = index.numberOfDimensions
+    samples = index.floatSamples
+    if len(samples) == 0:
+        return _np.empty((0, num_dimensions), dtype=_np.float32)
+    # Every serialized FloatVector is its header followed by the packed floats.
+    encoded = b"".join(sample.SerializeToString() for sample in samples)
+    sample_length = len(encoded) // len(samples)
+    if sample_length * len(samples) != len(encoded) or sample_length < 4 * num_dimensions:
+        return _np.array([list(sample.vector) for sample in samples], dtype=_np.float32)
+    rows = _np.frombuffer(encoded, dtype=_np.uint8).reshape(len(samples), sample_length)
+    return rows[:, sample_length - 4 * num_dimensions :].copy().view("<f4")
+
+
+def _kd_tree_order(data_points, leaf_size):
+    """
+    Return the permutation of the rows of ``data_points`` in the order of the leaves of a
+    balanced kd-tree: each node with more than ``leaf_size`` points is split at the median
+    along the dimension of largest spread, with the lower half of the points first.
+    """
+    order = _np.arange(len(data_points))
+    nodes = [(0, len(data_points))]
+    while nodes:
+        start, end = nodes.pop()
+        if end - start <= leaf_size:
+            continue
+        indices = order[start:end]
+        points = data_points[indices]
+        split_dimension = _np.argmax(points.max(axis=0) - points.min(axis=0))
+        middle = (end - start) // 2
+        order[start:end] = indices[_np.argpartition(points[:, split_dimension], middle)]
+        nodes.append((start, start + middle))
+        nodes.append((start + middle, end))
+    return order
 
 
 class KNearestNeighborsClassifierBuilder:
@@ -562,7 +640,7 @@ class KNearestNeighborsClassifierBuilder:
         Parameters
         ----------
         data_points
-                List of input data points.
+                List or 2-D numpy array of input data points, with one row per data point.
 
         labels
                 List of corresponding labels.
@@ -585,27 +663,78 @@ class KNearestNeighborsClassifierBuilder:
         if len(data_points) != len(labels):
             raise TypeError("len(data_points) !=  len(labels)")
 
+        try:
+            data_points = _np.asarray(data_points, dtype=_np.float32)
+        except ValueError:
+            data_points = None
+        if data_points is None or data_points.shape[1:] != (self.number_of_dimensions,):
+            raise TypeError(
+                "dimensionality of data_points != expected number of dimensions"
+            )
+
         # Validate the types of the labels before adding any points.
         self._validate_label_types(labels)
 
-        for data_point in data_points:
-            sample = (
-                self.spec.kNearestNeighborsClassifier.nearestNeighborsIndex.floatSamples.add()
-            )
-            for feature in data_point:
-                sample.vector.append(feature)
+        _add_float_samples(
+            self.spec.kNearestNeighborsClassifier.nearestNeighborsIndex, data_points
+        )
 
+        if isinstance(labels, _np.ndarray):
+            labels = labels.tolist()
         if self.spec.kNearestNeighborsClassifier.HasField("int64ClassLabels"):
-            for label in labels:
-                self.spec.kNearestNeighborsClassifier.int64ClassLabels.vector.append(
-                    label
-                )
+            self.spec.kNearestNeighborsClassifier.int64ClassLabels.vector.extend(labels)
         else:
             # string labels
-            for label in labels:
-                self.spec.kNearestNeighborsClassifier.stringClassLabels.vector.append(
-                    label
-                )
+            self.spec.kNearestNeighborsClassifier.stringClassLabels.vector.extend(labels)
+
+    def add_sample_batches(self, batches):
+        """
+        Add samples to the KNearestNeighborsClassifier model from an iterable of batches,
+        such as a generator reading the data points from disk, so that only one batch of
+        data points needs to be held in memory in addition to the spec.
+
+        Parameters
+        ----------
+        batches
+                Iterable of (``data_points``, ``labels``) tuples, each of which is added
+                with ``add_samples``. The batches before an invalid one are still added.
+
+        Returns
+        -------
+        None
+        """
+        for data_points, labels in batches:
+            self.add_samples(data_points, labels)
+
+    def order_samples_for_kd_tree(self):
+        """
+        Reorder the samples added to a KNearestNeighborsClassifier model with a kd-tree
+        index so that they are stored in the order of the leaves of a balanced kd-tree
+        with the model's leaf size. This does not change the predictions of the model.
+
+        Returns
+        -------
+        The permutation applied to the samples, as an array of the indices of the samples
+        in the order in which they were added.
+        """
+        if self.index_type != "kd_tree":
+            raise ValueError("Samples can only be ordered for a kd_tree index")
+
+        knn_spec = self.spec.kNearestNeighborsClassifier
+        data_points = _get_float_samples(knn_spec.nearestNeighborsIndex)
+        order = _kd_tree_order(data_points, self.leaf_size)
+
+        del knn_spec.nearestNeighborsIndex.floatSamples[:]
+        _add_float_samples(knn_spec.nearestNeighborsIndex, data_points[order])
+
+        if knn_spec.HasField("int64ClassLabels"):
+            label_vector = knn_spec.int64ClassLabels.vector
+        else:
+            label_vector = knn_spec.stringClassLabels.vector
+        labels = list(label_vector)
+        del label_vector[:]
+        label_vector.extend([labels[i] for i in order])
+        return order
 
     def _validate_label_types(self, labels):
         """
@@ -624,6 +753,8 @@ class KNearestNeighborsClassifierBuilder:
         None, throws a TypeError if not expected.
         """
         if self.spec.kNearestNeighborsClassifier.HasField("int64ClassLabels"):
+            if isinstance(labels, _np.ndarray) and _np.issubdtype(labels.dtype, _np.integer):
+                return
             check_is_valid = KNearestNeighborsClassifierBuilder._is_valid_number_type
         else:
             check_is_valid = KNearestNeighborsClassifierBuilder._is_valid_text_type
@@ -19,6 +19,7 @@ from ... import SPECIFICATION_VERSION as _SPECIFICATION_VERSION
 from ... import proto as _proto
 from .. import datatypes
 from .._interface_management import set_training_features, set_transform_interface_params
+from ..utils import _fill_float_weights
 from .quantization_utils import _convert_array_to_nbit_quantized_bytes, _unpack_to_bytes
 from .spec_inspection_utils import _summarize_network_layer_info
 from .update_optimizer_utils import AdamParams, SgdParams
@@ -1553,7 +1554,7 @@ class NeuralNetworkBuilder:
 
         weights = spec_layer_params.weights
         if not is_quantized_weight and isinstance(W, _np.ndarray):
-            weights.floatValue.extend(W.flatten())
+            _fill_float_weights(weights, W)
         else:
 
             _verify_quantization_arguments(
@@ -1580,7 +1581,7 @@ class NeuralNetworkBuilder:
 
         if has_bias:
             bias = spec_layer_params.bias
-            bias.floatValue.extend(b.flatten())
+            _fill_float_weights(bias, b)
 
         return spec_layer
 
@@ -1672,7 +1673,7 @@ class NeuralNetworkBuilder:
 
         weights = spec_layer_params.weights
         if not is_quantized_weight:
-            weights.floatValue.extend(W.flatten())
+            _fill_float_weights(weights, W)
         else:
             _verify_quantization_arguments(
                 weight=W,
@@ -1696,7 +1697,7 @@ class NeuralNetworkBuilder:
 
         if has_bias:
             bias = spec_layer_params.bias
-            bias.floatValue.extend(b.flatten())
+            _fill_float_weights(bias, b)
 
         return spec_layer
 
@@ -1889,7 +1890,7 @@ class NeuralNetworkBuilder:
 
         elif non_linearity == "PRELU":
             # PReLU must provide an np array in params[0]
-            spec_layer_params.PReLU.alpha.floatValue.extend(params.flatten())
+            _fill_float_weights(spec_layer_params.PReLU.alpha, params)
 
         elif non_linearity == "ELU":
             # ELU must provide an alpha in params[0]
@@ -1899,10 +1900,8 @@ class NeuralNetworkBuilder:
             # Parametric softplus must provide two np arrays for alpha and beta
             alphas, betas = (params[0], params[1])
             # Weight alignment: Keras [H,W,C,F]
-            spec_layer_params.parametricSoftplus.alpha.floatValue.extend(
-                alphas.flatten()
-            )
-            spec_layer_params.parametricSoftplus.beta.floatValue.extend(betas.flatten())
+            _fill_float_weights(spec_layer_params.parametricSoftplus.alpha, alphas)
+            _fill_float_weights(spec_layer_params.parametricSoftplus.beta, betas)
 
         elif non_linearity == "THRESHOLDEDRELU":
             if params is None:
@@ -2166,7 +2165,7 @@ class NeuralNetworkBuilder:
         if isinstance(W, int):
             scale.floatValue.append(float(W))
         else:
-            scale.floatValue.extend(W.flatten())
+            _fill_float_weights(scale, W)
         if len(scale.floatValue) != _np.prod(shape_scale):
             raise ValueError(
                 "Dimensions of 'shape_scale' do not match the size of the provided 'scale' parameter"
@@ -2179,7 +2178,7 @@ class NeuralNetworkBuilder:
             if isinstance(b, int):
                 bias.floatValue.append(float(b))
             else:
-                bias.floatValue.extend(b.flatten())
+                _fill_float_weights(bias, b)
             if len(bias.floatValue) != _np.prod(shape_bias):
                 raise ValueError(
                     "Dimensions of 'shape_bias' do not match the size of the provided 'b' parameter"
@@ -2226,7 +2225,7 @@ class NeuralNetworkBuilder:
         if isinstance(b, int):
             bias.floatValue.append(float(b))
         else:
-            bias.floatValue.extend(b.flatten())
+            _fill_float_weights(bias, b)
         if len(bias.floatValue) != _np.prod(shape_bias):
             raise ValueError(
                 "Dimensions of 'shape_bias' do not match the size"
@@ -2525,7 +2524,7 @@ class NeuralNetworkBuilder:
         # Assign weights
         weights = spec_layer_params.weights
         if not quantization:  # no quantization
-            weights.floatValue.extend(Wt.flatten())
+            _fill_float_weights(weights, Wt)
         else:  # there is quantization
             W_bytes = bytes()
             if nbits == 8:
@@ -2539,8 +2538,7 @@ class NeuralNetworkBuilder:
         # Assign biases
         if has_bias:
             bias = spec_layer_params.bias
-            for f in range(output_channels):
-                bias.floatValue.append(float(b[f]))
+            _fill_float_weights(bias, b[:output_channels])
 
         return spec_layer
 
@@ -2743,14 +2741,13 @@ class NeuralNetworkBuilder:
 
         # Assign weights
         weights = spec_layer_params.weights
-        weights.floatValue.extend(W.flatten())
+        _fill_float_weights(weights, W)
 
         # Assign biases
         spec_layer_params.hasBias = has_bias
         if has_bias:
             bias = spec_layer_params.bias
-            for f in range(output_channels):
-                bias.floatValue.append(float(b[f]))
+            _fill_float_weights(bias, b[:output_channels])
 
         return spec_layer
 
@@ -3255,11 +3252,11 @@ class NeuralNetworkBuilder:
         _set_recurrent_activation(activation_f, activation)
 
         # Write the weights
-        spec_layer_params.weightMatrix.floatValue.extend(W_x.flatten())
-        spec_layer_params.recursionMatrix.floatValue.extend(W_h.flatten())
+        _fill_float_weights(spec_layer_params.weightMatrix, W_x)
+        _fill_float_weights(spec_layer_params.recursionMatrix, W_h)
 
         if b is not None:
-            spec_layer_params.biasVector.floatValue.extend(b.flatten())
+            _fill_float_weights(spec_layer_params.biasVector, b)
         return spec_layer
 
     def add_gru(
@@ -3356,19 +3353,19 @@ class NeuralNetworkBuilder:
         R_z, R_r, R_o = W_h
         W_z, W_r, W_o = W_x
 
-        spec_layer_params.updateGateWeightMatrix.floatValue.extend(W_z.flatten())
-        spec_layer_params.resetGateWeightMatrix.floatValue.extend(W_r.flatten())
-        spec_layer_params.outputGateWeightMatrix.floatValue.extend(W_o.flatten())
+        _fill_float_weights(spec_layer_params.updateGateWeightMatrix, W_z)
+        _fill_float_weights(spec_layer_params.resetGateWeightMatrix, W_r)
+        _fill_float_weights(spec_layer_params.outputGateWeightMatrix, W_o)
 
-        spec_layer_params.updateGateRecursionMatrix.floatValue.extend(R_z.flatten())
-        spec_layer_params.resetGateRecursionMatrix.floatValue.extend(R_r.flatten())
-        spec_layer_params.outputGateRecursionMatrix.floatValue.extend(R_o.flatten())
+        _fill_float_weights(spec_layer_params.updateGateRecursionMatrix, R_z)
+        _fill_float_weights(spec_layer_params.resetGateRecursionMatrix, R_r)
+        _fill_float_weights(spec_layer_params.outputGateRecursionMatrix, R_o)
 
         if b is not None:
             b_z, b_r, b_o = b
-            spec_layer_params.updateGateBiasVector.floatValue.extend(b_z.flatten())
-            spec_layer_params.resetGateBiasVector.floatValue.extend(b_r.flatten())
-            spec_layer_params.outputGateBiasVector.floatValue.extend(b_o.flatten())
+            _fill_float_weights(spec_layer_params.updateGateBiasVector, b_z)
+            _fill_float_weights(spec_layer_params.resetGateBiasVector, b_r)
+            _fill_float_weights(spec_layer_params.outputGateBiasVector, b_o)
         return spec_layer
 
     def add_unilstm(
@@ -3487,28 +3484,28 @@ class NeuralNetworkBuilder:
         R_i, R_f, R_o, R_z = W_h
         W_i, W_f, W_o, W_z = W_x
 
-        weight_params.inputGateWeightMatrix.floatValue.extend(W_i.flatten())
-        weight_params.forgetGateWeightMatrix.floatValue.extend(W_f.flatten())
-        weight_params.outputGateWeightMatrix.floatValue.extend(W_o.flatten())
-        weight_params.blockInputWeightMatrix.floatValue.extend(W_z.flatten())
+        _fill_float_weights(weight_params.inputGateWeightMatrix, W_i)
+        _fill_float_weights(weight_params.forgetGateWeightMatrix, W_f)
+        _fill_float_weights(weight_params.outputGateWeightMatrix, W_o)
+        _fill_float_weights(weight_params.blockInputWeightMatrix, W_z)
 
-        weight_params.inputGateRecursionMatrix.floatValue.extend(R_i.flatten())
-        weight_params.forgetGateRecursionMatrix.floatValue.extend(R_f.flatten())
-        weight_params.outputGateRecursionMatrix.floatValue.extend(R_o.flatten())
-        weight_params.blockInputRecursionMatrix.floatValue.extend(R_z.flatten())
+        _fill_float_weights(weight_params.inputGateRecursionMatrix, R_i)
+        _fill_float_weights(weight_params.forgetGateRecursionMatrix, R_f)
+        _fill_float_weights(weight_params.outputGateRecursionMatrix, R_o)
+        _fill_float_weights(weight_params.blockInputRecursionMatrix, R_z)
 
         if b is not None:
             b_i, b_f, b_o, b_z = b
-            weight_params.inputGateBiasVector.floatValue.extend(b_i.flatten())
-            weight_params.forgetGateBiasVector.floatValue.extend(b_f.flatten())
-            weight_params.outputGateBiasVector.floatValue.extend(b_o.flatten())
-            weight_params.blockInputBiasVector.floatValue.extend(b_z.flatten())
+            _fill_float_weights(weight_params.inputGateBiasVector, b_i)
+            _fill_float_weights(weight_params.forgetGateBiasVector, b_f)
+            _fill_float_weights(weight_params.outputGateBiasVector, b_o)
+            _fill_float_weights(weight_params.blockInputBiasVector, b_z)
 
         if peep is not None:
             p_i, p_f, p_o = peep
-            weight_params.inputGatePeepholeVector.floatValue.extend(p_i.flatten())
-            weight_params.forgetGatePeepholeVector.floatValue.extend(p_f.flatten())
-            weight_params.outputGatePeepholeVector.floatValue.extend(p_o.flatten())
+            _fill_float_weights(weight_params.inputGatePeepholeVector, p_i)
+            _fill_float_weights(weight_params.forgetGatePeepholeVector, p_f)
+            _fill_float_weights(weight_params.outputGatePeepholeVector, p_o)
 
         return spec_layer
 
@@ -3673,55 +3670,55 @@ class NeuralNetworkBuilder:
         R_i, R_f, R_o, R_z = W_h
         W_i, W_f, W_o, W_z = W_x
 
-        weight_params.inputGateWeightMatrix.floatValue.extend(W_i.flatten())
-        weight_params.forgetGateWeightMatrix.floatValue.extend(W_f.flatten())
-        weight_params.outputGateWeightMatrix.floatValue.extend(W_o.flatten())
-        weight_params.blockInputWeightMatrix.floatValue.extend(W_z.flatten())
+        _fill_float_weights(weight_params.inputGateWeightMatrix, W_i)
+        _fill_float_weights(weight_params.forgetGateWeightMatrix, W_f)
+        _fill_float_weights(weight_params.outputGateWeightMatrix, W_o)
+        _fill_float_weights(weight_params.blockInputWeightMatrix, W_z)
 
-        weight_params.inputGateRecursionMatrix.floatValue.extend(R_i.flatten())
-        weight_params.forgetGateRecursionMatrix.floatValue.extend(R_f.flatten())
-        weight_params.outputGateRecursionMatrix.floatValue.extend(R_o.flatten())
-        weight_params.blockInputRecursionMatrix.floatValue.extend(R_z.flatten())
+        _fill_float_weights(weight_params.inputGateRecursionMatrix, R_i)
+        _fill_float_weights(weight_params.forgetGateRecursionMatrix, R_f)
+        _fill_float_weights(weight_params.outputGateRecursionMatrix, R_o)
+        _fill_float_weights(weight_params.blockInputRecursionMatrix, R_z)
 
         if b is not None:
             b_i, b_f, b_o, b_z = b
-            weight_params.inputGateBiasVector.floatValue.extend(b_i.flatten())
-            weight_params.forgetGateBiasVector.floatValue.extend(b_f.flatten())
-            weight_params.outputGateBiasVector.floatValue.extend(b_o.flatten())
-            weight_params.blockInputBiasVector.floatValue.extend(b_z.flatten())
+            _fill_float_weights(weight_params.inputGateBiasVector, b_i)
+            _fill_float_weights(weight_params.forgetGateBiasVector, b_f)
+            _fill_float_weights(weight_params.outputGateBiasVector, b_o)
+            _fill_float_weights(weight_params.blockInputBiasVector, b_z)
 
         if peep is not None:
             p_i, p_f, p_o = peep
-            weight_params.inputGatePeepholeVector.floatValue.extend(p_i.flatten())
-            weight_params.forgetGatePeepholeVector.floatValue.extend(p_f.flatten())
-            weight_params.outputGatePeepholeVector.floatValue.extend(p_o.flatten())
+            _fill_float_weights(weight_params.inputGatePeepholeVector, p_i)
+            _fill_float_weights(weight_params.forgetGatePeepholeVector, p_f)
+            _fill_float_weights(weight_params.outputGatePeepholeVector, p_o)
 
         # Write the backward lstm weights
         R_i, R_f, R_o, R_z = W_h_back
         W_i, W_f, W_o, W_z = W_x_back
 
-        weight_params_back.inputGateWeightMatrix.floatValue.extend(W_i.flatten())
-        weight_params_back.forgetGateWeightMatrix.floatValue.extend(W_f.flatten())
-        weight_params_back.outputGateWeightMatrix.floatValue.extend(W_o.flatten())
-        weight_params_back.blockInputWeightMatrix.floatValue.extend(W_z.flatten())
+        _fill_float_weights(weight_params_back.inputGateWeightMatrix, W_i)
+        _fill_float_weights(weight_params_back.forgetGateWeightMatrix, W_f)
+        _fill_float_weights(weight_params_back.outputGateWeightMatrix, W_o)
+        _fill_float_weights(weight_params_back.blockInputWeightMatrix, W_z)
 
-        weight_params_back.inputGateRecursionMatrix.floatValue.extend(R_i.flatten())
-        weight_params_back.forgetGateRecursionMatrix.floatValue.extend(R_f.flatten())
-        weight_params_back.outputGateRecursionMatrix.floatValue.extend(R_o.flatten())
-        weight_params_back.blockInputRecursionMatrix.floatValue.extend(R_z.flatten())
+        _fill_float_weights(weight_params_back.inputGateRecursionMatrix, R_i)
+        _fill_float_weights(weight_params_back.forgetGateRecursionMatrix, R_f)
+        _fill_float_weights(weight_params_back.outputGateRecursionMatrix, R_o)
+        _fill_float_weights(weight_params_back.blockInputRecursionMatrix, R_z)
 
         if b_back is not None:
             b_i, b_f, b_o, b_z = b_back
-            weight_params_back.inputGateBiasVector.floatValue.extend(b_i.flatten())
-            weight_params_back.forgetGateBiasVector.floatValue.extend(b_f.flatten())
-            weight_params_back.outputGateBiasVector.floatValue.extend(b_o.flatten())
-            weight_params_back.blockInputBiasVector.floatValue.extend(b_z.flatten())
+            _fill_float_weights(weight_params_back.inputGateBiasVector, b_i)
+            _fill_float_weights(weight_params_back.forgetGateBiasVector, b_f)
+            _fill_float_weights(weight_params_back.outputGateBiasVector, b_o)
+            _fill_float_weights(weight_params_back.blockInputBiasVector, b_z)
 
         if peep_back is not None:
             p_i, p_f, p_o = peep_back
-            weight_params_back.inputGatePeepholeVector.floatValue.extend(p_i.flatten())
-            weight_params_back.forgetGatePeepholeVector.floatValue.extend(p_f.flatten())
-            weight_params_back.outputGatePeepholeVector.floatValue.extend(p_o.flatten())
+            _fill_float_weights(weight_params_back.inputGatePeepholeVector, p_i)
+            _fill_float_weights(weight_params_back.forgetGatePeepholeVector, p_f)
+            _fill_float_weights(weight_params_back.outputGatePeepholeVector, p_o)
         return spec_layer
 
     def add_flatten(self, name, mode, input_name, output_name):
@@ -4005,8 +4002,8 @@ class NeuralNetworkBuilder:
 
         # Set the parameters
         spec_layer_params.channels = channels
-        spec_layer_params.gamma.floatValue.extend(gamma.flatten())
-        spec_layer_params.beta.floatValue.extend(beta.flatten())
+        _fill_float_weights(spec_layer_params.gamma, gamma)
+        _fill_float_weights(spec_layer_params.beta, beta)
         spec_layer_params.epsilon = epsilon
         spec_layer_params.computeMeanVar = compute_mean_var
         spec_layer_params.instanceNormalization = instance_normalization
@@ -4018,8 +4015,8 @@ class NeuralNetworkBuilder:
                 )
 
         if not compute_mean_var:
-            spec_layer_params.mean.floatValue.extend(mean.flatten())
-            spec_layer_params.variance.floatValue.extend(variance.flatten())
+            _fill_float_weights(spec_layer_params.mean, mean)
+            _fill_float_weights(spec_layer_params.variance, variance)
 
         return spec_layer
 
@@ -4481,7 +4478,7 @@ class NeuralNetworkBuilder:
         spec_layer_params = spec_layer.loadConstant
 
         data = spec_layer_params.data
-        data.floatValue.extend(constant_value.flatten())
+        _fill_float_weights(data, constant_value)
 
         spec_layer_params.shape.extend(shape)
 
@@ -7005,7 +7002,7 @@ class NeuralNetworkBuilder:
 
         weights = spec_layer_params.weights
         if not is_quantized_weight:
-            weights.floatValue.extend(W.flatten())
+            _fill_float_weights(weights, W)
         else:
             _verify_quantization_arguments(
                 weight=W,
@@ -7029,7 +7026,7 @@ class NeuralNetworkBuilder:
 
         if b is not None:
             bias = spec_layer_params.bias
-            bias.floatValue.extend(b.flatten())
+            _fill_float_weights(bias, b)
         return spec_layer
 
     def add_batched_mat_mul(
@@ -7155,7 +7152,7 @@ class NeuralNetworkBuilder:
             weights = spec_layer_params.weights
 
             if not is_quantized_weight:
-                weights.floatValue.extend(_np.transpose(W).flatten())
+                _fill_float_weights(weights, _np.transpose(W))
             else:
                 _verify_quantization_arguments(
                     weight=W,
@@ -7201,7 +7198,7 @@ class NeuralNetworkBuilder:
 
             if bias is not None:
                 bias_param = spec_layer_params.bias
-                bias_param.floatValue.extend(bias.flatten())
+                _fill_float_weights(bias_param, bias)
 
         return spec_layer
 
@@ -7257,7 +7254,7 @@ class NeuralNetworkBuilder:
         spec_layer_params = spec_layer.loadConstantND
 
         data = spec_layer_params.data
-        data.floatValue.extend(constant_value.flatten())
+        _fill_float_weights(data, constant_value)
         spec_layer_params.shape.extend(shape)
 
         # Rank information
@@ -8716,10 +8713,10 @@ class NeuralNetworkBuilder:
         spec_layer_params.normalizedShape.extend(normalized_shape)
 
         weights = spec_layer_params.gamma
-        weights.floatValue.extend(gamma.flatten())
+        _fill_float_weights(weights, gamma)
 
         bias = spec_layer_params.beta
-        bias.floatValue.extend(beta.flatten())
+        _fill_float_weights(bias, beta)
 
         spec_layer_params.eps = eps
 
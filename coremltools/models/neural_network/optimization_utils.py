@@ -10,6 +10,8 @@ Neural Network optimization utilities.
 import numpy as _np
 from coremltools import _logger
 
+from ..utils import _fill_float_weights
+
 
 def _proto_float_to_np_array(input: "CoreML.Specification.WeightParams"):
     """Convert input with float values stored in floatValue or float16Value to np array."""
@@ -43,19 +45,19 @@ def _fuse_layer_with_scale_layer(layer_idx, scale_idx, layers):
     w = w.reshape(layer.outputChannels, int(len(w) / layer.outputChannels))
     wp = w * sw[:, None]
     del layer.weights.floatValue[:]
-    layer.weights.floatValue.extend(wp.flatten())
+    _fill_float_weights(layer.weights, wp)
 
     # Update biases
     if scale.hasBias:
         sb = _proto_float_to_np_array(scale.bias)
         if not layer.hasBias:
-            layer.bias.floatValue.extend(sb)
+            _fill_float_weights(layer.bias, sb)
             layer.hasBias = True
         else:
             lb = _proto_float_to_np_array(layer.bias)
             bp = sw * lb + sb
             del layer.bias.floatValue[:]
-            layer.bias.floatValue.extend(bp)
+            _fill_float_weights(layer.bias, bp)
 
     # re-wire outputs and delete scale layer
     print("Fused {}->{}".format(layers[layer_idx].name, layers[scale_idx].name))
@@ -79,13 +81,13 @@ def _fuse_layer_with_bias_layer(layer_idx, bias_idx, layers):
 
     bb = _proto_float_to_np_array(bias.bias)
     if not layer.hasBias:
-        layer.bias.floatValue.extend(bb)
+        _fill_float_weights(layer.bias, bb)
         layer.hasBias = True
     else:
         lb = _proto_float_to_np_array(layer.bias)
         bp = lb + bb
         del layer.bias.floatValue[:]
-        layer.bias.floatValue.extend(bp)
+        _fill_float_weights(layer.bias, bp)
 
     # re-wire outputs and delete bias layer
     print("Fused {}->{}".format(layers[layer_idx].name, layers[bias_idx].name))
@@ -112,8 +114,8 @@ def _bn_scale_fusion(bn_idx, scale_idx, layers):
     del bn.gamma.floatValue[:]
     del bn.beta.floatValue[:]
 
-    bn.gamma.floatValue.extend(gamma)
-    bn.beta.floatValue.extend(beta)
+    _fill_float_weights(bn.gamma, gamma)
+    _fill_float_weights(bn.beta, beta)
 
     # re-wire outputs and delete scale layer
     print("Fused {}->{}".format(layers[bn_idx].name, layers[scale_idx].name))
@@ -155,8 +157,8 @@ def _conv_bn_fusion(conv_idx, bn_idx, layers):
     if conv.hasBias:
         del conv.bias.floatValue[:]
 
-    conv.weights.floatValue.extend(wp.flatten())
-    conv.bias.floatValue.extend(bp)
+    _fill_float_weights(conv.weights, wp)
+    _fill_float_weights(conv.bias, bp)
     conv.hasBias = True
 
     print("Fused {}->{}".format(layers[conv_idx].name, layers[bn_idx].name))
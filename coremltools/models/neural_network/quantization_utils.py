@@ -14,7 +14,6 @@ from typing import Optional as _Optional
 import numpy as _np
 
 import coremltools as _ct
-from coremltools import _logger
 from coremltools._deps import _HAS_KMEANS1D, _kmeans1d
 from coremltools.optimize import _utils as _optimize_utils
 
@@ -23,7 +22,7 @@ from ... import (
     _MINIMUM_QUANTIZED_MODEL_SPEC_VERSION,
     _SPECIFICATION_VERSION_IOS_14,
 )
-from ..utils import _get_model, _macos_version, _wp_to_fp16wp
+from ..utils import _fill_float_weights, _get_model, _macos_version, _wp_to_fp16wp
 from .optimization_utils import _optimize_nn
 
 
@@ -373,7 +372,7 @@ def _get_kmeans_lookup_table_and_weight(
         Weights as numpy array
 
     force_kmeans1d:
-        Use kmeans1d regardless of number of weights
+        Use 1-D k-means regardless of number of weights
 
     Returns
     -------
@@ -398,9 +397,8 @@ def _get_kmeans_lookup_table_and_weight(
         weight.shape[1] == 1 and num_weights >= 10_000 and weight.dtype == _np.float16
     )
 
-    if (is_better_to_use_kmeans1d and _HAS_KMEANS1D) or force_kmeans1d:
+    if (is_better_to_use_kmeans1d or force_kmeans1d) and _HAS_KMEANS1D:
         # Cluster with kmeans1d
-        assert _HAS_KMEANS1D, "Unable to import kmeans1d, please make sure it's installed."
         values, indices, counts = _np.unique(weight, return_inverse=True, return_counts=True)
         indices = indices.flatten()
         n_clusters = min(len(values), lut_len)
@@ -408,6 +406,10 @@ def _get_kmeans_lookup_table_and_weight(
         lut = lut.squeeze(-1)
         lut[:n_clusters] = kmeans_results.centroids
         wq = _np.array(kmeans_results.clusters)[indices]
+    elif is_better_to_use_kmeans1d or force_kmeans1d:
+        # Cluster with the NumPy exact 1-D k-means, which is fast for the few distinct fp16 values.
+        lut, wq = _optimize_utils.kmeans_1d(weight.reshape(1, -1), lut_len)
+        lut, wq = lut[0], wq[0]
     else:
         # Cluster with scikit-learn
         try:
@@ -418,10 +420,6 @@ def _get_kmeans_lookup_table_and_weight(
                 " To install, run: \"pip install scikit-learn\"."
             )
 
-        if is_better_to_use_kmeans1d:
-            _logger.warning("It would be better to use kmeans1d but that is not available."
-                         " Using scikit-learn for K-means.")
-
         n_clusters = min(num_weights, lut_len)
         kmeans = KMeans(n_clusters, init="k-means++", tol=1e-2, n_init=1, random_state=0).fit(
             weight
@@ -729,7 +727,7 @@ def _dequantize_wp(wp, shape, axis=0):
 
     wp.rawValue = bytes()
     wp.quantization.Clear()
-    wp.floatValue.extend(dequantized_weight.flatten())
+    _fill_float_weights(wp, dequantized_weight)
 
 
 def _dequantize_nn_spec(spec):
@@ -8,11 +8,123 @@ Tree ensemble builder class to construct CoreML models.
 """
 import collections as _collections
 
+import numpy as _np
+
 from coremltools import proto as _proto
 
 from .. import SPECIFICATION_VERSION as _SPECIFICATION_VERSION
 from ._interface_management import set_classifier_interface_params, set_regressor_interface_params
 
+_TreeNode = _proto.TreeEnsemble_pb2.TreeEnsembleParameters.TreeNode
+
+# Protobuf wire types.
+_WIRE_TYPE_VARINT = 0
+_WIRE_TYPE_FIXED64 = 1
+_WIRE_TYPE_LENGTH_DELIMITED = 2
+
+
+def _encode_varints(values):
+    """
+    Encode an array of non-negative integers as protobuf varints.
+
+    Returns an ``(n, width)`` array holding the bytes of each varint, padded to the width
+    of the longest one, and the number of bytes of each varint.
+    """
+    remaining = _np.asarray(values).astype(_np.uint64)
+    num_bytes = _np.ones(remaining.shape, dtype=_np.int64)
+    columns = []
+    while True:
+        next_remaining = remaining >> _np.uint64(7)
+        has_more = next_remaining != 0
+        columns.append(
+            (remaining & _np.uint64(0x7F)).astype(_np.uint8) | (has_more.astype(_np.uint8) << 7)
+        )
+        if not has_more.any():
+            break
+        num_bytes += has_more
+        remaining = next_remaining
+    return _np.stack(columns, axis=1), num_bytes
+
+
+def _encode_doubles(values):
+    """
+    Encode an array of doubles as protobuf fixed64 values, in the layout of ``_encode_varints``.
+    """
+    values = _np.ascontiguousarray(values, dtype="<f8")
+    return values.view(_np.uint8).reshape(-1, 8), _np.full(len(values), 8, dtype=_np.int64)
+
+
+class _MessageEncoder:
+    """
+    Vectorized encoder of a batch of protobuf messages of the same type, which are built
+    field by field from arrays holding the value of the field in each message.
+
+    As in protobuf 3, scalar fields equal to zero are omitted.
+    """
+
+    def __init__(self, descriptor, num_messages):
+        self._descriptor = descriptor
+        self._num_messages = num_messages
+        # List of (bytes, lengths) pairs, where the first lengths[i] bytes of row i of
+        # bytes belong to message i.
+        self._segments = []
+
+    def _add_field(self, field_name, wire_type, encoded, present):
+        field_number = self._descriptor.fields_by_name[field_name].number
+        tag_bytes, tag_lengths = _encode_varints([field_number << 3 | wire_type])
+        present = _np.broadcast_to(present, (self._num_messages,))
+        self._segments.append((tag_bytes, present * tag_lengths))
+        encoded_bytes, lengths = encoded
+        self._segments.append((encoded_bytes, present * lengths))
+
+    def add_varint(self, field_name, values, present=True):
+        values = _np.broadcast_to(values, (self._num_messages,))
+        self._add_field(
+            field_name, _WIRE_TYPE_VARINT, _encode_varints(values), present & (values != 0)
+        )
+
+    def add_double(self, field_name, values, present=True):
+        values = _np.broadcast_to(_np.asarray(values, dtype=_np.float64), (self._num_messages,))
+        # Compare the bits rather than the values, since -0.0 is serialized.
+        is_nonzero = _np.ascontiguousarray(values).view(_np.uint64) != 0
+        self._add_field(
+            field_name, _WIRE_TYPE_FIXED64, _encode_doubles(values), present & is_nonzero
+        )
+
+    def add_message(self, field_name, encoder, present=True):
+        present = _np.broadcast_to(present, (self._num_messages,))
+        lengths = encoder.lengths()
+        self._add_field(field_name, _WIRE_TYPE_LENGTH_DELIMITED, _encode_varints(lengths), present)
+        # Embed the fields of the messages, rather than their serialized bytes.
+        for segment_bytes, segment_lengths in encoder._segments:
+            self._segments.append((segment_bytes, present * segment_lengths))
+
+    def lengths(self):
+        """
+        Return the number of bytes of each serialized message.
+        """
+        lengths = _np.zeros(self._num_messages, dtype=_np.int64)
+        for _, segment_lengths in self._segments:
+            lengths += segment_lengths
+        return lengths
+
+    def to_bytes(self):
+        """
+        Return the serialized messages, one after the other.
+        """
+        if not self._segments:
+            return bytes()
+        segment_bytes = _np.concatenate(
+            [_np.broadcast_to(b, (self._num_messages, b.shape[1])) for b, _ in self._segments],
+            axis=1,
+        )
+        mask = _np.concatenate(
+            [_np.arange(b.shape[1]) < lengths[:, None] for b, lengths in self._segments],
+            axis=1,
+        )
+        # Boolean indexing is row-major, so the bytes of each message stay in order.
+        return segment_bytes[mask].tobytes()
+
 
 class TreeEnsembleBase:
     """
@@ -252,6 +364,156 @@ class TreeEnsembleBase:
                 )
             )
 
+    def add_tree(
+        self,
+        tree_id,
+        feature_indices,
+        feature_values,
+        true_child_ids,
+        false_child_ids,
+        leaf_values,
+        branch_mode="BranchOnValueLessThanEqual",
+        leaf_value_indices=None,
+        relative_hit_rates=None,
+        missing_value_tracks_true_child=None,
+        node_ids=None,
+    ):
+        """
+        Add all the nodes of a tree to the tree ensemble, given as arrays with one entry per
+        node, such as the ``tree_`` arrays of a scikit-learn tree, or the arrays of a tree in
+        an XGBoost JSON model.
+
+        This is equivalent to calling :py:meth:`add_branch_node` and :py:meth:`add_leaf_node`
+        for each node, but the nodes are serialized at once, which is much faster for large
+        ensembles.
+
+        Parameters
+        ----------
+        tree_id: int
+            ID of the tree to add the nodes to.
+
+        feature_indices: array of int
+            Index of the feature split on by each node. Ignored for leaf nodes.
+
+        feature_values: array of double
+            The value used in the feature comparison of each node. Ignored for leaf nodes.
+
+        true_child_ids: array of int
+            ID of the child under the true condition of the split of each node. Nodes with
+            a negative ``true_child_ids`` entry, such as ``sklearn.tree._tree.TREE_LEAF``, are
+            leaf nodes.
+
+        false_child_ids: array of int
+            ID of the child under the false condition of the split of each node. Ignored for
+            leaf nodes.
+
+        leaf_values: array of double
+            Value(s) at each node to add to the prediction when the node is activated, given
+            as an array of shape ``(num_nodes,)``, or ``(num_nodes, num_values)`` for multiple
+            values. Ignored for branch nodes.
+
+        branch_mode: str
+            Branch mode of all the branch nodes. See :py:meth:`add_branch_node`.
+
+        leaf_value_indices: list of int [optional]
+            Index of the prediction dimension each column of ``leaf_values`` is added to.
+            Defaults to ``range(num_values)``.
+
+        relative_hit_rates: array of double [optional]
+            Relative hit rate of each node. See :py:meth:`add_branch_node`.
+
+        missing_value_tracks_true_child: array of bool [optional]
+            Whether a missing value traverses to the true child of each node. Ignored for
+            leaf nodes. Defaults to ``False``.
+
+        node_ids: array of int [optional]
+            ID of each node within the tree. Defaults to the position of each node in the
+            arrays.
+        """
+        true_child_ids = _np.asarray(true_child_ids, dtype=_np.int64)
+        if true_child_ids.ndim != 1:
+            raise ValueError("true_child_ids must be a 1-dimensional array.")
+        num_nodes = len(true_child_ids)
+        is_leaf = true_child_ids < 0
+        is_branch = ~is_leaf
+
+        def _as_node_array(name, values, dtype):
+            values = _np.asarray(values, dtype=dtype)
+            if values.shape != (num_nodes,):
+                raise ValueError(
+                    "%s must have one entry per node (%d), got shape %s."
+                    % (name, num_nodes, values.shape)
+                )
+            return values
+
+        feature_indices = _as_node_array("feature_indices", feature_indices, _np.int64)
+        feature_values = _as_node_array("feature_values", feature_values, _np.float64)
+        false_child_ids = _as_node_array("false_child_ids", false_child_ids, _np.int64)
+        if node_ids is None:
+            node_ids = _np.arange(num_nodes)
+        node_ids = _as_node_array("node_ids", node_ids, _np.int64)
+
+        leaf_values = _np.asarray(leaf_values, dtype=_np.float64)
+        if leaf_values.ndim == 1:
+            leaf_values = leaf_values[:, None]
+        if leaf_values.ndim != 2 or leaf_values.shape[0] != num_nodes:
+            raise ValueError(
+                "leaf_values must have shape (%d,) or (%d, num_values), got shape %s."
+                % (num_nodes, num_nodes, leaf_values.shape)
+            )
+        if leaf_value_indices is None:
+            leaf_value_indices = range(leaf_values.shape[1])
+        if len(leaf_value_indices) != leaf_values.shape[1]:
+            raise ValueError(
+                "leaf_value_indices must have one entry per column of leaf_values (%d)."
+                % leaf_values.shape[1]
+            )
+
+        if _np.any(node_ids < 0) or _np.any(feature_indices[is_branch] < 0):
+            raise ValueError("node_ids and feature_indices must be non-negative.")
+        if _np.any(false_child_ids[is_branch] < 0):
+            raise ValueError("Branch nodes must have non-negative false_child_ids.")
+
+        # Zero the entries ignored for leaf nodes, so that they are not serialized.
+        feature_indices = _np.where(is_branch, feature_indices, 0)
+        feature_values = _np.where(is_branch, feature_values, 0.0)
+        true_child_ids = _np.where(is_branch, true_child_ids, 0)
+        false_child_ids = _np.where(is_branch, false_child_ids, 0)
+
+        nodes = _MessageEncoder(_TreeNode.DESCRIPTOR, num_nodes)
+        nodes.add_varint("treeId", tree_id)
+        nodes.add_varint("nodeId", node_ids)
+        nodes.add_varint(
+            "nodeBehavior",
+            _np.where(
+                is_leaf,
+                _TreeNode.TreeNodeBehavior.Value("LeafNode"),
+                _TreeNode.TreeNodeBehavior.Value(branch_mode),
+            ),
+        )
+        nodes.add_varint("branchFeatureIndex", feature_indices)
+        nodes.add_double("branchFeatureValue", feature_values)
+        nodes.add_varint("trueChildNodeId", true_child_ids)
+        nodes.add_varint("falseChildNodeId", false_child_ids)
+        if missing_value_tracks_true_child is not None:
+            missing_value_tracks_true_child = _as_node_array(
+                "missing_value_tracks_true_child", missing_value_tracks_true_child, bool
+            )
+            nodes.add_varint("missingValueTracksTrueChild", missing_value_tracks_true_child & is_branch)
+        for column, index in enumerate(leaf_value_indices):
+            evaluation_info = _MessageEncoder(_TreeNode.EvaluationInfo.DESCRIPTOR, num_nodes)
+            evaluation_info.add_varint("evaluationIndex", index)
+            evaluation_info.add_double("evaluationValue", leaf_values[:, column])
+            nodes.add_message("evaluationInfo", evaluation_info, present=is_leaf)
+        if relative_hit_rates is not None:
+            relative_hit_rates = _as_node_array("relative_hit_rates", relative_hit_rates, _np.float64)
+            nodes.add_double("relativeHitRate", relative_hit_rates)
+
+        # Append the nodes to the repeated nodes field.
+        tree_nodes = _MessageEncoder(self.tree_parameters.DESCRIPTOR, num_nodes)
+        tree_nodes.add_message("nodes", nodes)
+        self.tree_parameters.MergeFromString(tree_nodes.to_bytes())
+
 
 class TreeEnsembleRegressor(TreeEnsembleBase):
     """
@@ -8,6 +8,7 @@ Utilities for the entire package.
 """
 import copy as _copy
 import gc as _gc
+import json as _json
 import math as _math
 import os as _os
 import shutil as _shutil
@@ -61,15 +62,14 @@ _MODEL_FILE_NAME = 'model.mlmodel'
 _WEIGHTS_FILE_NAME = 'weight.bin'
 _WEIGHTS_DIR_NAME = 'weights'
 _MLPACKAGE_AUTHOR_NAME = "com.apple.CoreML"
+# Index of the blobs in the weight file of a multifunction mlpackage, stored at the package root.
+_WEIGHT_DIGESTS_FILE_NAME = "weight_digests.json"
 
 try:
     from ..libmodelpackage import ModelPackage as _ModelPackage
 except:
     _ModelPackage = None
 
-if _HAS_SCIPY:
-    import scipy.sparse as _sp
-
 
 def _to_unicode(x):
     if isinstance(x, bytes):
@@ -88,27 +88,10 @@ def _remove_invalid_keys(input_dict, model):
             del input_dict[k]
 
 
-def _create_mlpackage(
-    proto_spec: "_proto.Model_pb2",
-    weights_dir: _Optional[str] = None,
-    package_path: _Optional[str] = None,
-) -> str:
+def _init_mlpackage_path(package_path: _Optional[str] = None) -> str:
     """
-
-    Parameters
-    ----------
-    proto_spec
-        The proto spec of the model.
-
-    weights_dir
-        Copy weights from this path to the ``mlpackage``.
-
-    package_path
-        Place the created ``mlpackage`` at this path. Error out if this path is a non-empty directory.
-
-    Returns
-    -------
-    path to the ``mlpackage``.
+    Validate the path at which a new ``mlpackage`` is created, or create a temporary one
+    if ``package_path`` is ``None``. Error out if this path is a non-empty directory.
     """
     if package_path is None:
         package_path = _tempfile.mkdtemp(suffix=_MLPACKAGE_EXTENSION)
@@ -126,8 +109,17 @@ def _create_mlpackage(
             f"For an ML Package, extension must be {_MLPACKAGE_EXTENSION} (not {ext})"
         )
 
-    package = _ModelPackage(package_path)
+    return package_path
+
+
+def _set_mlpackage_root_model(package_path: str, proto_spec: "_proto.Model_pb2") -> None:
+    """
+    Save the proto spec as the root model of the ``mlpackage`` at ``package_path``.
+    """
+    _add_mlpackage_root_model(_ModelPackage(package_path), proto_spec)
+
 
+def _add_mlpackage_root_model(package: "_ModelPackage", proto_spec: "_proto.Model_pb2") -> None:
     # Save proto to disk as the root model file, and copy into the model package.
     spec_file = _tempfile.NamedTemporaryFile(suffix=_MLMODEL_EXTENSION)
     spec_file.write(proto_spec.SerializeToString())
@@ -137,6 +129,64 @@ def _create_mlpackage(
     # Spec file is auto cleaned after close, which is fine because it is already added to the model package.
     spec_file.close()
 
+
+def _create_mlpackage_for_weights(package_path: _Optional[str] = None) -> _Tuple[str, str]:
+    """
+    Create an ``mlpackage`` with an empty weights directory and no root model yet, so that the
+    weights can be written directly into the package rather than copied into it. The root model
+    must then be set with ``_set_mlpackage_root_model``.
+
+    Parameters
+    ----------
+    package_path
+        Place the created ``mlpackage`` at this path. Error out if this path is a non-empty directory.
+        Defaults to a temporary directory.
+
+    Returns
+    -------
+    The path to the ``mlpackage``, and the path to its weights directory.
+    """
+    package_path = _init_mlpackage_path(package_path)
+    package = _ModelPackage(package_path)
+    with _tempfile.TemporaryDirectory() as empty_weights_dir:
+        package.addItem(
+            empty_weights_dir,
+            _WEIGHTS_DIR_NAME,
+            _MLPACKAGE_AUTHOR_NAME,
+            "CoreML Model Weights",
+        )
+    weights_dir = package.findItemByNameAuthor(_WEIGHTS_DIR_NAME, _MLPACKAGE_AUTHOR_NAME).path()
+    # The manifest is written when the package is released.
+    del package
+    return package_path, weights_dir
+
+
+def _create_mlpackage(
+    proto_spec: "_proto.Model_pb2",
+    weights_dir: _Optional[str] = None,
+    package_path: _Optional[str] = None,
+) -> str:
+    """
+
+    Parameters
+    ----------
+    proto_spec
+        The proto spec of the model.
+
+    weights_dir
+        Copy weights from this path to the ``mlpackage``.
+
+    package_path
+        Place the created ``mlpackage`` at this path. Error out if this path is a non-empty directory.
+
+    Returns
+    -------
+    path to the ``mlpackage``.
+    """
+    package_path = _init_mlpackage_path(package_path)
+    package = _ModelPackage(package_path)
+    _add_mlpackage_root_model(package, proto_spec)
+
     # Add weights bundle into the model package.
     if weights_dir is not None:
         package.addItem(
@@ -149,6 +199,37 @@ def _create_mlpackage(
     return package_path
 
 
+def _link_or_copy(src: str, dst: str) -> str:
+    """
+    Hard link ``dst`` to ``src``, or copy it if they are on different filesystems, or if the
+    filesystem doesn't support hard links.
+    """
+    try:
+        _os.link(src, dst)
+    except OSError:
+        _shutil.copy2(src, dst)
+    return dst
+
+
+def _copy_package(package_path: str, save_path: str) -> None:
+    """
+    Copy the ``mlpackage`` at ``package_path`` to ``save_path``.
+
+    The weight files are hard linked rather than copied (see ``_link_or_copy``), since they are
+    not modified once serialized; appending to a multifunction model copies the weight file
+    before writing to it (see ``_unshare_file``). The other files of the package, such as the
+    manifest and the model spec, may be rewritten in place and are copied.
+    """
+    weights_dir = _os.path.join("Data", _MLPACKAGE_AUTHOR_NAME, _WEIGHTS_DIR_NAME)
+
+    def copy_function(src: str, dst: str) -> str:
+        if _os.path.relpath(_os.path.dirname(src), package_path) == weights_dir:
+            return _link_or_copy(src, dst)
+        return _shutil.copy2(src, dst)
+
+    _shutil.copytree(package_path, save_path, copy_function=copy_function)
+
+
 def _get_model_spec_path(save_path: str) -> str:
     """
     Gets the filepath to save a protobuf model if it's within a `mlpackage`.
@@ -347,6 +428,34 @@ def _wp_to_fp16wp(wp):
     wp.float16Value = _fp32_to_fp16_byte_array(wp.floatValue)
     del wp.floatValue[:]
 
+
+def _encode_varint(value):
+    encoded = bytearray()
+    while value > 0x7F:
+        encoded.append((value & 0x7F) | 0x80)
+        value >>= 7
+    encoded.append(value)
+    return bytes(encoded)
+
+
+def _fill_float_weights(weights_message, values):
+    """
+    Append ``values``, flattened in row-major order, to the ``floatValue`` field of
+    ``weights_message``, the same as ``weights_message.floatValue.extend(values.flatten())``.
+
+    The values are encoded as a packed repeated float field in one shot from the numpy
+    buffer, and merged into the message, rather than added to ``floatValue`` one element
+    at a time, which dominates the time and memory used to build large models.
+    """
+    data = _np.ascontiguousarray(values, dtype="<f4").tobytes()
+    if len(data) == 0:
+        return
+    field_number = weights_message.DESCRIPTOR.fields_by_name["floatValue"].number
+    # Tag of a length-delimited field, followed by the length in bytes of the packed values.
+    header = _encode_varint(field_number << 3 | 2) + _encode_varint(len(data))
+    weights_message.MergeFromString(header + data)
+
+
 def _convert_neural_network_spec_weights_to_fp16(fp_spec):
     from .neural_network.quantization_utils import _quantize_spec_weights
 
@@ -748,7 +857,7 @@ def _sanitize_value(x):
     """
     if isinstance(x, (str, int, float,)):
         return x
-    elif _HAS_SCIPY and _sp.issparse(x):
+    elif _HAS_SCIPY and "scipy.sparse" in _sys.modules and _sys.modules["scipy.sparse"].issparse(x):
         return x.todense()
     elif isinstance(x, _np.ndarray):
         return x
@@ -1332,10 +1441,12 @@ def _convert_model_spec_to_pymil_prog(
     else:
         raise TypeError("weight compression not applicable for model type {}".format(model_type))
 
+    # The weights are memory-mapped, so only the weights touched by the graph passes are read.
     prog = pymil_load_func(
         model_spec=model_spec,
         specification_version=specification_version,
         file_weights_dir=mlmodel.weights_dir,
+        lazy_weights=True,
     )
     return prog
 
@@ -1547,9 +1658,241 @@ def _multifunction_program_append_unifunction_program(
     multifunction_prog.add_function(target_func_name, unifunction_prog.functions[src_func_name])
 
 
+def _get_function_spec(
+    spec: "_proto.Model_pb2", func_name: str
+) -> _proto.Model_pb2.FunctionDescription:
+    """
+    Utils to construct a FunctionDescription from the source spec.
+    """
+    model_desc = spec.description
+    # For single function model, we construct the FunctionDescription ourselves
+    if len(model_desc.functions) == 0:
+        assert func_name == "main", f"invalid function name {func_name}"
+        return _proto.Model_pb2.FunctionDescription(
+            input=model_desc.input,
+            output=model_desc.output,
+            state=model_desc.state,
+            predictedFeatureName=model_desc.predictedFeatureName,
+            predictedProbabilitiesName=model_desc.predictedProbabilitiesName,
+        )
+    # For multifunction model, we look for the corresponding FunctionDescription
+    for func_desc in model_desc.functions:
+        if func_desc.name != func_name:
+            continue
+        res = _proto.Model_pb2.FunctionDescription()
+        res.CopyFrom(func_desc)
+        res.name = ""
+        return res
+
+
+def _get_weight_digest_index(
+    mil_program_spec: "_proto.MIL_pb2.Program", prog: _mil.Program
+) -> _Dict[str, int]:
+    """
+    Map the content digest of each const of ``prog`` whose value is stored in ``weight.bin`` to
+    the offset of its blob, given the milproto ``mil_program_spec`` exported from ``prog``.
+    """
+    digest_to_offset = {}
+    for func_name, func_spec in mil_program_spec.functions.items():
+        name_to_const_op = {}
+
+        def collect_const_ops(block):
+            for op in block.operations:
+                for b in op.blocks:
+                    collect_const_ops(b)
+                if op.op_type == "const":
+                    name_to_const_op[op.outputs[0].name] = op
+
+        def add_blobs(block_spec):
+            for op_spec in block_spec.operations:
+                for b in op_spec.blocks:
+                    add_blobs(b)
+                if op_spec.type != "const" or "val" not in op_spec.attributes:
+                    continue
+                value_spec = op_spec.attributes["val"]
+                if value_spec.WhichOneof("value") != "blobFileValue":
+                    continue
+                file_value = value_spec.blobFileValue
+                if _os.path.basename(file_value.fileName) != _WEIGHTS_FILE_NAME:
+                    continue
+                op = name_to_const_op.get(op_spec.outputs[0].name)
+                if op is not None:
+                    digest_to_offset.setdefault(op.content_digest, file_value.offset)
+
+        collect_const_ops(prog.functions[func_name])
+        for block_spec in func_spec.block_specializations.values():
+            add_blobs(block_spec)
+    return digest_to_offset
+
+
+def _get_weight_file_fingerprint(weight_path: str) -> _Optional[_List[int]]:
+    if not _os.path.exists(weight_path):
+        return None
+    stat = _os.stat(weight_path)
+    return [stat.st_size, stat.st_mtime_ns]
+
+
+def _get_weight_digest_index_path(weights_dir: str) -> str:
+    """
+    The index is kept in the ``Data`` directory of the package, next to the weights directory,
+    where it is not part of any package item.
+    """
+    return _os.path.join(_os.path.dirname(_os.path.normpath(weights_dir)), _WEIGHT_DIGESTS_FILE_NAME)
+
+
+def _save_weight_digest_index(weights_dir: str, digest_to_offset: _Dict[str, int]) -> None:
+    """
+    Store the index of the blobs in the weight file in ``weights_dir``, along with the size and
+    modification time of the weight file, so that an index which no longer matches the weight
+    file is not used.
+    """
+    index = {
+        "weight_file": _get_weight_file_fingerprint(_os.path.join(weights_dir, _WEIGHTS_FILE_NAME)),
+        "digests": digest_to_offset,
+    }
+    index_path = _get_weight_digest_index_path(weights_dir)
+    tmp_index_path = index_path + ".tmp"
+    with open(tmp_index_path, "w") as f:
+        _json.dump(index, f)
+    _os.replace(tmp_index_path, index_path)
+
+
+def _load_weight_digest_index(
+    package_path: str, spec: "_proto.Model_pb2", weights_dir: str
+) -> _Dict[str, int]:
+    """
+    Load the index of the blobs in the weight file of the ``mlpackage`` at ``package_path``.
+    If it is missing, as it is until functions are first appended to the package, or outdated,
+    it is computed from the program in ``spec``, with the weights memory-mapped rather than read
+    into memory.
+    """
+    weight_path = _os.path.join(weights_dir, _WEIGHTS_FILE_NAME)
+    index_path = _get_weight_digest_index_path(weights_dir)
+    if _os.path.exists(index_path):
+        with open(index_path) as f:
+            index = _json.load(f)
+        if index["weight_file"] == _get_weight_file_fingerprint(weight_path):
+            return index["digests"]
+        _logger.info(f"The weight digest index of {package_path} is outdated. Computing it again.")
+
+    prog = _milproto_to_pymil.load(
+        spec, spec.specificationVersion, weights_dir, lazy_weights=True
+    )
+    return _get_weight_digest_index(spec.mlProgram, prog)
+
+
+def _unshare_file(path: str) -> None:
+    """
+    Replace the file at ``path`` with a copy of itself if it is hard linked to other files
+    (see ``_copy_package``), so that it can be modified in place without modifying them.
+    """
+    if _os.stat(path).st_nlink > 1:
+        tmp_path = path + ".tmp"
+        _shutil.copy2(path, tmp_path)
+        _os.replace(tmp_path, path)
+
+
+def _append_to_multifunction(desc: MultiFunctionDescriptor, package_path: str) -> None:
+    """
+    Add the functions of ``desc`` to the multifunction ``mlpackage`` at ``package_path`` in place.
+
+    Only the programs of the added functions are loaded, with their weights memory-mapped. Their
+    weights are matched against the index of the blobs already in the weight file of the package,
+    and only the weights which are not found are appended to it. The existing functions and
+    their weights are not rewritten. They are only loaded, with their weights memory-mapped, to
+    build the index the first time functions are appended to the package; the index is then
+    kept in the package for the next appends.
+    """
+    from coremltools.converters.mil.backend.mil.load import WeightAppendingMILProtoExporter
+
+    try:
+        spec = load_spec(package_path)
+    except Exception as err:
+        raise ValueError(f"invalid destination_path {package_path} with error {err} while loading.")
+    existing_function_names = [func.name for func in spec.description.functions]
+    if spec.WhichOneof("Type") != "mlProgram" or len(existing_function_names) == 0:
+        raise ValueError(
+            f"{package_path} is not a multifunction model. Functions can only be appended to a "
+            f"model saved by save_multifunction."
+        )
+    weights_dir = _try_get_weights_dir_path(package_path)
+    if weights_dir is None:
+        raise ValueError(f"weight_dir for destination_path {package_path} not found.")
+
+    if len(desc._name_to_source_function) == 0:
+        raise ValueError("The MultiFunctionDescriptor instance has no function to append.")
+    for target_func_name in desc._name_to_source_function:
+        if target_func_name in existing_function_names:
+            raise ValueError(f"function {target_func_name} already exists in {package_path}.")
+
+    default_function_name = desc.default_function_name
+    if default_function_name is None:
+        default_function_name = spec.description.defaultFunctionName
+    if (
+        default_function_name not in existing_function_names
+        and default_function_name not in desc._name_to_source_function
+    ):
+        raise ValueError(f"default_function_name {default_function_name} not found in the model.")
+
+    spec_version = max(
+        [spec.specificationVersion]
+        + [
+            desc._modelpath_to_spec[model_path].specificationVersion
+            for model_path, _ in desc._name_to_source_function.values()
+        ]
+    )
+
+    # construct a pymil program with only the new functions
+    modelpath_to_pymil = {}
+    new_prog = _mil.Program()
+    function_descs = []
+    for target_func_name, (model_path, src_func_name) in desc._name_to_source_function.items():
+        src_spec = desc._modelpath_to_spec[model_path]
+        if model_path not in modelpath_to_pymil:
+            weight_dir = _try_get_weights_dir_path(model_path)
+            if weight_dir is None:
+                raise ValueError(f"weight_dir for model_path {model_path} not found.")
+            modelpath_to_pymil[model_path] = _milproto_to_pymil.load(
+                src_spec, spec_version, weight_dir, lazy_weights=True
+            )
+        _multifunction_program_append_unifunction_program(
+            new_prog, modelpath_to_pymil[model_path], src_func_name, target_func_name
+        )
+        function_spec = _get_function_spec(src_spec, src_func_name)
+        function_spec.name = target_func_name
+        function_descs.append(function_spec)
+    new_prog.default_function_name = function_descs[0].name
+
+    # Identical weights, within the new functions or with the existing ones, are deduplicated
+    # by the exporter from their content digest, so that they share the same blob.
+    digest_to_offset = _load_weight_digest_index(package_path, spec, weights_dir)
+    weight_path = _os.path.join(weights_dir, _WEIGHTS_FILE_NAME)
+    if _os.path.exists(weight_path):
+        _unshare_file(weight_path)
+    exporter = WeightAppendingMILProtoExporter(new_prog, weights_dir, spec_version, digest_to_offset)
+    mil_proto = exporter.export()
+    # Close the blob writer, so that the weight file is complete.
+    exporter.blob_writers.clear()
+
+    for func_name in new_prog.functions:
+        spec.mlProgram.functions[func_name].CopyFrom(mil_proto.functions[func_name])
+    spec.description.functions.extend(function_descs)
+    spec.description.defaultFunctionName = default_function_name
+    spec.specificationVersion = spec_version
+
+    spec_path = _ModelPackage(package_path).getRootModel().path()
+    with open(spec_path, "wb") as f:
+        f.write(spec.SerializeToString())
+
+    for (_, digest), offset in exporter.content_digest_to_offset.items():
+        digest_to_offset[digest] = offset
+    _save_weight_digest_index(weights_dir, digest_to_offset)
+
+
 def save_multifunction(
     desc: MultiFunctionDescriptor,
     destination_path: str,
+    append: bool = False,
 ):
     """
     Save a :py:class:`MultiFunctionDescriptor` instance into a multifunction ``mlpackage``.
@@ -1563,6 +1906,16 @@ def save_multifunction(
     destination_path: str
         The path where the new ``mlpackage`` will be saved.
 
+    append: bool
+        If ``True``, ``destination_path`` must be an existing multifunction ``mlpackage`` saved by
+        ``save_multifunction``, and the functions in ``desc`` are added to it in place. Only the
+        programs of the added functions are loaded, and only their weights which are not already
+        in the package are written to it, so adding a function (for instance, another adapter of
+        the same base model) does not reload and rewrite the whole package. The first append
+        indexes the weights already in the package, and keeps that index in its ``Data``
+        directory for the next ones.
+        The default function of the package is kept, unless ``desc.default_function_name`` is set.
+
     Examples
     --------
     .. sourcecode:: python
@@ -1575,36 +1928,19 @@ def save_multifunction(
 
         save_multifunction(desc, "multifunction_model.mlpackage")
 
+        # Add another function to the saved model
+        desc = MultiFunctionDescriptor()
+        desc.add_function("my_model_3.mlpackage", "main", "main_3")
+        save_multifunction(desc, "multifunction_model.mlpackage", append=True)
+
     See Also
     --------
     MultiFunctionDescriptor
 
     """
-    def get_function_spec(
-        spec: "_proto.Model_pb2", func_name: str
-    ) -> _proto.Model_pb2.FunctionDescription:
-        """
-        Utils to construct a FunctionDescription from the source spec.
-        """
-        model_desc = spec.description
-        # For single function model, we construct the FunctionDescription ourselves
-        if len(model_desc.functions) == 0:
-            assert func_name == "main", f"invalid function name {func_name}"
-            return _proto.Model_pb2.FunctionDescription(
-                input=model_desc.input,
-                output=model_desc.output,
-                state=model_desc.state,
-                predictedFeatureName=model_desc.predictedFeatureName,
-                predictedProbabilitiesName=model_desc.predictedProbabilitiesName,
-            )
-        # For multifunction model, we look for the corresponding FunctionDescription
-        for func_desc in model_desc.functions:
-            if func_desc.name != func_name:
-                continue
-            res = _proto.Model_pb2.FunctionDescription()
-            res.CopyFrom(func_desc)
-            res.name = ""
-            return res
+    if append:
+        _append_to_multifunction(desc, destination_path)
+        return
 
     # compile model information: spec / weight_dir
     modelpath_to_spec_and_weightdir = {}
@@ -1648,7 +1984,7 @@ def save_multifunction(
 
         # get the corresponding function description from the spec
         spec = modelpath_to_spec_and_weightdir[model_path][0]
-        function_spec = get_function_spec(spec, src_func_name)
+        function_spec = _get_function_spec(spec, src_func_name)
         assert function_spec.name == "", "function_spec should not have name set"
         function_spec.name = target_func_name
         function_to_desc[target_func_name] = function_spec
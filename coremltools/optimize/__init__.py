@@ -3,7 +3,17 @@
 #  Use of this source code is governed by a BSD-3-clause license that can be
 #  found in the LICENSE.txt file or at https://opensource.org/licenses/BSD-3-Clause
 
+import importlib as _importlib
+
 from coremltools._deps import _IMPORT_CT_OPTIMIZE_TORCH
 
-if _IMPORT_CT_OPTIMIZE_TORCH:
-    from . import torch
+
+def __getattr__(name):
+    # coremltools.optimize.torch imports torch, so it is only imported on first access.
+    if name == "torch" and _IMPORT_CT_OPTIMIZE_TORCH:
+        return _importlib.import_module(f"{__name__}.torch")
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__():
+    return sorted(set(globals()) | ({"torch"} if _IMPORT_CT_OPTIMIZE_TORCH else set()))
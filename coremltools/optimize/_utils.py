@@ -396,8 +396,15 @@ def reshape_weight_for_vector_lut(
     return np.swapaxes(weight, -2, vector_axis)
 
 
+# Default bound on the temporary memory of `find_indices_for_lut`, in bytes.
+_FIND_INDICES_FOR_LUT_MAX_MEMORY = 1 << 28
+
+
 def find_indices_for_lut(
-    data: np.ndarray, lut: np.ndarray, vector_axis: Optional[int] = None
+    data: np.ndarray,
+    lut: np.ndarray,
+    vector_axis: Optional[int] = None,
+    max_memory: int = _FIND_INDICES_FOR_LUT_MAX_MEMORY,
 ) -> np.ndarray:
     """
     Given a data and a look-up-table (LUT), find the closest indices in LUT that each element in
@@ -407,6 +414,11 @@ def find_indices_for_lut(
     Note the elements in data may not exactly match the elements in lut due to numerical instability.
     So we use fuzzy match to find the closest one instead of doing exact match.
 
+    The data is processed in chunks, so the temporary memory is bounded by max_memory instead of
+    growing with data.size * 2**nbits. For scalar palettization, each element is binary searched
+    in the midpoints of its sorted LUT. For vector palettization, the distances to all LUT entries
+    are computed for a chunk of vectors at a time.
+
     Parameters
     - data: Arbitrary numpy array.
     - lut: [block_num1, ..., 2**nbits, vector_size]. LUT's rank is K + 2, where K is the rank of data.
@@ -416,46 +428,280 @@ def find_indices_for_lut(
         own LUT values. See details in the iOS18 `constexpr_lut_to_dense` op.
     - vector_axis: Only effective when lut's last dim (vector_size) > 1. It denotes which axis the
         vector is along.
+    - max_memory: The approximate bound on the temporary memory, in bytes.
     """
     if len(lut.shape) != len(data.shape) + 2:
         raise ValueError(
             "The lut's rank should be data's rank + 2. See constexpr_lut_to_dense op definition."
         )
-    if lut.shape[-1] > 1:
+    palette_num, vector_size = lut.shape[-2:]
+    if vector_size > 1:
         if vector_axis is None:
             raise ValueError("The vector_axis must be provided for vector palettization.")
         if not len(data.shape) > vector_axis >= -len(data.shape):
             raise ValueError(f"Invalid vector_axis ({vector_axis})")
         if vector_axis < 0:
             vector_axis += len(data.shape)
-        vector_size = lut.shape[-1]
         if data.shape[vector_axis] % vector_size != 0:
             raise ValueError(
                 f"The data dim on {vector_axis}th axis ({data.shape[vector_axis]}) "
                 f"must be divisible by vector_size ({vector_size})"
             )
         data = reshape_weight_for_vector_lut(data, vector_size, vector_axis)
+        indices_shape = data.shape[:-1]
+    else:
+        indices_shape = data.shape
 
-    repeated_lut_shape = data.shape
-    if lut.shape[-1] > 1:
-        repeated_lut_shape = repeated_lut_shape[:-1]
-    repeated_lut = repeat_data_as(lut, repeated_lut_shape)
-
-    if lut.shape[-1] == 1:
-        # For scalar palettization, we can simply find the closest value for each element.
-        indices = np.argmin(
-            np.abs(np.expand_dims(data, axis=-1) - np.squeeze(repeated_lut, axis=-1)), axis=-1
+    block_num = lut.shape[:-2]
+    block_sizes = []
+    for axis, (dim_size, block_dim_size) in enumerate(zip(indices_shape, block_num)):
+        if dim_size % block_dim_size != 0:
+            raise ValueError(
+                f"The data dim on {axis}th axis ({dim_size}) must be divisible by the "
+                f"lut's block number ({block_dim_size})"
+            )
+        block_sizes.append(dim_size // block_dim_size)
+    flattened_data = data.reshape(-1, vector_size)
+    flattened_lut = lut.reshape(-1, palette_num, vector_size).astype(np.float64)
+
+    if vector_size == 1:
+        # Sort each LUT, and map each sorted position to the first LUT index holding that value,
+        # so that ties resolve to the smallest index like argmin does.
+        order = np.argsort(flattened_lut[..., 0], axis=-1, kind="stable")
+        sorted_lut = np.take_along_axis(flattened_lut[..., 0], order, axis=-1)
+        is_duplicate = np.zeros(sorted_lut.shape, dtype=bool)
+        is_duplicate[:, 1:] = sorted_lut[:, 1:] == sorted_lut[:, :-1]
+        run_start = np.maximum.accumulate(
+            np.where(is_duplicate, 0, np.arange(palette_num)), axis=-1
         )
+        order = np.take_along_axis(order, run_start, axis=-1).reshape(-1)
+        # The midpoints between consecutive sorted LUT values, padded by +inf, so that the
+        # closest sorted position of a value is the number of midpoints below it.
+        midpoints = np.full(sorted_lut.shape, np.inf)
+        midpoints[:, :-1] = (sorted_lut[:, 1:] + sorted_lut[:, :-1]) / 2
+        midpoints = midpoints.reshape(-1)
+        # The block index, a few positions and a value per element.
+        bytes_per_element = 8 * (len(indices_shape) + 6)
     else:
-        # For vector palettization, find the closest vector by Euclidean distance.
-        dist = np.linalg.norm(np.expand_dims(data, axis=-2) - repeated_lut, axis=-1)
-        indices = np.argmin(dist, axis=-1)
+        # The gathered LUTs and the distances to all LUT entries of each vector.
+        bytes_per_element = 8 * (3 * palette_num * vector_size + len(indices_shape) + 2)
+
+    # The LUT has at most 2**8 entries.
+    indices = np.empty(flattened_data.shape[0], dtype=np.uint8)
+    chunk_size = max(1, max_memory // bytes_per_element)
+    for start in range(0, len(indices), chunk_size):
+        chunk = slice(start, start + chunk_size)
+        coordinates = np.unravel_index(
+            np.arange(start, min(start + chunk_size, len(indices))), indices_shape
+        )
+        block_indices = np.ravel_multi_index(
+            [coordinate // block_size for coordinate, block_size in zip(coordinates, block_sizes)],
+            block_num,
+        )
+        if vector_size == 1:
+            values = flattened_data[chunk, 0].astype(np.float64)
+            base = block_indices * palette_num
+            positions = np.zeros(len(values), dtype=np.int64)
+            step = palette_num // 2
+            while step > 0:
+                positions += np.where(midpoints[base + positions + step - 1] < values, step, 0)
+                step //= 2
+            closest = order[base + positions]
+            # A value on a midpoint is as close to the next LUT value, so take the smaller index.
+            is_tie = midpoints[base + positions] == values
+            if np.any(is_tie):
+                tie_positions = (base + positions)[is_tie]
+                closest[is_tie] = np.minimum(closest[is_tie], order[tie_positions + 1])
+            indices[chunk] = closest
+        else:
+            differences = flattened_data[chunk, None, :] - flattened_lut[block_indices]
+            indices[chunk] = np.argmin(np.sum(differences**2, axis=-1), axis=-1)
 
-    nbits = int(math.log2(lut.shape[-2]))
+    nbits = int(math.log2(palette_num))
+    indices = indices.reshape(indices_shape)
     indices = indices.astype(types.nptype_from_builtin(types.string_to_builtin(f"uint{nbits}")))
     return indices
 
 
+# Bound on the number of entries of the back-pointer table of `kmeans_1d`, which bounds how many
+# rows are clustered in one batch.
+_KMEANS_1D_MAX_TABLE_SIZE = 1 << 26
+
+
+def _histogram_1d(data: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Build the histogram of distinct values of each row of a 2-D array.
+
+    Returns the sorted distinct values and their counts (concatenated over the rows), the offsets
+    of each row's bins in them (length num_rows + 1), and for each element of data its bin index.
+    """
+    num_rows, row_size = data.shape
+    if data.dtype == np.float16 and row_size >= 1 << 16:
+        # A fp16 row has at most 2**16 distinct values, so count them by their bit pattern instead
+        # of sorting. The keys are ordered the same way as the float values.
+        bits = data.view(np.uint16).astype(np.int64)
+        keys = np.where(bits & 0x8000, 0xFFFF - bits, bits | 0x8000)
+        keys += np.arange(num_rows, dtype=np.int64)[:, None] << 16
+        counts = np.bincount(keys.reshape(-1), minlength=num_rows << 16)
+        bins = np.flatnonzero(counts)
+        bin_of_key = np.cumsum(counts > 0) - 1
+        row_keys = bins & 0xFFFF
+        values = np.where(row_keys & 0x8000, row_keys & 0x7FFF, 0xFFFF - row_keys)
+        values = values.astype(np.uint16).view(np.float16)
+        row_offsets = np.searchsorted(bins >> 16, np.arange(num_rows + 1))
+        return values, counts[bins], row_offsets, bin_of_key[keys]
+
+    order = np.argsort(data, axis=1, kind="stable")
+    sorted_data = np.take_along_axis(data, order, axis=1)
+    is_new = np.ones(sorted_data.shape, dtype=bool)
+    is_new[:, 1:] = sorted_data[:, 1:] != sorted_data[:, :-1]
+    bin_of_sorted = np.cumsum(is_new) - 1
+    bin_starts = np.flatnonzero(is_new)
+    counts = np.diff(np.append(bin_starts, is_new.size))
+    row_offsets = np.append(bin_of_sorted[::row_size], len(bin_starts))
+    element_bins = np.empty(data.shape, dtype=np.int64)
+    np.put_along_axis(element_bins, order, bin_of_sorted.reshape(data.shape), axis=1)
+    return sorted_data.reshape(-1)[bin_starts], counts, row_offsets, element_bins
+
+
+def _cluster_histogram_1d(
+    values: np.ndarray, counts: np.ndarray, row_offsets: np.ndarray, n_clusters: int
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Optimal weighted 1-D k-means of the sorted histograms built by `_histogram_1d`.
+
+    Each row is solved by the dynamic program over the number of clusters, where the best start of
+    the last cluster is monotone in the end bin. So every layer is solved by divide and conquer,
+    with all the subproblems of a recursion level (over all rows) evaluated in one vectorized step.
+
+    Returns the cluster index of each bin, and the centroids of each row
+    (shape [num_rows, n_clusters], zero padded for rows with fewer distinct values than n_clusters).
+    """
+    num_rows = len(row_offsets) - 1
+    num_bins = len(values)
+    row_sizes = np.diff(row_offsets)
+    row_of_bin = np.repeat(np.arange(num_rows), row_sizes)
+
+    # Center each row to limit the cancellation in the cluster cost.
+    weights = counts.astype(np.float64)
+    row_means = np.add.reduceat(weights * values, row_offsets[:-1]) / np.add.reduceat(
+        weights, row_offsets[:-1]
+    )
+    x = values.astype(np.float64) - row_means[row_of_bin]
+    cum_w = np.concatenate(([0.0], np.cumsum(weights)))
+    cum_s = np.concatenate(([0.0], np.cumsum(weights * x)))
+    cum_q = np.concatenate(([0.0], np.cumsum(weights * x * x)))
+
+    def cluster_cost(first_bin, last_bin):
+        w = cum_w[last_bin + 1] - cum_w[first_bin]
+        s = cum_s[last_bin + 1] - cum_s[first_bin]
+        return np.maximum(cum_q[last_bin + 1] - cum_q[first_bin] - s * s / w, 0.0)
+
+    # cluster_starts[c, b] is the first bin of the last cluster when the bins from the row start
+    # to b are split into c + 1 clusters.
+    cluster_starts = np.zeros((n_clusters, num_bins), dtype=np.int64)
+    cluster_starts[0] = row_offsets[row_of_bin]
+    prev_cost = cluster_cost(row_offsets[row_of_bin], np.arange(num_bins))
+    for c in range(1, n_clusters):
+        rows = np.flatnonzero(row_sizes > c)
+        if len(rows) == 0:
+            break
+        # The terms of the total cost which only depend on the start bin j of the last cluster.
+        start_cost = np.empty(num_bins)
+        start_cost[0] = np.inf
+        start_cost[1:] = prev_cost[:-1] - cum_q[1:-1]
+        cost = np.full(num_bins, np.inf)
+        # Each subproblem solves the end bins [i_lo, i_hi], whose best starts are in [j_lo, j_hi].
+        i_lo = row_offsets[rows] + c
+        i_hi = row_offsets[rows + 1] - 1
+        j_lo, j_hi = i_lo, i_hi
+        while len(i_lo) > 0:
+            mid = (i_lo + i_hi) // 2
+            # The last cluster also starts no earlier than with one cluster less.
+            first = np.minimum(np.maximum(j_lo, cluster_starts[c - 1, mid]), mid)
+            sizes = np.minimum(j_hi, mid) - first + 1
+            offsets = np.cumsum(sizes) - sizes
+            # The candidate starts of all subproblems, concatenated. The arithmetic is in place to
+            # limit the memory traffic, which dominates the run time.
+            j = np.repeat((first - offsets).astype(np.int32), sizes)
+            j += np.arange(len(j), dtype=np.int32)
+            s = np.repeat(cum_s[mid + 1], sizes)
+            s -= cum_s[j]
+            s *= s
+            w = np.repeat(cum_w[mid + 1], sizes)
+            w -= cum_w[j]
+            s /= w
+            total = start_cost[j]
+            total -= s
+            best_cost = np.minimum.reduceat(total, offsets)
+            # The first start attaining the minimum of each subproblem.
+            candidates = np.flatnonzero(total <= np.repeat(best_cost, sizes))
+            best = j[candidates[np.searchsorted(candidates, offsets)]]
+            cost[mid] = best_cost + cum_q[mid + 1]
+            cluster_starts[c, mid] = best
+
+            left, right = mid > i_lo, mid < i_hi
+            i_lo, i_hi, j_lo, j_hi = (
+                np.concatenate((i_lo[left], mid[right] + 1)),
+                np.concatenate((mid[left] - 1, i_hi[right])),
+                np.concatenate((j_lo[left], best[right])),
+                np.concatenate((best[left], j_hi[right])),
+            )
+        prev_cost = cost
+
+    # Backtrack the clusters of all rows from their last bins.
+    is_cluster_start = np.zeros(num_bins, dtype=bool)
+    row_clusters = np.minimum(row_sizes, n_clusters)
+    last_bin = row_offsets[1:] - 1
+    for c in range(n_clusters - 1, 0, -1):
+        rows = np.flatnonzero(row_clusters > c)
+        first_bin = cluster_starts[c, last_bin[rows]]
+        is_cluster_start[first_bin] = True
+        last_bin[rows] = first_bin - 1
+    is_cluster_start[row_offsets[:-1]] = True
+
+    cluster_index = np.cumsum(is_cluster_start) - 1
+    bin_clusters = cluster_index - cluster_index[row_offsets[:-1]][row_of_bin]
+    first_bins = np.flatnonzero(is_cluster_start)
+    centroids = np.zeros((num_rows, n_clusters))
+    centroids[row_of_bin[first_bins], bin_clusters[first_bins]] = np.add.reduceat(
+        weights * values, first_bins
+    ) / np.add.reduceat(weights, first_bins)
+    return bin_clusters, centroids
+
+
+def kmeans_1d(data: np.ndarray, n_clusters: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Exact (optimal) 1-D k-means clustering of each row of data, computed with NumPy only.
+
+    The distinct values of each row are clustered, weighted by their counts, so the cost mostly
+    depends on the number of distinct values, which is small for fp16 weights.
+
+    Parameters
+    - data: [num_rows, row_size]. Each row is clustered independently.
+    - n_clusters: The number of clusters of each row.
+
+    Returns
+    - lut: [num_rows, n_clusters] float64 centroids, sorted ascending. A row with fewer distinct
+        values than n_clusters has one centroid per distinct value, followed by zeros.
+    - indices: [num_rows, row_size] cluster index of each element.
+    """
+    if data.ndim != 2:
+        raise ValueError(f"data must be rank 2, but got rank {data.ndim}")
+    num_rows, row_size = data.shape
+    max_bins = min(row_size, 1 << 16) if data.dtype == np.float16 else row_size
+    rows_per_batch = max(1, _KMEANS_1D_MAX_TABLE_SIZE // (n_clusters * max(max_bins, 1)))
+
+    lut = np.zeros((num_rows, n_clusters))
+    indices = np.zeros(data.shape, dtype=np.int64)
+    for start in range(0, num_rows, rows_per_batch):
+        batch = slice(start, start + rows_per_batch)
+        values, counts, row_offsets, element_bins = _histogram_1d(data[batch])
+        bin_clusters, lut[batch] = _cluster_histogram_1d(values, counts, row_offsets, n_clusters)
+        indices[batch] = bin_clusters[element_bins]
+    return lut, indices
+
+
 def infer_block_sizes(
     op: "Operation",
     op_config: Union[OpLinearQuantizerConfig, OpPalettizerConfig],
@@ -753,12 +999,54 @@ def ios18_quant_params_to_ios16(quant_params: QuantParams) -> QuantParamsIos16:
     )
 
 
-def pack_elements_into_bits(elements: np.ndarray, nbits: int) -> np.ndarray:
+# The number of elements packed or unpacked at a time, which bounds the temporary memory. It's a
+# multiple of 8, so each chunk starts at a byte boundary for any nbits.
+_BITS_PACKING_CHUNK_SIZE = 1 << 20
+
+
+def _pack_bits_chunk(elements: np.ndarray, nbits: int, out: np.ndarray) -> None:
+    """Pack uint8 elements (a multiple of 8 of them) into the len(elements) * nbits / 8 bytes of out."""
+    if 8 % nbits == 0:
+        # Each byte holds 8 // nbits elements.
+        elements = elements.reshape(-1, 8 // nbits)
+        np.copyto(out, elements[:, 0])
+        for i in range(1, 8 // nbits):
+            out |= elements[:, i] << np.uint8(i * nbits)
+    else:
+        # Every 8 elements fill nbits bytes, so they are gathered in a little-endian 64-bit word.
+        elements = elements.reshape(-1, 8)
+        words = elements[:, 0].astype("<u8")
+        for i in range(1, 8):
+            words |= elements[:, i].astype("<u8") << np.uint64(i * nbits)
+        out.reshape(-1, nbits)[...] = words.view(np.uint8).reshape(-1, 8)[:, :nbits]
+
+
+def _unpack_bits_chunk(packed_values: np.ndarray, nbits: int, out: np.ndarray) -> None:
+    """The reverse of `_pack_bits_chunk`: unpack len(out) (a multiple of 8) uint8 elements."""
+    mask = (1 << nbits) - 1
+    if 8 % nbits == 0:
+        out = out.reshape(-1, 8 // nbits)
+        for i in range(8 // nbits):
+            np.right_shift(packed_values, np.uint8(i * nbits), out=out[:, i])
+            out[:, i] &= np.uint8(mask)
+    else:
+        words = np.zeros((len(packed_values) // nbits, 8), dtype=np.uint8)
+        words[:, :nbits] = packed_values.reshape(-1, nbits)
+        words = words.view("<u8").reshape(-1)
+        out = out.reshape(-1, 8)
+        for i in range(8):
+            out[:, i] = (words >> np.uint64(i * nbits)) & np.uint64(mask)
+
+
+def pack_elements_into_bits(
+    elements: np.ndarray, nbits: int, out: Optional[np.ndarray] = None
+) -> np.ndarray:
     """
     Pack elements into nbits representation, by starting with the least significant bit (LSB) and
     moving upward to the most significant bit (MSB).
 
-    Returns packed elements as np.uint8.
+    Returns packed elements as np.uint8. If out is provided, which must be a 1-rank np.uint8
+    array of ceil(elements.size * nbits / 8) bytes, the packed elements are written into it.
     """
     if not np.issubdtype(elements.dtype, np.integer):
         raise ValueError(f"Only support packing integers elements, but got {elements.dtype}")
@@ -779,17 +1067,40 @@ def pack_elements_into_bits(elements: np.ndarray, nbits: int) -> np.ndarray:
             f"To pack elements into {nbits}-bit, the min value is {min_val}, but got {np.min(elements)}"
         )
 
-    # As np.unpackbits only supports uint8, convert to uint8 first.
-    # Notice that it will not lose information, because the bits are unchanged when converting int8
-    # to uint8. For example, the signed int -6 has bit representation '11111010', and when we unpackbits
-    # we get [0, 1, 0, 1, 1, 1, 1, 1], where only first 4 elements are needed for 4-bit representation.
-    elements = elements.astype(np.uint8)
-    bitarray = np.unpackbits(elements.reshape(-1, 1), bitorder="little", axis=-1)[:, :nbits]
-    return np.packbits(bitarray.flatten(), bitorder="little")
+    elements = elements.reshape(-1)
+    packed_size = (elements.size * nbits + 7) // 8
+    if out is None:
+        out = np.empty(packed_size, dtype=np.uint8)
+    elif out.shape != (packed_size,) or out.dtype != np.uint8:
+        raise ValueError(
+            f"The out buffer should be a np.uint8 array of shape ({packed_size},), but got "
+            f"{out.dtype} array of shape {out.shape}"
+        )
+
+    mask = np.uint8((1 << nbits) - 1)
+    for start in range(0, elements.size, _BITS_PACKING_CHUNK_SIZE):
+        # Casting to uint8 keeps the bits of signed elements, where the masking drops the
+        # repeated sign bits. For example, the signed int -6 is '11111010', and its 4-bit
+        # representation is '1010'.
+        chunk = elements[start : start + _BITS_PACKING_CHUNK_SIZE].astype(np.uint8) & mask
+        chunk_out = out[start * nbits // 8 : (start + len(chunk)) * nbits // 8]
+        if len(chunk) % 8 != 0:
+            # Only the last chunk may end in the middle of a byte, so pad it with zeros.
+            chunk = np.concatenate([chunk, np.zeros(8 - len(chunk) % 8, dtype=np.uint8)])
+            chunk_out = np.empty(len(chunk) * nbits // 8, dtype=np.uint8)
+            _pack_bits_chunk(chunk, nbits, chunk_out)
+            out[start * nbits // 8 :] = chunk_out[: packed_size - start * nbits // 8]
+        else:
+            _pack_bits_chunk(chunk, nbits, chunk_out)
+    return out
 
 
 def restore_elements_from_packed_bits(
-    packed_values: np.ndarray, nbits: int, element_num: int, are_packed_values_signed: bool = False
+    packed_values: np.ndarray,
+    nbits: int,
+    element_num: int,
+    are_packed_values_signed: bool = False,
+    out: Optional[np.ndarray] = None,
 ) -> np.ndarray:
     """
     Restore elements from packed bits. Requires values that are packed by starting with the
@@ -799,6 +1110,8 @@ def restore_elements_from_packed_bits(
     are_packed_values_signed: Indicates if the packed_values were packed from signed integers. If
         True, the n-bit number unpacked from packed_values will be interpreted as signed integers,
         and the returned ndarray will have dtype np.int8. Otherwise, np.uint8 will be used.
+    out: If provided, the restored elements are written into it. It must be a 1-rank array of
+        element_num elements, with the dtype described above.
     """
     if len(packed_values.shape) != 1:
         raise NotImplementedError(
@@ -806,38 +1119,50 @@ def restore_elements_from_packed_bits(
         )
 
     if packed_values.dtype == np.int8:
-        # As np.unpackbits only supports uint8, need to convert first.
-        packed_values = packed_values.astype(np.uint8)
+        # The bits are unchanged when viewing int8 as uint8.
+        packed_values = packed_values.view(np.uint8)
     elif packed_values.dtype != np.uint8:
         raise NotImplementedError(
             f"Only support int8 or uint8 packed_values, but got {packed_values.dtype}"
         )
+    if packed_values.size * 8 < element_num * nbits:
+        raise ValueError(
+            f"The packed_values ({packed_values.size} bytes) are too short to restore "
+            f"{element_num} elements of {nbits} bits."
+        )
 
-    bitarray = np.unpackbits(packed_values, bitorder="little")
-    pad_required = bitarray.size % nbits != 0
-    if pad_required:
-        bitarray = np.concatenate([bitarray, np.zeros(nbits - bitarray.size % nbits)]).astype(
-            bitarray.dtype
+    dtype = np.int8 if are_packed_values_signed else np.uint8
+    if out is None:
+        out = np.empty(element_num, dtype=dtype)
+    elif out.shape != (element_num,) or out.dtype != dtype:
+        raise ValueError(
+            f"The out buffer should be a {np.dtype(dtype)} array of shape ({element_num},), but "
+            f"got {out.dtype} array of shape {out.shape}"
         )
-        if bitarray.size % nbits != 0:
-            raise ValueError(
-                f"The length of bitarray ({bitarray.size}) should be divisible by "
-                f"nbits ({nbits})."
-            )
-    bitarray = bitarray.reshape(-1, nbits)[:element_num, :]
-    # The np.packbits doesn't work well for signed int if we feed `bitarray` to it directly.
-    # For example, the original signed int is -6, which is packed as 1010 for 4-bit representation,
-    # and here `bitarray` is [[0, 1, 0, 1]], where the value will be interpreted as 10 (b'1010')
-    # by np.packbits.
-    # To make np.packbits work correctly, we need to repeat the sign bit. For example, 1010 will
-    # become 11111010, where np.packbits can correctly handle and after converting to int8 it's -6.
-    if are_packed_values_signed:
-        # Repeat the sign bit to make uint8 to int8 works.
-        bitarray = np.repeat(bitarray, [1] * (nbits - 1) + [8 - nbits + 1], axis=1)
-    restored_elements = np.packbits(bitarray, bitorder="little", axis=-1).reshape(-1)
-    if are_packed_values_signed:
-        restored_elements = restored_elements.astype(np.int8)
-    return restored_elements
+
+    restored_elements = out.view(np.uint8)
+    for start in range(0, element_num, _BITS_PACKING_CHUNK_SIZE):
+        chunk_out = restored_elements[start : start + _BITS_PACKING_CHUNK_SIZE]
+        chunk_packed_size = len(chunk_out) * nbits // 8
+        if len(chunk_out) % 8 != 0:
+            # Only the last chunk may end in the middle of a byte, so pad it with zeros.
+            padded_size = len(chunk_out) + 8 - len(chunk_out) % 8
+            chunk_packed = np.zeros(padded_size * nbits // 8, dtype=np.uint8)
+            available = packed_values[start * nbits // 8 : (start + padded_size) * nbits // 8]
+            chunk_packed[: len(available)] = available
+            padded_out = np.empty(padded_size, dtype=np.uint8)
+            _unpack_bits_chunk(chunk_packed, nbits, padded_out)
+            chunk_out[...] = padded_out[: len(chunk_out)]
+        else:
+            chunk_packed = packed_values[start * nbits // 8 : start * nbits // 8 + chunk_packed_size]
+            _unpack_bits_chunk(chunk_packed, nbits, chunk_out)
+
+    if are_packed_values_signed and nbits < 8:
+        # Repeat the sign bit to the upper bits. For example, -6 is packed as 1010 for 4-bit
+        # representation, which becomes 11111010.
+        out <<= 8 - nbits
+        out >>= 8 - nbits
+    return out
 
 
 def get_min_and_max_values(
@@ -835,10 +835,19 @@ class OptimizationConfig:
         * The keys of the dictionary are the name of a constant or an op instance, and the values are the corresponding :py:class:`OpCompressorConfig`.
         * An op instance will not be compressed if the value is set to ``None``.
         * You can use ``coremltools.optimize.coreml.get_weights_metadata`` to get the name of the constants / op instances in the model.
+
+    num_workers: int
+        * Number of worker processes used to compress the weights of different ops in parallel.
+          The weights are shared with the worker processes through shared memory, and the graph
+          is still modified in the main process.
+        * When palettizing with ``num_workers > 1``, the k-means of each weight runs in a single
+          worker process, so ``num_kmeans_workers`` of the op config has no effect.
+        * Default to 1, which compresses the weights one by one in the main process.
     """
     global_config: Optional[OpCompressorConfig] = field(default=None)
     op_type_configs: Optional[OpCompressorConfig] = field(default=None)
     op_name_configs: Optional[OpCompressorConfig] = field(default=None)
+    num_workers: int = field(default=1, validator=validators.instance_of(int))
 
     # The following two private attributes is aim for backward compatibility for ct.compression_utils implementation
     # They need to be removed in the future once we deprecate ct.compression_utils
@@ -942,6 +951,11 @@ class OptimizationConfig:
         if not _is_deprecated and self._op_selector is not None:
             raise ValueError("op_selector is supported only through the coremltools.compression_utils API.")
 
+    @num_workers.validator
+    def check_num_workers(self, attr, num_workers):
+        if num_workers < 1:
+            raise ValueError(f"num_workers must be a positive integer. Got {num_workers}.")
+
     @op_type_configs.validator
     def check_op_type_configs(self, attr, op_type_configs):
         if op_type_configs is None:
@@ -1032,12 +1046,13 @@ class OptimizationConfig:
     def from_dict(cls, config_dict: Dict[str, Any]) -> "OptimizationConfig":
         """
         Construct an ``OptimizationConfig`` instance from a nested dictionary.
-        The dictionary should have the structure that only contains (if any) the following four ``str`` keys:
+        The dictionary should have the structure that only contains (if any) the following ``str`` keys:
 
         * ``"config_type"``: Specify the configuration class type.
         * ``"global_config"``: Parameters for ``global_config``.
         * ``"op_type_configs"``: A nested dictionary for ``op_type_configs``.
         * ``"op_name_config"``: A nested dictionary for ``op_name_configs``.
+        * ``"num_workers"``: The ``num_workers``.
 
         The following is a nested dictionary that creates an optimization config for weight palettization:
 
@@ -1098,7 +1113,13 @@ class OptimizationConfig:
             return class_type._from_dict(cls_attrs)
 
         def _check_config_dict(config_dict):
-            valid_keys = ("config_type", "global_config", "op_name_configs", "op_type_configs")
+            valid_keys = (
+                "config_type",
+                "global_config",
+                "op_name_configs",
+                "op_type_configs",
+                "num_workers",
+            )
             for k in config_dict:
                 if k not in valid_keys:
                     raise ValueError(
@@ -1124,6 +1145,8 @@ class OptimizationConfig:
             cls_attrs[key] = {
                 k: _get_cls_instance(config_type, v) for k, v in config_dict[key].items()
             }
+        if "num_workers" in config_dict:
+            cls_attrs["num_workers"] = config_dict["num_workers"]
 
         return cls(**cls_attrs)
 
@@ -1131,12 +1154,13 @@ class OptimizationConfig:
     def from_yaml(cls, yml: Union[IO, str]) -> "OptimizationConfig":
         """
         Construct an ``OptimizationConfig`` instance from a YAML file.
-        The YAML file should have the structure that only contains (if any) the following four ``str`` keys:
+        The YAML file should have the structure that only contains (if any) the following ``str`` keys:
 
         * ``"config_type"``: Specify the configuration class type.
         * ``"global_config"``: Parameters for ``global_config``.
         * ``"op_type_configs"``: A nested dictionary for ``op_type_configs``.
         * ``"op_name_config"``: A nested dictionary for ``op_name_configs``.
+        * ``"num_workers"``: The ``num_workers``.
 
         The following is a YAML file that creates an optimization config for weight palettization:
 
@@ -4,9 +4,12 @@
 # found in the LICENSE.txt file or at https://opensource.org/licenses/BSD-3-Clause
 
 import atexit
+import copy
+import pickle
+from collections import deque
 from itertools import repeat
-from multiprocessing import Pool
-from typing import Callable, List, Optional, Tuple, Union
+from multiprocessing import Pool, shared_memory
+from typing import Any, Callable, Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple, Union
 
 import numpy as np
 from tqdm import tqdm
@@ -35,6 +38,176 @@ from coremltools.optimize.coreml._config import (
 )
 
 
+class _CompressionTask(NamedTuple):
+    """
+    The numeric part of compressing a const, which is ``compress_fn(weight, **kwargs)``.
+
+    It doesn't touch the graph, so it can run in a worker process. ``state`` holds what is needed
+    to mutate the graph by the compression result, besides the result itself.
+    """
+    weight: np.ndarray
+    compress_fn: Callable
+    kwargs: Dict[str, Any]
+    state: Dict[str, Any]
+
+    def run(self) -> Any:
+        return self.compress_fn(self.weight, **self.kwargs)
+
+
+# Whether the current process is a worker of a _CompressionScheduler, in which no nested process
+# pool can be created.
+_is_compression_worker = False
+
+
+def _init_compression_worker():
+    global _is_compression_worker
+    _is_compression_worker = True
+
+
+class _SubByteArray(NamedTuple):
+    """
+    A picklable stand-in for an array of sub-byte dtype, whose dtype metadata holds a MIL builtin
+    type that cannot be pickled.
+    """
+    data: np.ndarray
+    dtype_name: str
+
+
+def _pack_sub_byte_arrays(value: Any) -> Any:
+    if isinstance(value, np.ndarray) and types.SUB_BYTE_DTYPE_METADATA_KEY in (
+        value.dtype.metadata or {}
+    ):
+        builtin_type = value.dtype.metadata[types.SUB_BYTE_DTYPE_METADATA_KEY]
+        return _SubByteArray(
+            value.view(np.dtype(value.dtype.str)), types.builtin_to_string(builtin_type)
+        )
+    if isinstance(value, tuple) and hasattr(value, "_fields"):
+        return value._replace(**{f: _pack_sub_byte_arrays(getattr(value, f)) for f in value._fields})
+    return value
+
+
+def _unpack_sub_byte_arrays(value: Any) -> Any:
+    if isinstance(value, _SubByteArray):
+        return value.data.view(
+            types.nptype_from_builtin(types.string_to_builtin(value.dtype_name))
+        )
+    if isinstance(value, tuple) and hasattr(value, "_fields"):
+        return value._replace(
+            **{f: _unpack_sub_byte_arrays(getattr(value, f)) for f in value._fields}
+        )
+    return value
+
+
+def _compress_shared_weight(
+    shm_name: str, shape: Tuple[int], dtype: np.dtype, pickled_fn_and_kwargs: bytes
+) -> Any:
+    """
+    Run ``compress_fn(weight, **kwargs)`` on the weight in the shared memory block ``shm_name``,
+    where ``pickled_fn_and_kwargs`` is the pickled ``(compress_fn, kwargs)``.
+    """
+    compress_fn, kwargs = pickle.loads(pickled_fn_and_kwargs)
+    shm = shared_memory.SharedMemory(name=shm_name)
+    weight = np.ndarray(shape, dtype=dtype, buffer=shm.buf)
+    # Copy the result, so no view of the shared memory outlives the block.
+    result = copy.deepcopy(compress_fn(weight, **kwargs))
+    del weight
+    shm.close()
+    return _pack_sub_byte_arrays(result)
+
+
+class _CompressionScheduler:
+    """
+    Run the compression tasks of consts in a pool of ``num_workers`` processes, and yield the
+    results in order, so the caller can mutate the graph on the main process while the following
+    tasks are still running.
+
+    The weights are passed to the workers through shared memory instead of being pickled. At most
+    ``2 * num_workers`` tasks are in flight, to bound the shared memory in use. Tasks which cannot
+    be pickled (for example, with a lambda as the ``lut_function`` of palettization) run on the
+    main process. With ``num_workers <= 1``, all tasks run on the main process.
+    """
+
+    def __init__(self, num_workers: int = 1):
+        self.num_workers = num_workers
+        self._pool: Optional[Pool] = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if self._pool is not None:
+            if exc_type is None:
+                self._pool.close()
+            else:
+                self._pool.terminate()
+            self._pool.join()
+            self._pool = None
+
+    def _get_pool(self) -> Pool:
+        if self._pool is None:
+            self._pool = Pool(processes=self.num_workers, initializer=_init_compression_worker)
+        return self._pool
+
+    def _submit(self, task: _CompressionTask) -> Tuple[Any, Optional[shared_memory.SharedMemory]]:
+        # Pickled here rather than by the pool, which would only report a failure when the
+        # result is fetched. The pool then only copies the bytes.
+        try:
+            pickled_fn_and_kwargs = pickle.dumps((task.compress_fn, task.kwargs))
+        except Exception:
+            return task.run(), None
+
+        weight = np.ascontiguousarray(task.weight)
+        shm = shared_memory.SharedMemory(create=True, size=max(weight.nbytes, 1))
+        try:
+            np.ndarray(weight.shape, dtype=weight.dtype, buffer=shm.buf)[...] = weight
+            async_result = self._get_pool().apply_async(
+                _compress_shared_weight,
+                (shm.name, weight.shape, weight.dtype, pickled_fn_and_kwargs),
+            )
+        except Exception:
+            shm.close()
+            shm.unlink()
+            raise
+        return async_result, shm
+
+    @staticmethod
+    def _collect(
+        op: Operation,
+        task: _CompressionTask,
+        result: Any,
+        shm: Optional[shared_memory.SharedMemory],
+    ) -> Tuple[Operation, _CompressionTask, Any]:
+        if shm is None:
+            return op, task, result
+        try:
+            return op, task, _unpack_sub_byte_arrays(result.get())
+        finally:
+            shm.close()
+            shm.unlink()
+
+    def run(
+        self, tasks: Iterable[Tuple[Operation, _CompressionTask]]
+    ) -> Iterator[Tuple[Operation, _CompressionTask, Any]]:
+        if self.num_workers <= 1:
+            for op, task in tasks:
+                yield op, task, task.run()
+            return
+
+        pending = deque()
+        try:
+            for op, task in tasks:
+                pending.append((op, task, *self._submit(task)))
+                if len(pending) >= 2 * self.num_workers:
+                    yield self._collect(*pending.popleft())
+            while pending:
+                yield self._collect(*pending.popleft())
+        finally:
+            for _, _, _, shm in pending:
+                if shm is not None:
+                    shm.close()
+                    shm.unlink()
+
+
 class AbstractCompressionPass(AbstractQuantizationPass):
     """
     The abstract class for the compression graph passes.
@@ -116,15 +289,48 @@ class AbstractCompressionPass(AbstractQuantizationPass):
                     if need_transform:
                         valid_consts.append(op)
 
-            for op in tqdm(
-                valid_consts,
-                desc=f"Running compression pass {self.__class__.__name__}",
-                unit=" ops",
-            ):
-                self.transform_op(op)
+            def prepare_compression_tasks():
+                for op in tqdm(
+                    valid_consts,
+                    desc=f"Running compression pass {self.__class__.__name__}",
+                    unit=" ops",
+                ):
+                    task = self._prepare_compression(op)
+                    if task is not None:
+                        yield op, task
 
-        for f in prog.functions.values():
-            apply_block(f)
+            for op, task, compressed_params in scheduler.run(prepare_compression_tasks()):
+                self._apply_compression(op, task, compressed_params)
+
+        num_workers = 1 if self.config is None else self.config.num_workers
+        if self.joint_compression:
+            # Joint compression rewrites the constexpr ops around a weight, so the weights are
+            # compressed one after another.
+            num_workers = 1
+        with _CompressionScheduler(num_workers) as scheduler:
+            for f in prog.functions.values():
+                apply_block(f)
+
+    def _prepare_compression(self, op: Operation) -> Optional[_CompressionTask]:
+        """
+        Return the compression task of a const op, or None if the op is not compressed.
+        This must not mutate the graph.
+        """
+        raise NotImplementedError
+
+    def _apply_compression(
+        self, op: Operation, task: _CompressionTask, compressed_params: Optional[Any]
+    ) -> None:
+        """
+        Replace the const op by its compressed representation, given the result of its compression
+        task. ``compressed_params`` is None if the weight cannot be compressed.
+        """
+        raise NotImplementedError
+
+    def transform_op(self, op: Operation):
+        task = self._prepare_compression(op)
+        if task is not None:
+            self._apply_compression(op, task, task.run())
 
     def need_compress_const(
         self, op: Operation, _is_deprecated: bool, weight_threshold: float
@@ -489,24 +695,28 @@ class prune_weights(AbstractCompressionPass):
             name=op.name + "_sparsified",
         )
 
-    def transform_op(self, op: Operation):
+    def _prepare_compression(self, op: Operation) -> Optional[_CompressionTask]:
         op_config = self.config._get_const_op_config(op)
         if op_config is None:
-            return
+            return None
         if not self.need_compress_const(op, self.config._is_deprecated, op_config.weight_threshold):
-            return
+            return None
 
         const_val = self._get_const_value(op)
         if not isinstance(const_val, (np.ndarray, np.generic)):
             raise ValueError("Only numpy arrays are supported")
 
-        sparse_params: Optional[optimize_utils.SparseParamsIos16] = None
         skip_msg = f"op named {op.name} not applicable for {op_config} configuration. Skipped."
+        state = {"skip_msg": skip_msg}
         if isinstance(op_config, OpThresholdPrunerConfig):
-            sparse_params = self.compress_by_threshold(
-                val=const_val,
-                threshold=op_config.threshold,
-                minimum_sparsity_percentile=op_config.minimum_sparsity_percentile,
+            return _CompressionTask(
+                const_val,
+                self.compress_by_threshold,
+                {
+                    "threshold": op_config.threshold,
+                    "minimum_sparsity_percentile": op_config.minimum_sparsity_percentile,
+                },
+                state,
             )
         elif isinstance(op_config, OpMagnitudePrunerConfig):
             # Structural sparsity can only be applied to conv / linear weight
@@ -516,24 +726,38 @@ class prune_weights(AbstractCompressionPass):
             if not op_config._check_const_op_is_valid(op):
                 if op.name not in self.config.op_name_configs:
                     logger.warning(skip_msg)
-                    return
+                    return None
 
             if op_config.target_sparsity is not None:
-                sparse_params = self.compress_by_magnitude(
-                    val=const_val,
-                    target_sparsity=op_config.target_sparsity,
-                    block_size=op_config.block_size,
-                    dim=op_config.dim,
+                return _CompressionTask(
+                    const_val,
+                    self.compress_by_magnitude,
+                    {
+                        "target_sparsity": op_config.target_sparsity,
+                        "block_size": op_config.block_size,
+                        "dim": op_config.dim,
+                    },
+                    state,
                 )
             elif op_config.n_m_ratio is not None:
-                sparse_params = self.compress_by_nm_sparsity(
-                    val=const_val,
-                    n_m_ratio=op_config.n_m_ratio,
-                    dim=op_config.dim,
+                return _CompressionTask(
+                    const_val,
+                    self.compress_by_nm_sparsity,
+                    {"n_m_ratio": op_config.n_m_ratio, "dim": op_config.dim},
+                    state,
                 )
 
+        logger.warning(skip_msg)
+        return None
+
+    def _apply_compression(
+        self,
+        op: Operation,
+        task: _CompressionTask,
+        sparse_params: Optional["optimize_utils.SparseParamsIos16"],
+    ) -> None:
         if sparse_params is None:
-            logger.warning(skip_msg)
+            logger.warning(task.state["skip_msg"])
             return
 
         sparse_params: optimize_utils.SparseParams = optimize_utils.ios16_sparse_params_to_ios18(
@@ -953,8 +1177,22 @@ class palettize_weights(AbstractCompressionPass):
                 logger.warning(f"Can't perform palettization:{e}")
                 return None
 
+        if (
+            mode.upper() == "KMEANS"
+            and cluster_dim == 1
+            and original_data.dtype == np.float16
+            and grouped_channel_data[0].size >= 10_000
+        ):
+            # Large fp16 groups have relatively few distinct values, so the scalar k-means of all
+            # groups is solved exactly in one batched call.
+            lut, indices = optimize_utils.kmeans_1d(
+                np.stack([data.reshape(-1) for data in grouped_channel_data]), 1 << nbits
+            )
+            lut = lut.astype(original_data.dtype)
+            indices = indices.astype(np.uint8)
         # The subprocesses have overhead, so only use it for expensive computations (k-means).
-        if mode.upper() == "KMEANS" and num_kmeans_workers > 1:
+        # Inside a worker of the cross-op compression pool, the k-means runs in the worker itself.
+        elif mode.upper() == "KMEANS" and num_kmeans_workers > 1 and not _is_compression_worker:
             if palettize_weights._compress_pool is None:
                 palettize_weights._compress_pool = Pool(processes=num_kmeans_workers)
                 atexit.register(lambda: palettize_weights._compress_pool.terminate())
@@ -1018,12 +1256,12 @@ class palettize_weights(AbstractCompressionPass):
             params = optimize_utils.ios16_lut_params_to_ios18(params)
         return optimize_utils.lut_to_dense(params.indices, params.lut, params.vector_axis)
 
-    def transform_op(self, op: Operation):
+    def _prepare_compression(self, op: Operation) -> Optional[_CompressionTask]:
         op_config: Optional[OpPalettizerConfig] = self.config._get_const_op_config(op)
         if op_config is None:
-            return
+            return None
         if not self.need_compress_const(op, self.config._is_deprecated, op_config.weight_threshold):
-            return
+            return None
         if not is_current_opset_version_compatible_with(AvailableTarget.iOS18):
             err_msg = (
                 "The {} palettization is supported since iOS18. Please re-convert "
@@ -1058,28 +1296,48 @@ class palettize_weights(AbstractCompressionPass):
             logger.warning(
                 f"Cannot perform palettization on {op.name} as block_sizes is None. Skipped this op."
             )
-            return
+            return None
         if op_config.cluster_dim > 1:
             if not optimize_utils.is_cluster_dim_valid(op, op_config.cluster_dim, channel_axis):
                 logger.warning(f"The `cluster_dim` is invalid for {op.name}. Skipped this op.")
-                return
+                return None
 
+        per_channel_scale = None
         if op_config.enable_per_channel_scale:
             # Normalize by per channel scales before doing palettization.
             per_channel_scale = np.max(np.abs(weight_to_compress), axis=channel_axis, keepdims=True)
             per_channel_scale[per_channel_scale == 0] = 1
-            weight_to_compress /= per_channel_scale
+            # Not in place: the weight may be a read-only memory map of the weight file.
+            weight_to_compress = weight_to_compress / per_channel_scale
 
-        lut_params = self.blockwise_compress(
+        return _CompressionTask(
             weight_to_compress,
-            op_config.mode,
-            op_config.nbits,
-            block_sizes,
-            op_config.lut_function,
-            op_config.cluster_dim,
-            channel_axis=channel_axis,
-            num_kmeans_workers=op_config.num_kmeans_workers,
+            self.blockwise_compress,
+            {
+                "mode": op_config.mode,
+                "nbits": op_config.nbits,
+                "block_sizes": block_sizes,
+                "lut_function": op_config.lut_function,
+                "cluster_dim": op_config.cluster_dim,
+                "channel_axis": channel_axis,
+                "num_kmeans_workers": op_config.num_kmeans_workers,
+            },
+            {
+                "op_config": op_config,
+                "per_channel_scale": per_channel_scale,
+                "restore_original_dtype": restore_original_dtype,
+            },
         )
+
+    def _apply_compression(
+        self,
+        op: Operation,
+        task: _CompressionTask,
+        lut_params: Optional["optimize_utils.LutParams"],
+    ) -> None:
+        op_config: OpPalettizerConfig = task.state["op_config"]
+        per_channel_scale = task.state["per_channel_scale"]
+        restore_original_dtype = task.state["restore_original_dtype"]
         if lut_params is None:
             logger.warning(f"Cannot perform palettization on {op.name}. Skipped this op.")
             return
@@ -1372,12 +1630,12 @@ class linear_quantize_weights(AbstractCompressionPass):
             name=op.name + "_quantized",
         )
 
-    def transform_op(self, op: Operation):
+    def _prepare_compression(self, op: Operation) -> Optional[_CompressionTask]:
         op_config: Optional[OpLinearQuantizerConfig] = self.config._get_const_op_config(op)
         if op_config is None:
-            return
+            return None
         if not self.need_compress_const(op, self.config._is_deprecated, op_config.weight_threshold):
-            return
+            return None
         if not is_current_opset_version_compatible_with(AvailableTarget.iOS18):
             err_msg = (
                 "The {} quantization is supported since iOS18. "
@@ -1394,10 +1652,10 @@ class linear_quantize_weights(AbstractCompressionPass):
             logger.warning(
                 f"The const {op} has inf/-inf, which is not supported by quantization. Skipped."
             )
-            return
+            return None
         elif weight_to_compress.dtype == bool:
             # bool is already the smallest possible dtype (i.e. 1 bit), cannot further compress
-            return
+            return None
         elif np.issubdtype(weight_to_compress.dtype, np.integer):
             # We have a real use case (llama) where a const bool mask is indexed by input position,
             # which lowers to Core ML `cast bool to int8 -> gather int8 -> cast int8 back to bool`
@@ -1411,7 +1669,7 @@ class linear_quantize_weights(AbstractCompressionPass):
                 np.amax(weight_to_compress) - np.amin(weight_to_compress) < 2
                 and weight_to_compress.dtype.itemsize <= 1
             ):
-                return
+                return None
 
         if self.joint_compression:
             child_op = op.outputs[0].child_ops[0]
@@ -1434,15 +1692,26 @@ class linear_quantize_weights(AbstractCompressionPass):
             logger.warning(
                 f"Cannot perform quantization on {op.name} as block_sizes is None. Skipped this op."
             )
-            return
+            return None
 
-        quant_params = self.blockwise_compress_by_dtype(
+        return _CompressionTask(
             weight_to_compress,
-            op_config.dtype,
-            op_config.mode,
-            block_sizes,
+            self.blockwise_compress_by_dtype,
+            {
+                # The builtin type cannot be pickled, so it's passed by its name.
+                "dtype": types.builtin_to_string(op_config.dtype),
+                "mode": op_config.mode,
+                "block_sizes": block_sizes,
+            },
+            {},
         )
 
+    def _apply_compression(
+        self,
+        op: Operation,
+        task: _CompressionTask,
+        quant_params: Optional["optimize_utils.QuantParams"],
+    ) -> None:
         if quant_params is None:
             logger.warning(f"Cannot perform quantization on {op.name}. Skipped this op.")
             return
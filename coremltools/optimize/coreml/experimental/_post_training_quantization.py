@@ -11,6 +11,10 @@ import numpy as np
 from tqdm import tqdm
 
 import coremltools as ct
+from coremltools.converters.mil.frontend.milproto import load as _milproto_to_pymil
+from coremltools.converters.mil.mil import types as _types
+from coremltools.converters.mil.mil.executor import ReferenceExecutor as _ReferenceExecutor
+from coremltools.models import utils as _model_utils
 from coremltools.models._deprecation import deprecated as _deprecated
 from coremltools.optimize.coreml import OptimizationConfig as _OptimizationConfig
 from coremltools.optimize.coreml import _post_training_quantization
@@ -101,9 +105,7 @@ def _update_tensor_range(
 ) -> None:
     tensor_min = np.min(np.array(tensor_value).flatten())
     tensor_max = np.max(np.array(tensor_value).flatten())
-    activation_stats_dict[tensor_name]["rmin"] = tensor_min
-    activation_stats_dict[tensor_name]["rmax"] = tensor_max
-    if tensor_name in activation_stats_dict:
+    if "rmin" in activation_stats_dict[tensor_name]:
         activation_stats_dict[tensor_name]["rmin"] = min(
             tensor_min, activation_stats_dict[tensor_name]["rmin"]
         )
@@ -196,10 +198,55 @@ def _adjust_concat_surrounding_activation_stats(
                 activation_stats_dict[tensor_name]["rmax"] = group_rmax
 
 
+def _update_activation_stats_with_reference_executor(
+    fpmodel: "ct.models.MLModel",
+    sample_data: List[Dict[str, np.ndarray]],
+    intermediate_output_names: List[str],
+    activation_stats_dict: Dict[str, Dict[str, float]],
+) -> None:
+    """
+    Run the PyMIL program of the model on the sample data with the ``ReferenceExecutor``, and update
+    the min/max of the intermediate tensors in a single pass. Only the running min/max are kept, since
+    the executor frees each activation once its consumers have run. It doesn't need Core ML, so it
+    works on all platforms.
+    """
+    model_spec = fpmodel.get_spec()
+    for input_spec in model_spec.description.input:
+        if input_spec.type.WhichOneof("Type") == "imageType":
+            raise ValueError(
+                f"Input {input_spec.name} is an image, which isn't supported by the pymil "
+                "calibration backend. Please use the coreml calibration backend on macOS instead."
+            )
+
+    prog = _model_utils._convert_model_spec_to_pymil_prog(
+        fpmodel, model_spec.specificationVersion, _milproto_to_pymil.load
+    )
+    function_name = fpmodel.function_name or prog.default_function_name
+    executor = _ReferenceExecutor(prog, function_name)
+    recorded_names = set(intermediate_output_names)
+
+    def record_intermediate_output(var, value):
+        # Same as the coreml backend, only tensors which are valid model outputs are recorded.
+        if (
+            var.name in recorded_names
+            and _types.is_tensor(var.sym_type)
+            and var.dtype in (_types.fp16, _types.fp32, _types.fp64, _types.int32)
+        ):
+            _update_tensor_range(var.name, value, activation_stats_dict)
+
+    for data in tqdm(
+        sample_data,
+        desc="Running compression pass linear_quantize_activations",
+        unit=" calibration samples",
+    ):
+        executor.predict(data, state=executor.make_state(), callback=record_intermediate_output)
+
+
 def _get_activation_calibration_stats(
     fpmodel: "ct.models.MLModel",
     sample_data: List[Dict[str, np.ndarray]],
     calibration_op_group_size: int = -1,
+    calibration_backend: str = "auto",
 ) -> Dict[str, Dict[str, float]]:
     """
     Calibration and store a dict of intermediate tensor stats.
@@ -216,12 +263,28 @@ def _get_activation_calibration_stats(
         thousands of outputs, which may lead to model hanging forever during model loading. To work around this
         issue, intermediate outputs are grouped into smaller groups, where each time a temperary model will only
         have `calibration_op_group_size` outputs. By default (op_group_size = -1), op_group_size is equal to the
-        number of valid intermediate ops.
+        number of valid intermediate ops. Only used by the ``"coreml"`` backend.
+    calibration_backend: str
+        How to compute the intermediate tensors:
+        - ``"coreml"``: Predict with Core ML models which have the intermediate tensors as outputs.
+          Only available on macOS.
+        - ``"pymil"``: Execute the PyMIL program of the model with NumPy, in a single streaming pass
+          over the sample data. Available on all platforms.
+        - ``"auto"``: ``"coreml"`` if the model is loaded (i.e. can be used for prediction),
+          otherwise ``"pymil"``.
 
     Returns
     -------
     activation_calibration_stats: dict
     """
+    if calibration_backend == "auto":
+        calibration_backend = "coreml" if fpmodel.__proxy__ is not None else "pymil"
+    if calibration_backend not in ("coreml", "pymil"):
+        raise ValueError(
+            f'calibration_backend must be one of "auto", "coreml" or "pymil", '
+            f"but got {calibration_backend}."
+        )
+
     debugger = ModelDebugger(fpmodel)
     activation_stats_dict = defaultdict(dict)
     intermediate_output_names = debugger.get_intermediate_output_names(
@@ -248,17 +311,22 @@ def _get_activation_calibration_stats(
             intermediate_output_names.remove(intermediate_output_name)
 
     # Get data ranges for all intermeditate outputs.
-    for data in tqdm(
-        sample_data,
-        desc="Running compression pass linear_quantize_activations",
-        unit=" calibration samples",
-    ):
-        debugger.step(
-            inputs=data,
-            activation_stats_dict=activation_stats_dict,
-            intermediate_output_names=intermediate_output_names,
-            op_group_size=calibration_op_group_size,
+    if calibration_backend == "pymil":
+        _update_activation_stats_with_reference_executor(
+            fpmodel, sample_data, intermediate_output_names, activation_stats_dict
         )
+    else:
+        for data in tqdm(
+            sample_data,
+            desc="Running compression pass linear_quantize_activations",
+            unit=" calibration samples",
+        ):
+            debugger.step(
+                inputs=data,
+                activation_stats_dict=activation_stats_dict,
+                intermediate_output_names=intermediate_output_names,
+                op_group_size=calibration_op_group_size,
+            )
 
     # Handle a special case - concat ops.
     _adjust_concat_surrounding_activation_stats(
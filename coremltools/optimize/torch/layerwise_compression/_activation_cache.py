@@ -0,0 +1,91 @@
+#  Copyright (c) 2025, Apple Inc. All rights reserved.
+#
+#  Use of this source code is governed by a BSD-3-clause license that can be
+#  found in the LICENSE.txt file or at https://opensource.org/licenses/BSD-3-Clause
+
+import os as _os
+from collections import deque as _deque
+from concurrent.futures import ThreadPoolExecutor as _ThreadPoolExecutor
+from typing import Any as _Any
+from typing import Callable as _Callable
+from typing import Iterator as _Iterator
+
+import torch as _torch
+
+
+def _map_tensors(value: _Any, fn: _Callable[[_torch.Tensor], _torch.Tensor]) -> _Any:
+    """
+    Apply ``fn`` to all tensors in a (possibly nested) tuple, list or dict, such as
+    the inputs or the outputs of a layer.
+    """
+    if isinstance(value, _torch.Tensor):
+        return fn(value)
+    if isinstance(value, (tuple, list)):
+        return type(value)(_map_tensors(item, fn) for item in value)
+    if isinstance(value, dict):
+        return type(value)((key, _map_tensors(item, fn)) for key, item in value.items())
+    return value
+
+
+class DiskActivationCache:
+    """
+    A list of per sample activations, which is stored in files under ``cache_dir``
+    instead of memory. It is used by :py:class:`LayerwiseCompressor` in place of the lists
+    of the inputs and outputs of the layer being compressed, so that the peak memory
+    doesn't depend on the number of calibration samples.
+
+    Each item is a tensor, or a (nested) tuple, list or dict of tensors, which is saved in
+    its own file when set. The files are memory-mapped when read. Iterating over the cache
+    loads the next ``prefetch_size`` items in a background thread, so that reading from
+    disk overlaps with the forward passes of the layer.
+
+    Args:
+        cache_dir (:obj:`str`): Directory in which the activations are stored. It must exist.
+        device (:obj:`str`): Device to which the activations are moved when read.
+        prefetch_size (:obj:`int`): Number of items loaded ahead while iterating.
+    """
+
+    def __init__(self, cache_dir: str, device: str, prefetch_size: int = 8):
+        self._cache_dir = cache_dir
+        self._device = device
+        self._prefetch_size = max(1, prefetch_size)
+        self._len = 0
+
+    def _path(self, idx: int) -> str:
+        return _os.path.join(self._cache_dir, f"{idx}.pt")
+
+    def __len__(self) -> int:
+        return self._len
+
+    def __setitem__(self, idx: int, value: _Any):
+        if not 0 <= idx <= self._len:
+            raise IndexError(f"Index {idx} out of range for cache of length {self._len}.")
+        path = self._path(idx)
+        # Write to a new file and rename it, so that the item being replaced can still be
+        # memory-mapped by a reader.
+        tmp_path = path + ".tmp"
+        _torch.save(_map_tensors(value, lambda tensor: tensor.detach().cpu()), tmp_path)
+        _os.replace(tmp_path, path)
+        self._len = max(self._len, idx + 1)
+
+    def append(self, value: _Any):
+        self[self._len] = value
+
+    def __getitem__(self, idx: int) -> _Any:
+        if not 0 <= idx < self._len:
+            raise IndexError(f"Index {idx} out of range for cache of length {self._len}.")
+        value = _torch.load(self._path(idx), map_location="cpu", mmap=True, weights_only=False)
+        # Copy, so that the data is read (in the prefetching thread) rather than paged in lazily.
+        return _map_tensors(value, lambda tensor: tensor.to(self._device, copy=True))
+
+    def __iter__(self) -> _Iterator[_Any]:
+        with _ThreadPoolExecutor(max_workers=1) as executor:
+            num_prefetched = min(self._prefetch_size, self._len)
+            futures = _deque(
+                executor.submit(self.__getitem__, idx) for idx in range(num_prefetched)
+            )
+            for idx in range(self._len):
+                value = futures.popleft().result()
+                if idx + num_prefetched < self._len:
+                    futures.append(executor.submit(self.__getitem__, idx + num_prefetched))
+                yield value
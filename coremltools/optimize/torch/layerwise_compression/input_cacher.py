@@ -13,6 +13,8 @@ from abc import abstractmethod as _abstractmethod
 from typing import Dict as _Dict
 from typing import Iterable as _Iterable
 from typing import List as _List
+from typing import MutableSequence as _MutableSequence
+from typing import Optional as _Optional
 from typing import Tuple as _Tuple
 from typing import Union as _Union
 
@@ -40,7 +42,11 @@ class FirstLayerInputCacher(_ABC, _ClassRegistryMixin):
 
     @_abstractmethod
     def cache(
-        self, dataloader: _Iterable, nsamples: int, device: str
+        self,
+        dataloader: _Iterable,
+        nsamples: int,
+        device: str,
+        inputs: _Optional[_MutableSequence] = None,
     ) -> _Tuple[_List[_torch.Tensor], _Dict[str, _torch.Tensor]]:
         """
         Cache inputs and keyword arguments to be fed to first layer of the model
@@ -51,6 +57,8 @@ class FirstLayerInputCacher(_ABC, _ClassRegistryMixin):
                 is an input to the model to be compressed.
             nsamples (:obj:`int`): Number of samples to cache.
             device (:obj:`str`): Device string for device to run compression on.
+            inputs (:obj:`MutableSequence`, optional): Sequence to which the cached inputs are
+                appended, such as a disk backed cache. Defaults to a new :obj:`list`.
         """
         raise NotImplementedError("Method not implemented in base class.")
 
@@ -127,7 +135,11 @@ class GPTFirstLayerInputCacher(FirstLayerInputCacher):
         return input_cacher_pre_hook
 
     def cache(
-        self, dataloader: _Iterable, nsamples: int, device: str
+        self,
+        dataloader: _Iterable,
+        nsamples: int,
+        device: str,
+        inputs: _Optional[_MutableSequence] = None,
     ) -> _Tuple[_List[_torch.Tensor], _Dict[str, _torch.Tensor]]:
         """
         Cache inputs and keyword arguments to be fed to the first decoder layer
@@ -138,11 +150,14 @@ class GPTFirstLayerInputCacher(FirstLayerInputCacher):
                 is an input to the model to be compressed.
             nsamples (:obj:`int`): Number of samples to cache.
             device (:obj:`str`): Device string for device to run compression on.
+            inputs (:obj:`MutableSequence`, optional): Sequence to which the cached inputs are
+                appended, such as a disk backed cache. Defaults to a new :obj:`list`.
         """
         for layer in self._pre_layers:
             layer.to(device)
 
-        inputs, kwarg_inputs = [], {}
+        inputs = [] if inputs is None else inputs
+        kwarg_inputs = {}
         input_cacher_handle = self._first_layer.register_forward_pre_hook(
             self._get_input_cacher_pre_hook(inputs, kwarg_inputs), with_kwargs=True
         )
@@ -162,7 +177,11 @@ class GPTFirstLayerInputCacher(FirstLayerInputCacher):
 @FirstLayerInputCacher.register("default")
 class DefaultInputCacher(FirstLayerInputCacher):
     def cache(
-        self, dataloader: _Iterable, nsamples: int, device: str
+        self,
+        dataloader: _Iterable,
+        nsamples: int,
+        device: str,
+        inputs: _Optional[_MutableSequence] = None,
     ) -> _Tuple[_List[_torch.Tensor], _Dict[str, _torch.Tensor]]:
         """
         Cache inputs and keyword arguments to be fed to first layer of the model
@@ -173,8 +192,10 @@ class DefaultInputCacher(FirstLayerInputCacher):
                 is an input to the model to be compressed.
             nsamples (:obj:`int`): Number of samples to cache.
             device (:obj:`str`): Device string for device to run compression on.
+            inputs (:obj:`MutableSequence`, optional): Sequence to which the cached inputs are
+                appended, such as a disk backed cache. Defaults to a new :obj:`list`.
         """
-        inputs = []
+        inputs = [] if inputs is None else inputs
         sampled = 0
         for batch in dataloader:
             inputs.append(batch.to(device))
@@ -7,7 +7,10 @@
 # Copyright 2023 IST Austria Distributed Algorithms and Systems Lab. All Rights Reserved.
 
 import logging as _logging
+import os as _os
 import re as _re
+import shutil as _shutil
+import tempfile as _tempfile
 from collections import OrderedDict as _OrderedDict
 from contextlib import contextmanager as _contextmanager
 from typing import Any as _Any
@@ -15,6 +18,7 @@ from typing import Callable as _Callable
 from typing import Dict as _Dict
 from typing import Iterable as _Iterable
 from typing import List as _List
+from typing import MutableSequence as _MutableSequence
 from typing import NewType as _NewType
 from typing import Optional as _Optional
 from typing import Tuple as _Tuple
@@ -43,6 +47,9 @@ from coremltools.optimize.torch.base_model_optimizer import (
     BaseDataCalibratedModelOptimizer as _BaseDataCalibratedModelOptimizer,
 )
 from coremltools.optimize.torch.base_model_optimizer import _Report
+from coremltools.optimize.torch.layerwise_compression._activation_cache import (
+    DiskActivationCache as _DiskActivationCache,
+)
 from coremltools.optimize.torch.layerwise_compression.algorithms import (
     LayerwiseCompressionAlgorithm as _LayerwiseCompressionAlgorithm,
 )
@@ -90,6 +97,14 @@ class LayerwiseCompressorConfig(_OptimizationConfig):
         input_cacher (:obj:`str` or :py:class:`FirstLayerInputCacher`): Cacher object that caches inputs which are then
             fed to the first layer set up for compression.
         calibration_nsamples (:obj:`int`): Number of samples to be used for calibration.
+        activation_cache_dir (:obj:`str`, optional): If set, the inputs and outputs of the layer
+            being compressed are stored for all calibration samples in a temporary directory under
+            ``activation_cache_dir`` instead of in memory, and read back while the activation
+            statistics are computed. The peak memory then doesn't depend on
+            ``calibration_nsamples``, at the cost of disk I/O. Defaults to ``None``, which
+            keeps the activations in memory.
+        activation_cache_prefetch_size (:obj:`int`): Number of samples read ahead from
+            ``activation_cache_dir`` while running a layer. Defaults to ``8``.
     """
 
     layers: _Optional[_Union[_List[_Union[_nn.Module, str]], _nn.ModuleList]] = _field(
@@ -129,6 +144,12 @@ class LayerwiseCompressorConfig(_OptimizationConfig):
     )
     input_cacher: str = _field(default="default", converter=_FirstLayerInputCacher.get_class)
     calibration_nsamples: int = _field(default=128, validator=_validators.instance_of(int))
+    activation_cache_dir: _Optional[str] = _field(
+        default=None, validator=_validators.optional(_validators.instance_of(str))
+    )
+    activation_cache_prefetch_size: int = _field(
+        default=8, validator=[_validators.instance_of(int), _validators.ge(1)]
+    )
 
     @classmethod
     def from_dict(cls, config_dict: _Dict[str, _Any]) -> "LayerwiseCompressorConfig":
@@ -265,27 +286,60 @@ class LayerwiseCompressor(_BaseDataCalibratedModelOptimizer):
     @staticmethod
     def _forward_layer(layer, inputs, kwarg_inputs, outputs) -> _List:
         """
-        Perform forward pass on layer and store outputs.
+        Perform forward pass on layer and store outputs, unless ``outputs`` is ``None``.
         """
         for j, inp in enumerate(inputs):
             if isinstance(inp, _torch.Tensor):
                 inp = (inp,)
-            outputs[j] = layer(*inp, **kwarg_inputs)
+            out = layer(*inp, **kwarg_inputs)
+            if outputs is not None:
+                outputs[j] = out
         return outputs
 
     def _get_cached_inputs(
-        self, dataloader: _Iterable, device: str
+        self, dataloader: _Iterable, device: str, inputs: _Optional[_MutableSequence] = None
     ) -> _Tuple[_List[_torch.Tensor], _Dict[str, _torch.Tensor]]:
         """
         Cache the inputs and keyword arguments up till the first layer set up for compression
         """
+        cache_kwargs = {} if inputs is None else {"inputs": inputs}
         inputs, kwarg_inputs = self._input_cacher.cache(
             dataloader=dataloader,
             nsamples=self._config.calibration_nsamples,
             device=device,
+            **cache_kwargs,
         )
         return inputs, kwarg_inputs
 
+    @_contextmanager
+    def _activation_caches(self, device: str):
+        """
+        Yields the disk backed caches for the inputs and outputs of the layers, which are
+        deleted on exit, or ``(None, None)`` if the activations are kept in memory.
+        """
+        if self._config.activation_cache_dir is None:
+            yield None, None
+            return
+
+        _os.makedirs(self._config.activation_cache_dir, exist_ok=True)
+        cache_dir = _tempfile.mkdtemp(
+            prefix="layerwise_compression_", dir=self._config.activation_cache_dir
+        )
+        try:
+            caches = []
+            for name in ("inputs", "outputs"):
+                _os.mkdir(_os.path.join(cache_dir, name))
+                caches.append(
+                    _DiskActivationCache(
+                        _os.path.join(cache_dir, name),
+                        device,
+                        self._config.activation_cache_prefetch_size,
+                    )
+                )
+            yield tuple(caches)
+        finally:
+            _shutil.rmtree(cache_dir, ignore_errors=True)
+
     def _get_layers_to_compress(self) -> _Dict[str, _nn.Module]:
         """
         Returns a list of layers to be compressed
@@ -335,71 +389,75 @@ class LayerwiseCompressor(_BaseDataCalibratedModelOptimizer):
         4) Compute updated outputs using compressed weights to propagate quantization error
            to the next layer and set them up as inputs to next layer.
         """
-        inputs, kwarg_inputs = self._get_cached_inputs(dataloader, device)
-        outputs = [None for _ in inputs]
-
-        # compress the layers one by one
-        for layer_idx, (parent_layer_name, layer) in enumerate(self._get_layers_to_compress()):
-            layer.to(device)
-            atomic_layers_dict = _get_atomic_layers(
-                layer,
-                layer_types=self._supported_modules,
-                name_prefix=parent_layer_name,
-            )
+        with self._activation_caches(device) as (inputs, outputs):
+            inputs, kwarg_inputs = self._get_cached_inputs(dataloader, device, inputs)
+            if outputs is None:
+                outputs = [None for _ in inputs]
+
+            # compress the layers one by one
+            for layer_idx, (parent_layer_name, layer) in enumerate(self._get_layers_to_compress()):
+                layer.to(device)
+                atomic_layers_dict = _get_atomic_layers(
+                    layer,
+                    layer_types=self._supported_modules,
+                    name_prefix=parent_layer_name,
+                )
 
-            # dict mapping layer_name -> compression algorithm object
-            compression_algo_objects_dict = dict()
+                # dict mapping layer_name -> compression algorithm object
+                compression_algo_objects_dict = dict()
 
-            # dict mapping layer_name -> forward hook handle
-            layer_hooks = []
+                # dict mapping layer_name -> forward hook handle
+                layer_hooks = []
 
-            for atomic_layer_name, atomic_layer in atomic_layers_dict.items():
-                obj = self._init_and_config_layer(atomic_layer_name, atomic_layer)
+                for atomic_layer_name, atomic_layer in atomic_layers_dict.items():
+                    obj = self._init_and_config_layer(atomic_layer_name, atomic_layer)
 
-                if obj is not None:
-                    compression_algo_objects_dict[atomic_layer_name] = obj
+                    if obj is not None:
+                        compression_algo_objects_dict[atomic_layer_name] = obj
 
-                    layer_hooks.append(self._register_activation_processing_hook(atomic_layer, obj))
+                        layer_hooks.append(
+                            self._register_activation_processing_hook(atomic_layer, obj)
+                        )
 
-            # Compute statistics on the activations using the activation processing hooks
-            outputs = self._forward_layer(
-                layer,
-                inputs,
-                kwarg_inputs,
-                outputs,
-            )
+                # Compute statistics on the activations using the activation processing hooks
+                self._forward_layer(
+                    layer,
+                    inputs,
+                    kwarg_inputs,
+                    None,
+                )
 
-            # Remove the activation processing hooks
-            for h in layer_hooks:
-                h.remove()
-
-            # compress the layers
-            _logger.info(f"Layer {layer_idx}")
-            for (
-                atomic_layer_name,
-                compressor_algo,
-            ) in compression_algo_objects_dict.items():
-                _logger.info(f"Compressing {atomic_layer_name}")
-                compressor_algo.compress()
-                compressor_algo.cleanup()
-
-            del compression_algo_objects_dict
-
-            # feed the previous layer's outputs to this layer
-            outputs = self._forward_layer(
-                layer,
-                inputs,
-                kwarg_inputs,
-                outputs,
-            )
+                # Remove the activation processing hooks
+                for h in layer_hooks:
+                    h.remove()
+
+                # compress the layers
+                _logger.info(f"Layer {layer_idx}")
+                for (
+                    atomic_layer_name,
+                    compressor_algo,
+                ) in compression_algo_objects_dict.items():
+                    _logger.info(f"Compressing {atomic_layer_name}")
+                    compressor_algo.compress()
+                    compressor_algo.cleanup()
+
+                del compression_algo_objects_dict
+
+                # feed the previous layer's outputs to this layer
+                outputs = self._forward_layer(
+                    layer,
+                    inputs,
+                    kwarg_inputs,
+                    outputs,
+                )
 
-            # free memory
-            layer.cpu()
-            del layer
-            _torch.cuda.empty_cache()
+                # free memory
+                layer.cpu()
+                del layer
+                _torch.cuda.empty_cache()
 
-            # interchange inputs and outputs
-            inputs, outputs = outputs, inputs
+                # interchange inputs and outputs
+                inputs, outputs = outputs, inputs
 
         _register_metadata_version(self._model)
         return self._model
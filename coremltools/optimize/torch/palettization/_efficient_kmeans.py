@@ -4,12 +4,17 @@
 #  found in the LICENSE.txt file or at https://opensource.org/licenses/BSD-3-Clause
 
 from typing import Optional as _Optional
+from typing import Tuple as _Tuple
 from typing import Union as _Union
 
 import numpy as _np
 import torch as _torch
 import torch.distributed as _dist
 
+# Maximum number of elements of the (rows x clusters) distance matrix computed at once
+# when assigning rows to clusters.
+_ASSIGNMENT_CHUNK_NUMEL = 1 << 24
+
 
 class _EfficientKMeans:
     """
@@ -63,23 +68,95 @@ class _EfficientKMeans:
             .to(vals.device)
             .index_add_(0, indices, weight)
         )
-        v_numel[v_numel == 0] = 1
+        return _EfficientKMeans._cluster_avg_from_sums(v_sum, v_numel, vals.dtype)
 
-        v_avg = v_sum / v_numel.reshape(-1, 1)
+    @staticmethod
+    def _assign_clusters(
+        params: _torch.Tensor,
+        clusters: _torch.Tensor,
+        sample_weight: _Optional[_torch.Tensor] = None,
+        accumulate: bool = False,
+        chunk_numel: int = _ASSIGNMENT_CHUNK_NUMEL,
+    ) -> _Tuple[
+        _torch.Tensor, _torch.Tensor, _Optional[_torch.Tensor], _Optional[_torch.Tensor]
+    ]:
+        """
+        Assign each row of ``params`` to its closest cluster. The distances are computed
+        for chunks of rows at a time, so that at most ``chunk_numel`` distances are held in
+        memory, instead of the full ``len(params) x len(clusters)`` matrix.
+
+        Returns the squared distance of each row to its cluster and the cluster labels.
+        If ``accumulate`` is ``True``, also returns the (``sample_weight`` weighted) sum of the
+        rows assigned to each cluster, and their count (or total weight), accumulated in the
+        same pass as in :py:meth:`_get_cluster_avg`. Otherwise, these are ``None``.
+        """
+        n_clusters = len(clusters)
+        chunk_size = max(1, chunk_numel // n_clusters)
+
+        v_sum, v_numel = None, None
+        if accumulate:
+            v_sum = _torch.zeros([n_clusters] + list(params[0].size()), device=params.device)
+            v_numel = _torch.zeros(
+                n_clusters,
+                dtype=_torch.int if sample_weight is None else sample_weight.dtype,
+                device=params.device,
+            )
+
+        min_errors, labels = [], []
+        for start in range(0, len(params), chunk_size):
+            chunk = params[start : start + chunk_size]
+            # By default, cdist switches to the matmul based computation for inputs of more
+            # than 25 rows, so the distances, and possibly the labels, would depend on the
+            # chunk size. The direct computation gives the same result for any chunking.
+            min_error, chunk_labels = _EfficientKMeans.x_c_dist(
+                chunk, clusters, compute_mode="donot_use_mm_for_euclid_dist"
+            ).min(dim=-1)
+            min_errors.append(min_error)
+            labels.append(chunk_labels)
+
+            if accumulate:
+                if sample_weight is None:
+                    v_sum.index_add_(0, chunk_labels, chunk.float())
+                    v_numel.index_add_(
+                        0,
+                        chunk_labels,
+                        _torch.ones(len(chunk), dtype=_torch.int, device=params.device),
+                    )
+                else:
+                    chunk_weight = sample_weight[start : start + chunk_size].to(params.device)
+                    v_sum.index_add_(0, chunk_labels, chunk.float() * chunk_weight.float())
+                    v_numel.index_add_(0, chunk_labels, chunk_weight.squeeze(1))
 
-        return v_avg.to(vals.dtype)
+        return _torch.cat(min_errors), _torch.cat(labels), v_sum, v_numel
 
     @staticmethod
-    def x_c_dist(params: _torch.Tensor, clusters: _torch.Tensor) -> _torch.Tensor:
+    def _cluster_avg_from_sums(
+        v_sum: _torch.Tensor, v_numel: _torch.Tensor, dtype: _torch.dtype
+    ) -> _torch.Tensor:
+        v_numel[v_numel == 0] = 1
+        v_avg = v_sum / v_numel.reshape(-1, 1)
+        return v_avg.to(dtype)
+
+    @staticmethod
+    def x_c_dist(
+        params: _torch.Tensor,
+        clusters: _torch.Tensor,
+        compute_mode: str = "use_mm_for_euclid_dist_if_necessary",
+    ) -> _torch.Tensor:
         """
-        Calculate the distance between weights and clusters.
+        Calculate the distance between weights and clusters. ``compute_mode`` is passed
+        to :py:func:`torch.cdist`.
         """
         clusters = clusters.contiguous()
 
         if _torch.finfo(params.dtype).bits > _torch.finfo(clusters.dtype).bits:
-            return _torch.cdist(params.to(clusters.dtype), clusters).square()
+            return _torch.cdist(
+                params.to(clusters.dtype), clusters, compute_mode=compute_mode
+            ).square()
         else:
-            return _torch.cdist(params, clusters.to(params.dtype)).square()
+            return _torch.cdist(
+                params, clusters.to(params.dtype), compute_mode=compute_mode
+            ).square()
 
     def _kmeans_pp(
         self, parameters: _torch.Tensor, sample_weight: _Optional[_torch.Tensor] = None
@@ -108,42 +185,37 @@ class _EfficientKMeans:
                     device=parameters.device,
                     dtype=parameters.dtype,
                 )
+                # Distance of each parameter to its closest centroid chosen so far, which is
+                # updated with each new centroid instead of keeping all the distances.
+                c_to_x = None
                 for i in range(self.n_clusters):
                     if i == 0:
                         centroids[i] = parameters[_torch.randint(0, len(parameters), [1])]
-                        d_ij_curr = _torch.cdist(centroids[:i], parameters)
                     else:
-                        d_ij_prev = _torch.cdist(centroids[i - 1 : i], parameters)
+                        d_ij_prev = _torch.cdist(centroids[i - 1 : i], parameters)[0]
                         d_ij_prev[d_ij_prev == 0] = -int(1e9)
 
-                        d_ij_curr = _torch.cat((d_ij_curr, d_ij_prev), dim=0)
-
-                        c_to_x = _torch.min(d_ij_curr, dim=0)
-                        centroids[i] = parameters[c_to_x[0].argmax()]
+                        c_to_x = (
+                            d_ij_prev if c_to_x is None else _torch.minimum(c_to_x, d_ij_prev)
+                        )
+                        centroids[i] = parameters[c_to_x.argmax()]
 
             last_inertia = int(1e9)
             num_update = 0
             for i in range(self.max_iter):
-                min_error, labels = _torch.cdist(parameters, centroids).min(dim=-1)
-
-                min_error = (
-                    min_error * (sample_weight.T).sqrt() if sample_weight is not None else min_error
+                # Assign the parameters to the centroids, and accumulate the new centroids in
+                # the same pass over chunks of the parameters.
+                min_error, labels, v_sum, v_numel = self._assign_clusters(
+                    parameters, centroids, sample_weight=sample_weight, accumulate=True
                 )
-
-                centroids.zero_()
-                agg_params = parameters * sample_weight if sample_weight is not None else parameters
-                weights = sample_weight.view(labels.size()) if sample_weight is not None else None
-                centroids.scatter_add_(
-                    0,
-                    labels.view(-1, 1).expand([-1, parameters.size(-1)]),
-                    agg_params,
+                min_error = (
+                    min_error * sample_weight.view(labels.size())
+                    if sample_weight is not None
+                    else min_error
                 )
-                n_centroids = _torch.bincount(
-                    labels, weights=weights, minlength=self.n_clusters
-                ).view(-1, 1)
 
-                centroids /= n_centroids
-                cur_inertia = min_error.square().sum()
+                centroids = (v_sum / v_numel.view(-1, 1)).to(parameters.dtype)
+                cur_inertia = min_error.sum()
 
                 # update labels and cluster_centers if inertia improves
                 if cur_inertia < self.inertia_:
@@ -226,24 +298,34 @@ class _EfficientKMeans:
                 )
                 self.labels_ = _torch.Tensor(self.labels_).int().to(X.device)
 
-                min_error, _ = _EfficientKMeans.x_c_dist(X, self.cluster_centers_).min(dim=-1)
+                min_error, _, _, _ = _EfficientKMeans._assign_clusters(X, self.cluster_centers_)
                 self.inertia_ = min_error.sum()
         else:
             self.inertia_ = None
+            # The sums of the clusters assigned in the previous iteration, from which the
+            # cluster centers are updated.
+            v_sum, v_numel = None, None
 
             for i in range(self.max_iter):
-                self.cluster_centers_ = _EfficientKMeans._get_cluster_avg(
-                    self.n_clusters, self.labels_, X, sample_weight=sample_weight
-                )
+                if v_sum is None:
+                    self.cluster_centers_ = _EfficientKMeans._get_cluster_avg(
+                        self.n_clusters, self.labels_, X, sample_weight=sample_weight
+                    )
+                else:
+                    self.cluster_centers_ = _EfficientKMeans._cluster_avg_from_sums(
+                        v_sum, v_numel, X.dtype
+                    )
 
                 # remove empty clusters perhaps due to pruning
                 nan_centers = self.cluster_centers_.isnan()
                 if nan_centers.any():
                     self._kmeans_pp(X, sample_weight=sample_weight)
+                    v_sum, v_numel = None, None
                     continue
 
-                x_c_dist = _EfficientKMeans.x_c_dist(X, self.cluster_centers_)
-                min_error, self.labels_ = x_c_dist.min(dim=-1)
+                min_error, self.labels_, v_sum, v_numel = _EfficientKMeans._assign_clusters(
+                    X, self.cluster_centers_, sample_weight=sample_weight, accumulate=True
+                )
                 cur_inertia = min_error.sum()
 
                 if self.error_bnd and _torch.sqrt(cur_inertia / N) < self.error_bnd:
@@ -256,9 +338,9 @@ class _EfficientKMeans:
                     reduce_cluster_centers_ = reduce_cluster_centers_[
                         ~_torch.isnan(reduce_cluster_centers_)
                     ].view(-1, 1)
-                    reduce_min_error, reduce_labels_ = _EfficientKMeans.x_c_dist(
+                    reduce_min_error, reduce_labels_, _, _ = _EfficientKMeans._assign_clusters(
                         X, reduce_cluster_centers_
-                    ).min(dim=-1)
+                    )
                     reduce_inertia = reduce_cluster_centers_.sum()
                     rmse_error = _torch.sqrt(reduce_inertia / N)
 
@@ -266,6 +348,7 @@ class _EfficientKMeans:
                         self.cluster_centers_ = reduce_cluster_centers_
                         self.labels_ = reduce_labels_
                         self.n_clusters = len(self.cluster_centers_)
+                        v_sum, v_numel = None, None
                         continue
 
                 if self.inertia_ is None or abs(self.inertia_ - cur_inertia) > self.tol:
@@ -0,0 +1,231 @@
+#  Copyright (c) 2025, Apple Inc. All rights reserved.
+#
+#  Use of this source code is governed by a BSD-3-clause license that can be
+#  found in the LICENSE.txt file or at https://opensource.org/licenses/BSD-3-Clause
+
+import json as _json
+import logging as _logging
+import os as _os
+import shutil as _shutil
+from typing import Dict as _Dict
+from typing import List as _List
+from typing import Optional as _Optional
+from typing import Tuple as _Tuple
+
+import torch as _torch
+import torch.distributed as _dist
+
+_logger = _logging.getLogger(__name__)
+
+_NamedParameters = _List[_Tuple[str, _torch.nn.Parameter]]
+
+
+class SensitivityCheckpoint:
+    """
+    On-disk store of the running sums of squared gradients accumulated by
+    :py:class:`SKMPalettizer` while computing sensitivity, so that an interrupted
+    computation can be resumed from the last processed calibration sample.
+
+    Each worker process stores its (possibly sharded) gradients under its own
+    ``rank_<rank>`` sub-directory of ``checkpoint_dir``, with one file per parameter.
+    A checkpoint is written to a new directory, and then made current by atomically
+    replacing ``state.json``, which records the checkpoints available and the number of
+    samples each of them covers. A checkpoint which was only partially written is therefore
+    never loaded.
+
+    When several workers compute sensitivity in a distributed process group, the previous
+    checkpoint is only removed once every worker has written the new one, and on resuming
+    the workers agree on the latest checkpoint which all of them have, so that they all
+    start from the same calibration sample.
+
+    Args:
+        checkpoint_dir (:obj:`str`): Directory in which the checkpoints are stored.
+            It is created if it doesn't exist.
+        rank (:obj:`int`): Rank of the worker process.
+        num_workers (:obj:`int`): Number of worker processes computing sensitivity.
+        num_samples (:obj:`int`): Number of calibration samples processed by this worker.
+    """
+
+    _STATE_FILE = "state.json"
+
+    def __init__(self, checkpoint_dir: str, rank: int, num_workers: int, num_samples: int):
+        self._rank_dir = _os.path.join(checkpoint_dir, f"rank_{rank}")
+        self._num_workers = num_workers
+        self._num_samples = num_samples
+        self._generation = None
+        self._generations = dict()
+        _os.makedirs(self._rank_dir, exist_ok=True)
+
+    @property
+    def _state_path(self) -> str:
+        return _os.path.join(self._rank_dir, self._STATE_FILE)
+
+    def _read_state(self) -> _Optional[dict]:
+        if not _os.path.exists(self._state_path):
+            return None
+        with open(self._state_path) as f:
+            return _json.load(f)
+
+    def _write_state(self, generations: _Dict[str, dict]):
+        """
+        Atomically replace the state file with one recording ``generations``.
+        """
+        state = {
+            "num_workers": self._num_workers,
+            "num_samples": self._num_samples,
+            "generations": generations,
+        }
+        tmp_state_path = self._state_path + ".tmp"
+        with open(tmp_state_path, "w") as f:
+            _json.dump(state, f)
+        _os.replace(tmp_state_path, self._state_path)
+        self._generations = generations
+
+    def _remove_stale_generations(self):
+        """
+        Remove the checkpoint directories which aren't recorded in the state file, such as
+        those left behind by a checkpoint which was interrupted while being written.
+        """
+        for entry in _os.listdir(self._rank_dir):
+            path = _os.path.join(self._rank_dir, entry)
+            if _os.path.isdir(path) and entry not in self._generations:
+                _shutil.rmtree(path, ignore_errors=True)
+
+    def _reset(self):
+        """
+        Remove all checkpoints of this worker.
+        """
+        if _os.path.exists(self._state_path):
+            _os.remove(self._state_path)
+        self._generation = None
+        self._generations = dict()
+        self._remove_stale_generations()
+
+    def _is_distributed(self) -> bool:
+        return self._num_workers > 1 and _dist.is_available() and _dist.is_initialized()
+
+    def _all_reduce_min(self, value: int) -> int:
+        """
+        Return the minimum of ``value`` over all workers.
+        """
+        if not self._is_distributed():
+            return value
+        device = _torch.device("cpu")
+        if _dist.get_backend() == _dist.Backend.NCCL:
+            device = _torch.device("cuda", _torch.cuda.current_device())
+        tensor = _torch.tensor([value], dtype=_torch.int64, device=device)
+        _dist.all_reduce(tensor, op=_dist.ReduceOp.MIN)
+        return int(tensor.item())
+
+    def _barrier(self):
+        if self._is_distributed():
+            _dist.barrier()
+
+    def _read_compatible_generations(self, named_parameters: _NamedParameters) -> _Dict[int, str]:
+        """
+        Return the checkpoints recorded in the state file, keyed by the number of samples
+        they cover, or an empty dictionary if they weren't computed for ``named_parameters``
+        and the same number of workers and calibration samples.
+        """
+        state = self._read_state()
+        if state is None:
+            return dict()
+
+        shapes = {name: list(param.shape) for name, param in named_parameters}
+        if (
+            state["num_workers"] != self._num_workers
+            or state["num_samples"] != self._num_samples
+            or any(
+                shapes.get(name) != entry["shape"]
+                for generation in state["generations"].values()
+                for name, entry in generation["params"].items()
+            )
+        ):
+            _logger.warning(
+                f"Ignoring sensitivity checkpoint in {self._rank_dir}, since it was computed "
+                f"for a different model, number of workers or number of calibration samples."
+            )
+            return dict()
+
+        self._generations = state["generations"]
+        return {
+            generation["num_samples_processed"]: name
+            for name, generation in self._generations.items()
+        }
+
+    def load(self, named_parameters: _NamedParameters) -> int:
+        """
+        Restore the gradients of ``named_parameters`` from the latest checkpoint, if there is
+        one which is compatible with them, and return the number of calibration samples it
+        covers. Return ``0``, leaving the gradients untouched, otherwise.
+
+        In a distributed process group, this must be called by all workers, and the latest
+        checkpoint which all of them have is restored.
+        """
+        generations = self._read_compatible_generations(named_parameters)
+        num_samples_processed = self._all_reduce_min(max(generations, default=0))
+        # A worker may lack the agreed checkpoint if its files were removed, in which
+        # case all workers have to start over.
+        has_generation = int(num_samples_processed in generations)
+        if num_samples_processed == 0 or self._all_reduce_min(has_generation) == 0:
+            self._reset()
+            return 0
+
+        self._generation = generations[num_samples_processed]
+        state = self._generations[self._generation]
+        self._write_state({self._generation: state})
+        self._remove_stale_generations()
+
+        generation_dir = _os.path.join(self._rank_dir, self._generation)
+        for name, param in named_parameters:
+            if name not in state["params"]:
+                param.grad = None
+                continue
+            grad = _torch.load(
+                _os.path.join(generation_dir, state["params"][name]["file"]),
+                map_location="cpu",
+            )
+            param.grad = grad.to(device=param.device, dtype=param.dtype)
+
+        _logger.info(
+            f"Resuming sensitivity computation from sample {num_samples_processed} using "
+            f"checkpoint in {self._rank_dir}"
+        )
+        return num_samples_processed
+
+    def save(self, named_parameters: _NamedParameters, num_samples_processed: int):
+        """
+        Store the gradients of ``named_parameters``, accumulated over the first
+        ``num_samples_processed`` calibration samples, as the current checkpoint.
+
+        In a distributed process group, this must be called by all workers.
+        """
+        generation = f"samples_{num_samples_processed}"
+        if generation == self._generation:
+            # The current checkpoint already covers these samples.
+            return
+        generation_dir = _os.path.join(self._rank_dir, generation)
+        _shutil.rmtree(generation_dir, ignore_errors=True)
+        _os.makedirs(generation_dir)
+
+        params = dict()
+        for idx, (name, param) in enumerate(named_parameters):
+            if param.grad is None:
+                continue
+            file_name = f"{idx}.pt"
+            _torch.save(param.grad.detach().cpu(), _os.path.join(generation_dir, file_name))
+            params[name] = {"file": file_name, "shape": list(param.grad.shape)}
+
+        state = {"num_samples_processed": num_samples_processed, "params": params}
+        generations = {
+            name: entry for name, entry in self._generations.items() if name == self._generation
+        }
+        generations[generation] = state
+        self._write_state(generations)
+
+        # The previous checkpoint is kept until every worker has written this one, so that
+        # the workers can still agree on a checkpoint if some of them are interrupted first.
+        self._barrier()
+        self._generation = generation
+        self._write_state({generation: state})
+        self._remove_stale_generations()
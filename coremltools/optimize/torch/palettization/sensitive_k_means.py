@@ -66,6 +66,9 @@ from coremltools.optimize.torch.optimization_config import (
     PalettizationGranularity,
     _structure_from_dict_hook_factory,
 )
+from coremltools.optimize.torch.palettization._sensitivity_checkpoint import (
+    SensitivityCheckpoint as _SensitivityCheckpoint,
+)
 
 _logger = _logging.getLogger(__name__)
 
@@ -178,6 +181,17 @@ class SKMPalettizerConfig(_OptimizationConfig):
             a regex or a fully qualified name that can be used to fetch it from the top level module
             using the ``module.get_submodule(target)`` method.
         calibration_nsamples (:obj:`int`): Number of samples to be used for calibration.
+        sensitivity_checkpoint_dir (:obj:`str`, optional): If set, the squared gradients
+            accumulated while computing sensitivity are periodically saved under
+            ``sensitivity_checkpoint_dir``, together with the number of calibration samples
+            processed. When sensitivity is computed again with the same directory, model and
+            number of workers, the accumulation resumes from the last checkpoint, so only the
+            remaining samples are processed. The calibration data must be the same, and in the
+            same order, as in the interrupted run. The checkpoint is kept after sensitivity is
+            computed; remove the directory to compute it from scratch. Defaults to ``None``,
+            which doesn't save checkpoints.
+        sensitivity_checkpoint_interval (:obj:`int`): Number of calibration samples processed
+            by each worker between two checkpoints. Defaults to ``16``.
     """
 
     global_config: _Optional[ModuleSKMPalettizerConfig] = _field(
@@ -205,6 +219,12 @@ class SKMPalettizerConfig(_OptimizationConfig):
         ),
     )
     calibration_nsamples: int = _field(default=128, validator=_validators.instance_of(int))
+    sensitivity_checkpoint_dir: _Optional[str] = _field(
+        default=None, validator=_validators.optional(_validators.instance_of(str))
+    )
+    sensitivity_checkpoint_interval: int = _field(
+        default=16, validator=[_validators.instance_of(int), _validators.ge(1)]
+    )
 
     def __attrs_post_init__(self):
         if (
@@ -315,11 +335,22 @@ class SKMPalettizer(_BaseDataCalibratedModelOptimizer):
 
         self._model.zero_grad()
 
+        named_parameters = [
+            (name, param)
+            for name, param in self._model.named_parameters(remove_duplicate=True)
+            if param.requires_grad
+        ]
+        checkpoint = self._get_sensitivity_checkpoint(0, 1, len(dataset))
+        start = checkpoint.load(named_parameters) if checkpoint is not None else 0
+
         with self._register_grad_square_hooks(self._model):
-            for didx, data in enumerate(dataset):
+            for didx in range(start, len(dataset)):
                 _logger.info(f"Computing sensitivity using sample {didx}")
-                loss = loss_fn(self._model, data)
+                loss = loss_fn(self._model, dataset[didx])
                 loss.backward()
+                self._maybe_save_sensitivity_checkpoint(
+                    checkpoint, named_parameters, didx + 1, len(dataset)
+                )
 
             sensitivity_dict = dict()
             for name, param in self._model.named_parameters(remove_duplicate=True):
@@ -383,12 +414,22 @@ class SKMPalettizer(_BaseDataCalibratedModelOptimizer):
         )
         optim.zero_grad()
 
+        # Each worker checkpoints the gradients of its own shards of the parameters.
+        named_parameters = [
+            (name, param) for name, param in model.named_parameters() if param.requires_grad
+        ]
+        checkpoint = self._get_sensitivity_checkpoint(rank, num_workers, len(dataset))
+        start = checkpoint.load(named_parameters) if checkpoint is not None else 0
+
         with self._register_grad_square_hooks(model):
-            for didx, data in enumerate(dataset):
+            for didx in range(start, len(dataset)):
                 if _is_leader():
                     _logger.info(f"Computing sensitivity using sample {didx}")
-                loss = loss_fn(model, data)
+                loss = loss_fn(model, dataset[didx])
                 loss.backward()
+                self._maybe_save_sensitivity_checkpoint(
+                    checkpoint, named_parameters, didx + 1, len(dataset)
+                )
 
             # we set the parameters to zero so that when we call optim.step,
             # the parameter values are equal to the square of the gradient
@@ -437,6 +478,38 @@ class SKMPalettizer(_BaseDataCalibratedModelOptimizer):
             for handle in hook_handles:
                 handle.remove()
 
+    def _get_sensitivity_checkpoint(
+        self, rank: int, num_workers: int, num_samples: int
+    ) -> _Optional[_SensitivityCheckpoint]:
+        """
+        Return the store of the sensitivity checkpoints of the worker with given rank,
+        or ``None`` if checkpointing is disabled.
+        """
+        if self._config.sensitivity_checkpoint_dir is None:
+            return None
+        return _SensitivityCheckpoint(
+            self._config.sensitivity_checkpoint_dir, rank, num_workers, num_samples
+        )
+
+    def _maybe_save_sensitivity_checkpoint(
+        self,
+        checkpoint: _Optional[_SensitivityCheckpoint],
+        named_parameters: _List[_Tuple[str, _torch.nn.Parameter]],
+        num_samples_processed: int,
+        num_samples: int,
+    ):
+        """
+        Save a checkpoint every ``sensitivity_checkpoint_interval`` samples, and after
+        the last sample.
+        """
+        if checkpoint is None:
+            return
+        if (
+            num_samples_processed % self._config.sensitivity_checkpoint_interval == 0
+            or num_samples_processed == num_samples
+        ):
+            checkpoint.save(named_parameters, num_samples_processed)
+
     def _get_sensitivity_path(self, sensitivity_path: _Optional[str]) -> str:
         """
         Return sensitivity_path if it's not None else a temporary path
@@ -465,6 +538,9 @@ class SKMPalettizer(_BaseDataCalibratedModelOptimizer):
         When ``num_sensitivity_workers > 1``, the model is sharded on multiple GPUs using
         :py:class:`FullyShardedDataParallel`, which enables distributed computation of gradients.
 
+        If ``sensitivity_checkpoint_dir`` is set in the config, the computation periodically saves
+        checkpoints to it, and resumes from the last checkpoint found there.
+
         Args:
             dataloader (:py:class:`Iterable`): An iterable where each element
                 is an input to the model to be compressed. Used for computing gradients of model weights.
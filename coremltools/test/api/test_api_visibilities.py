@@ -169,6 +169,7 @@ class TestApiVisibilities:
         expected = [
             "ClassifierConfig",
             "ColorLayout",
+            "ConversionProfiler",
             "EnumeratedShapes",
             "ImageType",
             "RangeDim",
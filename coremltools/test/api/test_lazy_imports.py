@@ -0,0 +1,84 @@
+# Copyright (c) 2025, Apple Inc. All rights reserved.
+#
+# Use of this source code is governed by a BSD-3-clause license that can be
+# found in the LICENSE.txt file or at https://opensource.org/licenses/BSD-3-Clause
+
+import subprocess
+import sys
+
+import pytest
+
+import coremltools as ct
+from coremltools import _deps
+
+# The optional frameworks which must not be imported by ``import coremltools``.
+_OPTIONAL_FRAMEWORKS = (
+    "libsvm",
+    "sklearn",
+    "tensorflow",
+    "torch",
+    "torchaudio",
+    "torchvision",
+    "xgboost",
+)
+
+
+def _modules_imported_by(statement):
+    """Run ``statement`` in a fresh interpreter and return the set of imported top-level modules."""
+    script = (
+        f"import sys\n{statement}\n"
+        "print(' '.join(sorted({name.split('.')[0] for name in sys.modules})))"
+    )
+    output = subprocess.run(
+        [sys.executable, "-c", script], capture_output=True, text=True, check=True
+    ).stdout
+    return set(output.splitlines()[-1].split())
+
+
+class TestLazyImports:
+    def test_import_coremltools_does_not_import_frameworks(self):
+        imported = _modules_imported_by("import coremltools")
+        assert "coremltools" in imported
+        assert imported.isdisjoint(_OPTIONAL_FRAMEWORKS), imported.intersection(
+            _OPTIONAL_FRAMEWORKS
+        )
+
+    @pytest.mark.skipif(not _deps._HAS_TORCH, reason=_deps.MSG_TORCH_NOT_FOUND)
+    def test_torch_frontend_imported_on_access(self):
+        imported = _modules_imported_by(
+            "import coremltools as ct\nct.converters.mil.frontend.torch.register_torch_op"
+        )
+        assert "torch" in imported
+
+    def test_lazy_attributes(self):
+        assert "sklearn" in dir(ct.converters)
+        assert callable(ct.converters.libsvm.convert)
+        assert "torch" in dir(ct.converters.mil.frontend)
+        with pytest.raises(AttributeError, match="has no attribute 'not_a_frontend'"):
+            ct.converters.mil.frontend.not_a_frontend
+
+    def test_frontend_passes_registered_on_lookup(self):
+        from coremltools.converters.mil.mil.passes.pass_registry import PASS_REGISTRY
+
+        assert "torch::torch_upsample_to_core_upsample" in PASS_REGISTRY
+        assert "tensorflow::expand_tf_lstm" in PASS_REGISTRY
+        assert "tensorflow2::remove_vacuous_cond" in PASS_REGISTRY
+        assert "torch::not_a_pass" not in PASS_REGISTRY
+
+    @pytest.mark.parametrize(
+        "module_name, flag",
+        [
+            ("torch", "_HAS_TORCH"),
+            ("torchvision", "_HAS_TORCH_VISION"),
+            ("torchaudio", "_HAS_TORCH_AUDIO"),
+            ("scipy", "_HAS_SCIPY"),
+            ("transformers", "_HAS_HF"),
+        ],
+    )
+    def test_deps_flags_match_availability(self, module_name, flag):
+        try:
+            __import__(module_name)
+            available = True
+        except ImportError:
+            available = False
+        assert getattr(_deps, flag) == available
@@ -16,6 +16,7 @@ from coremltools.models.ml_program.experimental.debugging_utils import (
     MLModelComparator,
     MLModelInspector,
     MLModelValidator,
+    _ModelCache,
     compute_snr_and_psnr,
     skip_op_by_type,
 )
@@ -128,6 +129,21 @@ class TestMLModelInspector:
         ):
             np.testing.assert_allclose(value, expected_outputs[name], atol=0.2)
 
+    @pytest.mark.asyncio
+    async def test_cached_model_with_superset_of_outputs_is_reused(self):
+        prog = get_simple_program()
+        mlmodel = ct.convert(prog, convert_to="mlprogram", compute_precision=ct.precision.FLOAT32)
+        inspector = MLModelInspector(model=mlmodel, compute_units=ct.ComputeUnit.CPU_ONLY)
+        input = np.random.rand(1, 2, 3, 4)
+        expected_outputs = compute_ground_truth_answer(input=input)
+
+        await inspector.retrieve_outputs(inputs={"x": input}, output_names=["output_0", "output_1"])
+        assert (inspector.cache_hits, inspector.cache_misses) == (0, 1)
+
+        outputs = await inspector.retrieve_outputs(inputs={"x": input}, output_names=["output_1"])
+        assert (inspector.cache_hits, inspector.cache_misses) == (1, 1)
+        np.testing.assert_allclose(outputs["output_1"], expected_outputs["output_1"], atol=0.2)
+
     @pytest.mark.asyncio
     async def test_invalid_output_name(self):
         prog = get_simple_program()
@@ -155,6 +171,70 @@ class TestMLModelInspector:
                 pass
 
 
+class TestModelCache:
+    class _Model:
+        def __init__(self, temp_asset_path=None):
+            self.temp_asset_path = temp_asset_path
+
+    def test_superset_lookup(self):
+        cache = _ModelCache()
+        model_abc = self._Model()
+        model_ab = self._Model()
+        cache.put(["a", "b", "c"], model_abc)
+        cache.put(["a", "b"], model_ab)
+
+        # The model with the fewest outputs covering the request is returned.
+        assert cache.get(["a"]) is model_ab
+        assert cache.get(["b", "a"]) is model_ab
+        assert cache.get(["c"]) is model_abc
+        assert cache.get(["a", "d"]) is None
+        assert cache.get(["d"]) is None
+        assert (cache.hits, cache.misses) == (3, 2)
+
+    def test_lru_eviction_by_count(self):
+        cache = _ModelCache(max_models=2)
+        models = [self._Model() for _ in range(3)]
+        assert cache.put(["a"], models[0]) == []
+        assert cache.put(["b"], models[1]) == []
+        # Using "a" makes "b" the least recently used model.
+        assert cache.get(["a"]) is models[0]
+        assert cache.put(["c"], models[2]) == [models[1]]
+        assert len(cache) == 2
+        assert cache.get(["b"]) is None
+        assert cache.get(["a"]) is models[0]
+        assert cache.get(["c"]) is models[2]
+
+    def test_lru_eviction_by_size(self, tmp_path):
+        def make_model(name, size):
+            path = tmp_path / name
+            path.mkdir()
+            (path / "weight.bin").write_bytes(b"0" * size)
+            return self._Model(temp_asset_path=str(path))
+
+        cache = _ModelCache(max_size_in_bytes=100)
+        model_a = make_model("a", 60)
+        model_b = make_model("b", 60)
+        model_c = make_model("c", 200)
+        assert cache.put(["a"], model_a) == []
+        assert cache.put(["b"], model_b) == [model_a]
+        assert cache.size_in_bytes == 60
+        # A model larger than the bound is still cached on its own.
+        assert cache.put(["c"], model_c) == [model_b]
+        assert cache.get(["c"]) is model_c
+        assert cache.size_in_bytes == 200
+
+    def test_replace_and_clear(self):
+        cache = _ModelCache()
+        model_1 = self._Model()
+        model_2 = self._Model()
+        cache.put(["a", "b"], model_1)
+        assert cache.put(["b", "a"], model_2) == [model_1]
+        assert len(cache) == 1
+        assert cache.clear() == [model_2]
+        assert len(cache) == 0
+        assert cache.get(["a"]) is None
+
+
 class TestMLModelValidator:
     @staticmethod
     def _get_test_program_with_div():
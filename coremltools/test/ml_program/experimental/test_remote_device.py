@@ -3,13 +3,17 @@
 # Use of this source code is governed by a BSD-3-clause license that can be
 # found in the LICENSE.txt file or at https://opensource.org/licenses/BSD-3-Clause
 
+import asyncio
+import io
 import random
 import platform
+import socket
 import subprocess
+import tarfile
 import tempfile
 import time
 from pathlib import Path
-from threading import Timer
+from threading import Lock, Thread, Timer
 from typing import Any, Dict, List, Optional
 
 import numpy as np
@@ -30,6 +34,9 @@ from coremltools.models.ml_program.experimental.remote_device import (
     _JSONRPCSocket,
     _ModelRunnerAppBuilder,
     _RemoteMLModelService,
+    _receive_frame,
+    _send_frame,
+    _StreamRemoteService,
     _TensorDescriptor,
 )
 
@@ -368,6 +375,244 @@ class TestRemoteMLModelService:
             await service.unload()
 
 
+class StandInStreamServer:
+    """
+    An in-process stand-in for the model runner application, serving JSON-RPC over a
+    stream socket. Each request is processed on its own thread, so responses are sent
+    in the order in which they complete rather than the order of the requests.
+    """
+
+    def __init__(self, unix_socket_path: Optional[str] = None) -> None:
+        self.models = {}
+        self.requests = []
+        self.connections = []
+        if unix_socket_path is None:
+            self._server = socket.create_server(("127.0.0.1", 0))
+            self.address = self._server.getsockname()[:2]
+        else:
+            self._server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            self._server.bind(unix_socket_path)
+            self._server.listen()
+            self.address = unix_socket_path
+        Thread(target=self._serve, daemon=True).start()
+
+    def _serve(self) -> None:
+        while True:
+            try:
+                connection, _ = self._server.accept()
+            except OSError:
+                return
+            self.connections.append(connection)
+            Thread(target=self._serve_connection, args=(connection,), daemon=True).start()
+
+    def _serve_connection(self, connection: socket.socket) -> None:
+        lock = Lock()
+        while True:
+            try:
+                frame = _receive_frame(connection)
+            except OSError:
+                return
+            if frame is None:
+                return
+            message, payload = frame
+            Thread(
+                target=self._process, args=(connection, lock, message, payload), daemon=True
+            ).start()
+
+    def _process(
+        self,
+        connection: socket.socket,
+        lock: Lock,
+        message: Dict[str, Any],
+        payload: Optional[bytes],
+    ) -> None:
+        self.requests.append((message, payload))
+        method = message["method"]
+        params = message["params"]
+        response = {"jsonrpc": "2.0", "id": message["id"]}
+        response_payload = None
+
+        if method == "Echo":
+            time.sleep(params.get("delay", 0))
+            response["result"] = params
+            if payload is not None:
+                response["resource"] = message["resource"]
+                response_payload = payload
+
+        elif method == "Disconnect":
+            connection.shutdown(socket.SHUT_RDWR)
+            return
+
+        elif method == "MLModelService.Load":
+            self.models[params["modelID"]] = message["resource"]
+            response["result"] = {"modelID": params["modelID"], "duration": 0}
+
+        elif method == "MLModelService.Prediction":
+            with io.BytesIO(payload) as fp:
+                inputs = {
+                    name: _TensorDescriptor.from_dict(value).to_array(fp)
+                    for name, value in params["inputs"].items()
+                }
+            data_file = io.BytesIO()
+            outputs = {
+                name: _TensorDescriptor.from_array(array=value, file=data_file).as_dict()
+                for name, value in {
+                    "sum": inputs["x"] + inputs["y"],
+                    "diff": inputs["x"] - inputs["y"],
+                }.items()
+            }
+            response["result"] = {"modelID": params["modelID"], "outputs": outputs}
+            response["resource"] = "outputs.bin"
+            response_payload = data_file.getvalue()
+
+        else:
+            response["error"] = {"code": -32601, "message": f"Method {method} not found."}
+
+        try:
+            with lock:
+                _send_frame(connection, response, response_payload)
+        except OSError:
+            # The connection was closed while the request was processed.
+            pass
+
+    def close(self) -> None:
+        self._server.close()
+        for connection in self.connections:
+            connection.close()
+
+
+class TestStreamRemoteService:
+    @pytest.mark.asyncio
+    async def test_call_method_with_resource(self):
+        server = StandInStreamServer()
+        service = _StreamRemoteService.connect(server.address)
+
+        result, resource = await service.call_method(
+            name="Echo", params={"value": 1}, resource=b"\x00\x01\x02"
+        )
+        assert result == {"value": 1}
+        assert resource == b"\x00\x01\x02"
+
+        result, resource = await service.call_method(name="Echo", params={"value": 2})
+        assert result == {"value": 2}
+        assert resource is None
+
+        service.socket.close()
+        server.close()
+
+    @pytest.mark.asyncio
+    async def test_pipelined_calls(self):
+        server = StandInStreamServer()
+        service = _StreamRemoteService.connect(server.address)
+        completed = []
+
+        async def call(delay):
+            result, _ = await service.call_method(name="Echo", params={"delay": delay})
+            completed.append(result["delay"])
+
+        start = time.perf_counter()
+        await asyncio.gather(call(0.5), call(0.0), call(0.25))
+        elapsed = time.perf_counter() - start
+
+        # Responses complete their calls as soon as they arrive, in any order.
+        assert completed == [0.0, 0.25, 0.5]
+        assert elapsed < 1.0
+
+        service.socket.close()
+        server.close()
+
+    @pytest.mark.asyncio
+    async def test_error_response(self):
+        server = StandInStreamServer()
+        service = _StreamRemoteService.connect(server.address)
+
+        with pytest.raises(_DeviceCtlError) as e:
+            await service.call_method(name="Unknown", params={})
+        assert e.value.message == "Method Unknown not found."
+
+        service.socket.close()
+        server.close()
+
+    @pytest.mark.asyncio
+    async def test_directory_resource(self, tmp_path):
+        server = StandInStreamServer()
+        service = _StreamRemoteService.connect(server.address)
+
+        model_path = tmp_path / "model.mlmodelc"
+        model_path.mkdir()
+        (model_path / "model.mil").write_text("program")
+        await service.call_method(name="Echo", params={}, resource=model_path)
+
+        message, payload = server.requests[-1]
+        assert message["resource"] == "model.mlmodelc"
+        assert message["resourceFormat"] == "tar"
+        with tarfile.open(fileobj=io.BytesIO(payload)) as archive:
+            content = archive.extractfile("model.mlmodelc/model.mil").read()
+        assert content == b"program"
+
+        service.socket.close()
+        server.close()
+
+    @pytest.mark.asyncio
+    async def test_connection_loss_fails_pending_calls(self):
+        server = StandInStreamServer()
+        service = _StreamRemoteService.connect(server.address)
+
+        pending = asyncio.ensure_future(service.call_method(name="Echo", params={"delay": 5.0}))
+        with pytest.raises(ConnectionError):
+            await asyncio.gather(service.call_method(name="Disconnect", params={}), pending)
+        with pytest.raises(ConnectionError):
+            await pending
+        assert not service.is_alive
+
+        service.socket.close()
+        server.close()
+
+    @pytest.mark.asyncio
+    @pytest.mark.skipif(not hasattr(socket, "AF_UNIX"), reason="Unix domain sockets are not available")
+    async def test_unix_domain_socket(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            server = StandInStreamServer(unix_socket_path=str(Path(temp_dir) / "modelrunner.sock"))
+            service = _StreamRemoteService.connect(server.address)
+
+            result, _ = await service.call_method(name="Echo", params={"value": 1})
+            assert result == {"value": 1}
+
+            service.socket.close()
+            server.close()
+
+    @pytest.mark.asyncio
+    async def test_model_predict(self, tmp_path):
+        server = StandInStreamServer()
+        service = _StreamRemoteService.connect(server.address)
+        compiled_model_path = tmp_path / "model.mlmodelc"
+        compiled_model_path.mkdir()
+
+        model_service = _RemoteMLModelService(
+            service=service,
+            compiled_model_path=compiled_model_path,
+            compute_units=ct.ComputeUnit.ALL,
+        )
+        await model_service.load()
+
+        inputs = {
+            "x": np.random.rand(1, 10).astype(np.float32),
+            "y": np.random.rand(1, 10).astype(np.float32),
+        }
+        outputs = await model_service.predict(inputs)
+        np.testing.assert_array_equal(outputs["sum"], inputs["x"] + inputs["y"])
+        np.testing.assert_array_equal(outputs["diff"], inputs["x"] - inputs["y"])
+
+        # The inputs were sent inline with the request, and no file was written for them.
+        message, payload = server.requests[-1]
+        assert message["resource"] == "resource.bin"
+        assert len(payload) == inputs["x"].nbytes + inputs["y"].nbytes
+
+        model_service._state = _RemoteMLModelService.State.Unloaded
+        service.socket.close()
+        server.close()
+
+
 class TestModelRunnerApp:
     @staticmethod
     @pytest.mark.skipif(
@@ -20,6 +20,7 @@ import coremltools.optimize as cto
 from coremltools import _SPECIFICATION_VERSION_IOS_18, proto
 from coremltools.converters.mil import mil
 from coremltools.converters.mil.converter import mil_convert as _mil_convert
+from coremltools.converters.mil.frontend.milproto import load as milproto_to_pymil
 from coremltools.converters.mil.mil import Program, types
 from coremltools.converters.mil.mil.builder import Builder as mb
 from coremltools.converters.mil.mil.passes.pass_pipeline import PassPipeline, PassPipelineManager
@@ -31,6 +32,7 @@ from coremltools.converters.mil.testing_utils import (
 )
 from coremltools.models.utils import (
     MultiFunctionDescriptor,
+    _try_get_weights_dir_path,
     bisect_model,
     change_input_output_tensor_type,
     load_spec,
@@ -546,6 +548,164 @@ class TestMultiFunctionDescriptor:
         assert spec.specificationVersion == _SPECIFICATION_VERSION_IOS_18
         shutil.rmtree(package_path)
 
+    @staticmethod
+    def _get_adapter_mlpackage(adapter_seed):
+        """
+        A single function model made of a base weight, the same for all models, followed by an
+        adapter weight which depends on ``adapter_seed``.
+        """
+        base_weight = np.random.RandomState(0).rand(32, 32).astype(np.float16)
+        adapter_weight = np.random.RandomState(adapter_seed).rand(32, 32).astype(np.float16)
+
+        @mb.program(
+            input_specs=[mb.TensorSpec((1, 32), dtype=types.fp16)],
+            opset_version=ct.target.iOS18,
+        )
+        def prog(x):
+            x = mb.linear(x=x, weight=base_weight)
+            return mb.linear(x=x, weight=adapter_weight)
+
+        mlmodel = ct.convert(
+            prog,
+            minimum_deployment_target=ct.target.iOS18,
+            compute_precision=ct.precision.FLOAT16,
+            skip_model_load=True,
+        )
+        package_path = tempfile.mkdtemp(suffix=".mlpackage")
+        mlmodel.save(package_path)
+        return package_path
+
+    @staticmethod
+    def _get_weight_file_size(package_path):
+        return os.path.getsize(os.path.join(_try_get_weights_dir_path(package_path), "weight.bin"))
+
+    def test_append_function_to_multifunction_model(self):
+        """
+        Appending a function to a multifunction model gives the same model as saving all the
+        functions at once, and only writes the weights which are not in the model yet.
+        """
+        models = [self._get_adapter_mlpackage(seed) for seed in (1, 2, 3)]
+        desc = MultiFunctionDescriptor()
+        desc.add_function(models[0], "main", "adapter_1")
+        desc.add_function(models[1], "main", "adapter_2")
+        desc.default_function_name = "adapter_1"
+        package_path = tempfile.mkdtemp(suffix=".mlpackage")
+        save_multifunction(desc, package_path)
+
+        desc.add_function(models[2], "main", "adapter_3")
+        expected_package_path = tempfile.mkdtemp(suffix=".mlpackage")
+        save_multifunction(desc, expected_package_path)
+
+        weight_file_size = self._get_weight_file_size(package_path)
+        desc = MultiFunctionDescriptor()
+        desc.add_function(models[2], "main", "adapter_3")
+        save_multifunction(desc, package_path, append=True)
+
+        # verify the model spec
+        spec = load_spec(package_path)
+        expected_spec = load_spec(expected_package_path)
+        assert spec.description == expected_spec.description
+        assert spec.description.defaultFunctionName == "adapter_1"
+
+        # only the weight of the new adapter is appended
+        adapter_weight_size = self._get_weight_file_size(package_path) - weight_file_size
+        assert 0 < adapter_weight_size < weight_file_size / 2
+        assert self._get_weight_file_size(package_path) == self._get_weight_file_size(
+            expected_package_path
+        )
+
+        # verify the weights of each function
+        prog = milproto_to_pymil.load(
+            spec, spec.specificationVersion, _try_get_weights_dir_path(package_path)
+        )
+        for seed, func_name in zip((1, 2, 3), ("adapter_1", "adapter_2", "adapter_3")):
+            weights = [
+                op.outputs[0].val
+                for op in prog.functions[func_name].find_ops(op_type="const")
+                if op.outputs[0].val.shape == (32, 32)
+            ]
+            np.testing.assert_array_equal(
+                weights[0], np.random.RandomState(0).rand(32, 32).astype(np.float16)
+            )
+            np.testing.assert_array_equal(
+                weights[1], np.random.RandomState(seed).rand(32, 32).astype(np.float16)
+            )
+
+        # appending a function whose weights are all in the model doesn't write any weight
+        weight_file_size = self._get_weight_file_size(package_path)
+        desc = MultiFunctionDescriptor()
+        desc.add_function(models[0], "main", "adapter_1_copy")
+        desc.default_function_name = "adapter_1_copy"
+        save_multifunction(desc, package_path, append=True)
+        assert self._get_weight_file_size(package_path) == weight_file_size
+        assert load_spec(package_path).description.defaultFunctionName == "adapter_1_copy"
+
+        for model in models:
+            shutil.rmtree(model)
+        shutil.rmtree(package_path)
+        shutil.rmtree(expected_package_path)
+
+    def test_append_function_weight_digest_index(self):
+        """
+        The index of the weights of a multifunction model is only stored once functions are
+        appended to it, in the Data directory of the package, and computed again if it is missing.
+        """
+        model = self._get_adapter_mlpackage(1)
+        desc = MultiFunctionDescriptor()
+        desc.add_function(model, "main", "main_1")
+        desc.default_function_name = "main_1"
+        package_path = tempfile.mkdtemp(suffix=".mlpackage")
+        save_multifunction(desc, package_path)
+        index_path = os.path.join(
+            os.path.dirname(_try_get_weights_dir_path(package_path)), "weight_digests.json"
+        )
+        assert sorted(os.listdir(package_path)) == ["Data", "Manifest.json"]
+        assert not os.path.exists(index_path)
+
+        weight_file_size = self._get_weight_file_size(package_path)
+        for func_name in ("main_2", "main_3"):
+            desc = MultiFunctionDescriptor()
+            desc.add_function(model, "main", func_name)
+            save_multifunction(desc, package_path, append=True)
+            assert self._get_weight_file_size(package_path) == weight_file_size
+            assert os.path.exists(index_path)
+            os.remove(index_path)
+        assert [func.name for func in load_spec(package_path).description.functions] == [
+            "main_1",
+            "main_2",
+            "main_3",
+        ]
+
+        shutil.rmtree(model)
+        shutil.rmtree(package_path)
+
+    def test_append_function_invalid_inputs(self):
+        model = self._get_adapter_mlpackage(1)
+        desc = MultiFunctionDescriptor()
+        desc.add_function(model, "main", "main_1")
+        desc.default_function_name = "main_1"
+        package_path = tempfile.mkdtemp(suffix=".mlpackage")
+        save_multifunction(desc, package_path)
+
+        # function name already in the model
+        with pytest.raises(ValueError, match="function main_1 already exists"):
+            save_multifunction(desc, package_path, append=True)
+
+        # default function name not found in the model
+        desc = MultiFunctionDescriptor()
+        desc.add_function(model, "main", "main_2")
+        desc.default_function_name = "invalid"
+        with pytest.raises(ValueError, match="default_function_name invalid not found"):
+            save_multifunction(desc, package_path, append=True)
+
+        # destination is not a multifunction model
+        desc.default_function_name = "main_2"
+        with pytest.raises(ValueError, match="is not a multifunction model"):
+            save_multifunction(desc, model, append=True)
+
+        shutil.rmtree(model)
+        shutil.rmtree(package_path)
+
     @staticmethod
     def _multifunction_model_from_single_function(model_path: str) -> str:
         desc = MultiFunctionDescriptor()
@@ -759,3 +759,68 @@ class TestSpecAndMLModelAPIs:
         # verify that findItemByNameAuthor returns None, when item not found
         model_package_item_info = mlpackage.findItemByNameAuthor(_WEIGHTS_DIR_NAME, "inexistent_author_name")
         assert model_package_item_info is None
+
+    def test_convert_writes_weights_into_package_dir(self):
+        """
+        Test that the weights are serialized directly into the package passed as package_dir,
+        and that saving the model to that same path keeps the package intact.
+        """
+        @mb.program(input_specs=[mb.TensorSpec(shape=(4, 500))])
+        def prog(input):
+            return mb.linear(x=input, weight=np.random.rand(100, 500), name="output")
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            package_path = os.path.join(temp_dir, "model" + utils._MLPACKAGE_EXTENSION)
+            mlmodel = coremltools.convert(
+                prog, convert_to="mlprogram", package_dir=package_path, skip_model_load=True
+            )
+            assert mlmodel.package_path == package_path
+            assert ModelPackage.isValid(package_path)
+            assert mlmodel.weights_dir == os.path.join(
+                package_path, "Data", _MLPACKAGE_AUTHOR_NAME, "weights"
+            )
+            assert os.path.exists(os.path.join(mlmodel.weights_dir, "weight.bin"))
+
+            mlmodel.save(package_path)
+            assert ModelPackage.isValid(package_path)
+            assert os.path.exists(os.path.join(mlmodel.weights_dir, "weight.bin"))
+            assert MLModel(package_path, skip_model_load=True).get_spec() == mlmodel.get_spec()
+
+    def test_convert_removes_package_dir_on_failure(self):
+        @mb.program(input_specs=[mb.TensorSpec(shape=(4, 500))])
+        def prog(input):
+            return mb.linear(x=input, weight=np.random.rand(100, 500), name="output")
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            package_path = os.path.join(temp_dir, "model" + utils._MLPACKAGE_EXTENSION)
+            with pytest.raises(KeyError, match="Pass common::no_such_pass not found"):
+                coremltools.convert(
+                    prog,
+                    convert_to="mlprogram",
+                    package_dir=package_path,
+                    pass_pipeline=ct.PassPipeline(pass_names=["common::no_such_pass"]),
+                    skip_model_load=True,
+                )
+            assert not os.path.exists(package_path)
+
+    def test_save_links_weights(self):
+        """
+        Test that saving a model links its weights rather than copying them, and that the
+        other files of the saved package are not shared with the model's package.
+        """
+        with tempfile.TemporaryDirectory() as temp_dir:
+            save_path = os.path.join(temp_dir, "model" + utils._MLPACKAGE_EXTENSION)
+            self.mlmodel.save(save_path)
+
+            saved_weights_dir = os.path.join(save_path, "Data", _MLPACKAGE_AUTHOR_NAME, "weights")
+            original_weights = os.stat(os.path.join(self.mlmodel.weights_dir, "weight.bin"))
+            saved_weights = os.stat(os.path.join(saved_weights_dir, "weight.bin"))
+            assert os.path.samestat(original_weights, saved_weights)
+
+            for relative_path in (
+                "Manifest.json",
+                os.path.join("Data", _MLPACKAGE_AUTHOR_NAME, "model.mlmodel"),
+            ):
+                original_file = os.stat(os.path.join(self.mlmodel.package_path, relative_path))
+                saved_file = os.stat(os.path.join(save_path, relative_path))
+                assert not os.path.samestat(original_file, saved_file)
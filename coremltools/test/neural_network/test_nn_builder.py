@@ -3,18 +3,20 @@
 # Use of this source code is governed by a BSD-3-clause license that can be
 # found in the LICENSE.txt file or at https://opensource.org/licenses/BSD-3-Clause
 
+import time
+import unittest
+
 import numpy as np
 import pytest
-import unittest
 
 import coremltools
-from coremltools import ComputeUnit
+from coremltools import ComputeUnit, _logger as logger
 from coremltools.converters.mil.mil.types.type_mapping import np_val_to_py_type
 from coremltools.models import MLModel, datatypes
 from coremltools.models.neural_network import NeuralNetworkBuilder
 from coremltools.models.neural_network.quantization_utils import (
     _convert_array_to_nbit_quantized_bytes, quantize_weights)
-from coremltools.models.utils import _is_macos, _macos_version
+from coremltools.models.utils import _fill_float_weights, _is_macos, _macos_version
 
 MIN_MACOS_VERSION_REQUIRED = (10, 13)
 LAYERS_10_14_MACOS_VERSION = (10, 14)
@@ -625,3 +627,79 @@ class UseFloatArraytypeTest(unittest.TestCase):
     def test_false_use_float_array(self):
         # Instruct the builder to use its default Double datatype for inputs and outputs
         self._test_use_float_array_helper(False)
+
+
+class TestFillFloatWeights:
+    @pytest.mark.parametrize(
+        "values",
+        [
+            np.random.rand(100, 50),
+            np.random.rand(7).astype(np.float32),
+            np.random.rand(3, 4, 5).transpose(2, 0, 1),
+            np.arange(6, dtype=np.int32),
+            np.random.rand(1 << 10).astype(np.float16),
+            [1.0, 2.5, -3.0],
+            np.zeros((0, 3)),
+        ],
+    )
+    def test_matches_extend(self, values):
+        expected = coremltools.proto.NeuralNetwork_pb2.WeightParams()
+        expected.floatValue.extend(np.asarray(values).flatten())
+        weights = coremltools.proto.NeuralNetwork_pb2.WeightParams()
+        _fill_float_weights(weights, values)
+        assert weights == expected
+        assert weights.SerializeToString() == expected.SerializeToString()
+
+    def test_appends_to_existing_values(self):
+        weights = coremltools.proto.NeuralNetwork_pb2.WeightParams()
+        weights.floatValue.extend([1.0, 2.0])
+        _fill_float_weights(weights, np.array([3.0, 4.0]))
+        _fill_float_weights(weights, np.array([5.0]))
+        assert list(weights.floatValue) == [1.0, 2.0, 3.0, 4.0, 5.0]
+
+    def test_builder_weights(self):
+        input_features = [("data", datatypes.Array(3))]
+        output_features = [("out", None)]
+        builder = NeuralNetworkBuilder(input_features, output_features)
+        W = np.random.rand(4, 3)
+        b = np.random.rand(4)
+        builder.add_inner_product(
+            name="ip",
+            W=W,
+            b=b,
+            input_channels=3,
+            output_channels=4,
+            has_bias=True,
+            input_name="data",
+            output_name="out",
+        )
+        params = builder.spec.neuralNetwork.layers[0].innerProduct
+        np.testing.assert_array_equal(params.weights.floatValue, W.astype(np.float32).flatten())
+        np.testing.assert_array_equal(params.bias.floatValue, b.astype(np.float32))
+
+    @pytest.mark.slow
+    def test_benchmark_large_inner_product(self):
+        # An inner product layer with 500 MB of float32 weights.
+        input_channels, output_channels = 8192, 16000
+        W = np.random.rand(output_channels, input_channels).astype(np.float32)
+        builder = NeuralNetworkBuilder(
+            [("data", datatypes.Array(input_channels))], [("out", None)]
+        )
+
+        start = time.perf_counter()
+        builder.add_inner_product(
+            name="ip",
+            W=W,
+            b=None,
+            input_channels=input_channels,
+            output_channels=output_channels,
+            has_bias=False,
+            input_name="data",
+            output_name="out",
+        )
+        elapsed = time.perf_counter() - start
+
+        weights = builder.spec.neuralNetwork.layers[0].innerProduct.weights
+        assert len(weights.floatValue) == W.size
+        assert weights.floatValue[-1] == W[-1, -1]
+        logger.info(f"add_inner_product with {W.nbytes / 1e6:.0f} MB of weights: {elapsed:.2f} s")
@@ -639,7 +639,12 @@ class TestKMeansLookup:
         max_deltas = np.abs(w.flatten() - quantized_weight_values.flatten()).max()
         assert max_deltas < 0.1
 
-    def test_kmeans1d_exact_value(self):
+    @pytest.mark.parametrize("use_kmeans1d_package", [True, False])
+    def test_kmeans1d_exact_value(self, use_kmeans1d_package, monkeypatch):
+        if use_kmeans1d_package and not quantization_utils._HAS_KMEANS1D:
+            pytest.skip("The kmeans1d package is not available.")
+        # Without the kmeans1d package, the NumPy 1-D k-means is used.
+        monkeypatch.setattr(quantization_utils, "_HAS_KMEANS1D", use_kmeans1d_package)
         w = np.array(
             [
                 [12.0, 11.0, 12.0, 33.0, 32.0, 99.0, 0.0, 34.0, 40.0],
@@ -364,6 +364,30 @@ class TestCompressionNumerical:
         )
         np.testing.assert_allclose(decompressed_grouped_channelwise, decompressed_blockwise)
 
+    @pytest.mark.parametrize(
+        "nbits, channel_axis, channel_group_size",
+        itertools.product(
+            [2, 4],
+            [0, 1],
+            [1, 4],
+        ),
+    )
+    def test_grouped_channelwise_fp16_kmeans(self, nbits, channel_axis, channel_group_size):
+        """
+        The k-means of large fp16 channel groups is solved exactly in one batched call, so it's at
+        least as accurate as the per-group scikit-learn k-means used for fp32.
+        """
+        original_data = np.random.normal(size=(8, 8, 2500)).astype(np.float16)
+
+        def get_error(data):
+            params = quantization.palettize_weights.grouped_channelwise_compress(
+                data, "KMEANS", nbits, channel_axis, channel_group_size
+            )
+            decompressed = quantization.palettize_weights.decompress(params)
+            return np.sum((decompressed.astype(np.float64) - original_data) ** 2)
+
+        assert get_error(original_data) <= get_error(original_data.astype(np.float32)) * 1.001
+
     @pytest.mark.parametrize(
         "nbits, mode",
         itertools.product(
@@ -2770,6 +2794,117 @@ class TestCompressionOperations(TestCompressionPasses):
         assert prog.find_ops(op_type="constexpr_lut_to_dense")[0].lut.val.shape == (16,)
 
 
+class TestParallelCompression(TestCompressionPasses):
+    @staticmethod
+    def _get_compressed_program(pass_name, op_config, num_workers):
+        np.random.seed(0)
+        prog = TestCompressionPasses._get_test_program()
+        graph_pass = PASS_REGISTRY[pass_name]
+        graph_pass.set_options(
+            [
+                PassOption(
+                    "config",
+                    cto.coreml.OptimizationConfig(global_config=op_config, num_workers=num_workers),
+                )
+            ]
+        )
+        graph_pass.apply(prog)
+        return prog
+
+    @pytest.mark.parametrize(
+        "pass_name, op_config",
+        [
+            (
+                "compression::linear_quantize_weights",
+                cto.coreml.OpLinearQuantizerConfig(mode="linear", weight_threshold=1000),
+            ),
+            (
+                "compression::palettize_weights",
+                cto.coreml.OpPalettizerConfig(mode="kmeans", nbits=4, weight_threshold=1000),
+            ),
+            (
+                "compression::palettize_weights",
+                cto.coreml.OpPalettizerConfig(
+                    mode="custom",
+                    lut_function=lambda w: (
+                        np.linspace(w.min(), w.max(), 4).astype(w.dtype),
+                        np.zeros(w.size, dtype=np.uint8),
+                    ),
+                    weight_threshold=1000,
+                ),
+            ),
+            (
+                "compression::prune_weights",
+                cto.coreml.OpMagnitudePrunerConfig(target_sparsity=0.5, weight_threshold=1000),
+            ),
+        ],
+    )
+    def test_parallel_compression_is_same_as_sequential(self, pass_name, op_config):
+        sequential_prog = self._get_compressed_program(pass_name, op_config, num_workers=1)
+        parallel_prog = self._get_compressed_program(pass_name, op_config, num_workers=2)
+
+        assert get_op_types_in_program(parallel_prog) == get_op_types_in_program(sequential_prog)
+        for sequential_op, parallel_op in zip(
+            sequential_prog.functions["main"].operations,
+            parallel_prog.functions["main"].operations,
+        ):
+            if sequential_op.op_type == "const":
+                np.testing.assert_array_equal(parallel_op.val.val, sequential_op.val.val)
+                assert parallel_op.val.dtype == sequential_op.val.dtype
+
+    class _PickleCounter:
+        """A value which counts how many times it is pickled in the main process."""
+
+        num_pickles = 0
+
+        def __init__(self, value):
+            self.value = value
+
+        def __reduce__(self):
+            TestParallelCompression._PickleCounter.num_pickles += 1
+            return TestParallelCompression._PickleCounter, (self.value,)
+
+    @staticmethod
+    def _scale_weight(weight, factor):
+        return weight * factor.value
+
+    def test_task_pickled_once(self):
+        """The compression function and its arguments are serialized once per task."""
+        self._PickleCounter.num_pickles = 0
+        weights = [np.random.rand(8, 8).astype(np.float32) for _ in range(4)]
+        tasks = [
+            (
+                None,
+                quantization._CompressionTask(
+                    weight, self._scale_weight, {"factor": self._PickleCounter(2.0)}, {}
+                ),
+            )
+            for weight in weights
+        ]
+        with quantization._CompressionScheduler(num_workers=2) as scheduler:
+            results = [result for _, _, result in scheduler.run(tasks)]
+
+        assert self._PickleCounter.num_pickles == len(tasks)
+        for weight, result in zip(weights, results):
+            np.testing.assert_array_equal(result, weight * 2.0)
+
+    @staticmethod
+    def test_invalid_num_workers():
+        with pytest.raises(ValueError, match="num_workers must be a positive integer"):
+            cto.coreml.OptimizationConfig(num_workers=0)
+
+    @staticmethod
+    def test_num_workers_from_dict():
+        config = cto.coreml.OptimizationConfig.from_dict(
+            {
+                "config_type": "OpLinearQuantizerConfig",
+                "global_config": {"mode": "linear"},
+                "num_workers": 4,
+            }
+        )
+        assert config.num_workers == 4
+
+
 class TestInvalidConfig:
     """
     This test is checking error handling for invalid configuration.
@@ -3791,3 +3926,41 @@ class TestGetActivationStats(TestCompressionPasses):
         for i in range(0, output_count):
             output_name = model_spec.description.output[i].name
             assert output_name not in activation_stats
+
+    def test_get_activation_calibration_stats_pymil_backend(self):
+        """
+        The pymil backend computes the stats without Core ML, accumulated over all samples.
+        """
+        sample_data = []
+        for i in range(3):
+            input_data = np.random.rand(5, 10, 4, 4) + i
+            sample_data.append({"data_0": input_data})
+
+        mlmodel = self._get_test_mlmodel_conv_concat()
+        activation_stats = _get_activation_calibration_stats(
+            mlmodel, sample_data, calibration_backend="pymil"
+        )
+
+        all_inputs = np.stack([data["data_0"] for data in sample_data])
+        assert activation_stats["data_0"]["rmin"] == all_inputs.min()
+        assert activation_stats["data_0"]["rmax"] == all_inputs.max()
+        # The input, and the outputs of the cast, the 2 convs and the concat.
+        assert len(activation_stats) >= 5
+        for value in activation_stats.values():
+            assert value["rmin"] <= value["rmax"]
+
+        if ct.utils._is_macos() and ct.utils._macos_version() >= (13, 0):
+            coreml_activation_stats = _get_activation_calibration_stats(
+                mlmodel, sample_data, calibration_backend="coreml"
+            )
+            assert activation_stats.keys() == coreml_activation_stats.keys()
+            for name, value in activation_stats.items():
+                np.testing.assert_allclose(
+                    [value["rmin"], value["rmax"]],
+                    [coreml_activation_stats[name]["rmin"], coreml_activation_stats[name]["rmax"]],
+                    rtol=1e-2,
+                    atol=1e-2,
+                )
+
+        with pytest.raises(ValueError, match="calibration_backend must be one of"):
+            _get_activation_calibration_stats(mlmodel, sample_data, calibration_backend="foo")
@@ -1694,6 +1694,45 @@ class TestPalettizeWeights:
         if _macos_version() >= (15, 0):
             verify_model_outputs(mlmodel, mlmodel_palettized, coreml_input_values)
 
+    @staticmethod
+    def test_palettization_pcs_with_memory_mapped_weights():
+        """
+        The weights of a saved model are loaded as read-only memory maps of the weight file,
+        which the per-channel-scale normalization must not modify in place.
+        """
+        weight = (np.random.rand(32, 64) * np.arange(1, 33)[:, None]).astype(np.float32)
+
+        @mb.program(
+            input_specs=[mb.TensorSpec(shape=(4, 64))], opset_version=ct.target.iOS18
+        )
+        def prog(x):
+            return mb.linear(x=x, weight=weight)
+
+        mlmodel = ct.convert(
+            prog,
+            convert_to="mlprogram",
+            minimum_deployment_target=ct.target.iOS18,
+            compute_precision=ct.precision.FLOAT32,
+            skip_model_load=True,
+        )
+        config = cto.coreml.OptimizationConfig(
+            global_config=cto.coreml.OpPalettizerConfig(
+                mode="uniform",
+                nbits=4,
+                enable_per_channel_scale=True,
+                weight_threshold=500,
+            )
+        )
+        mlmodel_palettized = cto.coreml.palettize_weights(mlmodel, config)
+
+        main_func = mlmodel_palettized._mil_program.functions["main"]
+        assert len(main_func.find_ops(op_type="constexpr_lut_to_dense")) == 1
+        assert len(main_func.find_ops(op_type="constexpr_blockwise_shift_scale")) == 1
+
+        # The source model still holds the original weight.
+        ops_metadata_dict = cto.coreml.get_weights_metadata(mlmodel, weight_threshold=500)
+        np.testing.assert_array_equal(next(iter(ops_metadata_dict.values())).val, weight)
+
 
 class TestPruneWeights:
     @staticmethod
@@ -4,10 +4,13 @@
 # found in the LICENSE.txt file or at https://opensource.org/licenses/BSD-3-Clause
 
 import itertools
+import time
+import tracemalloc
 
 import numpy as np
 import pytest
 
+from coremltools import _logger as logger
 from coremltools.converters.mil.mil import types
 from coremltools.converters.mil.mil.ops.defs.iOS18.compression import constexpr_lut_to_dense
 from coremltools.optimize import _utils as optimize_utils
@@ -179,6 +182,157 @@ class TestFindIndicesForLut:
             == f"uint{nbits}"
         )
 
+    @pytest.mark.parametrize(
+        "nbits, vector_size, lut_shape_prefix",
+        itertools.product(
+            (1, 3, 8),
+            (1, 2),
+            ((1, 1, 1), (4, 1, 2), (8, 3, 4)),
+        ),
+    )
+    def test_chunked_matches_dense_search(self, nbits, vector_size, lut_shape_prefix):
+        """
+        With a tiny memory budget the data is processed in many chunks, and the indices match the
+        dense search over all LUT entries, including the ties from duplicated LUT entries.
+        """
+        data = np.random.normal(size=(8, 6, 4 * vector_size)).astype(np.float16)
+        lut = np.random.normal(size=lut_shape_prefix + (2**nbits, vector_size)).astype(np.float16)
+        lut[..., -1, :] = lut[..., 0, :]
+
+        indices = optimize_utils.find_indices_for_lut(
+            data, lut, vector_axis=-1, max_memory=1024
+        ).astype(np.int64)
+
+        vectors = data.reshape(8, 6, 4, vector_size)
+        repeated_lut = optimize_utils.repeat_data_as(lut, vectors.shape[:-1]).astype(np.float64)
+        distances = np.sum((np.expand_dims(vectors, axis=-2) - repeated_lut) ** 2, axis=-1)
+        np.testing.assert_array_equal(indices, np.argmin(distances, axis=-1))
+
+    @staticmethod
+    def _dense_find_indices_for_lut(data, lut):
+        """
+        The search over the LUT repeated to the full data shape, which find_indices_for_lut did
+        before processing the data in chunks.
+        """
+        if lut.shape[-1] == 1:
+            repeated_lut = optimize_utils.repeat_data_as(lut, data.shape)
+            return np.argmin(
+                np.abs(np.expand_dims(data, axis=-1) - np.squeeze(repeated_lut, axis=-1)), axis=-1
+            )
+        data = optimize_utils.reshape_weight_for_vector_lut(data, lut.shape[-1], data.ndim - 1)
+        repeated_lut = optimize_utils.repeat_data_as(lut, data.shape[:-1])
+        dist = np.linalg.norm(np.expand_dims(data, axis=-2) - repeated_lut, axis=-1)
+        return np.argmin(dist, axis=-1)
+
+    @pytest.mark.slow
+    @pytest.mark.parametrize(
+        "data_shape, vector_size",
+        [((256, 2752), 1), ((64, 2752), 2)],
+    )
+    def test_benchmark_chunked_and_dense_search(self, data_shape, vector_size):
+        """
+        Compare the time and peak memory of find_indices_for_lut, within a max_memory budget, with
+        the dense search. The fp16 data has one 8-bit LUT per row.
+        """
+        max_memory = 1 << 26
+        data = np.random.normal(size=data_shape).astype(np.float16)
+        lut = np.random.normal(size=(data_shape[0], 1, 256, vector_size)).astype(np.float16)
+
+        results = {}
+        for name, find_indices in (
+            ("dense", self._dense_find_indices_for_lut),
+            (
+                "chunked",
+                lambda data, lut: optimize_utils.find_indices_for_lut(
+                    data, lut, vector_axis=-1, max_memory=max_memory
+                ),
+            ),
+        ):
+            tracemalloc.start()
+            start = time.perf_counter()
+            indices = find_indices(data, lut)
+            elapsed = time.perf_counter() - start
+            _, peak_memory = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            results[name] = (indices.astype(np.int64), elapsed, peak_memory)
+
+        # The chunked search computes the distances in float64, so an index may differ from the
+        # fp16 dense search, but only for a LUT entry which is at least as close.
+        vectors = data.reshape(data_shape[0], -1, 1, vector_size).astype(np.float64)
+        distances = np.sum((vectors - lut.astype(np.float64)) ** 2, axis=-1)
+        dense_distances, chunked_distances = (
+            np.take_along_axis(distances, results[name][0][..., None], axis=-1)
+            for name in ("dense", "chunked")
+        )
+        assert np.all(chunked_distances <= dense_distances)
+        assert results["chunked"][2] < 2 * max_memory
+        logger.info(
+            f"find_indices_for_lut on {data_shape} fp16 data, vector size {vector_size}, "
+            + ", ".join(
+                f"{name}: {elapsed:.2f}s, peak {peak_memory / 2**20:.0f} MiB"
+                for name, (_, elapsed, peak_memory) in results.items()
+            )
+        )
+
+
+class TestKMeans1D:
+    @staticmethod
+    def _sum_squared_error(data, lut, indices):
+        return ((data.astype(np.float64) - np.take_along_axis(lut, indices, axis=1)) ** 2).sum()
+
+    def test_basic(self):
+        data = np.array([[1.0, 2.0, 10.0, 11.0, 1.0, 30.0], [5.0, 5.0, 5.0, 5.0, 5.0, 5.0]])
+        lut, indices = optimize_utils.kmeans_1d(data, n_clusters=3)
+        np.testing.assert_allclose(lut, [[4 / 3, 10.5, 30.0], [5.0, 0.0, 0.0]])
+        np.testing.assert_array_equal(indices, [[0, 0, 1, 1, 0, 2], [0, 0, 0, 0, 0, 0]])
+
+    @pytest.mark.parametrize("n_clusters, seed", itertools.product([1, 2, 3, 4], range(10)))
+    def test_optimal(self, n_clusters, seed):
+        """The clustering is compared with all partitions of the sorted distinct values."""
+        data = np.random.default_rng(seed).integers(0, 8, size=(1, 12)).astype(np.float32)
+        lut, indices = optimize_utils.kmeans_1d(data, n_clusters)
+
+        values = np.unique(data)
+        num_clusters = min(n_clusters, len(values))
+        best_error = np.inf
+        for cuts in itertools.combinations(range(1, len(values)), num_clusters - 1):
+            bounds = [0, *cuts, len(values)]
+            error = 0.0
+            for start, end in zip(bounds[:-1], bounds[1:]):
+                cluster = data[(data >= values[start]) & (data <= values[end - 1])]
+                error += ((cluster - cluster.mean()) ** 2).sum()
+            best_error = min(best_error, error)
+        np.testing.assert_allclose(
+            self._sum_squared_error(data, lut, indices), best_error, atol=1e-6
+        )
+        assert np.all(np.diff(lut[0, :num_clusters]) > 0)
+        np.testing.assert_array_equal(lut[0, num_clusters:], 0.0)
+
+    def test_fp16_histogram(self):
+        """The fp16 rows with many elements are histogrammed by bit pattern."""
+        data = np.random.default_rng(0).normal(size=(2, 1 << 16)).astype(np.float16)
+        data[0, :4] = [0.0, -0.0, np.finfo(np.float16).min, np.finfo(np.float16).max]
+        lut, indices = optimize_utils.kmeans_1d(data, n_clusters=16)
+        lut_ref, indices_ref = optimize_utils.kmeans_1d(data.astype(np.float32), n_clusters=16)
+        np.testing.assert_allclose(
+            self._sum_squared_error(data, lut, indices),
+            self._sum_squared_error(data, lut_ref, indices_ref),
+            rtol=1e-9,
+        )
+
+    def test_batched_rows(self, monkeypatch):
+        """The rows are clustered independently, also when split into several batches."""
+        data = np.random.default_rng(0).normal(size=(7, 50)).astype(np.float16)
+        lut, indices = optimize_utils.kmeans_1d(data, n_clusters=4)
+        monkeypatch.setattr(optimize_utils, "_KMEANS_1D_MAX_TABLE_SIZE", 4 * 50 * 2)
+        lut_batched, indices_batched = optimize_utils.kmeans_1d(data, n_clusters=4)
+        for row in range(len(data)):
+            lut_row, indices_row = optimize_utils.kmeans_1d(data[row : row + 1], n_clusters=4)
+            np.testing.assert_array_equal(lut[row], lut_row[0])
+            np.testing.assert_array_equal(indices[row], indices_row[0])
+        np.testing.assert_array_equal(lut, lut_batched)
+        np.testing.assert_array_equal(indices, indices_batched)
+
 
 class TestPackUnpackBits:
     def test_pack_basic(self):
@@ -222,3 +376,95 @@ class TestPackUnpackBits:
             packed_data, nbits, element_num, are_packed_values_signed=is_data_signed
         )
         np.testing.assert_array_equal(restored_data, original_data)
+
+    @pytest.mark.parametrize(
+        "nbits, data_dtype, element_num",
+        itertools.product(list(range(1, 9)), [np.int8, np.uint8], [7, 64, 101, 8000]),
+    )
+    def test_chunked_pack_unpack_matches_bit_array(
+        self, nbits, data_dtype, element_num, monkeypatch
+    ):
+        """
+        Pack and unpack over many chunks into preallocated buffers, and check against the bit
+        array representation of the elements.
+        """
+        is_data_signed = np.issubdtype(data_dtype, np.signedinteger)
+        low, high = 0, 2**nbits
+        if is_data_signed:
+            low, high = -(2 ** (nbits - 1)), 2 ** (nbits - 1)
+        original_data = np.random.randint(low=low, high=high, size=(element_num,)).astype(
+            data_dtype
+        )
+        bitarray = np.unpackbits(
+            original_data.astype(np.uint8).reshape(-1, 1), bitorder="little", axis=-1
+        )[:, :nbits]
+        expected_packed_data = np.packbits(bitarray.flatten(), bitorder="little")
+
+        monkeypatch.setattr(optimize_utils, "_BITS_PACKING_CHUNK_SIZE", 16)
+        packed_data = np.empty(len(expected_packed_data), dtype=np.uint8)
+        result = optimize_utils.pack_elements_into_bits(original_data, nbits, out=packed_data)
+        assert result is packed_data
+        np.testing.assert_array_equal(packed_data, expected_packed_data)
+
+        restored_data = np.empty(element_num, dtype=data_dtype)
+        result = optimize_utils.restore_elements_from_packed_bits(
+            packed_data, nbits, element_num, is_data_signed, out=restored_data
+        )
+        assert result is restored_data
+        np.testing.assert_array_equal(restored_data, original_data)
+
+    def test_invalid_buffers(self):
+        original_data = np.arange(5, dtype=np.uint8)
+        with pytest.raises(ValueError, match="The out buffer should be a np.uint8 array"):
+            optimize_utils.pack_elements_into_bits(
+                original_data, 3, out=np.empty(1, dtype=np.uint8)
+            )
+        with pytest.raises(ValueError, match="are too short to restore"):
+            optimize_utils.restore_elements_from_packed_bits(np.zeros(1, dtype=np.uint8), 3, 5)
+        with pytest.raises(ValueError, match="The out buffer should be a int8 array"):
+            optimize_utils.restore_elements_from_packed_bits(
+                np.zeros(2, dtype=np.uint8), 3, 5, True, out=np.empty(5, dtype=np.uint8)
+            )
+
+    @pytest.mark.slow
+    @pytest.mark.parametrize("nbits", [1, 2, 3, 4, 6, 8])
+    def test_benchmark_pack_unpack(self, nbits):
+        """
+        Compare the shift-and-mask kernels with packing through a bit array, which expands every
+        element to one byte per bit with np.unpackbits before np.packbits.
+        """
+        element_num = 1 << 24
+        original_data = np.random.randint(low=0, high=2**nbits, size=element_num).astype(np.uint8)
+
+        start = time.perf_counter()
+        bitarray = np.unpackbits(original_data.reshape(-1, 1), bitorder="little", axis=-1)
+        expected_packed_data = np.packbits(bitarray[:, :nbits].flatten(), bitorder="little")
+        bitarray_pack_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        bitarray = np.unpackbits(expected_packed_data, bitorder="little")[: element_num * nbits]
+        expected_restored_data = np.packbits(
+            bitarray.reshape(-1, nbits), bitorder="little", axis=-1
+        ).reshape(-1)
+        bitarray_unpack_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        packed_data = optimize_utils.pack_elements_into_bits(original_data, nbits)
+        pack_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        restored_data = optimize_utils.restore_elements_from_packed_bits(
+            packed_data, nbits, element_num
+        )
+        unpack_time = time.perf_counter() - start
+
+        np.testing.assert_array_equal(packed_data, expected_packed_data)
+        np.testing.assert_array_equal(expected_restored_data, original_data)
+        np.testing.assert_array_equal(restored_data, original_data)
+        logger.info(
+            f"{nbits}-bit pack / unpack of {element_num} elements, million elements per second: "
+            f"bit array {element_num / bitarray_pack_time / 1e6:.0f} / "
+            f"{element_num / bitarray_unpack_time / 1e6:.0f}, "
+            f"shift and mask {element_num / pack_time / 1e6:.0f} / "
+            f"{element_num / unpack_time / 1e6:.0f}"
+        )
@@ -20,6 +20,7 @@ from coremltools.optimize.torch.layerwise_compression import (
     LayerwiseCompressor,
     LayerwiseCompressorConfig,
 )
+from coremltools.optimize.torch.layerwise_compression._activation_cache import DiskActivationCache
 from coremltools.optimize.torch.layerwise_compression._quant import Quantizer
 from coremltools.optimize.torch.layerwise_compression.algorithms import (
     GPTQ,
@@ -358,3 +359,55 @@ def test_gptq_static_blocking():
             block = model[0].weight[:, start_idx : start_idx + block_size]
             quantizer.find_params(block, weight=True)
             assert torch.all(quantizer.scale.flatten() == expected_scale[:, block_idx])
+
+
+@pytest.mark.parametrize("algorithm", ["gptq", "sparse_gpt"])
+def test_disk_activation_cache(tmp_path, algorithm):
+    """
+    Test that offloading the activations to disk gives the same compressed model
+    as keeping them in memory, and that the cached activations are deleted afterwards.
+    """
+    torch.manual_seed(0)
+    model = nn.Sequential(nn.Linear(16, 32), nn.ReLU(), nn.Linear(32, 8))
+    samples = [torch.randn(4, 16) for _ in range(10)]
+
+    compressed_models = []
+    for activation_cache_dir in [None, str(tmp_path / "cache")]:
+        compressor_config = LayerwiseCompressorConfig.from_dict(
+            {
+                "global_config": {"algorithm": algorithm, "weight_dtype": "uint4"},
+                "calibration_nsamples": len(samples),
+                "activation_cache_dir": activation_cache_dir,
+                "activation_cache_prefetch_size": 3,
+            }
+        )
+        compressor = LayerwiseCompressor(model, compressor_config)
+        compressed_models.append(compressor.compress(iter(samples), device="cpu"))
+
+    for name, param in compressed_models[0].state_dict().items():
+        assert torch.equal(param, compressed_models[1].state_dict()[name])
+    assert list((tmp_path / "cache").iterdir()) == []
+
+
+def test_disk_activation_cache_items(tmp_path):
+    cache = DiskActivationCache(str(tmp_path), device="cpu", prefetch_size=2)
+    values = [(torch.randn(2, 3), None), torch.randn(4), {"x": torch.randn(1)}]
+    for value in values:
+        cache.append(value)
+    assert len(cache) == 3
+
+    new_value = torch.zeros(3)
+    cache[1] = new_value
+    values[1] = new_value
+    for value, expected in zip(cache, values):
+        if isinstance(expected, tuple):
+            assert torch.equal(value[0], expected[0]) and value[1] is None
+        elif isinstance(expected, dict):
+            assert torch.equal(value["x"], expected["x"])
+        else:
+            assert torch.equal(value, expected)
+
+    with pytest.raises(IndexError):
+        cache[4] = new_value
+    with pytest.raises(IndexError):
+        cache[3]
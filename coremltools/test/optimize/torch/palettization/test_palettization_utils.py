@@ -4,12 +4,17 @@
 #  found in the LICENSE.txt file or at https://opensource.org/licenses/BSD-3-Clause
 
 import copy
+import logging
+import time
 
 import pytest
 import torch
 
+from coremltools.optimize.torch.palettization._efficient_kmeans import _EfficientKMeans
 from coremltools.optimize.torch.palettization._utils import devectorize, vectorize
 
+logger = logging.getLogger(__name__)
+
 
 @pytest.mark.parametrize(
     "cluster_dim_reshape_expected_shape_expected_first_row",
@@ -52,3 +57,83 @@ def test_devectorize_cluster_dim_gt_1(cluster_dim_reshape):
         vectorized_weight_tensor, None, torch.Size(reshape), cluster_dim
     )
     assert torch.equal(pwt_copy, devectorized_partition_weight_tensor)
+
+
+@pytest.mark.parametrize("use_sample_weight", [False, True])
+@pytest.mark.parametrize("chunk_numel", [1, 7 * 16, 1 << 24])
+def test_efficient_kmeans_chunked_assignment(use_sample_weight, chunk_numel):
+    torch.manual_seed(0)
+    params = torch.randn(1000, 2)
+    clusters = torch.randn(16, 2)
+    sample_weight = torch.rand(1000, 1) if use_sample_weight else None
+
+    min_error, labels, v_sum, v_numel = _EfficientKMeans._assign_clusters(
+        params, clusters, sample_weight=sample_weight, accumulate=True, chunk_numel=chunk_numel
+    )
+
+    expected_min_error, expected_labels = _EfficientKMeans.x_c_dist(
+        params, clusters, compute_mode="donot_use_mm_for_euclid_dist"
+    ).min(dim=-1)
+    assert torch.equal(labels, expected_labels)
+    assert torch.allclose(min_error, expected_min_error)
+
+    expected_avg = _EfficientKMeans._get_cluster_avg(
+        16, expected_labels, params, sample_weight=sample_weight
+    )
+    avg = _EfficientKMeans._cluster_avg_from_sums(v_sum, v_numel, params.dtype)
+    assert torch.allclose(avg, expected_avg, atol=1e-5)
+
+
+def test_efficient_kmeans_assignment_without_accumulation():
+    params = torch.randn(100, 1)
+    clusters = torch.randn(4, 1)
+    _, _, v_sum, v_numel = _EfficientKMeans._assign_clusters(params, clusters, chunk_numel=8)
+    assert v_sum is None
+    assert v_numel is None
+
+
+@pytest.mark.parametrize("init", ["kmeans++", "labels"])
+def test_efficient_kmeans_fit(init):
+    torch.manual_seed(0)
+    params = torch.randn(2000, 1)
+    if init == "labels":
+        labels = torch.randint(0, 8, (2000,))
+        kwargs = dict(init=None, labels=labels)
+    else:
+        kwargs = dict(init="kmeans++", n_init=2)
+
+    torch.manual_seed(1)
+    kmeans = _EfficientKMeans(n_clusters=8, max_iter=10, **kwargs).fit(params)
+
+    # Assigning to the fitted centers does not depend on how the rows are chunked.
+    min_error, labels, _, _ = _EfficientKMeans._assign_clusters(
+        params, kmeans.cluster_centers_, chunk_numel=len(params) * 8
+    )
+    chunked_min_error, chunked_labels, _, _ = _EfficientKMeans._assign_clusters(
+        params, kmeans.cluster_centers_, chunk_numel=64
+    )
+    assert kmeans.cluster_centers_.shape == (8, 1)
+    assert torch.equal(labels, chunked_labels)
+    assert torch.allclose(min_error, chunked_min_error)
+
+
+@pytest.mark.slow
+def test_benchmark_efficient_kmeans_large_embedding():
+    # An embedding table with 4M rows of dimension 4, palettized into 256 clusters
+    # of vectors. The full distance matrix would take 4 GiB per k-means iteration.
+    num_rows, dim, n_clusters = 1 << 22, 4, 256
+    params = torch.randn(num_rows, dim)
+    labels = torch.randint(0, n_clusters, (num_rows,))
+
+    start = time.perf_counter()
+    kmeans = _EfficientKMeans(n_clusters=n_clusters, init=None, labels=labels, max_iter=3).fit(
+        params
+    )
+    elapsed = time.perf_counter() - start
+
+    assert kmeans.cluster_centers_.shape == (n_clusters, dim)
+    assert kmeans.labels_.shape == (num_rows,)
+    logger.info(
+        f"_EfficientKMeans: {num_rows} x {dim} rows, {n_clusters} clusters, "
+        f"3 iterations {elapsed:.3f}s"
+    )
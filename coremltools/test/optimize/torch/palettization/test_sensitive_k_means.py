@@ -3,6 +3,8 @@
 #  Use of this source code is governed by a BSD-3-clause license that can be
 #  found in the LICENSE.txt file or at https://opensource.org/licenses/BSD-3-Clause
 
+import copy
+import multiprocessing as mp
 from collections import OrderedDict
 from contextlib import nullcontext
 from typing import Any, Dict
@@ -17,6 +19,7 @@ from coremltools.optimize.torch._utils.fsdp_utils import (
     SizeBasedWrapPolicy,
 )
 from coremltools.optimize.torch._utils.k_means import KMeansConfig
+from coremltools.optimize.torch.palettization._sensitivity_checkpoint import SensitivityCheckpoint
 from coremltools.optimize.torch.palettization.sensitive_k_means import (
     ModuleSKMPalettizerConfig,
     SKMPalettizer,
@@ -357,3 +360,139 @@ def test_compress_cluster_weights_call(
             palettizer._model,
             k_means_config_dict,
         )
+
+
+@pytest.mark.parametrize("checkpoint_interval", [1, 3])
+def test_compute_sensitivity_resumes_from_checkpoint(tmp_path, checkpoint_interval):
+    """
+    Test that an interrupted sensitivity computation resumes from the last checkpoint
+    and produces the same sensitivity as an uninterrupted one.
+    """
+    torch.manual_seed(0)
+    model = torch.nn.Sequential(torch.nn.Linear(4, 8), torch.nn.ReLU(), torch.nn.Linear(8, 2))
+    dataloader = [(torch.randn(3, 4), torch.randn(3, 2)) for _ in range(8)]
+
+    processed_samples = []
+
+    def loss_fn(model, data):
+        inp, target = data
+        processed_samples.append(inp)
+        return torch.nn.functional.mse_loss(model(inp), target)
+
+    expected = SKMPalettizer(
+        copy.deepcopy(model), SKMPalettizerConfig(calibration_nsamples=8)
+    ).compute_sensitivity(dataloader, loss_fn)
+
+    config = SKMPalettizerConfig(
+        calibration_nsamples=8,
+        sensitivity_checkpoint_dir=str(tmp_path),
+        sensitivity_checkpoint_interval=checkpoint_interval,
+    )
+
+    def interrupted_loss_fn(model, data):
+        if len(processed_samples) == 5:
+            raise KeyboardInterrupt
+        return loss_fn(model, data)
+
+    processed_samples.clear()
+    with pytest.raises(KeyboardInterrupt):
+        SKMPalettizer(copy.deepcopy(model), config).compute_sensitivity(
+            dataloader, interrupted_loss_fn
+        )
+
+    processed_samples.clear()
+    sensitivity = SKMPalettizer(copy.deepcopy(model), config).compute_sensitivity(
+        dataloader, loss_fn
+    )
+
+    # Only the samples after the last checkpoint are processed again
+    num_checkpointed = 5 - 5 % checkpoint_interval
+    assert len(processed_samples) == 8 - num_checkpointed
+    assert torch.equal(processed_samples[0], dataloader[num_checkpointed][0])
+
+    assert sensitivity.keys() == expected.keys()
+    for key, val in expected.items():
+        torch.testing.assert_close(sensitivity[key], val)
+
+    # A completed computation is not repeated
+    processed_samples.clear()
+    SKMPalettizer(copy.deepcopy(model), config).compute_sensitivity(dataloader, loss_fn)
+    assert len(processed_samples) == 0
+
+
+def test_compute_sensitivity_ignores_incompatible_checkpoint(tmp_path):
+    def loss_fn(model, data):
+        inp, target = data
+        return torch.nn.functional.mse_loss(model(inp), target)
+
+    dataloader = [(torch.randn(3, 4), torch.randn(3, 2)) for _ in range(4)]
+    config = SKMPalettizerConfig(calibration_nsamples=4, sensitivity_checkpoint_dir=str(tmp_path))
+    SKMPalettizer(torch.nn.Linear(4, 2), config).compute_sensitivity(dataloader, loss_fn)
+
+    dataloader = [(torch.randn(3, 4), torch.randn(3, 3)) for _ in range(4)]
+    sensitivity = SKMPalettizer(torch.nn.Linear(4, 3), config).compute_sensitivity(
+        dataloader, loss_fn
+    )
+    assert sensitivity["weight"].shape == (3, 4)
+
+
+def _load_sensitivity_checkpoint(rank, num_workers, init_file, checkpoint_dir, results):
+    torch.distributed.init_process_group(
+        "gloo", init_method=f"file://{init_file}", rank=rank, world_size=num_workers
+    )
+    try:
+        param = torch.nn.Parameter(torch.zeros(4))
+        checkpoint = SensitivityCheckpoint(checkpoint_dir, rank, num_workers, 8)
+        start = checkpoint.load([("weight", param)])
+        results.put((rank, start, param.grad.tolist()))
+    finally:
+        torch.distributed.destroy_process_group()
+
+
+def test_sensitivity_checkpoint_resumes_from_checkpoint_of_all_workers(tmp_path):
+    """
+    Test that, if only some of the workers wrote the latest checkpoint before being interrupted,
+    all of them resume from the previous checkpoint.
+    """
+    checkpoint_dir = str(tmp_path / "checkpoint")
+    num_workers = 2
+    param = torch.nn.Parameter(torch.zeros(4))
+    checkpoints = [
+        SensitivityCheckpoint(checkpoint_dir, rank, num_workers, 8) for rank in range(num_workers)
+    ]
+    for num_samples_processed in [2, 4]:
+        for rank, checkpoint in enumerate(checkpoints):
+            param.grad = torch.full((4,), 10.0 * rank + num_samples_processed)
+            checkpoint.save([("weight", param)], num_samples_processed)
+
+    # Worker 0 writes the checkpoint after 6 samples, and is interrupted
+    # while waiting for worker 1 to write it as well.
+    param.grad = torch.full((4,), 6.0)
+    with patch.object(checkpoints[0], "_barrier", side_effect=KeyboardInterrupt):
+        with pytest.raises(KeyboardInterrupt):
+            checkpoints[0].save([("weight", param)], 6)
+
+    ctx = mp.get_context("spawn")
+    results = ctx.Queue()
+    processes = [
+        ctx.Process(
+            target=_load_sensitivity_checkpoint,
+            args=(rank, num_workers, str(tmp_path / "init"), checkpoint_dir, results),
+        )
+        for rank in range(num_workers)
+    ]
+    for process in processes:
+        process.start()
+    loaded = dict()
+    for _ in processes:
+        rank, start, grad = results.get(timeout=120)
+        loaded[rank] = (start, grad)
+    for process in processes:
+        process.join(timeout=120)
+        assert process.exitcode == 0
+
+    for rank in range(num_workers):
+        assert loaded[rank] == (4, [10.0 * rank + 4] * 4)
+
+    # The checkpoint after 6 samples is dropped, so that the workers stay consistent
+    assert not (tmp_path / "checkpoint" / "rank_0" / "samples_6").exists()
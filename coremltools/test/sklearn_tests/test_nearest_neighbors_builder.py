@@ -7,6 +7,8 @@ import os
 import shutil
 import unittest
 
+import numpy as np
+
 from coremltools._deps import _HAS_SKLEARN
 from coremltools.models import MLModel
 from coremltools.models.nearest_neighbors import \
@@ -336,6 +338,56 @@ class NearestNeighborsBuilderTest(unittest.TestCase):
         with self.assertRaises(TypeError):
             builder_string_labels.add_samples(some_X, invalid_string_y)
 
+    def test_add_samples_numpy_arrays(self):
+        builder = self.create_builder(default_class_label=12)
+        builder.add_samples(self.training_X[:10], self.training_y[:10])
+        builder.add_samples(self.training_X[10:20].tolist(), self.training_y[10:20].tolist())
+
+        expected_builder = self.create_builder(default_class_label=12)
+        index = expected_builder.spec.kNearestNeighborsClassifier.nearestNeighborsIndex
+        for data_point in self.training_X[:20]:
+            sample = index.floatSamples.add()
+            for feature in data_point:
+                sample.vector.append(feature)
+        expected_builder.spec.kNearestNeighborsClassifier.int64ClassLabels.vector.extend(
+            self.training_y[:20].tolist()
+        )
+        self.assertEqual(builder.spec, expected_builder.spec)
+
+        with self.assertRaises(TypeError):
+            builder.add_samples(np.zeros((3, 5)), [0, 1, 2])
+        with self.assertRaises(TypeError):
+            builder.add_samples([[1.0, 2.0, 3.0, 4.0], [1.0, 2.0]], [0, 1])
+        self._validate_samples(builder.spec, self.training_X[:20], self.training_y[:20])
+
+    def test_add_sample_batches(self):
+        builder = self.create_builder(default_class_label="default")
+        labels = [str(label) for label in self.training_y]
+        builder.add_sample_batches(
+            (self.training_X[start : start + 7], labels[start : start + 7])
+            for start in range(0, len(labels), 7)
+        )
+        self._validate_samples(builder.spec, self.training_X, labels)
+
+    def test_order_samples_for_kd_tree(self):
+        builder = self.create_builder(default_class_label=12)
+        builder.add_samples(self.iris_X, self.iris_y)
+        with self.assertRaises(ValueError):
+            builder.order_samples_for_kd_tree()
+
+        builder.set_index_type("kd_tree", leaf_size=10)
+        order = builder.order_samples_for_kd_tree()
+        self.assertEqual(sorted(order), list(range(len(self.iris_y))))
+        self._validate_samples(builder.spec, self.iris_X[order], self.iris_y[order])
+
+        # The root splits the samples at the median of the dimension of largest spread.
+        split_dimension = np.argmax(np.ptp(self.iris_X, axis=0))
+        middle = len(order) // 2
+        self.assertLessEqual(
+            self.iris_X[order[:middle], split_dimension].max(),
+            self.iris_X[order[middle:], split_dimension].min(),
+        )
+
     @unittest.skipUnless(_is_macos(), "Only supported on MacOS platform.")
     def test_can_init_and_save_model_from_builder_with_updated_spec(self):
         builder = KNearestNeighborsClassifierBuilder(
@@ -0,0 +1,186 @@
+# Copyright (c) 2025, Apple Inc. All rights reserved.
+#
+# Use of this source code is governed by a BSD-3-clause license that can be
+# found in the LICENSE.txt file or at https://opensource.org/licenses/BSD-3-Clause
+
+import unittest
+
+import numpy as np
+
+from coremltools._deps import _HAS_SKLEARN
+from coremltools.models import datatypes
+from coremltools.models.tree_ensemble import TreeEnsembleClassifier, TreeEnsembleRegressor
+
+if _HAS_SKLEARN:
+    from sklearn.ensemble import GradientBoostingClassifier
+    from sklearn.tree import DecisionTreeClassifier
+
+    from coremltools.converters import sklearn as skl_converter
+
+
+def _complete_tree(depth, num_features, num_values, seed=0):
+    """
+    Arrays of a complete binary tree of the given depth, in the layout of a
+    scikit-learn tree.
+    """
+    rng = np.random.RandomState(seed)
+    num_nodes = 2 ** (depth + 1) - 1
+    num_branches = 2 ** depth - 1
+    true_child_ids = np.full(num_nodes, -1)
+    false_child_ids = np.full(num_nodes, -1)
+    true_child_ids[:num_branches] = 2 * np.arange(num_branches) + 1
+    false_child_ids[:num_branches] = 2 * np.arange(num_branches) + 2
+    return {
+        "feature_indices": rng.randint(0, num_features, num_nodes),
+        "feature_values": rng.randn(num_nodes),
+        "true_child_ids": true_child_ids,
+        "false_child_ids": false_child_ids,
+        "leaf_values": rng.randn(num_nodes, num_values),
+        "relative_hit_rates": rng.rand(num_nodes) * 100,
+        "missing_value_tracks_true_child": rng.rand(num_nodes) < 0.5,
+    }
+
+
+class TreeEnsembleBuilderTest(unittest.TestCase):
+    """
+    Unit tests for adding whole trees to the tree ensemble builder.
+    """
+
+    def setUp(self):
+        self.features = [("x", datatypes.Array(20))]
+
+    def _add_nodes(self, builder, tree_id, tree, leaf_value_indices, node_ids=None):
+        if node_ids is None:
+            node_ids = range(len(tree["true_child_ids"]))
+        for position, node_id in enumerate(node_ids):
+            if tree["true_child_ids"][position] < 0:
+                builder.add_leaf_node(
+                    tree_id,
+                    node_id,
+                    dict(zip(leaf_value_indices, tree["leaf_values"][position])),
+                    relative_hit_rate=tree["relative_hit_rates"][position],
+                )
+            else:
+                builder.add_branch_node(
+                    tree_id,
+                    node_id,
+                    tree["feature_indices"][position],
+                    tree["feature_values"][position],
+                    "BranchOnValueLessThan",
+                    tree["true_child_ids"][position],
+                    tree["false_child_ids"][position],
+                    relative_hit_rate=tree["relative_hit_rates"][position],
+                    missing_value_tracks_true_child=bool(
+                        tree["missing_value_tracks_true_child"][position]
+                    ),
+                )
+
+    def test_add_tree_matches_add_nodes(self):
+        expected = TreeEnsembleRegressor(self.features, "y")
+        builder = TreeEnsembleRegressor(self.features, "y")
+        for tree_id, depth in enumerate([0, 1, 5]):
+            tree = _complete_tree(depth, 20, 3, seed=tree_id)
+            # Zero values, which are not serialized, and large ones, which take
+            # multi-byte varints.
+            tree["feature_values"][0] = -0.0
+            tree["leaf_values"][-1, 0] = 0.0
+            self._add_nodes(expected, 1000 + tree_id, tree, [0, 2, 300])
+            builder.add_tree(
+                1000 + tree_id,
+                branch_mode="BranchOnValueLessThan",
+                leaf_value_indices=[0, 2, 300],
+                **tree,
+            )
+        self.assertEqual(builder.spec, expected.spec)
+        self.assertEqual(builder.spec.SerializeToString(), expected.spec.SerializeToString())
+
+    def test_add_tree_defaults(self):
+        tree = _complete_tree(3, 20, 1)
+        expected = TreeEnsembleClassifier(self.features, [0, 1], "label")
+        for node_id, true_child_id in enumerate(tree["true_child_ids"]):
+            if true_child_id < 0:
+                expected.add_leaf_node(0, node_id, tree["leaf_values"][node_id, 0])
+            else:
+                expected.add_branch_node(
+                    0,
+                    node_id,
+                    tree["feature_indices"][node_id],
+                    tree["feature_values"][node_id],
+                    "BranchOnValueLessThanEqual",
+                    true_child_id,
+                    tree["false_child_ids"][node_id],
+                )
+
+        builder = TreeEnsembleClassifier(self.features, [0, 1], "label")
+        builder.add_tree(
+            0,
+            tree["feature_indices"],
+            tree["feature_values"],
+            tree["true_child_ids"],
+            tree["false_child_ids"],
+            tree["leaf_values"][:, 0],
+        )
+        self.assertEqual(builder.spec, expected.spec)
+
+    def test_add_tree_node_ids(self):
+        tree = _complete_tree(2, 20, 1)
+        node_ids = np.arange(len(tree["true_child_ids"])) * 2
+        branches = tree["true_child_ids"] >= 0
+        tree["true_child_ids"][branches] *= 2
+        tree["false_child_ids"][branches] *= 2
+
+        expected = TreeEnsembleRegressor(self.features, "y")
+        self._add_nodes(expected, 0, tree, [0], node_ids=node_ids)
+        builder = TreeEnsembleRegressor(self.features, "y")
+        builder.add_tree(0, branch_mode="BranchOnValueLessThan", node_ids=node_ids, **tree)
+        self.assertEqual(builder.spec, expected.spec)
+
+    def test_add_tree_bad_inputs(self):
+        tree = _complete_tree(2, 20, 2)
+        builder = TreeEnsembleRegressor(self.features, "y")
+        with self.assertRaises(ValueError):
+            builder.add_tree(0, **dict(tree, feature_values=tree["feature_values"][1:]))
+        with self.assertRaises(ValueError):
+            builder.add_tree(0, **dict(tree, leaf_values=tree["leaf_values"][1:]))
+        with self.assertRaises(ValueError):
+            builder.add_tree(0, leaf_value_indices=[0], **tree)
+        with self.assertRaises(ValueError):
+            builder.add_tree(0, branch_mode="BranchOnValueLessThanOrEqual", **tree)
+        with self.assertRaises(ValueError):
+            false_child_ids = tree["false_child_ids"].copy()
+            false_child_ids[0] = -1
+            builder.add_tree(0, **dict(tree, false_child_ids=false_child_ids))
+        self.assertEqual(len(builder.tree_parameters.nodes), 0)
+
+    @unittest.skipIf(not _HAS_SKLEARN, "Missing sklearn. Skipping tests.")
+    def test_sklearn_leaf_values(self):
+        rng = np.random.RandomState(0)
+        X = rng.rand(200, 4)
+        y = np.digitize(X.sum(axis=1), [1.5, 2.5])
+
+        scikit_model = DecisionTreeClassifier(max_depth=4, random_state=0).fit(X, y)
+        spec = skl_converter.convert(scikit_model).get_spec()
+        nodes = spec.treeEnsembleClassifier.treeEnsemble.nodes
+        scikit_tree = scikit_model.tree_
+        self.assertEqual(len(nodes), scikit_tree.node_count)
+        for node in nodes:
+            if scikit_tree.children_left[node.nodeId] >= 0:
+                self.assertEqual(node.branchFeatureIndex, scikit_tree.feature[node.nodeId])
+                self.assertEqual(node.branchFeatureValue, scikit_tree.threshold[node.nodeId])
+                continue
+            counts = scikit_tree.value[node.nodeId, 0]
+            np.testing.assert_allclose(
+                [info.evaluationValue for info in node.evaluationInfo], counts / counts.sum()
+            )
+            self.assertEqual([info.evaluationIndex for info in node.evaluationInfo], [0, 1, 2])
+
+        # Each tree of a multiclass boosted model adds to the prediction of one class.
+        scikit_model = GradientBoostingClassifier(
+            n_estimators=2, max_depth=2, random_state=0
+        ).fit(X, y)
+        spec = skl_converter.convert(scikit_model).get_spec()
+        nodes = spec.treeEnsembleClassifier.treeEnsemble.nodes
+        for node in nodes:
+            if node.nodeBehavior == node.LeafNode:
+                self.assertEqual(len(node.evaluationInfo), 1)
+                self.assertEqual(node.evaluationInfo[0].evaluationIndex, node.treeId % 3)
@@ -387,3 +387,71 @@ class GradientBoostingMulticlassClassifierXGboostTest(unittest.TestCase):
             # Test the linear regression parameters.
             tr = spec.treeEnsembleClassifier.treeEnsemble
             self.assertIsNotNone(tr)
+
+
+@unittest.skipIf(not _HAS_XGBOOST, "Skipping, no xgboost")
+class GradientBoostingClassifierXGboostTreeArraysTest(unittest.TestCase):
+    """
+    Unit test class for converting an xgboost Booster from its JSON model, compared
+    with converting its text dump.
+    """
+
+    @staticmethod
+    def _sorted_nodes(spec):
+        nodes = spec.treeEnsembleClassifier.treeEnsemble.nodes
+        return sorted(nodes, key=lambda node: (node.treeId, node.nodeId))
+
+    def _check_same_trees(self, booster, n_classes):
+        feature_names = ["f%d" % i for i in range(4)]
+        spec = xgb_converter.convert(
+            booster,
+            feature_names,
+            "target",
+            mode="classifier",
+            n_classes=n_classes,
+            force_32bit_float=True,
+        ).get_spec()
+
+        xgb_model_json = tempfile.NamedTemporaryFile(suffix=".json").name
+        with open(xgb_model_json, "w") as f:
+            json.dump(booster.get_dump(with_stats=True, dump_format="json"), f)
+        expected_spec = xgb_converter.convert(
+            xgb_model_json,
+            feature_names,
+            "target",
+            mode="classifier",
+            n_classes=n_classes,
+            force_32bit_float=True,
+        ).get_spec()
+
+        nodes = self._sorted_nodes(spec)
+        expected_nodes = self._sorted_nodes(expected_spec)
+        self.assertEqual(len(nodes), len(expected_nodes))
+        for node, expected in zip(nodes, expected_nodes):
+            # Covers are printed with fewer digits in the dump.
+            np.testing.assert_allclose(node.relativeHitRate, expected.relativeHitRate, rtol=1e-5)
+            node.relativeHitRate = expected.relativeHitRate
+            self.assertEqual(node, expected)
+
+    def test_binary_classifier(self):
+        rng = np.random.RandomState(0)
+        X = rng.rand(300, 4)
+        X[rng.rand(*X.shape) < 0.1] = np.nan
+        y = (np.nansum(X, axis=1) > 1.5).astype(int)
+        booster = xgboost.train(
+            {"objective": "binary:logistic", "max_depth": 4},
+            xgboost.DMatrix(X, label=y),
+            num_boost_round=5,
+        )
+        self._check_same_trees(booster, 2)
+
+    def test_multiclass_classifier(self):
+        rng = np.random.RandomState(0)
+        X = rng.rand(300, 4)
+        y = np.digitize(X.sum(axis=1), [1.5, 2.5])
+        booster = xgboost.train(
+            {"objective": "multi:softprob", "num_class": 3, "max_depth": 3},
+            xgboost.DMatrix(X, label=y),
+            num_boost_round=3,
+        )
+        self._check_same_trees(booster, 3)